@@ -0,0 +1,526 @@
+"""
+    Consultas de baixa latência sobre as tabelas Gold por município.
+
+    Cada `_gold_municipio.parquet` é baixado uma única vez, convertido para um arquivo IPC
+    do Arrow (sem compressão) ordenado por ano, município, cargo e turno, e aberto com
+    `memory_map`: as colunas ficam no cache de páginas do sistema operacional e as
+    consultas leem só as linhas do recorte pedido. Um índice (ano, município, cargo,
+    turno) -> faixa de linhas localiza o recorte sem varrer a tabela; dentro da faixa, os
+    votos nominais vêm primeiro, do mais votado para o menos votado, de modo que o top-N
+    é um fatiamento.
+
+    Os resultados ficam num cache LRU limitado. Quando o md5 de um arquivo Gold muda no
+    armazenamento (`revalidar`), a tabela é recarregada e os resultados que vieram dela
+    são descartados.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from app.storage.armazenamento import Armazenamento
+from app.storage.manifesto_pasta import ArquivoManifesto, ManifestoPasta
+from app.utils.instrumentacao import RASTREADOR
+from app.utils.vars_envs import Settings_Env
+
+LOGGER = logging.getLogger(__name__)
+
+SUFIXO_GOLD_MUNICIPIO = "_gold_municipio.parquet"
+CHAVES_INDICE = ['ANO_ELEICAO', 'CD_MUNICIPIO', 'DS_CARGO', 'NR_TURNO']
+COLUNAS_RESULTADO = ['NM_VOTAVEL', 'TP_VOTO', 'QT_VOTOS', 'PERC_VOTOS_VALIDOS']
+
+
+def normalizar(texto: str) -> str:
+    """Forma de comparação de nomes: sem acentos, maiúsculas e espaços simples ('São  Paulo ' -> 'SAO PAULO')."""
+    sem_acentos = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sem_acentos.upper().split())
+
+
+@dataclass(frozen=True)
+class FaixaIndice:
+    """Linhas de um recorte (ano, município, cargo, turno) na tabela: [inicio, fim_nominal) são os votos nominais."""
+    tabela: "TabelaGold"
+    inicio: int
+    fim_nominal: int
+    fim: int
+
+
+class TabelaGold:
+    """
+        Tabela Gold de um arquivo, mapeada em memória a partir do IPC local, com o índice
+        (ano, município, cargo, turno) -> `FaixaIndice`.
+    """
+
+    def __init__(self, arquivo: ArquivoManifesto, caminho_ipc: str):
+        """
+            Attributes:
+                arquivo (ArquivoManifesto): Arquivo Gold de origem (nome e md5 carregados).
+                caminho_ipc (str): Arquivo IPC local com a tabela ordenada.
+                tabela (pa.Table): Colunas mapeadas do IPC (sem cópia).
+                indice (dict[tuple, FaixaIndice]): (ano, CD_MUNICIPIO, DS_CARGO, NR_TURNO) -> faixa de linhas.
+                municipios (dict[str, set[int]]): Nome normalizado -> CDs (nomes se repetem entre UFs).
+                cargos (dict[str, str]): Cargo normalizado -> DS_CARGO.
+                nomes_municipios (dict[int, tuple[str, str]]): CD_MUNICIPIO -> (NM_MUNICIPIO, SG_UF).
+        """
+        self.arquivo = arquivo
+        self.caminho_ipc = caminho_ipc
+        with pa.memory_map(caminho_ipc, "r") as fonte:
+            self.tabela = pa.ipc.open_file(fonte).read_all()
+        self.indice: dict[tuple, FaixaIndice] = {}
+        self.municipios: dict[str, set[int]] = {}
+        self.cargos: dict[str, str] = {}
+        self.nomes_municipios: dict[int, tuple[str, str]] = {}
+        self._indexar()
+
+
+    def _indexar(self) -> None:
+        """Percorre as fronteiras entre recortes (a tabela já está ordenada pelas chaves do índice)."""
+        linhas = self.tabela.num_rows
+        if linhas == 0:
+            return
+
+        chaves = [self.tabela.column(coluna).to_numpy() for coluna in CHAVES_INDICE]
+        nominal = pc.equal(self.tabela.column('TP_VOTO'), "NOMINAL").to_numpy(zero_copy_only=False)
+
+        mudou = np.zeros(linhas, dtype=bool)
+        mudou[0] = True
+        for valores in chaves:
+            mudou[1:] |= valores[1:] != valores[:-1]
+        inicios = np.flatnonzero(mudou)
+        fins = np.append(inicios[1:], linhas)
+
+        # Dentro de cada recorte os nominais vêm antes: a contagem deles marca o fim da parte nominal.
+        nominais_acumulados = np.concatenate([[0], np.cumsum(nominal)])
+        nomes = self.tabela.column('NM_MUNICIPIO').to_numpy(zero_copy_only=False)
+        ufs = self.tabela.column('SG_UF').to_numpy(zero_copy_only=False)
+
+        for inicio, fim in zip(inicios.tolist(), fins.tolist()):
+            ano, cd_municipio, cargo, turno = (int(chaves[0][inicio]), int(chaves[1][inicio]),
+                                              str(chaves[2][inicio]), int(chaves[3][inicio]))
+            fim_nominal = inicio + int(nominais_acumulados[fim] - nominais_acumulados[inicio])
+            self.indice[(ano, cd_municipio, cargo, turno)] = FaixaIndice(self, inicio, fim_nominal, fim)
+            self.municipios.setdefault(normalizar(nomes[inicio]), set()).add(cd_municipio)
+            self.nomes_municipios.setdefault(cd_municipio, (str(nomes[inicio]), str(ufs[inicio])))
+            self.cargos.setdefault(normalizar(cargo), cargo)
+
+
+    def linhas(self, inicio: int, fim: int) -> list[dict]:
+        """Colunas de resultado das linhas [inicio, fim)."""
+        return self.tabela.slice(inicio, fim - inicio).select(COLUNAS_RESULTADO).to_pylist()
+
+
+def preparar_ipc(caminho_parquet: str, caminho_ipc: str) -> None:
+    """
+        Converte o Parquet Gold para o IPC usado nas consultas: dicionários decodificados,
+        linhas ordenadas pelas chaves do índice e, dentro de cada recorte, nominais primeiro
+        por votos decrescentes. Sem compressão, para poder ser mapeado em memória.
+    """
+    tabela = pq.read_table(caminho_parquet)
+    colunas = [
+        coluna.cast(coluna.type.value_type) if pa.types.is_dictionary(coluna.type) else coluna
+        for coluna in tabela.columns
+    ]
+    tabela = pa.Table.from_arrays(colunas, names=tabela.column_names)
+    tabela = tabela.append_column('_NAO_NOMINAL', pc.not_equal(tabela.column('TP_VOTO'), "NOMINAL"))
+    tabela = tabela.sort_by(
+        [(coluna, "ascending") for coluna in CHAVES_INDICE]
+        + [('_NAO_NOMINAL', "ascending"), ('QT_VOTOS', "descending"), ('NM_VOTAVEL', "ascending")]
+    ).drop_columns(['_NAO_NOMINAL']).replace_schema_metadata(None)
+
+    pasta = os.path.dirname(caminho_ipc) or "."
+    descritor, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    try:
+        with os.fdopen(descritor, "wb") as destino, pa.ipc.new_file(destino, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        os.replace(temporario, caminho_ipc)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+@dataclass
+class EstatisticasConsultas:
+    """Contadores do cache de resultados neste processo."""
+    acertos: int = 0
+    faltas: int = 0
+    remocoes: int = 0       # entradas descartadas pelo LRU
+    invalidacoes: int = 0   # entradas descartadas porque o arquivo Gold mudou
+
+
+class CacheResultados:
+    """
+        Cache LRU de resultados de consultas, limitado em número de entradas.
+
+        Cada entrada guarda os arquivos Gold (nome, md5) de onde o resultado veio, para ser
+        descartada quando um deles for recarregado. Um resultado calculado sobre uma tabela
+        que foi trocada durante o cálculo não chega a entrar no cache.
+    """
+
+    def __init__(self, capacidade: int):
+        self.capacidade = capacidade
+        self._entradas: OrderedDict[tuple, tuple[frozenset, object]] = OrderedDict()
+        self._estatisticas = EstatisticasConsultas()
+        self._trava = threading.Lock()
+
+
+    def obter(self, chave: tuple, calcular: Callable[[], tuple[frozenset, object]],
+              vigente: Callable[[frozenset], bool] = lambda origens: True):
+        """
+            Resultado em cache para a chave, ou o de `calcular()`, que devolve (origens, resultado);
+            as origens são pares (nome, versão) e `vigente(origens)` diz se ainda são as carregadas.
+        """
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+                self._estatisticas.acertos += 1
+                return entrada[1]
+            self._estatisticas.faltas += 1
+
+        origens, resultado = calcular()
+        if self.capacidade <= 0:
+            return resultado
+
+        with self._trava:
+            if not vigente(origens):
+                return resultado
+            self._entradas[chave] = (origens, resultado)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+                self._estatisticas.remocoes += 1
+        return resultado
+
+
+    def invalidar(self, nome_arquivo: str) -> None:
+        """Descarta os resultados calculados a partir do arquivo."""
+        with self._trava:
+            for chave in [chave for chave, (origens, _) in self._entradas.items()
+                          if any(nome == nome_arquivo for nome, _ in origens)]:
+                del self._entradas[chave]
+                self._estatisticas.invalidacoes += 1
+
+
+    def estatisticas(self) -> dict:
+        with self._trava:
+            dados = asdict(self._estatisticas)
+            dados["entradas"] = len(self._entradas)
+        consultas = dados["acertos"] + dados["faltas"]
+        dados["taxa_acerto"] = round(dados["acertos"] / consultas, 4) if consultas else 0.0
+        return dados
+
+
+class ServicoConsultaGold:
+    """
+        Responde, a partir das tabelas Gold por município, às consultas dos painéis:
+
+        - `top_candidatos`: os N mais votados de um cargo num município;
+        - `participacao`: votos, percentuais e posição de um candidato num município;
+        - `comparar`: os mesmos candidatos lado a lado em vários municípios.
+
+        Municípios podem ser informados pelo código do TSE ou pelo nome, e nomes de
+        município, cargo e candidato são comparados sem acentos nem caixa. Sem `ano`,
+        vale a eleição mais recente carregada para o município e o cargo.
+    """
+
+    def __init__(self, armazenamento: Armazenamento, id_pasta_gold: str | None = None,
+                 diretorio_cache: str | None = None, capacidade_cache: int | None = None):
+        """
+            Attributes:
+                armazenamento (Armazenamento): Backend do Data Lake (Drive ou local).
+                id_pasta_gold (str): Pasta com as tabelas Gold.
+                diretorio_cache (str): Onde ficam os IPCs locais (nome do arquivo + md5).
+                cache (CacheResultados): Resultados recentes (`TAMANHO_CACHE_CONSULTAS` entradas).
+        """
+        self.armazenamento = armazenamento
+        self.id_pasta_gold = id_pasta_gold or Settings_Env.ID_PASTA_GOLD
+        self.diretorio_cache = diretorio_cache or Settings_Env.DIRETORIO_CACHE_CONSULTA
+        self.cache = CacheResultados(Settings_Env.TAMANHO_CACHE_CONSULTAS if capacidade_cache is None else capacidade_cache)
+        self._tabelas: dict[str, TabelaGold] = {}
+        self._indice: dict[tuple, FaixaIndice] = {}
+        self._municipios: dict[str, set[int]] = {}
+        self._cargos: dict[str, str] = {}
+        self._nomes_municipios: dict[int, tuple[str, str]] = {}
+        self._anos_por_recorte: dict[tuple, int] = {} # (município, cargo, turno) -> eleição mais recente
+        self._trava_carga = threading.Lock()
+        os.makedirs(self.diretorio_cache, exist_ok=True)
+        RASTREADOR.registrar_fonte("consulta.cache", self.cache.estatisticas)
+
+
+    # ------------------------------------------------------------------ carga
+
+    def revalidar(self) -> list[str]:
+        """
+            Lista a pasta Gold e (re)carrega as tabelas novas ou cujo md5 mudou; tabelas que
+            sumiram da pasta deixam de ser consultadas.
+
+            Returns:
+                list[str]: Arquivos carregados ou descartados nesta chamada.
+        """
+        with self._trava_carga:
+            manifesto = ManifestoPasta(self.armazenamento, self.id_pasta_gold)
+            atuais = {arquivo.nome: arquivo for arquivo in manifesto if arquivo.nome.endswith(SUFIXO_GOLD_MUNICIPIO)}
+
+            tabelas = dict(self._tabelas)
+            alterados = [nome for nome in tabelas if nome not in atuais]
+            for nome in alterados:
+                del tabelas[nome]
+
+            for nome, arquivo in atuais.items():
+                carregada = tabelas.get(nome)
+                if carregada is not None and _versao(carregada.arquivo) == _versao(arquivo):
+                    continue
+                tabelas[nome] = self._carregar(arquivo)
+                alterados.append(nome)
+
+            if alterados:
+                self._publicar(tabelas)
+                for nome in alterados:
+                    self.cache.invalidar(nome)
+                LOGGER.info(f"Consultas Gold: {len(alterados)} tabela(s) atualizada(s), {len(tabelas)} carregada(s)")
+            return alterados
+
+
+    def _carregar(self, arquivo: ArquivoManifesto) -> TabelaGold:
+        """Baixa o Parquet (se o IPC daquele md5 ainda não existir localmente) e abre a tabela mapeada."""
+        versao = "".join(c for c in _versao(arquivo) if c.isalnum())
+        caminho_ipc = os.path.join(self.diretorio_cache, f"{arquivo.nome.removesuffix('.parquet')}.{versao}.arrow")
+
+        with RASTREADOR.span("consulta.carregar", arquivo=arquivo.nome, bytes=arquivo.tamanho or 0):
+            if not os.path.exists(caminho_ipc):
+                with tempfile.TemporaryDirectory(dir=self.diretorio_cache, prefix="gold_") as pasta_temp:
+                    caminho_parquet = self.armazenamento.download_para_arquivo(
+                        arquivo.id, os.path.join(pasta_temp, arquivo.nome), arquivo.md5)
+                    preparar_ipc(caminho_parquet, caminho_ipc)
+                self._remover_versoes_antigas(arquivo.nome, caminho_ipc)
+            return TabelaGold(arquivo, caminho_ipc)
+
+
+    def _remover_versoes_antigas(self, nome: str, caminho_atual: str) -> None:
+        """Apaga os IPCs de md5 anteriores do mesmo arquivo (mapeamentos já abertos continuam válidos)."""
+        prefixo = f"{nome.removesuffix('.parquet')}."
+        for entrada in os.scandir(self.diretorio_cache):
+            if entrada.name.startswith(prefixo) and entrada.name.endswith(".arrow") and entrada.path != caminho_atual:
+                os.unlink(entrada.path)
+
+
+    def _publicar(self, tabelas: dict[str, TabelaGold]) -> None:
+        """Troca os índices consultados de uma vez: uma consulta em andamento continua com os anteriores."""
+        indice, municipios, cargos, nomes_municipios = {}, {}, {}, {}
+        for tabela in tabelas.values():
+            indice.update(tabela.indice)
+            for nome, codigos in tabela.municipios.items():
+                municipios.setdefault(nome, set()).update(codigos)
+            cargos.update(tabela.cargos)
+            nomes_municipios.update(tabela.nomes_municipios)
+
+        anos: dict[tuple, list[int]] = {}
+        for ano, cd_municipio, cargo, turno in indice:
+            anos.setdefault((cd_municipio, cargo, turno), []).append(ano)
+
+        self._tabelas = tabelas
+        self._indice, self._municipios, self._cargos, self._nomes_municipios = indice, municipios, cargos, nomes_municipios
+        self._anos_por_recorte = {recorte: max(lista) for recorte, lista in anos.items()}
+
+
+    def iniciar_revalidacao_periodica(self, intervalo_segundos: float | None = None) -> threading.Event:
+        """
+            Revalida a pasta Gold em segundo plano a cada `REVALIDACAO_GOLD_SEGUNDOS`: as
+            consultas nunca esperam pela listagem. Devolve o evento que encerra a thread.
+        """
+        intervalo = Settings_Env.REVALIDACAO_GOLD_SEGUNDOS if intervalo_segundos is None else intervalo_segundos
+        parar = threading.Event()
+
+        def revalidar_sempre():
+            while not parar.wait(intervalo):
+                try:
+                    self.revalidar()
+                except Exception as erro:
+                    LOGGER.warning(f"Falha ao revalidar a pasta Gold (mantidas as tabelas atuais): {erro}")
+
+        threading.Thread(target=revalidar_sempre, name="revalidacao_gold", daemon=True).start()
+        return parar
+
+
+    def situacao(self) -> dict:
+        """Tabelas carregadas (nome, md5, linhas, recortes indexados) e estatísticas do cache."""
+        return {
+            "tabelas": [
+                {"arquivo": nome, "md5": tabela.arquivo.md5, "linhas": tabela.tabela.num_rows, "recortes": len(tabela.indice)}
+                for nome, tabela in sorted(self._tabelas.items())
+            ],
+            "cache": self.cache.estatisticas(),
+        }
+
+
+    # ------------------------------------------------------------------ consultas
+
+    def top_candidatos(self, municipio: str | int, cargo: str, turno: int = 1, n: int = 10,
+                       ano: int | None = None, uf: str | None = None) -> dict:
+        """Os `n` candidatos mais votados do cargo no município, com votos e % dos votos válidos."""
+        if n <= 0:
+            raise ValueError("n deve ser positivo")
+
+        def calcular():
+            faixa, recorte = self._localizar(municipio, cargo, turno, ano, uf)
+            candidatos = [
+                {"posicao": posicao, **_candidato(linha)}
+                for posicao, linha in enumerate(faixa.tabela.linhas(faixa.inicio, min(faixa.inicio + n, faixa.fim_nominal)), 1)
+            ]
+            return frozenset([_origem(faixa)]), {**recorte, "candidatos": candidatos}
+
+        chave = ("top", _chave(municipio), _chave(cargo), int(turno), n, ano, _chave(uf))
+        return self.cache.obter(chave, calcular, self._vigente)
+
+
+    def participacao(self, municipio: str | int, cargo: str, candidato: str, turno: int = 1,
+                     ano: int | None = None, uf: str | None = None) -> dict:
+        """Votos, % dos válidos, % do total (com brancos e nulos) e posição do candidato no município."""
+
+        def calcular():
+            faixa, recorte = self._localizar(municipio, cargo, turno, ano, uf)
+            linhas = faixa.tabela.linhas(faixa.inicio, faixa.fim)
+            nominais = linhas[:faixa.fim_nominal - faixa.inicio]
+            procurado = normalizar(candidato)
+            posicao = next((i for i, linha in enumerate(nominais, 1) if normalizar(linha['NM_VOTAVEL']) == procurado), None)
+            if posicao is None:
+                raise KeyError(f"Candidato '{candidato}' não encontrado para {recorte['cargo']} em {recorte['municipio']}")
+
+            votos_validos = sum(linha['QT_VOTOS'] for linha in nominais)
+            votos_totais = sum(linha['QT_VOTOS'] for linha in linhas)
+            linha = nominais[posicao - 1]
+            resultado = {
+                **recorte,
+                **_candidato(linha),
+                "posicao": posicao,
+                "total_candidatos": len(nominais),
+                "perc_votos_totais": round(100 * linha['QT_VOTOS'] / votos_totais, 4) if votos_totais else 0.0,
+                "votos_validos": votos_validos,
+                "votos_totais": votos_totais,
+            }
+            return frozenset([_origem(faixa)]), resultado
+
+        chave = ("participacao", _chave(municipio), _chave(cargo), _chave(candidato), int(turno), ano, _chave(uf))
+        return self.cache.obter(chave, calcular, self._vigente)
+
+
+    def comparar(self, municipios: list[str | int], cargo: str, candidatos: list[str],
+                 turno: int = 1, ano: int | None = None, uf: str | None = None) -> dict:
+        """Votos e % dos válidos de cada candidato em cada município (None onde o candidato não teve linha)."""
+        if not municipios or not candidatos:
+            raise ValueError("Informe ao menos um município e um candidato")
+
+        def calcular():
+            procurados = {normalizar(nome): nome for nome in candidatos}
+            origens, comparacao = set(), []
+            for municipio in municipios:
+                faixa, recorte = self._localizar(municipio, cargo, turno, ano, uf)
+                origens.add(_origem(faixa))
+                encontrados = {
+                    procurados[normalizar(linha['NM_VOTAVEL'])]: _candidato(linha)
+                    for linha in faixa.tabela.linhas(faixa.inicio, faixa.fim_nominal)
+                    if normalizar(linha['NM_VOTAVEL']) in procurados
+                }
+                comparacao.append({**recorte, "candidatos": {nome: encontrados.get(nome) for nome in candidatos}})
+            return frozenset(origens), {"cargo": comparacao[0]["cargo"], "turno": int(turno), "municipios": comparacao}
+
+        chave = ("comparar", tuple(map(_chave, municipios)), _chave(cargo), tuple(map(_chave, candidatos)),
+                 int(turno), ano, _chave(uf))
+        return self.cache.obter(chave, calcular, self._vigente)
+
+
+    def _vigente(self, origens: frozenset) -> bool:
+        """Indica se as tabelas (nome, versão) usadas num resultado ainda são as carregadas."""
+        tabelas = self._tabelas
+        return all(nome in tabelas and _versao(tabelas[nome].arquivo) == versao for nome, versao in origens)
+
+
+    def _localizar(self, municipio: str | int, cargo: str, turno: int, ano: int | None,
+                   uf: str | None) -> tuple[FaixaIndice, dict]:
+        """
+            Faixa do recorte pedido.
+
+            Raises:
+                KeyError: Município, cargo ou recorte sem dados nas tabelas carregadas.
+                ValueError: Nome de município presente em mais de uma UF, sem `uf` informada.
+        """
+        cd_municipio = self._codigo_municipio(municipio, uf)
+        nm_municipio, sg_uf = self._nomes_municipios[cd_municipio]
+        ds_cargo = self._cargos.get(normalizar(cargo))
+        if ds_cargo is None:
+            raise KeyError(f"Cargo '{cargo}' não encontrado nas tabelas Gold")
+
+        turno = int(turno)
+        if ano is None:
+            ano = self._anos_por_recorte.get((cd_municipio, ds_cargo, turno))
+        faixa = self._indice.get((int(ano), cd_municipio, ds_cargo, turno)) if ano is not None else None
+        if faixa is None:
+            raise KeyError(f"Sem resultados de {ds_cargo} ({turno}º turno{f', {ano}' if ano else ''}) em {nm_municipio}/{sg_uf}")
+
+        recorte = {"ano": int(ano), "uf": sg_uf, "cd_municipio": cd_municipio, "municipio": nm_municipio,
+                   "cargo": ds_cargo, "turno": turno}
+        return faixa, recorte
+
+
+    def _codigo_municipio(self, municipio: str | int, uf: str | None) -> int:
+        """CD_MUNICIPIO a partir do código do TSE ou do nome (restrito à UF, se informada)."""
+        texto = str(municipio).strip()
+        if texto.isdigit() and int(texto) in self._nomes_municipios:
+            return int(texto)
+
+        codigos = self._municipios.get(normalizar(texto), set())
+        if uf:
+            codigos = {codigo for codigo in codigos if self._nomes_municipios[codigo][1] == uf.strip().upper()}
+        if not codigos:
+            raise KeyError(f"Município '{municipio}' não encontrado nas tabelas Gold")
+        if len(codigos) > 1:
+            raise ValueError(f"Município '{municipio}' é ambíguo ({len(codigos)} municípios com esse nome): "
+                             f"informe a UF ou o código do TSE")
+        return next(iter(codigos))
+
+
+def _chave(valor: str | int | None) -> str:
+    """Parte da chave do cache: 'Sobral', ' sobral' e 'SOBRAL' são a mesma consulta."""
+    return normalizar(valor) if valor is not None else ""
+
+
+def _versao(arquivo: ArquivoManifesto) -> str:
+    """md5 do arquivo (ou a data de modificação, se o backend não informar o md5)."""
+    return arquivo.md5 or arquivo.modificado_em or ""
+
+
+def _origem(faixa: FaixaIndice) -> tuple[str, str]:
+    return faixa.tabela.arquivo.nome, _versao(faixa.tabela.arquivo)
+
+
+def _candidato(linha: dict) -> dict:
+    return {
+        "candidato": linha['NM_VOTAVEL'],
+        "votos": linha['QT_VOTOS'],
+        "perc_votos_validos": round(linha['PERC_VOTOS_VALIDOS'], 4),
+    }
+
+
+def abrir_servico_consulta(armazenamento: Armazenamento | None = None) -> ServicoConsultaGold:
+    """Serviço sobre a pasta Gold configurada, já com as tabelas carregadas."""
+    if armazenamento is None:
+        from app.storage.armazenamento import obter_armazenamento_compartilhado
+        armazenamento = obter_armazenamento_compartilhado()
+
+    servico = ServicoConsultaGold(armazenamento)
+    inicio = time.perf_counter()
+    servico.revalidar()
+    tabelas = servico.situacao()["tabelas"]
+    LOGGER.info(f"Serviço de consultas pronto em {time.perf_counter() - inicio:.2f}s: {len(tabelas)} tabela(s), "
+                f"{sum(tabela['recortes'] for tabela in tabelas)} recortes indexados")
+    return servico
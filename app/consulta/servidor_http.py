@@ -0,0 +1,109 @@
+"""
+    Endpoint HTTP local (127.0.0.1) do serviço de consultas da Gold.
+
+        GET /top?municipio=Sobral&cargo=Prefeito&turno=1&n=5[&ano=2024][&uf=CE]
+        GET /participacao?municipio=Sobral&cargo=Prefeito&candidato=Fulano
+        GET /comparar?municipios=Sobral,Crato&cargo=Prefeito&candidatos=Fulano,Beltrano
+        GET /situacao
+
+    Respostas em JSON; 400 para parâmetros inválidos e 404 para recortes sem dados.
+"""
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from app.consulta.servico_gold import ServicoConsultaGold
+from app.utils.vars_envs import Settings_Env
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _lista(valor: str) -> list[str]:
+    return [item.strip() for item in valor.split(",") if item.strip()]
+
+
+def _inteiro_opcional(parametros: dict, nome: str) -> int | None:
+    return int(parametros[nome]) if parametros.get(nome) else None
+
+
+def responder(servico: ServicoConsultaGold, caminho: str, parametros: dict[str, str]) -> dict:
+    """
+        Executa a consulta da rota.
+
+        Raises:
+            ValueError: Parâmetro ausente ou inválido.
+            KeyError: Município, cargo, candidato ou recorte sem dados.
+            LookupError: Rota desconhecida.
+    """
+    def obrigatorio(nome: str) -> str:
+        if not parametros.get(nome):
+            raise ValueError(f"Parâmetro obrigatório ausente: {nome}")
+        return parametros[nome]
+
+    if caminho == "/situacao":
+        return servico.situacao()
+
+    turno = int(parametros.get("turno") or 1)
+    ano = _inteiro_opcional(parametros, "ano")
+    uf = parametros.get("uf") or None
+
+    if caminho == "/top":
+        return servico.top_candidatos(obrigatorio("municipio"), obrigatorio("cargo"), turno,
+                                      n=int(parametros.get("n") or 10), ano=ano, uf=uf)
+    if caminho == "/participacao":
+        return servico.participacao(obrigatorio("municipio"), obrigatorio("cargo"), obrigatorio("candidato"), turno, ano, uf)
+    if caminho == "/comparar":
+        return servico.comparar(_lista(obrigatorio("municipios")), obrigatorio("cargo"),
+                                _lista(obrigatorio("candidatos")), turno, ano, uf)
+    raise LookupError(f"Rota desconhecida: {caminho}")
+
+
+def criar_servidor(servico: ServicoConsultaGold, porta: int | None = None, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Servidor HTTP (uma thread por conexão) pronto para `serve_forever()`; porta 0 escolhe uma livre."""
+
+    class TratadorConsultas(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # conexões keep-alive: o cliente do painel não reabre TCP a cada consulta
+        disable_nagle_algorithm = True # cabeçalho e corpo saem em escritas separadas: sem TCP_NODELAY, o ACK atrasado soma ~40 ms
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            parametros = {nome: valores[-1] for nome, valores in parse_qs(url.query).items()}
+            try:
+                status, corpo = 200, responder(servico, url.path, parametros)
+            except ValueError as erro:
+                status, corpo = 400, {"erro": str(erro)}
+            except KeyError as erro:
+                status, corpo = 404, {"erro": erro.args[0] if erro.args else str(erro)}
+            except LookupError as erro:
+                status, corpo = 404, {"erro": str(erro)}
+            except Exception as erro:
+                LOGGER.exception(f"Erro na consulta {self.path}")
+                status, corpo = 500, {"erro": f"{type(erro).__name__}: {erro}"}
+
+            conteudo = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(conteudo)))
+            self.end_headers()
+            self.wfile.write(conteudo)
+
+        def log_message(self, formato, *args):
+            LOGGER.debug(formato % args)
+
+    porta = Settings_Env.PORTA_SERVICO_CONSULTA if porta is None else porta
+    return ThreadingHTTPServer((host, porta), TratadorConsultas)
+
+
+def servir(servico: ServicoConsultaGold, porta: int | None = None) -> None:
+    """Atende até ser interrompido, revalidando as tabelas Gold em segundo plano."""
+    parar_revalidacao = servico.iniciar_revalidacao_periodica()
+    with criar_servidor(servico, porta) as servidor:
+        host, porta = servidor.server_address[:2]
+        LOGGER.info(f"Serviço de consultas da Gold em http://{host}:{porta}")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            LOGGER.info("Serviço de consultas encerrado")
+        finally:
+            parar_revalidacao.set()
@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+from bs4 import BeautifulSoup
+from curl_cffi import requests
+
+from app.utils.instrumentacao import RASTREADOR
+from app.utils.vars_envs import Settings_Env
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class RecursoTSE:
+    """Arquivo de uma UF publicado na página de resultados de um ano."""
+    uf: str
+    titulo: str
+    url: str
+    tamanho: int | None = None         # bytes, preenchido quando o arquivo é sondado
+    modificado_em: str | None = None   # Last-Modified do arquivo, idem
+
+
+@dataclass
+class IndiceAno:
+    """Índice UF -> recurso de uma página de resultados, com os validadores HTTP da página."""
+    ano: int
+    recursos: dict[str, RecursoTSE] = field(default_factory=dict)
+    etag: str | None = None
+    ultima_modificacao: str | None = None
+    verificado_em: float = 0.0         # time.time() da última resposta 200/304
+
+
+def indexar_pagina(html: str) -> dict[str, RecursoTSE]:
+    """
+        Lê a lista de recursos da página do TSE uma única vez e indexa por UF.
+
+        Os títulos seguem o padrão "CE - Votação por seção eleitoral - 2022"; para cada UF
+        vale o primeiro recurso com link de download, como na busca linear anterior.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    lista = soup.find("ul", class_="resource-list")
+    recursos = {}
+    if lista is None:
+        return recursos
+
+    for item in lista.find_all("li", class_="resource-item"):
+        ancora_titulo = item.find("a", class_="heading")
+        titulo = ancora_titulo.get("title", "") if ancora_titulo else ""
+        ancora_download = item.find("a", class_="resource-url-analytics")
+        if " -" not in titulo or not ancora_download or not ancora_download.get("href"):
+            continue
+
+        uf = titulo.split(" -", 1)[0].strip()
+        if uf not in recursos:
+            recursos[uf] = RecursoTSE(uf=uf, titulo=titulo, url=ancora_download["href"])
+    return recursos
+
+
+class CatalogoTSE:
+    """
+        Catálogo das páginas `resultados-{ano}` do TSE: cada página é baixada e lida uma
+        vez e vira um índice UF -> recurso, gravado em disco.
+
+        Dentro de `validade_segundos` as consultas são respondidas do índice, sem rede.
+        Depois disso a página é revalidada com `If-None-Match`/`If-Modified-Since`: um 304
+        só renova o índice, e apenas uma resposta 200 é lida de novo. Consultas de várias
+        UFs do mesmo ano em paralelo esperam uma única requisição.
+    """
+
+    def __init__(self, base_url: str | None = None,
+                 diretorio: str | None = None,
+                 validade_segundos: float | None = None,
+                 headers: dict | None = None):
+        """
+            Attributes:
+                base_url (str): Prefixo das páginas, completado com o ano.
+                diretorio (str | None): Pasta dos índices em disco (None: só em memória).
+                validade_segundos (float): Idade do índice a partir da qual a página é revalidada.
+        """
+        self.base_url = base_url or Settings_Env.URL_BASE_TSE
+        self.diretorio = Settings_Env.DIRETORIO_CATALOGO_TSE if diretorio is None else diretorio
+        self.validade_segundos = (
+            Settings_Env.VALIDADE_CATALOGO_TSE_SEGUNDOS if validade_segundos is None else validade_segundos
+        )
+        self.sessao = requests.Session(headers=headers or {}, impersonate="chrome110")
+
+        self._indices: dict[int, IndiceAno] = {}
+        self._travas: dict[int, threading.Lock] = {}
+        self._trava = threading.Lock()
+        if self.diretorio:
+            os.makedirs(self.diretorio, exist_ok=True)
+
+
+    def obter(self, ano: int, sigla_estado: str) -> RecursoTSE | None:
+        """Recurso da UF na página do ano, ou None se a página não o publica."""
+        return self.indice(ano).recursos.get(sigla_estado)
+
+
+    def indice(self, ano: int) -> IndiceAno:
+        """Índice do ano, carregado do disco e revalidado na página se estiver vencido."""
+        with self._trava_ano(ano):
+            indice = self._indices.get(ano) or self._carregar(ano)
+            if indice is None or time.time() - indice.verificado_em >= self.validade_segundos:
+                indice = self._atualizar(ano, indice)
+            self._indices[ano] = indice
+            return indice
+
+
+    def registrar_sondagem(self, ano: int, sigla_estado: str, tamanho: int | None, modificado_em: str | None) -> None:
+        """Guarda no índice o tamanho e o Last-Modified obtidos ao sondar o arquivo da UF."""
+        with self._trava_ano(ano):
+            indice = self._indices.get(ano)
+            recurso = indice.recursos.get(sigla_estado) if indice else None
+            if recurso is None or (recurso.tamanho, recurso.modificado_em) == (tamanho, modificado_em):
+                return
+            recurso.tamanho, recurso.modificado_em = tamanho, modificado_em
+            self._salvar(indice)
+
+
+    def _trava_ano(self, ano: int) -> threading.Lock:
+        with self._trava:
+            return self._travas.setdefault(ano, threading.Lock())
+
+
+    def _atualizar(self, ano: int, indice: IndiceAno | None) -> IndiceAno:
+        """Requisição condicional da página; relê o HTML apenas quando ela mudou."""
+        cabecalhos = {}
+        if indice is not None and indice.etag:
+            cabecalhos["If-None-Match"] = indice.etag
+        if indice is not None and indice.ultima_modificacao:
+            cabecalhos["If-Modified-Since"] = indice.ultima_modificacao
+
+        response = self.sessao.get(f"{self.base_url}{ano}", headers=cabecalhos)
+        RASTREADOR.contar("chamadas_api", api="tse", metodo="pagina", status=response.status_code)
+        if response.status_code == 304 and indice is not None:
+            LOGGER.info(f"Catálogo TSE {ano}: página não mudou (304)")
+            indice.verificado_em = time.time()
+            self._salvar(indice)
+            return indice
+        response.raise_for_status()
+
+        recursos = indexar_pagina(response.text)
+        if indice is not None:
+            # Mantém o que já foi sondado dos arquivos que continuam com o mesmo link.
+            for uf, recurso in recursos.items():
+                anterior = indice.recursos.get(uf)
+                if anterior is not None and anterior.url == recurso.url:
+                    recurso.tamanho, recurso.modificado_em = anterior.tamanho, anterior.modificado_em
+
+        novo = IndiceAno(
+            ano=ano,
+            recursos=recursos,
+            etag=response.headers.get("ETag"),
+            ultima_modificacao=response.headers.get("Last-Modified"),
+            verificado_em=time.time(),
+        )
+        LOGGER.info(f"Catálogo TSE {ano}: {len(recursos)} UFs indexadas")
+        self._salvar(novo)
+        return novo
+
+
+    def _caminho(self, ano: int) -> str:
+        return os.path.join(self.diretorio, f"resultados-{ano}.json")
+
+
+    def _carregar(self, ano: int) -> IndiceAno | None:
+        if not self.diretorio:
+            return None
+        try:
+            with open(self._caminho(ano), encoding="utf-8") as arquivo:
+                dados = json.load(arquivo)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            LOGGER.warning(f"Catálogo TSE {ano}: índice em disco ilegível, será refeito")
+            return None
+
+        dados["recursos"] = {uf: RecursoTSE(**recurso) for uf, recurso in dados["recursos"].items()}
+        return IndiceAno(**dados)
+
+
+    def _salvar(self, indice: IndiceAno) -> None:
+        """Grava o índice de forma atômica (arquivo temporário + `os.replace`)."""
+        if not self.diretorio:
+            return
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, prefix=".parcial-")
+        with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+            json.dump(asdict(indice), arquivo, ensure_ascii=False, indent=2)
+        os.replace(temporario, self._caminho(indice.ano))
+
+
+_catalogo_compartilhado: CatalogoTSE | None = None
+_trava_catalogo = threading.Lock()
+
+
+def obter_catalogo_compartilhado(headers: dict | None = None) -> CatalogoTSE:
+    """Catálogo único do processo: todos os extratores usam o mesmo índice por ano."""
+    global _catalogo_compartilhado
+    with _trava_catalogo:
+        if _catalogo_compartilhado is None:
+            _catalogo_compartilhado = CatalogoTSE(headers=headers)
+        return _catalogo_compartilhado
@@ -0,0 +1,486 @@
+import hashlib
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from curl_cffi import CurlInfo, CurlOpt, requests
+from curl_cffi.curl import CURL_WRITEFUNC_ERROR
+
+from app.utils.instrumentacao import RASTREADOR
+
+LOGGER = logging.getLogger(__name__)
+
+
+# Corpo máximo aceito na sondagem: um servidor que ignora o Range começa a mandar o arquivo inteiro.
+LIMITE_CORPO_SONDAGEM = 64 * 1024
+
+
+@dataclass
+class InfoRecurso:
+    """Metadados de um arquivo remoto obtidos na sondagem."""
+    tamanho: int | None
+    aceita_ranges: bool
+    etag: str | None = None
+    ultima_modificacao: str | None = None
+
+
+class _CorpoLimitado:
+    """
+        `content_callback` que acumula o corpo da resposta e aborta a transferência
+        (`CURL_WRITEFUNC_ERROR`) se ele passar de `limite` bytes.
+    """
+
+    def __init__(self, limite: int):
+        self.limite = limite
+        self.dados = bytearray()
+        self.excedido = False
+
+
+    def __call__(self, chunk: bytes) -> int:
+        if len(self.dados) + len(chunk) > self.limite:
+            self.excedido = True
+            return CURL_WRITEFUNC_ERROR
+        self.dados += chunk
+        return len(chunk)
+
+
+class _FatiasEmFila:
+    """
+        `content_callback` do download sem Range: enche fatias pré-alocadas de
+        `tamanho_fatia` bytes e põe cada fatia cheia numa fila de até `maximo_em_fila`
+        fatias. Com a fila cheia o callback espera, e o curl deixa de ler da conexão.
+
+        O status é lido (`obter_status`) no primeiro pedaço do corpo, antes de qualquer
+        fatia sair: o corpo de uma resposta de erro é ignorado (quem fez a requisição
+        chama `raise_for_status`), e os `descartar` bytes iniciais só são pulados se o
+        servidor não respondeu a faixa pedida (206).
+    """
+
+    def __init__(self, tamanho_fatia: int, maximo_em_fila: int, obter_status: Callable[[], int], descartar: int = 0):
+        self.fila: queue.Queue = queue.Queue(maxsize=maximo_em_fila)
+        self.cancelado = threading.Event()
+        self.tamanho_fatia = tamanho_fatia
+        self.obter_status = obter_status
+        self.descartar = descartar
+        self.status: int | None = None
+        self._fatia = bytearray(tamanho_fatia)
+        self._preenchido = 0
+
+
+    def __call__(self, chunk: bytes) -> int:
+        if self.cancelado.is_set():
+            return CURL_WRITEFUNC_ERROR
+        if self.status is None:
+            self.status = self.obter_status()
+            if self.status == 206:
+                self.descartar = 0
+        if not 200 <= self.status < 300:
+            return len(chunk)
+
+        dados = memoryview(chunk)
+        if self.descartar:
+            pulados = min(self.descartar, len(dados))
+            dados = dados[pulados:]
+            self.descartar -= pulados
+
+        while dados:
+            copiados = min(len(dados), self.tamanho_fatia - self._preenchido)
+            self._fatia[self._preenchido:self._preenchido + copiados] = dados[:copiados]
+            self._preenchido += copiados
+            dados = dados[copiados:]
+            if self._preenchido == self.tamanho_fatia:
+                if not self._enfileirar(memoryview(self._fatia)):
+                    return CURL_WRITEFUNC_ERROR
+                self._fatia = bytearray(self.tamanho_fatia)
+                self._preenchido = 0
+        return len(chunk)
+
+
+    def finalizar(self, erro: BaseException | None = None) -> None:
+        """Enfileira a última fatia (incompleta) e o fim do download (None) ou o erro."""
+        if erro is None and self._preenchido:
+            self._enfileirar(memoryview(self._fatia)[:self._preenchido])
+        self._enfileirar(erro)
+
+
+    def _enfileirar(self, item) -> bool:
+        # Espera em passos curtos para perceber o cancelamento de quem consome as fatias.
+        while not self.cancelado.is_set():
+            try:
+                self.fila.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+class DownloaderParalelo:
+    """
+        Baixa arquivos do TSE em segmentos (HTTP Range) buscados em paralelo.
+
+        Todas as conexões saem de uma única `curl_cffi.requests.Session`, que mantém um
+        handle curl por thread e reaproveita as conexões abertas. Quando o servidor não
+        informa o tamanho ou não aceita Range, o download cai para uma única requisição.
+
+        Nenhuma requisição usa `stream=True`: no curl_cffi 0.14, uma resposta curta (ex: um
+        500 vazio) pode terminar antes de o callback de limpeza do stream ser registrado, e
+        a thread que fez a requisição fica esperando para sempre. Cada faixa é uma
+        requisição comum, limitada ao tamanho da faixa, com o corpo recebido por
+        `content_callback` e um prazo total (`timeout_segundos`).
+    """
+
+    def __init__(self, num_conexoes: int = 4,
+                 tamanho_segmento_bytes: int = 8 * 1024 * 1024,
+                 headers: dict | None = None,
+                 impersonate: str | None = "chrome110",
+                 tentativas: int = 3,
+                 timeout_segundos: float = 120):
+        """
+            Attributes:
+                num_conexoes (int): Quantidade de segmentos baixados simultaneamente.
+                tamanho_segmento_bytes (int): Tamanho de cada faixa (Range) requisitada.
+                headers (dict | None): Cabeçalhos enviados em todas as requisições.
+                impersonate (str | None): Navegador imitado pelo curl_cffi.
+                tentativas (int): Tentativas por segmento antes de desistir do download.
+                timeout_segundos (float): Prazo de cada requisição de faixa; no download sem
+                    Range, tempo máximo sem receber dados.
+                sessao (requests.Session): Sessão HTTP compartilhada entre as threads.
+        """
+        self.num_conexoes = max(1, num_conexoes)
+        self.tamanho_segmento_bytes = tamanho_segmento_bytes
+        self.headers = headers or {}
+        self.impersonate = impersonate
+        self.tentativas = tentativas
+        self.timeout_segundos = timeout_segundos
+        self.sessao = requests.Session(
+            headers=self.headers,
+            impersonate=self.impersonate,
+            timeout=timeout_segundos,
+            # Conexão parada (menos de 1 byte/s) também vale para o download sem Range, que não tem prazo total.
+            curl_options={CurlOpt.LOW_SPEED_LIMIT: 1, CurlOpt.LOW_SPEED_TIME: max(1, int(timeout_segundos))},
+        )
+
+
+    def fechar(self) -> None:
+        """Fecha a sessão HTTP (e as conexões abertas com o servidor)."""
+        self.sessao.close()
+
+
+    def sondar(self, url: str) -> InfoRecurso:
+        """
+            Descobre o tamanho do arquivo e se o servidor aceita requisições Range.
+
+            Usa um GET de um único byte (`Range: bytes=0-0`) em vez de HEAD, pois alguns
+            servidores não tratam HEAD corretamente. Uma resposta 206 com `Content-Range`
+            confirma o suporte a Range e traz o tamanho total. Se o servidor ignorar o Range,
+            a transferência é abortada depois de `LIMITE_CORPO_SONDAGEM` bytes: os
+            cabeçalhos já bastam.
+        """
+        RASTREADOR.contar("chamadas_api", api="tse", metodo="sondar")
+        corpo = _CorpoLimitado(LIMITE_CORPO_SONDAGEM)
+        try:
+            response = self.sessao.get(url, headers={"Range": "bytes=0-0"}, content_callback=corpo)
+        except requests.exceptions.RequestException as error:
+            if not corpo.excedido or error.response is None:
+                raise
+            response = error.response
+
+        response.raise_for_status()
+        etag = response.headers.get("ETag")
+        ultima_modificacao = response.headers.get("Last-Modified")
+
+        if response.status_code == 206:
+            content_range = response.headers.get("Content-Range", "")
+            total = content_range.rsplit("/", 1)[-1]
+            if total.isdigit():
+                return InfoRecurso(tamanho=int(total), aceita_ranges=True, etag=etag,
+                                   ultima_modificacao=ultima_modificacao)
+
+        tamanho = response.headers.get("Content-Length")
+        return InfoRecurso(tamanho=int(tamanho) if tamanho and tamanho.isdigit() else None,
+                           aceita_ranges=False, etag=etag, ultima_modificacao=ultima_modificacao)
+
+
+    def baixar(self, url: str, checksum_esperado: str | None = None, algoritmo: str = "md5") -> bytearray:
+        """
+            Baixa o arquivo inteiro para a memória.
+
+            Args:
+                url (str): Link direto para o arquivo.
+                checksum_esperado (str | None): Hash hexadecimal esperado do conteúdo.
+                algoritmo (str): Algoritmo do `hashlib` usado na verificação.
+
+            Returns:
+                bytearray: Conteúdo do arquivo, com os segmentos remontados em ordem.
+
+            Raises:
+                IOError: Se o tamanho ou o checksum não baterem.
+        """
+        info = self.sondar(url)
+
+        if not info.aceita_ranges or not info.tamanho:
+            LOGGER.info("Servidor sem suporte a Range, baixando em uma única requisição")
+            conteudo = bytearray()
+            for fatia, _ in self.baixar_em_fatias(url, info=info):
+                conteudo += fatia
+        else:
+            conteudo = bytearray(info.tamanho)
+            visao = memoryview(conteudo)
+
+            def escrever(offset, dados):
+                visao[offset:offset + len(dados)] = dados
+
+            self._baixar_segmentos(url, info.tamanho, escrever)
+
+        self._verificar(conteudo, info.tamanho, checksum_esperado, algoritmo)
+        return conteudo
+
+
+    def baixar_para_arquivo(self, url: str, caminho_arquivo: str,
+                            checksum_esperado: str | None = None, algoritmo: str = "md5") -> str:
+        """
+            Baixa o arquivo direto para o disco.
+
+            O arquivo é pré-alocado com o tamanho total e cada segmento é gravado na sua
+            posição com `os.pwrite`, sem passar por um buffer com o arquivo inteiro.
+        """
+        info = self.sondar(url)
+
+        with open(caminho_arquivo, "wb") as f:
+            if not info.aceita_ranges or not info.tamanho:
+                LOGGER.info("Servidor sem suporte a Range, baixando em uma única requisição")
+                self._baixar_inteiro(url, f)
+            else:
+                f.truncate(info.tamanho)
+                fd = f.fileno()
+                self._baixar_segmentos(url, info.tamanho, lambda offset, dados: os.pwrite(fd, dados, offset))
+
+        if info.tamanho is not None or checksum_esperado:
+            with open(caminho_arquivo, "rb") as f:
+                self._verificar_stream(f, info.tamanho, checksum_esperado, algoritmo)
+
+        return caminho_arquivo
+
+
+    def baixar_em_fatias(self, url: str, tamanho_fatia_bytes: int | None = None, info: InfoRecurso | None = None,
+                         inicio: int = 0):
+        """
+            Entrega o arquivo em fatias, na ordem, buscando as próximas em paralelo.
+
+            Mantém até `num_conexoes` fatias em voo: assim que a fatia mais antiga é
+            entregue, a próxima faixa é requisitada. A memória fica limitada a
+            `num_conexoes` fatias, independente do tamanho do arquivo.
+
+            Args:
+                inicio (int): Byte a partir do qual o arquivo é entregue (retomada de um
+                    download interrompido). As fatias são contadas a partir dele.
+
+            Yields:
+                tuple: (memoryview, int) com o conteúdo da fatia e o número da parte.
+        """
+        tamanho_fatia_bytes = tamanho_fatia_bytes or self.tamanho_segmento_bytes
+        info = info or self.sondar(url)
+
+        if not info.aceita_ranges or not info.tamanho:
+            yield from self._baixar_stream_unico(url, tamanho_fatia_bytes, inicio)
+            return
+
+        faixas = [(ini, min(ini + tamanho_fatia_bytes, info.tamanho))
+                  for ini in range(inicio, info.tamanho, tamanho_fatia_bytes)]
+
+        pool = ThreadPoolExecutor(max_workers=self.num_conexoes, thread_name_prefix="range")
+        try:
+            em_voo = []
+            proxima = 0
+
+            for parte in range(1, len(faixas) + 1):
+                while proxima < len(faixas) and len(em_voo) < self.num_conexoes:
+                    em_voo.append((pool.submit(self._baixar_faixa_em_memoria, url, *faixas[proxima]), faixas[proxima]))
+                    proxima += 1
+
+                yield memoryview(self._resultado_no_prazo(*em_voo.pop(0))), parte
+        finally:
+            # Não espera uma faixa travada (o prazo já estourou) nem as que ainda não começaram.
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+    def _baixar_segmentos(self, url: str, tamanho: int, escrever) -> None:
+        """Baixa todas as faixas em paralelo, entregando cada uma a `escrever(offset, dados)`."""
+        faixas = [(inicio, min(inicio + self.tamanho_segmento_bytes, tamanho))
+                  for inicio in range(0, tamanho, self.tamanho_segmento_bytes)]
+
+        LOGGER.info(f"Baixando {tamanho} bytes em {len(faixas)} segmentos ({self.num_conexoes} conexões)")
+
+        pool = ThreadPoolExecutor(max_workers=self.num_conexoes, thread_name_prefix="range")
+        try:
+            futuros = [(pool.submit(self._baixar_faixa, url, inicio, fim, escrever), (inicio, fim)) for inicio, fim in faixas]
+            for futuro, faixa in futuros:
+                self._resultado_no_prazo(futuro, faixa)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+    @property
+    def prazo_faixa_segundos(self) -> float:
+        """
+            Tempo máximo de uma faixa, somadas as tentativas (cada uma limitada pelo
+            `timeout_segundos` do curl), com uma tentativa de folga. Passado disso, a
+            thread da faixa é dada como travada.
+        """
+        return self.timeout_segundos * (self.tentativas + 1)
+
+
+    def _resultado_no_prazo(self, futuro: Future, faixa: tuple[int, int]):
+        """Resultado da faixa, ou TimeoutError se ela não terminar em `prazo_faixa_segundos`."""
+        try:
+            return futuro.result(timeout=self.prazo_faixa_segundos)
+        except TimeoutError:
+            if futuro.done():
+                raise # O TimeoutError veio de dentro da própria faixa.
+            raise TimeoutError(f"Faixa {faixa[0]}-{faixa[1] - 1} sem resposta em {self.prazo_faixa_segundos:.0f}s") from None
+
+
+    def _baixar_faixa_em_memoria(self, url: str, inicio: int, fim: int) -> bytearray:
+        """Baixa a faixa [inicio, fim) para um bytearray pré-alocado."""
+        fatia = bytearray(fim - inicio)
+        visao = memoryview(fatia)
+
+        def escrever(offset, dados):
+            visao[offset - inicio:offset - inicio + len(dados)] = dados
+
+        self._baixar_faixa(url, inicio, fim, escrever)
+        return fatia
+
+
+    def _baixar_faixa(self, url: str, inicio: int, fim: int, escrever) -> None:
+        """
+            Baixa a faixa [inicio, fim) com retentativas, gravando o conteúdo na posição
+            absoluta. Se uma tentativa cair no meio, os bytes já recebidos são gravados e a
+            próxima retoma do último byte recebido.
+        """
+        posicao = inicio
+        ultimo_erro = None
+
+        for tentativa in range(1, self.tentativas + 1):
+            corpo = _CorpoLimitado(fim - posicao)
+            try:
+                RASTREADOR.contar("chamadas_api", api="tse", metodo="faixa")
+                try:
+                    response = self.sessao.get(url, headers={"Range": f"bytes={posicao}-{fim - 1}"},
+                                               content_callback=corpo)
+                except requests.exceptions.RequestException as error:
+                    if corpo.excedido:
+                        raise IOError(f"Servidor ignorou o Range (corpo maior que a faixa de {fim - posicao} bytes)") from error
+                    if error.response is not None and error.response.status_code == 206 and corpo.dados:
+                        escrever(posicao, corpo.dados)
+                        posicao += len(corpo.dados)
+                    raise
+
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise IOError(f"Servidor ignorou o Range (status {response.status_code})")
+
+                escrever(posicao, corpo.dados)
+                posicao += len(corpo.dados)
+                if posicao == fim:
+                    return
+                raise IOError(f"Faixa {inicio}-{fim - 1} incompleta: {posicao - inicio} de {fim - inicio} bytes")
+
+            except Exception as error:
+                ultimo_erro = error
+                LOGGER.warning(f"Falha na faixa {inicio}-{fim - 1} (tentativa {tentativa}/{self.tentativas}): {error}")
+
+        raise IOError(f"Não foi possível baixar a faixa {inicio}-{fim - 1}: {ultimo_erro}")
+
+
+    def _baixar_inteiro(self, url: str, destino, inicio: int = 0) -> int:
+        """
+            Fallback sem Range: o arquivo inteiro numa única requisição, gravado em `destino`
+            à medida que chega. Sem prazo total (o arquivo pode ser grande), só o de conexão
+            parada da sessão.
+
+            Com `inicio`, ainda tenta um Range aberto (`bytes=inicio-`).
+
+            Returns:
+                int: Bytes do início de `destino` a descartar (`inicio` quando o servidor
+                    respondeu o arquivo inteiro em vez da faixa pedida).
+        """
+        cabecalhos = {"Range": f"bytes={inicio}-"} if inicio else None
+
+        def receber(chunk: bytes) -> int:
+            destino.write(chunk)
+            return len(chunk)
+
+        RASTREADOR.contar("chamadas_api", api="tse", metodo="stream_unico")
+        response = self.sessao.get(url, headers=cabecalhos, timeout=None, content_callback=receber)
+        response.raise_for_status()
+        return inicio if inicio and response.status_code != 206 else 0
+
+
+    def _baixar_stream_unico(self, url: str, tamanho_fatia_bytes: int, inicio: int = 0):
+        """
+            Fallback sem Range entregue em fatias: uma thread faz a requisição única e o
+            `content_callback` (`_FatiasEmFila`) entrega cada fatia assim que ela enche,
+            enquanto o resto do arquivo ainda chega. A fila guarda até `num_conexoes`
+            fatias; se quem consome atrasa, o download espera. Sem prazo total, só o de
+            conexão parada da sessão.
+
+            Com `inicio`, ainda tenta um Range aberto (`bytes=inicio-`); se o servidor
+            responder o arquivo inteiro, os `inicio` primeiros bytes são descartados.
+        """
+        cabecalhos = {"Range": f"bytes={inicio}-"} if inicio else None
+        # Sem stream=True, a requisição roda no handle curl da própria thread.
+        fatias = _FatiasEmFila(tamanho_fatia_bytes, self.num_conexoes,
+                               lambda: self.sessao.curl.getinfo(CurlInfo.RESPONSE_CODE), descartar=inicio)
+
+        def transferir():
+            try:
+                RASTREADOR.contar("chamadas_api", api="tse", metodo="stream_unico")
+                response = self.sessao.get(url, headers=cabecalhos, timeout=None, content_callback=fatias)
+                response.raise_for_status()
+            except BaseException as error:
+                fatias.finalizar(error)
+            else:
+                fatias.finalizar()
+
+        threading.Thread(target=transferir, name="stream-unico", daemon=True).start()
+        try:
+            parte = 1
+            while (item := fatias.fila.get()) is not None:
+                if isinstance(item, BaseException):
+                    raise item
+                yield item, parte
+                parte += 1
+        finally:
+            # Consumidor parou antes do fim: o callback aborta a transferência.
+            fatias.cancelado.set()
+
+
+    def _verificar(self, conteudo, tamanho: int | None, checksum_esperado: str | None, algoritmo: str) -> None:
+        """Confere o tamanho e, se informado, o checksum do conteúdo em memória."""
+        if tamanho is not None and len(conteudo) != tamanho:
+            raise IOError(f"Tamanho divergente: esperado {tamanho}, recebido {len(conteudo)}")
+
+        if checksum_esperado:
+            calculado = hashlib.new(algoritmo, conteudo).hexdigest()
+            if calculado != checksum_esperado.lower():
+                raise IOError(f"Checksum divergente ({algoritmo}): esperado {checksum_esperado}, calculado {calculado}")
+
+
+    def _verificar_stream(self, arquivo, tamanho: int | None, checksum_esperado: str | None, algoritmo: str) -> None:
+        """Confere o tamanho e, se informado, o checksum de um arquivo em disco."""
+        hasher = hashlib.new(algoritmo)
+        lidos = 0
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+            hasher.update(bloco)
+            lidos += len(bloco)
+
+        if tamanho is not None and lidos != tamanho:
+            raise IOError(f"Tamanho divergente: esperado {tamanho}, recebido {lidos}")
+
+        if checksum_esperado and hasher.hexdigest() != checksum_esperado.lower():
+            raise IOError(f"Checksum divergente ({algoritmo}): esperado {checksum_esperado}, calculado {hasher.hexdigest()}")
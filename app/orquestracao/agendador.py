@@ -0,0 +1,272 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+from app.ingestao.tse_extrator import ExtratorDados
+from app.orquestracao.pipeline_bronze import processar_arquivo_bronze
+from app.orquestracao.pipeline_gold import processar_arquivo_gold
+from app.orquestracao.pendencias import montar_jobs
+from app.orquestracao.pipeline_ingestao import ingerir_arquivo_tse
+from app.orquestracao.pipeline_silver import processar_arquivo_silver
+from app.processamento.layout_tse import LAYOUTS_POR_ANO, ErroLayoutTSE, layout_registrado
+from app.storage.armazenamento import Armazenamento, obter_armazenamento_compartilhado
+from app.storage.linhagem import RegistroLinhagem
+from app.storage.manifesto_pasta import ManifestoPasta
+from app.utils.execucao import ExecutorProcessos
+from app.utils.vars_envs import Settings_Env
+
+LOGGER = logging.getLogger(__name__)
+
+# Ordem das etapas de cada job: cada uma depende da saída da anterior.
+ETAPAS = ("ingestao", "bronze", "silver", "gold")
+
+# Falhas que se repetiriam em qualquer nova tentativa: UF/ano ausente na página do TSE (ou
+# entrada ausente na camada anterior) e arquivo fora do layout registrado.
+ERROS_PERMANENTES = (FileNotFoundError, ErroLayoutTSE)
+
+
+@dataclass
+class JobPipeline:
+    """Um par (ano, UF) percorrendo as etapas do pipeline."""
+    ano: int
+    sigla_estado: str
+    etapa: str = ETAPAS[0]
+    status: str = "pendente" # pendente | concluido | falhou | ignorado
+    artefato: str | list[str] | None = None # saída da última etapa concluída (entrada da próxima)
+    tentativas: dict[str, int] = field(default_factory=dict)
+    erro: str | None = None
+
+    def __str__(self) -> str:
+        return f"{self.sigla_estado}/{self.ano}"
+
+
+class AgendadorPipeline:
+    """
+        Executa a matriz de jobs (ano, UF) pelas etapas ingestão -> Bronze -> Silver -> Gold.
+
+        Cada etapa tem o próprio pool de threads, com o limite de concorrência configurado,
+        e as etapas de jobs diferentes se sobrepõem (a Silver de CE/2022 roda enquanto a
+        ingestão de PE/2022 ainda baixa). Downloads e uploads rodam nas threads; as
+        transformações pesadas são enviadas a um pool de processos compartilhado.
+
+        Uma etapa que falha é reagendada com espera exponencial sem ocupar a thread
+        enquanto espera. Esgotadas as tentativas, ou numa falha permanente
+        (`ERROS_PERMANENTES`), o job é marcado como falho e as etapas seguintes dele não
+        rodam; os demais jobs seguem normalmente. Jobs de anos sem layout registrado
+        nem começam: ficam como "ignorado", com o motivo em `erro`.
+
+        Cada thread da ingestão usa o próprio `ExtratorDados` (e a sessão HTTP do seu
+        downloader); o catálogo das páginas do TSE é compartilhado.
+    """
+
+    def __init__(self, armazenamento: Armazenamento,
+                 limites: dict[str, int] | None = None,
+                 num_processos: int | None = None,
+                 tentativas: int | None = None,
+                 espera_base_segundos: float = 5.0,
+                 modo_streaming: bool = True):
+        """
+            Attributes:
+                armazenamento (Armazenamento): Backend do Data Lake (Drive ou local), compartilhado pelas threads.
+                limites (dict[str, int]): Jobs simultâneos em cada etapa.
+                num_processos (int): Processos do pool das transformações (0 = no próprio processo).
+                tentativas (int): Tentativas de cada etapa antes de o job ser dado como falho.
+                espera_base_segundos (float): Espera antes da 2ª tentativa; dobra a cada nova falha.
+                modo_streaming (bool): Modo de ingestão (ver `executar_pipeline_ingestao`).
+        """
+        self.armazenamento = armazenamento
+        self.limites = limites or {
+            "ingestao": Settings_Env.LIMITE_CONCORRENCIA_INGESTAO,
+            "bronze": Settings_Env.LIMITE_CONCORRENCIA_BRONZE,
+            "silver": Settings_Env.LIMITE_CONCORRENCIA_SILVER,
+            "gold": Settings_Env.LIMITE_CONCORRENCIA_GOLD,
+        }
+        self.num_processos = Settings_Env.NUM_PROCESSOS_CPU if num_processos is None else num_processos
+        self.tentativas = tentativas or Settings_Env.TENTATIVAS_ETAPA
+        self.espera_base_segundos = espera_base_segundos
+        self.modo_streaming = modo_streaming
+
+        self._pools: dict[str, ThreadPoolExecutor] = {}
+        self._local = threading.local()
+        self._extratores: list[ExtratorDados] = []
+        self._trava_extratores = threading.Lock()
+        self._executar_cpu = ExecutorProcessos(self.num_processos)
+        self._pendentes = 0
+        self._condicao = threading.Condition()
+
+
+    def executar(self, jobs: list[tuple[int, str]]) -> list[JobPipeline]:
+        """
+            Roda todos os jobs até concluírem ou falharem.
+
+            Args:
+                jobs (list[tuple[int, str]]): Pares (ano, sigla da UF).
+
+            Returns:
+                list[JobPipeline]: Estado final de cada job, na ordem recebida.
+        """
+        self.manifestos = {
+            "brutos": ManifestoPasta(self.armazenamento, Settings_Env.ID_DADOS_BRUTOS_BUCKET_GOOGLE_DRIVE),
+            "bronze": ManifestoPasta(self.armazenamento, Settings_Env.ID_PASTA_BRONZE),
+            "silver": ManifestoPasta(self.armazenamento, Settings_Env.ID_PASTA_SILVER),
+            "gold": ManifestoPasta(self.armazenamento, Settings_Env.ID_PASTA_GOLD),
+        }
+        self.linhagens = {nome: RegistroLinhagem(manifesto) for nome, manifesto in self.manifestos.items()}
+
+        lista_jobs = [JobPipeline(ano=ano, sigla_estado=sigla_estado) for ano, sigla_estado in jobs]
+        LOGGER.info(f"Agendador: {len(lista_jobs)} jobs | limites por etapa {self.limites} | {self.num_processos} processos")
+
+        # Sem layout registrado a Bronze falharia depois de toda a ingestão: esses jobs nem começam.
+        for job in lista_jobs:
+            if not layout_registrado(job.ano):
+                job.status = "ignorado"
+                job.erro = f"ano {job.ano} sem layout registrado (anos suportados: {sorted(LAYOUTS_POR_ANO)})"
+                LOGGER.warning(f"[{job}] Job ignorado: {job.erro}")
+        executaveis = [job for job in lista_jobs if job.status == "pendente"]
+
+        self._pools = {
+            etapa: ThreadPoolExecutor(max_workers=max(1, self.limites[etapa]), thread_name_prefix=etapa)
+            for etapa in ETAPAS
+        }
+        with self._executar_cpu:
+            try:
+                with self._condicao:
+                    self._pendentes = len(executaveis)
+                for job in executaveis:
+                    self._submeter(job)
+
+                with self._condicao:
+                    self._condicao.wait_for(lambda: self._pendentes == 0)
+            finally:
+                for pool in self._pools.values():
+                    pool.shutdown(wait=True)
+                for extrator in self._extratores:
+                    extrator.downloader.fechar()
+                self._extratores.clear()
+
+                for linhagem in self.linhagens.values():
+                    linhagem.salvar()
+
+        concluidos = sum(job.status == "concluido" for job in lista_jobs)
+        ignorados = sum(job.status == "ignorado" for job in lista_jobs)
+        LOGGER.info(f"Agendador finalizado: {concluidos}/{len(lista_jobs)} jobs concluídos"
+                    + (f", {ignorados} ignorados (ano sem layout registrado)" if ignorados else ""))
+        for job in lista_jobs:
+            if job.status == "falhou":
+                LOGGER.error(f"Job {job} falhou na etapa {job.etapa}: {job.erro}")
+        return lista_jobs
+
+
+    def _submeter(self, job: JobPipeline) -> None:
+        """Coloca a etapa atual do job na fila do pool da etapa."""
+        self._pools[job.etapa].submit(self._executar_etapa, job)
+
+
+    def _executar_etapa(self, job: JobPipeline) -> None:
+        """Roda a etapa atual do job e encadeia a próxima (ou agenda a retentativa)."""
+        etapa = job.etapa
+        try:
+            LOGGER.info(f"[{job}] Iniciando etapa {etapa}")
+            job.artefato = self._etapas()[etapa](job)
+        except Exception as error:
+            self._tratar_falha(job, error)
+            return
+
+        proxima = ETAPAS.index(etapa) + 1
+        if proxima < len(ETAPAS):
+            job.etapa = ETAPAS[proxima]
+            self._submeter(job)
+        else:
+            job.status = "concluido"
+            LOGGER.info(f"[{job}] Pipeline concluído")
+            self._finalizar(job)
+
+
+    def _tratar_falha(self, job: JobPipeline, error: Exception) -> None:
+        """Reagenda a etapa com espera exponencial ou, esgotadas as tentativas, encerra o job."""
+        tentativa = job.tentativas.get(job.etapa, 0) + 1
+        job.tentativas[job.etapa] = tentativa
+        job.erro = f"{type(error).__name__}: {error}"
+
+        if isinstance(error, ERROS_PERMANENTES):
+            LOGGER.error(f"[{job}] Etapa {job.etapa} falhou sem chance de nova tentativa, desistindo do job: {error}")
+            job.status = "falhou"
+            self._finalizar(job)
+            return
+
+        if tentativa >= self.tentativas:
+            LOGGER.error(f"[{job}] Etapa {job.etapa} falhou {tentativa}x, desistindo do job: {error}")
+            job.status = "falhou"
+            self._finalizar(job)
+            return
+
+        espera = self.espera_base_segundos * 2 ** (tentativa - 1)
+        LOGGER.warning(f"[{job}] Etapa {job.etapa} falhou (tentativa {tentativa}/{self.tentativas}), "
+                       f"nova tentativa em {espera:.0f}s: {error}")
+
+        # O Timer espera fora dos pools: a vaga da etapa fica livre para outros jobs.
+        temporizador = threading.Timer(espera, self._submeter, args=(job,))
+        temporizador.daemon = True
+        temporizador.start()
+
+
+    def _finalizar(self, job: JobPipeline) -> None:
+        with self._condicao:
+            self._pendentes -= 1
+            self._condicao.notify_all()
+
+
+    def _etapas(self) -> dict[str, Callable[[JobPipeline], str | list[str]]]:
+        """Função de cada etapa: recebe o job e devolve a saída que alimenta a próxima."""
+        return {
+            "ingestao": self._etapa_ingestao,
+            "bronze": self._etapa_bronze,
+            "silver": self._etapa_silver,
+            "gold": self._etapa_gold,
+        }
+
+
+    def _extrator(self) -> ExtratorDados:
+        """Extrator da thread atual da ingestão, criado no primeiro job que ela executa."""
+        extrator = getattr(self._local, "extrator", None)
+        if extrator is None:
+            extrator = self._local.extrator = ExtratorDados()
+            with self._trava_extratores:
+                self._extratores.append(extrator)
+        return extrator
+
+
+    def _etapa_ingestao(self, job: JobPipeline) -> str:
+        return ingerir_arquivo_tse(self._extrator(), self.manifestos["brutos"], self.linhagens["brutos"],
+                                   job.ano, job.sigla_estado, self.modo_streaming)
+
+
+    def _etapa_bronze(self, job: JobPipeline) -> str:
+        arquivo = self._obter_entrada("brutos", job.artefato)
+        return processar_arquivo_bronze(arquivo, self.manifestos["bronze"], self.linhagens["bronze"], self._executar_cpu)
+
+
+    def _etapa_silver(self, job: JobPipeline) -> str:
+        arquivo = self._obter_entrada("bronze", job.artefato)
+        return processar_arquivo_silver(arquivo, self.manifestos["silver"], self.linhagens["silver"], self._executar_cpu)
+
+
+    def _etapa_gold(self, job: JobPipeline) -> list[str]:
+        arquivo = self._obter_entrada("silver", job.artefato)
+        return processar_arquivo_gold(arquivo, self.manifestos["gold"], self.linhagens["gold"], self._executar_cpu)
+
+
+    def _obter_entrada(self, camada: str, nome: str):
+        """Metadados do arquivo gerado pela etapa anterior, já registrados no manifesto da camada."""
+        arquivo = self.manifestos[camada].obter(nome)
+        if arquivo is None:
+            raise FileNotFoundError(f"{nome} não encontrado na camada {camada}")
+        return arquivo
+
+
+def executar_agendador(anos: list[int] | None = None, ufs: list[str] | None = None) -> list[JobPipeline]:
+    """Abre o backend do Data Lake (`BACKEND_ARMAZENAMENTO`) e roda todos os jobs (ano, UF) pelo agendador."""
+    armazenamento = obter_armazenamento_compartilhado()
+    return AgendadorPipeline(armazenamento).executar(montar_jobs(anos, ufs))
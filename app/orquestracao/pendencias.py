@@ -0,0 +1,94 @@
+import logging
+from dataclasses import dataclass, field
+
+from app.processamento.camadas import (
+    VERSAO_BRONZE, VERSAO_GOLD, VERSAO_SILVER, job_do_arquivo, nome_saida_bronze, nome_saida_silver, nomes_tabelas_gold,
+)
+from app.processamento.layout_tse import LAYOUTS_POR_ANO, layout_registrado
+from app.storage.armazenamento import Armazenamento
+from app.storage.linhagem import RegistroLinhagem
+from app.storage.manifesto_pasta import ManifestoPasta
+from app.utils.vars_envs import Settings_Env
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class PendenciaJob:
+    """Etapas que ainda precisam rodar para um job (ano, UF)."""
+    ano: int
+    sigla_estado: str
+    arquivo: str | None = None # ZIP do job na camada de dados brutos (None se ainda não foi ingerido)
+    etapas: list[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return f"{self.sigla_estado}/{self.ano}"
+
+
+def montar_jobs(anos: list[int] | None = None, ufs: list[str] | None = None) -> list[tuple[int, str]]:
+    """
+        Matriz (ano, UF) dos jobs; por padrão, `Settings_Env.ANOS` x `Settings_Env.UFS`.
+        Anos sem layout registrado ficam de fora (com um aviso), em vez de falharem na Bronze.
+    """
+    anos = anos or Settings_Env.ANOS
+    sem_layout = [ano for ano in anos if not layout_registrado(ano)]
+    if sem_layout:
+        LOGGER.warning(f"Anos {sem_layout} ignorados: sem layout registrado do arquivo de votação por seção "
+                       f"(anos suportados: {sorted(LAYOUTS_POR_ANO)})")
+    return [(ano, uf) for ano in anos if layout_registrado(ano) for uf in (ufs or Settings_Env.UFS)]
+
+
+def listar_pendencias(armazenamento: Armazenamento, jobs: list[tuple[int, str]]) -> list[PendenciaJob]:
+    """
+        Etapas pendentes de cada job, calculadas só com metadados: as listagens das quatro
+        pastas e os registros de linhagem, sem baixar dados nem consultar o TSE.
+
+        Uma etapa está pendente quando a linhagem da saída manda reprocessá-la (saída
+        ausente, origem com outro checksum ou outra versão do transformador); a partir da
+        primeira etapa pendente, as seguintes também estão, pois vão receber uma nova entrada.
+        A ingestão só aparece como pendente quando o ZIP do job não está na camada de dados
+        brutos: saber se o TSE publicou uma versão nova exige a sondagem feita pela própria ingestão.
+
+        Returns:
+            list[PendenciaJob]: Um item por job, na ordem recebida (`etapas` vazio se atualizado).
+    """
+    manifestos = {
+        "brutos": ManifestoPasta(armazenamento, Settings_Env.ID_DADOS_BRUTOS_BUCKET_GOOGLE_DRIVE),
+        "bronze": ManifestoPasta(armazenamento, Settings_Env.ID_PASTA_BRONZE),
+        "silver": ManifestoPasta(armazenamento, Settings_Env.ID_PASTA_SILVER),
+        "gold": ManifestoPasta(armazenamento, Settings_Env.ID_PASTA_GOLD),
+    }
+    linhagens = {nome: RegistroLinhagem(manifestos[nome]) for nome in ("bronze", "silver", "gold")}
+
+    zips = {}
+    for arquivo in manifestos["brutos"]:
+        if arquivo.nome.endswith(".zip") and job_do_arquivo(arquivo.nome) is not None:
+            zips.setdefault(job_do_arquivo(arquivo.nome), arquivo)
+
+    pendencias = []
+    for ano, sigla_estado in jobs:
+        pendencia = PendenciaJob(ano=ano, sigla_estado=sigla_estado)
+        pendencias.append(pendencia)
+
+        arquivo = zips.get((ano, sigla_estado))
+        if arquivo is None:
+            pendencia.etapas = ["ingestao", "bronze", "silver", "gold"]
+            continue
+        pendencia.arquivo = arquivo.nome
+
+        nome_bronze = nome_saida_bronze(arquivo.nome)
+        nome_silver = nome_saida_silver(nome_bronze)
+        desatualizadas = {
+            "bronze": linhagens["bronze"].precisa_processar(nome_bronze, arquivo, VERSAO_BRONZE),
+            "silver": linhagens["silver"].precisa_processar(nome_silver, manifestos["bronze"].obter(nome_bronze), VERSAO_SILVER),
+            "gold": any(
+                linhagens["gold"].precisa_processar(nome, manifestos["silver"].obter(nome_silver), VERSAO_GOLD)
+                for nome in nomes_tabelas_gold(nome_silver).values()
+            ),
+        }
+        for etapa in ("bronze", "silver", "gold"):
+            if pendencia.etapas or desatualizadas[etapa]:
+                pendencia.etapas.append(etapa)
+
+    LOGGER.info(f"Pendências: {sum(bool(p.etapas) for p in pendencias)}/{len(pendencias)} jobs com etapas a executar")
+    return pendencias
@@ -1,64 +1,304 @@
 import io
-from app.storage.google_drive import GoogleDriveClient
+import os
+import tempfile
+import time
+from typing import Callable
+from app.processamento.camadas import VERSAO_BRONZE as VERSAO_TRANSFORMADOR, nome_saida_bronze, pertence_aos_jobs
+from app.processamento.layout_tse import LayoutTSE, extrair_ano, obter_layout
+from app.storage.armazenamento import obter_armazenamento_compartilhado
+from app.storage.arquivo_spool import ArquivoSpool
+from app.storage.manifesto_pasta import ArquivoManifesto, ManifestoPasta
+from app.storage.linhagem import RegistroLinhagem
+from app.utils.execucao import executar_local
+from app.utils.instrumentacao import RASTREADOR
 from app.utils.vars_envs import Settings_Env
-import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
 import zipfile
 
 import logging
 LOGGER = logging.getLogger(__name__)
 
 
-def transformar_para_parquet(zip_bytes: bytes) -> bytes:
+def _localizar_csv(z: zipfile.ZipFile) -> str:
+    """Localiza o arquivo de dados dentro do ZIP (csv ou txt)."""
+    return [n for n in z.namelist() if n.endswith(('.csv', '.txt'))][0]
+
+
+def _ler_cabecalho(z: zipfile.ZipFile, nome_interno: str) -> list[str]:
+    """Nomes das colunas na primeira linha do CSV."""
+    with z.open(nome_interno) as f:
+        linha = f.readline().decode('latin-1').strip()
+    return [nome.strip().strip('"') for nome in linha.split(';')]
+
+
+class _LeituraCronometrada(io.RawIOBase):
+    """Repassa as leituras do CSV dentro do ZIP somando o tempo gasto nelas (descompressão)."""
+
+    def __init__(self, arquivo, tempos: dict[str, float]):
+        super().__init__()
+        self._arquivo = arquivo
+        self._tempos = tempos
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, tamanho: int = -1) -> bytes:
+        inicio = time.perf_counter()
+        try:
+            return self._arquivo.read(tamanho)
+        finally:
+            self._tempos["descompactar"] += time.perf_counter() - inicio
+
+    def readinto(self, destino) -> int:
+        dados = self.read(len(destino))
+        destino[:len(dados)] = dados
+        return len(dados)
+
+
+def _abrir_leitor_csv(arquivo, tamanho_lote_bytes: int, layout: LayoutTSE, cabecalho: list[str]):
+    """
+        Abre um leitor em lotes (RecordBatch) sobre o CSV do TSE (Separador ; e Encoding Latin-1).
+
+        Todas as colunas do cabeçalho são lidas como binário (sem inferência nem conversão na
+        leitura): o texto é decodificado e os inteiros convertidos depois, lote a lote, em
+        `_para_schema_bronze`. Strings vazias são tratadas como nulas, assim como o pandas
+        fazia no `read_csv`.
+    """
+    return pv.open_csv(
+        arquivo,
+        read_options=pv.ReadOptions(block_size=tamanho_lote_bytes, use_threads=True),
+        parse_options=pv.ParseOptions(delimiter=';'),
+        convert_options=pv.ConvertOptions(
+            column_types=layout.tipos_leitura(cabecalho),
+            include_columns=cabecalho,
+            strings_can_be_null=True,
+        ),
+    )
+
+
+def _decodificar_latin1(coluna: pa.Array) -> pa.Array:
+    """Converte uma coluna binária em latin-1 para texto, decodificando cada valor distinto uma vez."""
+    codificada = pc.dictionary_encode(coluna)
+    distintos = pa.array([valor.decode('latin-1') for valor in codificada.dictionary.to_pylist()], pa.string())
+    return distintos.take(codificada.indices)
+
+
+def _converter_inteiro(coluna: pa.Array, tipo: pa.DataType) -> pa.Array:
+    """
+        Converte uma coluna binária para o inteiro do layout. Valores malformados ou fora do
+        tipo viram nulos, como no `pd.to_numeric(errors='coerce')` da versão em pandas.
+    """
+    # Caminho comum: todos os valores são inteiros válidos e o cast direto basta.
+    try:
+        return pc.cast(coluna.view(pa.string()), tipo)
+    except pa.ArrowInvalid:
+        pass
+
+    texto = pc.utf8_trim_whitespace(_decodificar_latin1(coluna))
+    numeros = pc.cast(pc.if_else(pc.match_substring_regex(texto, r"^[+-]?\d{1,18}$"), texto, None), pa.int64())
+    limites = np.iinfo(tipo.to_pandas_dtype())
+    cabe = pc.and_(pc.greater_equal(numeros, limites.min), pc.less_equal(numeros, limites.max))
+    return pc.cast(pc.if_else(cabe, numeros, None), tipo)
+
+
+def _para_schema_bronze(lote: pa.RecordBatch, schema: pa.Schema, nome_arquivo: str = "") -> pa.RecordBatch:
+    """Decodifica o texto e converte os inteiros do lote lido, chegando ao schema da Bronze."""
+    colunas = []
+    for campo in schema:
+        coluna = lote.column(campo.name)
+        if pa.types.is_string(campo.type):
+            colunas.append(_decodificar_latin1(coluna))
+            continue
+
+        convertida = _converter_inteiro(coluna, campo.type)
+        descartados = convertida.null_count - coluna.null_count
+        if descartados:
+            LOGGER.warning(f"{nome_arquivo}: {descartados} valores de {campo.name} não são {campo.type} e viraram nulos")
+        colunas.append(convertida)
+    return pa.RecordBatch.from_arrays(colunas, schema=schema)
+
+
+def converter_zip_para_parquet(fonte_zip, destino, tamanho_lote_bytes: int | None = None,
+                               ao_ler_lote: Callable[[pa.RecordBatch], None] | None = None,
+                               layout: LayoutTSE | None = None) -> int:
+    """
+        Converte o CSV de dentro de um ZIP do TSE para Parquet em streaming.
+
+        O CSV é lido em lotes de aproximadamente `tamanho_lote_bytes` e cada lote é gravado
+        como um row group no `ParquetWriter`, de modo que o pico de memória acompanha o
+        tamanho do lote e não o tamanho do arquivo.
+
+        O cabeçalho é conferido com o layout do ano antes da leitura (ver `layout_tse`), e
+        a Bronze guarda todas as colunas do arquivo (a Silver projeta as que usa).
+
+        Args:
+            fonte_zip: Caminho ou objeto file-like (com seek) contendo o ZIP.
+            destino: Caminho ou objeto file-like gravável onde o Parquet será escrito.
+            tamanho_lote_bytes (int | None): Tamanho de cada lote lido do CSV. Quando None,
+                usa `Settings_Env.TAMANHO_LOTE_PARQUET_BYTES`.
+            ao_ler_lote (Callable | None): Chamado com cada lote já gravado, permitindo que
+                o modo fundido reaproveite os dados sem reler o Parquet.
+            layout (LayoutTSE | None): Layout do arquivo. Quando None, é o registrado para o
+                ano presente no nome do CSV.
+
+        Returns:
+            int: Quantidade de linhas escritas.
+
+        Raises:
+            ErroLayoutTSE: Se o ano não tiver layout registrado ou se o cabeçalho não tiver
+                as colunas usadas pelo pipeline.
+
+        O tempo de cada etapa é somado lote a lote e registrado como filho do span
+        `bronze.csv_para_parquet`: `descompactar` (leituras do ZIP, que o leitor faz em
+        paralelo ao parse), `parse`, `transformar` (decodificação do texto) e `serializar`.
+    """
+    tamanho_lote_bytes = tamanho_lote_bytes or Settings_Env.TAMANHO_LOTE_PARQUET_BYTES
+    total_linhas = 0
+    tempos = dict.fromkeys(("descompactar", "parse", "transformar", "serializar"), 0.0)
+
+    with RASTREADOR.span("bronze.csv_para_parquet") as span, zipfile.ZipFile(fonte_zip) as z:
+        nome_interno = _localizar_csv(z)
+        layout = layout or obter_layout(extrair_ano(nome_interno))
+        cabecalho = _ler_cabecalho(z, nome_interno)
+        layout.validar_cabecalho(cabecalho, nome_interno)
+        schema = layout.schema_bronze(cabecalho)
+        span.registrar(arquivo=nome_interno, bytes=z.getinfo(nome_interno).file_size)
+
+        with z.open(nome_interno) as f:
+            leitor = _abrir_leitor_csv(_LeituraCronometrada(f, tempos), tamanho_lote_bytes, layout, cabecalho)
+
+            with pq.ParquetWriter(destino, schema) as escritor:
+                while True:
+                    inicio = time.perf_counter()
+                    lote_lido = next(leitor, None)
+                    lido = time.perf_counter()
+                    tempos["parse"] += lido - inicio
+                    if lote_lido is None:
+                        break
+
+                    lote = _para_schema_bronze(lote_lido, schema, nome_interno)
+                    transformado = time.perf_counter()
+                    escritor.write_batch(lote)
+                    tempos["transformar"] += transformado - lido
+                    tempos["serializar"] += time.perf_counter() - transformado
+
+                    total_linhas += lote.num_rows
+                    if ao_ler_lote is not None:
+                        ao_ler_lote(lote)
+
+                inicio = time.perf_counter()
+            tempos["serializar"] += time.perf_counter() - inicio # rodapé do Parquet
+
+        span.registrar(linhas=total_linhas)
+        for etapa, segundos in tempos.items():
+            RASTREADOR.registrar_etapa(f"bronze.{etapa}", segundos)
+
+    return total_linhas
+
+
+def transformar_para_parquet(zip_bytes, tamanho_lote_bytes: int | None = None, destino=None):
     """
         Extrai o conteúdo de um ZIP e converte para formato Parquet.
+
+        A conversão é feita em lotes por `converter_zip_para_parquet`, sem carregar
+        o CSV inteiro em um DataFrame, e o Parquet é gravado direto no destino, sem
+        passar por um `getvalue()`.
+
+        Args:
+            zip_bytes: Conteúdo do ZIP (bytes), caminho ou objeto file-like com seek.
+            tamanho_lote_bytes (int | None): Tamanho de cada lote lido do CSV.
+            destino: Caminho ou objeto file-like gravável. Quando None, o Parquet vai para
+                um `ArquivoSpool` (em memória até `LIMITE_SPOOL_MEMORIA_BYTES`, em disco
+                acima disso).
+
+        Returns:
+            O `destino` informado ou o `ArquivoSpool`, posicionado no início para upload ou leitura.
+    """
+    fonte = io.BytesIO(zip_bytes) if isinstance(zip_bytes, (bytes, bytearray, memoryview)) else zip_bytes
+    saida = ArquivoSpool() if destino is None else destino
+    try:
+        linhas = converter_zip_para_parquet(fonte, saida, tamanho_lote_bytes)
+    except BaseException:
+        if destino is None:
+            saida.close()
+        raise
+
+    LOGGER.info(f"{linhas} linhas convertidas para Parquet")
+    if destino is None:
+        saida.seek(0)
+    return saida
+
+
+def processar_arquivo_bronze(arquivo: ArquivoManifesto, manifesto_bronze: ManifestoPasta,
+                             linhagem: RegistroLinhagem, executar_cpu: Callable = executar_local) -> str:
     """
+        Converte um ZIP da camada de dados brutos para o Parquet da Bronze.
+
+        Args:
+            arquivo (ArquivoManifesto): ZIP na pasta de dados brutos.
+            manifesto_bronze (ManifestoPasta): Manifesto da pasta Bronze.
+            linhagem (RegistroLinhagem): Linhagem da pasta Bronze.
+            executar_cpu (Callable): Executor da conversão (no processo ou em um pool de processos).
 
-    with io.BytesIO(zip_bytes) as buffer_entrada:
-        with zipfile.ZipFile(buffer_entrada) as z:
-            # Localiza o arquivo de dados dentro do ZIP (csv ou txt)
-            nome_interno = [n for n in z.namelist() if n.endswith(('.csv', '.txt'))][0]
-            
-            with z.open(nome_interno) as f:
-                # Lendo com os padrões do TSE (Separador ; e Encoding Latin-1)
-                df = pd.read_csv(f, sep=';', encoding='latin-1', low_memory=False)
-                
-                # Criando o buffer para o Parquet
-                buffer_saida = io.BytesIO()
-                df.to_parquet(buffer_saida, index=False, engine='pyarrow')
-                return buffer_saida.getvalue()
-
-
-def executar_pipeline_bronze():
+        Returns:
+            str: Nome do Parquet na Bronze (gerado agora ou já atualizado).
+
+        Raises:
+            Exception: Falhas de download, conversão ou upload são propagadas.
     """
+    nome_parquet = nome_saida_bronze(arquivo.nome)
+    LOGGER.info(f"Processando: {nome_parquet}")
+
+    if not linhagem.precisa_processar(nome_parquet, arquivo, VERSAO_TRANSFORMADOR):
+        LOGGER.info(f"Pulando arquivo {nome_parquet}, já está atualizado na camada bronze.")
+        return nome_parquet
+
+    # ZIP e Parquet passam por arquivos temporários: o processo da conversão recebe só os caminhos.
+    with RASTREADOR.span("bronze", arquivo=nome_parquet), tempfile.TemporaryDirectory(prefix="bronze_") as pasta_temp:
+        with RASTREADOR.span("bronze.download", bytes=arquivo.tamanho or 0):
+            caminho_zip = manifesto_bronze.armazenamento.download_para_arquivo(
+                arquivo.id, os.path.join(pasta_temp, arquivo.nome), arquivo.md5)
+        caminho_parquet = os.path.join(pasta_temp, nome_parquet)
+
+        with RASTREADOR.span("bronze.conversao") as span:
+            linhas = executar_cpu(converter_zip_para_parquet, caminho_zip, caminho_parquet)
+            span.registrar(linhas=linhas)
+        LOGGER.info(f"{linhas} linhas convertidas para Parquet")
 
+        with RASTREADOR.span("bronze.upload", bytes=os.path.getsize(caminho_parquet)), \
+                open(caminho_parquet, "rb") as final_buffer:
+            manifesto_bronze.salvar_buffer(buffer=final_buffer, file_name=nome_parquet)
+    linhagem.registrar(nome_parquet, arquivo, VERSAO_TRANSFORMADOR)
+    return nome_parquet
+
+
+def executar_pipeline_bronze(jobs: list[tuple[int, str]] | None = None):
+    """
+        Converte para Parquet todos os ZIPs da camada de dados brutos (ou só os dos jobs (ano, UF) informados).
     """
     LOGGER.info("Iniciando pipeline BRONZE")
 
-    drive = GoogleDriveClient(
-        client_secret_file=Settings_Env.PATH_GOOGLE_OAUTH_CLIENT_SECRET,
-        token_file=Settings_Env.PATH_TOKEN_PICKLE,
-    )
+    armazenamento = obter_armazenamento_compartilhado()
 
     pasta_raw = Settings_Env.ID_DADOS_BRUTOS_BUCKET_GOOGLE_DRIVE
     pasta_bronze_id = Settings_Env.ID_PASTA_BRONZE
 
-    arquivos_raw = drive.listar_arquivos(folder_id=pasta_raw)
+    manifesto_raw = ManifestoPasta(armazenamento, pasta_raw)
+    manifesto_bronze = ManifestoPasta(armazenamento, pasta_bronze_id)
+    linhagem = RegistroLinhagem(manifesto_bronze)
 
+    arquivos_raw = [arquivo for arquivo in manifesto_raw if arquivo.nome.endswith(".zip") and pertence_aos_jobs(arquivo.nome, jobs)]
     LOGGER.info(f"{len(arquivos_raw)} arquivos encontrados na RAW")
 
     for arquivo in arquivos_raw:
-        nome_parquet = arquivo["name"].replace(".zip", ".parquet")
-        LOGGER.info(f"Processando: {nome_parquet}")
-
-        if drive.arquivo_existe(nome_arquivo=nome_parquet, folder_id=pasta_bronze_id):
-            LOGGER.info(f"Pulando arquivo {pasta_bronze_id}, já existe na camada bronze.")
-            continue
-
-        conteudo_zip = drive.download_file(arquivo["id"])
-
-        conteudo_parquet = transformar_para_parquet(zip_bytes=conteudo_zip)
+        try:
+            processar_arquivo_bronze(arquivo, manifesto_bronze, linhagem)
+        except Exception as e:
+            LOGGER.error(f"Erro ao processar {arquivo.nome} para a camada bronze: {e}")
 
-        with io.BytesIO(conteudo_parquet) as final_buffer:
-            drive.upload_buffer(buffer=final_buffer, file_name=nome_parquet, folder_drive_id=pasta_bronze_id)
-        
+    linhagem.salvar()
     LOGGER.info("Pipeline BRONZE finalizado")
@@ -0,0 +1,173 @@
+import logging
+from contextlib import ExitStack
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.orquestracao.pipeline_bronze import converter_zip_para_parquet
+from app.processamento.camadas import (
+    VERSAO_BRONZE, VERSAO_GOLD, VERSAO_SILVER, nome_saida_bronze, nome_saida_silver, nomes_tabelas_gold, pertence_aos_jobs,
+)
+from app.processamento.silver_transformer import COLUNAS_SILVER, aplicar_regras_silver
+from app.processamento.gold_transformer import agregar_cubo_gold
+from app.processamento.motor_arrow import gerar_cubo_gold_arrow, transformar_bronze_para_silver_arrow
+from app.processamento.particionamento import enviar_particionado_drive
+from app.storage.arquivo_spool import ArquivoSpool
+from app.storage.armazenamento import obter_armazenamento_compartilhado
+from app.storage.linhagem import RegistroLinhagem
+from app.storage.manifesto_pasta import ManifestoPasta
+from app.utils.instrumentacao import RASTREADOR
+from app.utils.vars_envs import Settings_Env
+
+LOGGER = logging.getLogger(__name__)
+
+
+def transformar_zip_fundido(fonte_zip, destino_bronze, motor: str | None = None
+                            ) -> tuple[pd.DataFrame | pa.Table, dict[str, pd.DataFrame | pa.Table]]:
+    """
+        Leva um ZIP bruto do TSE até a Gold em uma única passada.
+
+        Enquanto o CSV é convertido em lotes para o Parquet da Bronze, as colunas usadas
+        pela Silver são retidas como Arrow, evitando serializar e reler a Bronze. A Silver
+        e a Gold são então calculadas em memória, sem passar por bytes, com o mesmo motor
+        (`motor`, padrão `MOTOR_TRANSFORMACAO`) e a mesma `ORDENAR_SILVER` das etapas separadas.
+
+        Args:
+            fonte_zip: Objeto file-like (com seek) contendo o ZIP, ex: um `ArquivoSpool`.
+            destino_bronze: Objeto file-like gravável que recebe o Parquet da Bronze.
+
+        Returns:
+            tuple: (Silver, tabelas Gold por nível), como DataFrames no motor pandas e
+                tabelas Arrow no motor arrow.
+    """
+    motor = motor or Settings_Env.MOTOR_TRANSFORMACAO
+    if motor not in ("pandas", "arrow"):
+        raise ValueError(f"MOTOR_TRANSFORMACAO desconhecido: {motor} (use 'pandas' ou 'arrow')")
+
+    lotes_silver = []
+
+    def reter_colunas_silver(lote: pa.RecordBatch) -> None:
+        lotes_silver.append(lote.select([col for col in COLUNAS_SILVER if col in lote.schema.names]))
+
+    converter_zip_para_parquet(fonte_zip, destino_bronze, ao_ler_lote=reter_colunas_silver)
+
+    bronze = pa.Table.from_batches(lotes_silver)
+    lotes_silver.clear()
+
+    with RASTREADOR.span("fundido.silver", motor=motor, linhas=bronze.num_rows):
+        if motor == "arrow":
+            silver = transformar_bronze_para_silver_arrow(bronze, ordenar=Settings_Env.ORDENAR_SILVER)
+        else:
+            silver = aplicar_regras_silver(bronze.to_pandas(), ordenar=Settings_Env.ORDENAR_SILVER)
+    del bronze
+
+    with RASTREADOR.span("fundido.gold", motor=motor, linhas=len(silver)):
+        cubo_gold = gerar_cubo_gold_arrow(silver) if motor == "arrow" else agregar_cubo_gold(silver)
+
+    return silver, cubo_gold
+
+
+def _gravar_parquet(tabela: pd.DataFrame | pa.Table, destino, **opcoes) -> None:
+    """Grava a saída de qualquer um dos motores (DataFrame ou tabela Arrow) em `destino`."""
+    if isinstance(tabela, pa.Table):
+        pq.write_table(tabela, destino, **opcoes)
+    else:
+        tabela.to_parquet(destino, index=False, **opcoes)
+
+
+def _como_dataframe(tabela: pd.DataFrame | pa.Table) -> pd.DataFrame:
+    return tabela.to_pandas() if isinstance(tabela, pa.Table) else tabela
+
+
+def executar_pipeline_fundido(jobs: list[tuple[int, str]] | None = None):
+    """
+        Executa Bronze, Silver e Gold de uma vez para cada ZIP da camada de dados brutos.
+
+        Cada arquivo é baixado uma única vez e as três camadas são enviadas ao final.
+        Um arquivo é processado quando qualquer uma das três saídas estiver desatualizada
+        segundo a linhagem. As etapas separadas (`executar_pipeline_bronze`, `_silver`,
+        `_gold`) continuam disponíveis para backfills. Com `jobs`, só os ZIPs desses (ano, UF).
+    """
+    LOGGER.info("Iniciando pipeline FUNDIDO (Bronze -> Silver -> Gold)")
+
+    armazenamento = obter_armazenamento_compartilhado()
+
+    manifesto_raw = ManifestoPasta(armazenamento, Settings_Env.ID_DADOS_BRUTOS_BUCKET_GOOGLE_DRIVE)
+    manifesto_bronze = ManifestoPasta(armazenamento, Settings_Env.ID_PASTA_BRONZE)
+    manifesto_silver = ManifestoPasta(armazenamento, Settings_Env.ID_PASTA_SILVER)
+    manifesto_gold = ManifestoPasta(armazenamento, Settings_Env.ID_PASTA_GOLD)
+
+    linhagem_bronze = RegistroLinhagem(manifesto_bronze)
+    linhagem_silver = RegistroLinhagem(manifesto_silver)
+    linhagem_gold = RegistroLinhagem(manifesto_gold)
+
+    for arquivo in [arq for arq in manifesto_raw if arq.nome.endswith(".zip") and pertence_aos_jobs(arq.nome, jobs)]:
+        nome_bronze = nome_saida_bronze(arquivo.nome)
+        nome_silver = nome_saida_silver(nome_bronze)
+        nomes_gold = nomes_tabelas_gold(nome_silver)
+
+        bronze = manifesto_bronze.obter(nome_bronze)
+        silver = manifesto_silver.obter(nome_silver)
+
+        desatualizado = (
+            linhagem_bronze.precisa_processar(nome_bronze, arquivo, VERSAO_BRONZE)
+            or linhagem_silver.precisa_processar(nome_silver, bronze, VERSAO_SILVER)
+            or any(linhagem_gold.precisa_processar(nome, silver, VERSAO_GOLD) for nome in nomes_gold.values())
+        )
+        if not desatualizado:
+            LOGGER.info(f"PULANDO: {arquivo.nome} já está atualizado nas três camadas.")
+            continue
+
+        try:
+            LOGGER.info(f"Processando (fundido): {arquivo.nome}")
+            with RASTREADOR.span("fundido", arquivo=arquivo.nome), ExitStack() as pilha:
+                # Download e saídas em spools: memória até o limite, disco (mmap) acima dele.
+                with RASTREADOR.span("fundido.download", bytes=arquivo.tamanho or 0):
+                    arquivo_zip = pilha.enter_context(armazenamento.download_spool(arquivo.id, arquivo.md5))
+                arquivo_bronze = pilha.enter_context(ArquivoSpool())
+
+                dados_silver, cubo_gold = transformar_zip_fundido(arquivo_zip, arquivo_bronze)
+                arquivo_zip.close()
+
+                with RASTREADOR.span("fundido.serializar"):
+                    arquivo_silver = pilha.enter_context(ArquivoSpool())
+                    _gravar_parquet(dados_silver, arquivo_silver, row_group_size=Settings_Env.LINHAS_POR_ROW_GROUP)
+                    if Settings_Env.SAIDA_PARTICIONADA:
+                        enviar_particionado_drive(_como_dataframe(dados_silver), manifesto_silver, nome_silver.replace(".parquet", ""))
+                    del dados_silver
+
+                    arquivos_gold = {}
+                    for nivel, gold in cubo_gold.items():
+                        arquivos_gold[nivel] = pilha.enter_context(ArquivoSpool())
+                        _gravar_parquet(gold, arquivos_gold[nivel])
+
+                # Upload das três camadas ao final; a linhagem de cada uma aponta para a anterior já enviada.
+                with RASTREADOR.span("fundido.upload") as span:
+                    span.registrar(bytes=arquivo_bronze.seek(0, 2))
+                    arquivo_bronze.seek(0)
+                    manifesto_bronze.salvar_buffer(arquivo_bronze, nome_bronze)
+                    linhagem_bronze.registrar(nome_bronze, arquivo, VERSAO_BRONZE)
+
+                    span.registrar(bytes=arquivo_silver.seek(0, 2))
+                    arquivo_silver.seek(0)
+                    manifesto_silver.salvar_buffer(arquivo_silver, nome_silver)
+                    linhagem_silver.registrar(nome_silver, manifesto_bronze.obter(nome_bronze), VERSAO_SILVER)
+
+                    for nivel, arquivo_gold in arquivos_gold.items():
+                        span.registrar(bytes=arquivo_gold.seek(0, 2))
+                        arquivo_gold.seek(0)
+                        manifesto_gold.salvar_buffer(arquivo_gold, nomes_gold[nivel])
+                        if Settings_Env.SAIDA_PARTICIONADA:
+                            enviar_particionado_drive(_como_dataframe(cubo_gold[nivel]), manifesto_gold, nomes_gold[nivel].replace(".parquet", ""))
+                        linhagem_gold.registrar(nomes_gold[nivel], manifesto_silver.obter(nome_silver), VERSAO_GOLD)
+
+            LOGGER.info(f"SUCESSO: {nome_bronze}, {nome_silver} e {len(nomes_gold)} tabelas Gold gerados.")
+
+        except Exception as e:
+            LOGGER.error(f"Erro no pipeline fundido para {arquivo.nome}: {e}")
+
+    linhagem_bronze.salvar()
+    linhagem_silver.salvar()
+    linhagem_gold.salvar()
+    LOGGER.info("Pipeline FUNDIDO finalizado")
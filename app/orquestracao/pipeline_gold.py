@@ -1,51 +1,126 @@
-import io
 import logging
-from app.storage.google_drive import GoogleDriveClient
-from app.processamento.gold_transformer import transformar_silver_para_gold
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from app.storage.armazenamento import obter_armazenamento_compartilhado
+from app.storage.manifesto_pasta import ArquivoManifesto, ManifestoPasta
+from app.storage.linhagem import RegistroLinhagem
+from app.processamento.camadas import nomes_tabelas_gold, pertence_aos_jobs
+from app.processamento.motor_arrow import gerar_cubo_gold_arrow
+from app.processamento.particionamento import enviar_particionado_drive
+from app.processamento.gold_transformer import VERSAO_TRANSFORMADOR, gravar_cubo_gold
+from app.utils.execucao import ExecutorProcessos, executar_local
+from app.utils.instrumentacao import RASTREADOR
 from app.utils.vars_envs import Settings_Env
 
 LOGGER = logging.getLogger(__name__)
 
-def executar_pipeline_gold():
+def executar_pipeline_gold(jobs: list[tuple[int, str]] | None = None):
     """
+        Gera a Gold de todos os Parquets da Silver (ou só dos jobs (ano, UF) informados).
     """
     
     LOGGER.info("Iniciando Camada Gold: Agregação de Resultados")
     
-    drive = GoogleDriveClient(
-        client_secret_file=Settings_Env.PATH_GOOGLE_OAUTH_CLIENT_SECRET,
-        token_file=Settings_Env.PATH_TOKEN_PICKLE
-    )
+    armazenamento = obter_armazenamento_compartilhado()
     
     id_silver = Settings_Env.ID_PASTA_SILVER
     id_gold = Settings_Env.ID_PASTA_GOLD
 
     # 1. Busca arquivos na Silver
-    arquivos_silver = drive.listar_arquivos(id_silver)
+    arquivos_silver = ManifestoPasta(armazenamento, id_silver)
+    manifesto_gold = ManifestoPasta(armazenamento, id_gold)
+    linhagem = RegistroLinhagem(manifesto_gold)
 
-    for arq in arquivos_silver:
-        if "_silver.parquet" in arq['name']:
-            nome_gold = arq['name'].replace("_silver.parquet", "_gold_municipio.parquet")
+    # Download, agregação (em outro processo) e upload de arquivos diferentes se sobrepõem.
+    arquivos = [arq for arq in arquivos_silver if "_silver.parquet" in arq.nome and pertence_aos_jobs(arq.nome, jobs)]
+    with ExecutorProcessos(Settings_Env.NUM_PROCESSOS_CPU) as executar_cpu, \
+            ThreadPoolExecutor(max_workers=Settings_Env.LIMITE_CONCORRENCIA_GOLD, thread_name_prefix="gold") as pool:
+        futuros = {
+            pool.submit(processar_arquivo_gold, arq, manifesto_gold, linhagem, executar_cpu): arq
+            for arq in arquivos
+        }
+        for futuro in as_completed(futuros):
+            try:
+                futuro.result()
+            except Exception as e:
+                LOGGER.error(f"Erro na Camada Gold para {futuros[futuro].nome}: {e}")
 
-            if drive.arquivo_existe(nome_gold, id_gold):
-                LOGGER.info(f"PULANDO: {nome_gold} já consolidado.")
-                continue
+    linhagem.salvar()
 
-            try:
-                # 2. Download Silver -> RAM
-                bytes_silver = drive.download_file(arq['id'])
-                
-                # 3. Transformação em Ouro (Agregação)
-                df_gold = transformar_silver_para_gold(io.BytesIO(bytes_silver))
 
-                # 4. Upload para Gold
-                buffer_gold = io.BytesIO()
-                df_gold.to_parquet(buffer_gold, index=False)
-                
-                buffer_gold.seek(0) 
+def processar_arquivo_gold(arq: ArquivoManifesto, manifesto_gold: ManifestoPasta,
+                           linhagem: RegistroLinhagem, executar_cpu: Callable = executar_local) -> list[str]:
+    """
+        Gera as tabelas Gold (todos os níveis do cubo) de um Parquet da Silver.
 
-                drive.upload_buffer(buffer_gold, nome_gold, id_gold)
-                LOGGER.info(f"SUCESSO: Tabela Gold {nome_gold} gerada e salva em: {id_gold}")
+        Returns:
+            list[str]: Nomes das tabelas Gold (geradas agora ou já atualizadas).
 
-            except Exception as e:
-                LOGGER.error(f"Erro na Camada Gold para {arq['name']}: {e}")
\ No newline at end of file
+        Raises:
+            Exception: Falhas de download, agregação ou upload são propagadas.
+    """
+    nomes_gold = nomes_tabelas_gold(arq.nome)
+
+    if not any(linhagem.precisa_processar(nome, arq, VERSAO_TRANSFORMADOR) for nome in nomes_gold.values()):
+        LOGGER.info(f"PULANDO: {arq.nome} já consolidado em todos os níveis.")
+        return list(nomes_gold.values())
+
+    # Silver e Gold passam por arquivos temporários: o processo da agregação recebe só os caminhos.
+    with RASTREADOR.span("gold", arquivo=arq.nome), tempfile.TemporaryDirectory(prefix="gold_") as pasta_temp:
+        # 1. Download Silver -> disco
+        with RASTREADOR.span("gold.download", bytes=arq.tamanho or 0):
+            caminho_silver = manifesto_gold.armazenamento.download_para_arquivo(
+                arq.id, os.path.join(pasta_temp, arq.nome), arq.md5)
+        caminhos_gold = {nivel: os.path.join(pasta_temp, nome) for nivel, nome in nomes_gold.items()}
+
+        # 2. Transformação em Ouro (Agregação em todos os níveis em uma única leitura)
+        with RASTREADOR.span("gold.conversao"):
+            executar_cpu(transformar_arquivo_silver_para_gold, caminho_silver, caminhos_gold)
+
+        # 3. Upload para Gold (uma tabela por nível)
+        for nivel, caminho_gold in caminhos_gold.items():
+            with RASTREADOR.span("gold.upload", nivel=nivel, bytes=os.path.getsize(caminho_gold)), \
+                    open(caminho_gold, "rb") as buffer_gold:
+                manifesto_gold.salvar_buffer(buffer_gold, nomes_gold[nivel])
+            if Settings_Env.SAIDA_PARTICIONADA:
+                with RASTREADOR.span("gold.upload_particionado", nivel=nivel):
+                    enviar_particionado_drive(pd.read_parquet(caminho_gold, memory_map=True), manifesto_gold,
+                                              nomes_gold[nivel].replace(".parquet", ""))
+            linhagem.registrar(nomes_gold[nivel], arq, VERSAO_TRANSFORMADOR)
+            LOGGER.info(f"SUCESSO: Tabela Gold {nomes_gold[nivel]} gerada e salva em: {manifesto_gold.folder_id}")
+
+    return list(nomes_gold.values())
+
+
+def transformar_arquivo_silver_para_gold(caminho_silver: str, caminhos_gold: dict[str, str], motor: str | None = None) -> None:
+    """
+        Silver -> um Parquet por nível Gold, entre arquivos em disco. Pode rodar em outro processo.
+
+        `motor` (padrão `MOTOR_TRANSFORMACAO`) escolhe entre o pandas e o plano do Acero
+        (`motor_arrow`); as tabelas geradas são as mesmas.
+    """
+    motor = motor or Settings_Env.MOTOR_TRANSFORMACAO
+    if motor == "pandas":
+        # A tabela da seção é gravada fatia a fatia junto com a agregação, sem passar
+        # inteira pela memória.
+        with RASTREADOR.span("gold.agregar", motor=motor, bytes=os.path.getsize(caminho_silver)) as span:
+            linhas = gravar_cubo_gold(caminho_silver, caminhos_gold)
+            span.registrar(linhas=sum(linhas.values()),
+                           bytes_gold=sum(os.path.getsize(caminho) for caminho in caminhos_gold.values()))
+        return
+    if motor != "arrow":
+        raise ValueError(f"MOTOR_TRANSFORMACAO desconhecido: {motor} (use 'pandas' ou 'arrow')")
+
+    with RASTREADOR.span("gold.agregar", motor=motor, bytes=os.path.getsize(caminho_silver)):
+        cubo = gerar_cubo_gold_arrow(caminho_silver)
+
+    for nivel, gold in cubo.items():
+        with RASTREADOR.span("gold.serializar", nivel=nivel, linhas=len(gold)) as span:
+            pq.write_table(gold, caminhos_gold[nivel])
+            span.registrar(bytes=os.path.getsize(caminhos_gold[nivel]))
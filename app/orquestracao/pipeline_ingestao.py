@@ -1,56 +1,415 @@
+import hashlib
 import io
 import logging
+import queue
+import threading
+import time
+import zipfile
 
 from app.ingestao.tse_extrator import ExtratorDados
-from app.storage.google_drive import GoogleDriveClient
+from app.processamento.camadas import VERSAO_INGESTAO as VERSAO_TRANSFORMADOR
+from app.storage.checkpoint_ingestao import CheckpointIngestao, RegistroCheckpoints
+from app.storage.controle_cota import ErroHttpDrive
+from app.storage.armazenamento import obter_armazenamento_compartilhado
+from app.storage.google_drive import GRANULARIDADE_UPLOAD, SessaoUploadResumable
+from app.storage.manifesto_pasta import ArquivoManifesto, ManifestoPasta
+from app.storage.linhagem import RegistroLinhagem
+from app.utils.instrumentacao import RASTREADOR, Span
 from app.utils.vars_envs import Settings_Env
 
 LOGGER = logging.getLogger(__name__)
 
+_FIM_DOWNLOAD = object()
 
-def executar_pipeline_ingestao(ano: int, sigla_estado: str) -> None:
+# Trecho antes do checkpoint rebaixado numa retomada para conferir que o arquivo no TSE não mudou.
+TAMANHO_CAUDA = GRANULARIDADE_UPLOAD
+
+
+class ErroRetomadaIngestao(RuntimeError):
+    """O arquivo no TSE não é mais o que estava sendo enviado: a ingestão precisa recomeçar."""
+
+
+class ErroIntegridadeIngestao(IOError):
+    """O ZIP gravado no Drive não passou na verificação final."""
+
+
+def _origem_tse(extrator: ExtratorDados, link: str) -> ArquivoManifesto:
     """
+        Descreve o arquivo publicado pelo TSE para a linhagem da camada de dados brutos.
+
+        O TSE não publica checksums, então o ETag (ou o Last-Modified) da resposta faz o
+        papel do checksum: uma republicação corrigida muda esse valor e força a reingestão.
     """
+    info = extrator.downloader.sondar(link)
+    return ArquivoManifesto(
+        id=link,
+        nome=link,
+        tamanho=info.tamanho,
+        md5=info.etag,
+        modificado_em=info.ultima_modificacao,
+    )
 
-    LOGGER.info("Iniciando pipeline TSE (Consolidado)")
-    LOGGER.info(f"Ano: {ano} | Estado: {sigla_estado}")
 
-    extrator = ExtratorDados()
-    drive = GoogleDriveClient(
-        client_secret_file=Settings_Env.PATH_GOOGLE_OAUTH_CLIENT_SECRET,
-        token_file="credenciais/token.pickle",
+def _colocar_na_fila(fila: queue.Queue, item, parar: threading.Event) -> bool:
+    """Coloca o item na fila, desistindo se o consumidor sinalizar parada."""
+    while not parar.is_set():
+        try:
+            fila.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produzir_fatias(extrator: ExtratorDados, link: str, fila: queue.Queue, parar: threading.Event,
+                     inicio: int = 0, span_pai: Span | None = None) -> None:
+    """
+        Baixa as fatias do TSE e as coloca na fila de upload.
+
+        A fila é limitada, então o download fica bloqueado quando o upload está atrasado,
+        mantendo no máximo `MAX_FATIAS_EM_MEMORIA` fatias em RAM. Um erro no download é
+        repassado ao consumidor pela própria fila. O span do download registra os bytes
+        e o tempo bloqueado na fila (`espera_fila_segundos`).
+    """
+    fatias = extrator.baixar_em_fatias(link, chunk_size_bytes=Settings_Env.TAMANHO_FATIA_INGESTAO_BYTES, inicio=inicio)
+    with RASTREADOR.span("ingestao.download", pai=span_pai) as span:
+        try:
+            for fatia_dados, num_parte in fatias:
+                LOGGER.info(f"Recebendo parte {num_parte}")
+                espera = time.perf_counter()
+                if not _colocar_na_fila(fila, fatia_dados, parar):
+                    return
+                span.registrar(bytes=len(fatia_dados), espera_fila_segundos=time.perf_counter() - espera)
+            _colocar_na_fila(fila, _FIM_DOWNLOAD, parar)
+        except Exception as error:
+            _colocar_na_fila(fila, error, parar)
+        finally:
+            fatias.close() # Fecha a conexão com o TSE caso o consumidor tenha desistido.
+
+
+def _retirar_da_fila(fila: queue.Queue, produtor: threading.Thread, prazo_segundos: float):
+    """
+        Próximo item da fila de fatias, sem esperar para sempre por um download parado.
+
+        Raises:
+            IOError: Se a thread produtora morreu sem entregar o fim do download.
+            TimeoutError: Se nenhuma fatia chegar em `prazo_segundos`.
+    """
+    limite = time.monotonic() + prazo_segundos
+    while True:
+        try:
+            return fila.get(timeout=1)
+        except queue.Empty:
+            pass
+
+        if not produtor.is_alive():
+            try:
+                return fila.get_nowait() # Item colocado logo antes de a thread terminar.
+            except queue.Empty:
+                raise IOError("O download do TSE terminou sem entregar o fim do arquivo") from None
+        if time.monotonic() >= limite:
+            raise TimeoutError(f"Nenhuma fatia do TSE em {prazo_segundos:.0f}s: download parado")
+
+
+def _registro_checkpoints() -> RegistroCheckpoints | None:
+    """Checkpoints da ingestão em streaming (desativados com `DIRETORIO_CHECKPOINTS_INGESTAO` vazio)."""
+    diretorio = Settings_Env.DIRETORIO_CHECKPOINTS_INGESTAO
+    return RegistroCheckpoints(diretorio) if diretorio else None
+
+
+def _abrir_sessao(manifesto: ManifestoPasta, link: str, nome_arquivo: str, origem: ArquivoManifesto,
+                  checkpoints: RegistroCheckpoints | None) -> tuple[SessaoUploadResumable, CheckpointIngestao]:
+    """
+        Retoma a sessão de upload do checkpoint, se o arquivo no TSE for o mesmo e a
+        sessão ainda existir no Drive; senão, inicia uma nova (e um novo checkpoint).
+    """
+    checkpoint = checkpoints.carregar(nome_arquivo) if checkpoints else None
+
+    if checkpoint is not None:
+        if not checkpoint.mesma_origem(link, origem):
+            LOGGER.info(f"{nome_arquivo} mudou no TSE desde a última tentativa; a ingestão recomeça do zero.")
+        else:
+            try:
+                sessao = manifesto.armazenamento.retomar_upload_resumable(checkpoint.uri_sessao)
+            except (ErroHttpDrive, FileNotFoundError) as error:
+                LOGGER.warning(f"Sessão de upload de {nome_arquivo} não pode ser retomada: {error}")
+            else:
+                if sessao.offset >= checkpoint.offset:
+                    checkpoint.retomadas += 1
+                    checkpoints.salvar(checkpoint)
+                    LOGGER.info(f"Retomando {nome_arquivo}: {sessao.offset} bytes já estão no Drive.")
+                    return sessao, checkpoint
+                LOGGER.warning(f"Drive confirmou menos bytes de {nome_arquivo} que o checkpoint; recomeçando.")
+        checkpoints.remover(nome_arquivo)
+
+    sessao = manifesto.armazenamento.iniciar_upload_resumable(
+        file_name=nome_arquivo,
+        folder_drive_id=manifesto.folder_id,
+        file_id=manifesto.existe(nome_arquivo), # Republicação: substitui o conteúdo do arquivo existente.
     )
-    dados_brutos_folder_id = Settings_Env.ID_DADOS_BRUTOS_BUCKET_GOOGLE_DRIVE
+    checkpoint = CheckpointIngestao(
+        nome_arquivo=nome_arquivo,
+        link=link,
+        uri_sessao=sessao.uri_sessao,
+        tamanho_total=origem.tamanho,
+        etag=origem.md5,
+        ultima_modificacao=origem.modificado_em,
+    )
+    if checkpoints:
+        checkpoints.salvar(checkpoint)
+    return sessao, checkpoint
+
 
+def _transferir(extrator: ExtratorDados, sessao: SessaoUploadResumable, link: str,
+                checkpoint: CheckpointIngestao, checkpoints: RegistroCheckpoints | None) -> str | None:
+    """
+        Baixa do TSE a partir do checkpoint e envia à sessão do Drive, gravando o
+        checkpoint a cada fatia confirmada.
+
+        O consumidor não espera para sempre: se o produtor morrer ou nenhuma fatia chegar
+        no prazo de uma faixa, a transferência falha e o checkpoint fica para a retomada.
 
-    # 1. Raspagem (Supondo que retorna uma lista ou um link único)
-    link = extrator.raspar_dados_tse(ano=ano, sigla_estado=sigla_estado)
-    nome_arquivo = link.split("/")[-1]
+        Uma retomada começa `TAMANHO_CAUDA` bytes antes do checkpoint: o md5 desse trecho
+        tem que bater com o `md5_cauda` gravado, o que garante que o restante baixado
+        continua o mesmo arquivo. Bytes que o Drive já tem (checkpoint atrasado em relação
+        à sessão) são baixados, mas não reenviados.
 
-    if drive.arquivo_existe(nome_arquivo=nome_arquivo, folder_id=dados_brutos_folder_id):
-        LOGGER.info(f"O arquivo {nome_arquivo}  já existe no DataLake. Parando processo.")
-        return
-    
-    
+        Returns:
+            str | None: md5 do arquivo inteiro quando ele passou todo por esta execução,
+                ou None em uma retomada (o estado do hash não sobrevive entre execuções).
+    """
+    verificar_cauda = checkpoint.offset > 0 and checkpoint.md5_cauda is not None
+    inicio = checkpoint.offset - TAMANHO_CAUDA if verificar_cauda else checkpoint.offset
+    hash_completo = hashlib.md5() if inicio == 0 else None
+    cauda = b""
+    envio = {"segundos": 0.0, "bytes": 0}
+
+    def registrar(dados) -> None:
+        """Atualiza hash, cauda e checkpoint depois que `dados` está no Drive."""
+        nonlocal cauda
+        if hash_completo is not None:
+            hash_completo.update(dados)
+        cauda = bytes(dados[-TAMANHO_CAUDA:]) if len(dados) >= TAMANHO_CAUDA else (cauda + bytes(dados))[-TAMANHO_CAUDA:]
+        if checkpoints:
+            checkpoint.offset = sessao.offset
+            checkpoint.md5_cauda = hashlib.md5(cauda).hexdigest()
+            checkpoints.salvar(checkpoint)
+
+    def enviar(dados, posicao: int, final: bool = False) -> None:
+        ja_no_drive = sessao.offset - posicao
+        if final or ja_no_drive < len(dados):
+            inicio_envio = time.perf_counter()
+            sessao.enviar_fatia(dados[max(ja_no_drive, 0):], final=final)
+            envio["segundos"] += time.perf_counter() - inicio_envio
+            envio["bytes"] += len(dados) - max(ja_no_drive, 0)
+        registrar(dados)
+
+    with RASTREADOR.span("ingestao.transferencia", offset_inicial=inicio) as span:
+        fila = queue.Queue(maxsize=Settings_Env.MAX_FATIAS_EM_MEMORIA)
+        parar = threading.Event()
+        produtor = threading.Thread(target=_produzir_fatias, args=(extrator, link, fila, parar, inicio, span), daemon=True)
+        produtor.start()
+
+        # O consumidor segura sempre uma fatia de antecedência, pois só é possível saber
+        # qual é a última (que finaliza o upload) quando o download termina.
+        posicao = inicio
+        fatia_pendente, posicao_pendente = None, inicio
+        # Uma fatia atrasa no máximo o prazo de uma faixa do downloader (todas as tentativas).
+        prazo_fatia = extrator.downloader.prazo_faixa_segundos
+        try:
+            while True:
+                item = _retirar_da_fila(fila, produtor, prazo_fatia)
+
+                if isinstance(item, Exception):
+                    raise item
+                if item is _FIM_DOWNLOAD:
+                    break
+
+                if verificar_cauda:
+                    trecho = bytes(item[:TAMANHO_CAUDA])
+                    if hashlib.md5(trecho).hexdigest() != checkpoint.md5_cauda:
+                        raise ErroRetomadaIngestao(f"{checkpoint.nome_arquivo}: conteúdo no TSE difere do já enviado")
+                    cauda, item, posicao, verificar_cauda = trecho, item[TAMANHO_CAUDA:], posicao + TAMANHO_CAUDA, False
+                    if not len(item):
+                        continue
+
+                if fatia_pendente is not None:
+                    enviar(fatia_pendente, posicao_pendente)
+                fatia_pendente, posicao_pendente = item, posicao
+                posicao += len(item)
+
+            LOGGER.info(f"Finalizando envio de {checkpoint.nome_arquivo} para o DataLake...")
+            enviar(fatia_pendente if fatia_pendente is not None else b"", posicao_pendente, final=True)
+            return hash_completo.hexdigest() if hash_completo is not None else None
+        finally:
+            parar.set()
+            produtor.join(timeout=prazo_fatia)
+            if produtor.is_alive():
+                LOGGER.warning(f"Download de {checkpoint.nome_arquivo} ainda em andamento após a interrupção; a thread fica para trás.")
+            # Tempo de upload somado fatia a fatia (o download tem o próprio span, na thread produtora).
+            RASTREADOR.registrar_etapa("ingestao.upload", envio["segundos"], bytes=envio["bytes"])
+
+
+def _verificar_integridade(armazenamento, metadados: dict, tamanho_esperado: int | None, md5_local: str | None) -> None:
+    """
+        Confere o ZIP gravado no Drive antes de a ingestão contar como concluída.
+
+        - tamanho igual ao publicado pelo TSE;
+        - md5 igual ao calculado durante o download, quando o arquivo passou inteiro por esta execução;
+        - diretório central do ZIP legível e consistente (lido do Drive por HTTP Range:
+          só o fim do arquivo é baixado). Um arquivo truncado falha aqui.
+
+        Raises:
+            ErroIntegridadeIngestao: Se alguma verificação falhar.
+    """
+    nome, tamanho = metadados.get("name"), int(metadados.get("size", -1))
+    if tamanho_esperado is not None and tamanho != tamanho_esperado:
+        raise ErroIntegridadeIngestao(f"{nome}: tamanho no Drive ({tamanho}) difere do publicado pelo TSE ({tamanho_esperado})")
+
+    md5_drive = metadados.get("md5Checksum")
+    if md5_local and md5_drive and md5_local != md5_drive:
+        raise ErroIntegridadeIngestao(f"{nome}: md5 no Drive ({md5_drive}) difere do baixado ({md5_local})")
+
+    try:
+        with zipfile.ZipFile(io.BufferedReader(armazenamento.abrir_leitura_aleatoria(metadados["id"], tamanho))) as z:
+            membros = z.infolist()
+    except zipfile.BadZipFile as error:
+        raise ErroIntegridadeIngestao(f"{nome}: ZIP inválido no Drive: {error}") from error
+
+    if not membros or max(m.header_offset + m.compress_size for m in membros) > tamanho:
+        raise ErroIntegridadeIngestao(f"{nome}: diretório central do ZIP inconsistente com o tamanho do arquivo")
+
+
+def _ingerir_em_streaming(extrator: ExtratorDados, manifesto: ManifestoPasta, link: str,
+                          nome_arquivo: str, origem: ArquivoManifesto) -> str | None:
+    """
+        Envia cada fatia baixada direto para uma sessão de upload resumable do Drive
+        enquanto a próxima fatia está sendo baixada.
+
+        Com checkpoints ativos, uma falha no meio da transferência mantém a sessão e o
+        checkpoint: a próxima execução retoma o download por HTTP Range e continua a
+        mesma sessão de upload. O ZIP final é verificado antes de ser registrado.
+    """
+    checkpoints = _registro_checkpoints()
+    sessao, checkpoint = _abrir_sessao(manifesto, link, nome_arquivo, origem, checkpoints)
+
+    try:
+        md5_local = None
+        if sessao.metadados is None:
+            md5_local = _transferir(extrator, sessao, link, checkpoint, checkpoints)
+        with RASTREADOR.span("ingestao.verificar"):
+            _verificar_integridade(manifesto.armazenamento, sessao.metadados, origem.tamanho, md5_local)
+
+    except (ErroRetomadaIngestao, ErroIntegridadeIngestao):
+        # Conteúdo divergente ou arquivo final inválido: nada a retomar, a próxima execução recomeça.
+        if checkpoints:
+            checkpoints.remover(nome_arquivo)
+        if sessao.metadados is None:
+            sessao.cancelar()
+        raise
+    except Exception:
+        if not checkpoints:
+            sessao.cancelar()
+        else:
+            LOGGER.warning(f"Ingestão de {nome_arquivo} interrompida em {sessao.offset} bytes; "
+                           f"a próxima execução retoma deste ponto.")
+        raise
+
+    if checkpoints:
+        checkpoints.remover(nome_arquivo)
+    return manifesto.registrar(sessao.metadados).id
+
+
+def _ingerir_em_memoria(extrator: ExtratorDados, manifesto: ManifestoPasta, link: str,
+                        nome_arquivo: str, origem: ArquivoManifesto) -> str | None:
+    """Baixa o arquivo inteiro para a memória e só então faz o upload."""
     arquivo_completo = io.BytesIO()
     try:
-        for fatia_dados, num_parte in extrator.baixar_em_fatias(link):
-            LOGGER.info(f"Recebendo parte {num_parte}")
-            arquivo_completo.write(fatia_dados)
+        with RASTREADOR.span("ingestao.download") as span:
+            for fatia_dados, num_parte in extrator.baixar_em_fatias(link):
+                LOGGER.info(f"Recebendo parte {num_parte}")
+                arquivo_completo.write(fatia_dados)
+            recebido = arquivo_completo.getbuffer().nbytes
+            span.registrar(bytes=recebido)
+
+        if origem.tamanho is not None and recebido != origem.tamanho:
+            raise IOError(f"Download de {nome_arquivo} incompleto: {recebido} de {origem.tamanho} bytes")
 
         arquivo_completo.seek(0)
         LOGGER.info(f"Enviando {nome_arquivo} completo para o DataLake...")
-        file_id = drive.upload_buffer(
-            buffer=arquivo_completo,
-            file_name=nome_arquivo,
-            folder_drive_id=dados_brutos_folder_id
-        )
-        if file_id:
-            LOGGER.info(f"Arquivo salvo com ID: {file_id}")
-
-    except Exception as error:
-        LOGGER.info(f"[executar_pipeline_ingestao] - Erro: {error}")
+        with RASTREADOR.span("ingestao.upload", bytes=recebido):
+            return manifesto.salvar_buffer(
+                buffer=arquivo_completo,
+                file_name=nome_arquivo,
+            )
     finally:
         arquivo_completo.close()
 
-    LOGGER.info(f"Pipeline de ingestão finalizado com sucesso {nome_arquivo}. ")
\ No newline at end of file
+
+def ingerir_arquivo_tse(extrator: ExtratorDados, manifesto_brutos: ManifestoPasta, linhagem: RegistroLinhagem,
+                        ano: int, sigla_estado: str, modo_streaming: bool = True) -> str:
+    """
+        Raspa o link do TSE para o ano/estado e grava o ZIP na camada de dados brutos,
+        se ele ainda não estiver lá atualizado.
+
+        Returns:
+            str: Nome do ZIP na pasta de dados brutos.
+
+        Raises:
+            Exception: Falhas de raspagem, download ou upload são propagadas.
+    """
+    with RASTREADOR.span("ingestao", ano=ano, uf=sigla_estado) as span:
+        # 1. Raspagem (Supondo que retorna uma lista ou um link único)
+        with RASTREADOR.span("ingestao.raspar"):
+            link = extrator.raspar_dados_tse(ano=ano, sigla_estado=sigla_estado)
+        if not link:
+            raise FileNotFoundError(f"Arquivo de {sigla_estado}/{ano} não encontrado na página do TSE")
+        nome_arquivo = link.split("/")[-1]
+        span.registrar(arquivo=nome_arquivo)
+
+        with RASTREADOR.span("ingestao.sondar"):
+            origem = _origem_tse(extrator, link)
+        extrator.catalogo.registrar_sondagem(ano, sigla_estado, origem.tamanho, origem.modificado_em)
+        if not linhagem.precisa_processar(nome_arquivo, origem, VERSAO_TRANSFORMADOR):
+            LOGGER.info(f"O arquivo {nome_arquivo}  já existe no DataLake e está atualizado. Parando processo.")
+            return nome_arquivo
+
+        span.registrar(bytes=origem.tamanho or 0)
+        ingerir = _ingerir_em_streaming if modo_streaming else _ingerir_em_memoria
+        file_id = ingerir(extrator, manifesto_brutos, link, nome_arquivo, origem)
+        if not file_id:
+            raise IOError(f"Upload de {nome_arquivo} não retornou um ID")
+
+    LOGGER.info(f"Arquivo salvo com ID: {file_id}")
+    linhagem.registrar(nome_arquivo, origem, VERSAO_TRANSFORMADOR)
+    return nome_arquivo
+
+
+def executar_pipeline_ingestao(ano: int, sigla_estado: str, modo_streaming: bool = True) -> None:
+    """
+        Raspa o link do TSE para o ano/estado e salva o ZIP na camada de dados brutos.
+
+        Args:
+            ano (int): Ano da eleição.
+            sigla_estado (str): Sigla da UF (ex: 'CE').
+            modo_streaming (bool): Quando True, cada fatia baixada é enviada ao Drive
+                enquanto a próxima é baixada (memória limitada a algumas fatias). Quando
+                False, o arquivo inteiro é montado em memória antes do upload.
+    """
+
+    LOGGER.info("Iniciando pipeline TSE (Consolidado)")
+    LOGGER.info(f"Ano: {ano} | Estado: {sigla_estado}")
+
+    extrator = ExtratorDados()
+    armazenamento = obter_armazenamento_compartilhado()
+    dados_brutos_folder_id = Settings_Env.ID_DADOS_BRUTOS_BUCKET_GOOGLE_DRIVE
+    manifesto_brutos = ManifestoPasta(armazenamento, dados_brutos_folder_id)
+    linhagem = RegistroLinhagem(manifesto_brutos)
+
+    try:
+        nome_arquivo = ingerir_arquivo_tse(extrator, manifesto_brutos, linhagem, ano, sigla_estado, modo_streaming)
+        linhagem.salvar()
+        LOGGER.info(f"Pipeline de ingestão finalizado com sucesso {nome_arquivo}. ")
+
+    except Exception as error:
+        LOGGER.info(f"[executar_pipeline_ingestao] - Erro: {error}")
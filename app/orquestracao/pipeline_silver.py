@@ -1,48 +1,125 @@
-import io
 import logging
-from app.storage.google_drive import GoogleDriveClient
-from app.processamento.silver_transformer import transformar_bronze_para_silver
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from app.storage.armazenamento import obter_armazenamento_compartilhado
+from app.storage.manifesto_pasta import ArquivoManifesto, ManifestoPasta
+from app.storage.linhagem import RegistroLinhagem
+from app.processamento.camadas import nome_saida_silver, pertence_aos_jobs
+from app.processamento.motor_arrow import transformar_bronze_para_silver_arrow
+from app.processamento.particionamento import enviar_particionado_drive
+from app.processamento.silver_transformer import VERSAO_TRANSFORMADOR, transformar_bronze_para_silver
+from app.utils.execucao import ExecutorProcessos, executar_local
+from app.utils.instrumentacao import RASTREADOR
 from app.utils.vars_envs import Settings_Env
 
 LOGGER = logging.getLogger(__name__)
 
-def executar_pipeline_silver():
+def executar_pipeline_silver(jobs: list[tuple[int, str]] | None = None):
+    """
+        Gera a Silver de todos os Parquets da Bronze (ou só dos jobs (ano, UF) informados).
+    """
     LOGGER.info("Iniciando Pipeline Silver...")
     
-    drive = GoogleDriveClient(
-        client_secret_file=Settings_Env.PATH_GOOGLE_OAUTH_CLIENT_SECRET,
-        token_file=Settings_Env.PATH_TOKEN_PICKLE
-    ) 
+    armazenamento = obter_armazenamento_compartilhado()
     
     id_bronze = Settings_Env.ID_PASTA_BRONZE
     id_silver = Settings_Env.ID_PASTA_SILVER
 
     # 1. Lista arquivos Parquet na Bronze
-    arquivos_bronze = drive.listar_arquivos(id_bronze)
+    arquivos_bronze = ManifestoPasta(armazenamento, id_bronze)
+    manifesto_silver = ManifestoPasta(armazenamento, id_silver)
+    linhagem = RegistroLinhagem(manifesto_silver)
+
+    # Download, transformação (em outro processo) e upload de arquivos diferentes se sobrepõem:
+    # cada thread leva um arquivo do início ao fim, e as transformações dividem os núcleos.
+    arquivos = [arq for arq in arquivos_bronze if arq.nome.endswith('.parquet') and pertence_aos_jobs(arq.nome, jobs)]
+    with ExecutorProcessos(Settings_Env.NUM_PROCESSOS_CPU) as executar_cpu, \
+            ThreadPoolExecutor(max_workers=Settings_Env.LIMITE_CONCORRENCIA_SILVER, thread_name_prefix="silver") as pool:
+        futuros = {
+            pool.submit(processar_arquivo_silver, arq, manifesto_silver, linhagem, executar_cpu): arq
+            for arq in arquivos
+        }
+        for futuro in as_completed(futuros):
+            try:
+                futuro.result()
+            except Exception as e:
+                LOGGER.error(f"❌ Erro ao processar silver para {futuros[futuro].nome}: {e}")
 
-    for arq in arquivos_bronze:
-        if arq['name'].endswith('.parquet'):
-            nome_silver = arq['name'].replace(".parquet", "_silver.parquet")
+    linhagem.salvar()
 
-            # 2. Verifica se já foi processado
-            if drive.arquivo_existe(nome_silver, id_silver):
-                LOGGER.info(f"PULANDO: {nome_silver} já existe.")
-                continue
 
-            try:
-                # 3. Download da Bronze
-                bytes_bronze = drive.download_file(arq['id'])
-                
-                # 4. Transformação (Limpeza e Regras de Negócio)
-                df_silver = transformar_bronze_para_silver(io.BytesIO(bytes_bronze))
+def processar_arquivo_silver(arq: ArquivoManifesto, manifesto_silver: ManifestoPasta,
+                             linhagem: RegistroLinhagem, executar_cpu: Callable = executar_local) -> str:
+    """
+        Gera a Silver de um Parquet da Bronze.
 
-                # 5. Upload para Silver
-                buffer_silver = io.BytesIO()
-                df_silver.to_parquet(buffer_silver, index=False)
-                buffer_silver.seek(0)
+        Returns:
+            str: Nome do Parquet na Silver (gerado agora ou já atualizado).
 
-                drive.upload_buffer(buffer_silver, nome_silver, id_silver)
-                LOGGER.info(f"✅ SUCESSO: {nome_silver} gerado.")
+        Raises:
+            Exception: Falhas de download, transformação ou upload são propagadas.
+    """
+    nome_silver = nome_saida_silver(arq.nome)
 
-            except Exception as e:
-                LOGGER.error(f"❌ Erro ao processar silver para {arq['name']}: {e}")
\ No newline at end of file
+    # 1. Verifica se já foi processado a partir da versão atual da Bronze
+    if not linhagem.precisa_processar(nome_silver, arq, VERSAO_TRANSFORMADOR):
+        LOGGER.info(f"PULANDO: {nome_silver} já está atualizado.")
+        return nome_silver
+
+    # Bronze e Silver passam por arquivos temporários: o processo da transformação recebe só os caminhos.
+    with RASTREADOR.span("silver", arquivo=nome_silver), tempfile.TemporaryDirectory(prefix="silver_") as pasta_temp:
+        # 2. Download da Bronze
+        with RASTREADOR.span("silver.download", bytes=arq.tamanho or 0):
+            caminho_bronze = manifesto_silver.armazenamento.download_para_arquivo(
+                arq.id, os.path.join(pasta_temp, arq.nome), arq.md5)
+        caminho_silver = os.path.join(pasta_temp, nome_silver)
+
+        # 3. Transformação (Limpeza e Regras de Negócio)
+        with RASTREADOR.span("silver.conversao"):
+            executar_cpu(transformar_arquivo_bronze_para_silver, caminho_bronze, caminho_silver)
+
+        # 4. Upload para Silver
+        with RASTREADOR.span("silver.upload", bytes=os.path.getsize(caminho_silver)), \
+                open(caminho_silver, "rb") as buffer_silver:
+            manifesto_silver.salvar_buffer(buffer_silver, nome_silver)
+
+        # 5. Dataset particionado (NR_TURNO/DS_CARGO/CD_MUNICIPIO) para leitura seletiva
+        if Settings_Env.SAIDA_PARTICIONADA:
+            with RASTREADOR.span("silver.upload_particionado"):
+                df_silver = pd.read_parquet(caminho_silver, memory_map=True)
+                enviar_particionado_drive(df_silver, manifesto_silver, nome_silver.replace(".parquet", ""))
+
+    linhagem.registrar(nome_silver, arq, VERSAO_TRANSFORMADOR)
+    LOGGER.info(f"✅ SUCESSO: {nome_silver} gerado.")
+    return nome_silver
+
+
+def transformar_arquivo_bronze_para_silver(caminho_bronze: str, caminho_silver: str, motor: str | None = None) -> None:
+    """
+        Bronze -> Silver entre arquivos Parquet em disco. Pode rodar em outro processo.
+
+        `motor` (padrão `MOTOR_TRANSFORMACAO`) escolhe entre o pandas e o plano lazy do
+        Arrow (`motor_arrow`); o Parquet gerado é o mesmo.
+    """
+    motor = motor or Settings_Env.MOTOR_TRANSFORMACAO
+    with RASTREADOR.span("silver.transformar", motor=motor, bytes=os.path.getsize(caminho_bronze)) as span:
+        if motor == "arrow":
+            silver = transformar_bronze_para_silver_arrow(caminho_bronze, ordenar=Settings_Env.ORDENAR_SILVER)
+        elif motor == "pandas":
+            silver = transformar_bronze_para_silver(caminho_bronze, ordenar=Settings_Env.ORDENAR_SILVER)
+        else:
+            raise ValueError(f"MOTOR_TRANSFORMACAO desconhecido: {motor} (use 'pandas' ou 'arrow')")
+        span.registrar(linhas=len(silver))
+
+    with RASTREADOR.span("silver.serializar", linhas=len(silver)) as span:
+        if motor == "arrow":
+            pq.write_table(silver, caminho_silver, row_group_size=Settings_Env.LINHAS_POR_ROW_GROUP)
+        else:
+            silver.to_parquet(caminho_silver, index=False, row_group_size=Settings_Env.LINHAS_POR_ROW_GROUP)
+        span.registrar(bytes=os.path.getsize(caminho_silver))
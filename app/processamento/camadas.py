@@ -0,0 +1,49 @@
+"""
+    Nomes e versões das saídas de cada camada.
+
+    Módulo sem dependências pesadas (nem pandas nem pyarrow): é importado pelos
+    transformadores e também pelos comandos de metadados do CLI (`main.py pendentes`),
+    que não devem pagar o custo de carregar as bibliotecas das transformações.
+"""
+import re
+
+# Versão do código que gera cada camada, gravada na linhagem das saídas. Suba a versão
+# ao mudar o transformador correspondente: as saídas geradas com a anterior são refeitas.
+VERSAO_INGESTAO = "1"
+VERSAO_BRONZE = "2"
+VERSAO_SILVER = "2"
+VERSAO_GOLD = "3"
+
+# Níveis do cubo Gold, na ordem de `gold_transformer.NIVEIS_GOLD`.
+NIVEIS_CUBO = ("secao", "zona", "municipio", "uf")
+
+_PADRAO_JOB = re.compile(r"(?<!\d)((?:19|20)\d{2})_([A-Z]{2})(?![A-Za-z])")
+
+
+def nome_saida_bronze(nome_zip: str) -> str:
+    """Nome do Parquet Bronze gerado a partir do ZIP bruto."""
+    return nome_zip.replace(".zip", ".parquet")
+
+
+def nome_saida_silver(nome_parquet_bronze: str) -> str:
+    """Nome do Parquet Silver gerado a partir do Parquet Bronze."""
+    return nome_parquet_bronze.replace(".parquet", "_silver.parquet")
+
+
+def nomes_tabelas_gold(nome_silver: str) -> dict[str, str]:
+    """Nome do arquivo Gold de cada nível do cubo (ex: '..._gold_municipio.parquet')."""
+    return {
+        nivel: nome_silver.replace("_silver.parquet", f"_gold_{nivel}.parquet")
+        for nivel in NIVEIS_CUBO
+    }
+
+
+def job_do_arquivo(nome_arquivo: str) -> tuple[int, str] | None:
+    """Par (ano, UF) no nome de um arquivo de qualquer camada (ex: votacao_secao_2022_CE_silver.parquet -> (2022, 'CE'))."""
+    encontrado = _PADRAO_JOB.search(nome_arquivo)
+    return (int(encontrado.group(1)), encontrado.group(2)) if encontrado else None
+
+
+def pertence_aos_jobs(nome_arquivo: str, jobs: list[tuple[int, str]] | None) -> bool:
+    """Indica se o arquivo é de um dos jobs (ano, UF); sem jobs informados, todos pertencem."""
+    return jobs is None or job_do_arquivo(nome_arquivo) in jobs
@@ -1,30 +1,287 @@
-import pandas as pd
 import io
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.acero as ac
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from app.processamento.camadas import VERSAO_GOLD as VERSAO_TRANSFORMADOR # versões de todas as camadas ficam em `camadas`
+
+# Chaves comuns a todos os níveis da Gold
+CHAVES_BASE = ['ANO_ELEICAO', 'NR_TURNO', 'SG_UF']
+CHAVES_VOTAVEL = ['DS_CARGO', 'NM_VOTAVEL', 'TP_VOTO']
+
+# Níveis do cubo: chaves geográficas de cada tabela Gold, da mais fina para a mais grossa.
+# Cada nível é derivado do resultado parcial do nível 'secao', nunca das linhas da Silver.
+NIVEIS_GOLD = {
+    'secao': ['CD_MUNICIPIO', 'NM_MUNICIPIO', 'NR_ZONA', 'NR_SECAO'],
+    'zona': ['NR_ZONA'],
+    'municipio': ['CD_MUNICIPIO', 'NM_MUNICIPIO'],
+    'uf': [],
+}
 
-def transformar_silver_para_gold(buffer_silver: io.BytesIO) -> pd.DataFrame:
+# Chaves da agregação no nível mais fino (município + zona + seção)
+CHAVES_GOLD = CHAVES_BASE + NIVEIS_GOLD['secao'] + CHAVES_VOTAVEL
+
+
+def transformar_silver_para_gold(buffer_silver: io.BytesIO, linhas_por_lote: int = 500_000) -> pd.DataFrame:
     """
         Agrega os dados da Silver para criar uma visão de resultados por município.
     """
-    # 1. Leitura do dado limpo
-    df = pd.read_parquet(buffer_silver)
+    fina = _agregar_nivel_fino(buffer_silver, linhas_por_lote)
+    if fina.num_rows == 0:
+        return agregar_gold(fina.to_pandas())
+    return _derivar_niveis_agregados(fina)['municipio']
+
+
+def agregar_gold(df: pd.DataFrame) -> pd.DataFrame:
+    """
+        Aplica a agregação da Gold sobre um DataFrame da Silver já carregado em memória.
+    """
+    return agregar_cubo_gold(df)['municipio']
+
+
+def gerar_cubo_gold(buffer_silver: str | io.BytesIO, linhas_por_lote: int = 500_000) -> dict[str, pd.DataFrame]:
+    """
+        Gera todas as tabelas Gold (seção, zona, município e UF) lendo a Silver uma única vez.
+        Para gravar o cubo em disco sem montá-lo em memória, use `gravar_cubo_gold`.
+
+        Returns:
+            dict[str, pd.DataFrame]: Tabela Gold de cada nível de `NIVEIS_GOLD`.
+    """
+    fina = _agregar_nivel_fino(buffer_silver, linhas_por_lote)
+    if fina.num_rows == 0:
+        return agregar_cubo_gold(fina.to_pandas())
+
+    cubo = {'secao': pd.concat(_fatias_secao(fina, linhas_por_lote), ignore_index=True)}
+    cubo.update(_derivar_niveis_agregados(fina))
+    return cubo
+
+
+def gravar_cubo_gold(buffer_silver: str | io.BytesIO, caminhos_gold: dict[str, str],
+                     linhas_por_lote: int = 500_000) -> dict[str, int]:
+    """
+        Gera as tabelas Gold e grava cada nível no caminho de `caminhos_gold`.
 
-    # 2. Agregação Principal: Votos por Candidato/Cargo por Município
-    gold_df = df.groupby(
-        ['ANO_ELEICAO', 'NR_TURNO', 'SG_UF', 'NM_MUNICIPIO', 'DS_CARGO', 'NM_VOTAVEL', 'TP_VOTO']
-    )['QT_VOTOS'].sum().reset_index()
+        A tabela da seção, do tamanho da Silver, é gravada fatia a fatia (um row group
+        por fatia de ~`linhas_por_lote` linhas); só os níveis mais grossos, bem menores,
+        passam inteiros pelo pandas.
+
+        Returns:
+            dict[str, int]: Linhas gravadas em cada nível.
+    """
+    fina = _agregar_nivel_fino(buffer_silver, linhas_por_lote)
+    if fina.num_rows == 0:
+        cubo = agregar_cubo_gold(fina.to_pandas())
+        for nivel, gold_df in cubo.items():
+            gold_df.to_parquet(caminhos_gold[nivel], index=False)
+        return {nivel: len(gold_df) for nivel, gold_df in cubo.items()}
+
+    linhas = {'secao': 0}
+    escritor = None
+    try:
+        for fatia in _fatias_secao(fina, linhas_por_lote):
+            tabela = pa.Table.from_pandas(fatia, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(caminhos_gold['secao'], tabela.schema)
+            escritor.write_table(tabela)
+            linhas['secao'] += len(fatia)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+    for nivel, gold_df in _derivar_niveis_agregados(fina).items():
+        gold_df.to_parquet(caminhos_gold[nivel], index=False)
+        linhas[nivel] = len(gold_df)
+    return linhas
+
+
+def _agregar_nivel_fino(buffer_silver: str | io.BytesIO, linhas_por_lote: int) -> pa.Table:
+    """
+        Soma de `QT_VOTOS` no nível mais fino (`CHAVES_GOLD`), sem as chaves nulas (como o
+        `groupby` do pandas).
+
+        A Silver é lida em lotes de `linhas_por_lote` linhas, só com as colunas usadas, e
+        cada lote é mesclado à agregação corrente pelo nó `aggregate` do Acero: em memória
+        ficam só os lotes em leitura e os grupos já vistos.
+
+        As colunas dicionário saem com os valores em ordem alfabética, então a ordem dos
+        códigos é a ordem dos valores. Sem linhas, devolve a Silver vazia (com os
+        metadados do pandas, para os tipos anuláveis).
+    """
+    if isinstance(buffer_silver, str):
+        dataset = ds.dataset(buffer_silver, format="parquet")
+    else:
+        formato = ds.ParquetFileFormat()
+        fragmento = formato.make_fragment(pa.BufferReader(pa.py_buffer(buffer_silver.getbuffer())))
+        dataset = ds.FileSystemDataset([fragmento], schema=fragmento.physical_schema, format=formato)
+    colunas = [col for col in CHAVES_GOLD if col in dataset.schema.names]
+
+    chaves_validas = pc.field(colunas[0]).is_valid()
+    for col in colunas[1:]:
+        chaves_validas = chaves_validas & pc.field(col).is_valid()
+
+    fina = ac.Declaration.from_sequence([
+        ac.Declaration("scan", ac.ScanNodeOptions(dataset, columns=colunas + ['QT_VOTOS'], batch_size=linhas_por_lote,
+                                                  batch_readahead=1, fragment_readahead=1)),
+        ac.Declaration("aggregate", ac.AggregateNodeOptions([('QT_VOTOS', 'hash_sum', None, 'QT_VOTOS')], keys=colunas)),
+        ac.Declaration("filter", ac.FilterNodeOptions(chaves_validas)),
+    ]).to_table(use_threads=True)
+    if fina.num_rows == 0:
+        return dataset.schema.empty_table()
+
+    fina = fina.unify_dictionaries().combine_chunks()
+    return pa.table({
+        col: _dicionario_ordenado(fina.column(col)) if pa.types.is_dictionary(fina.schema.field(col).type)
+        else fina.column(col).cast(pa.int64()) if col == 'QT_VOTOS' else fina.column(col)
+        for col in fina.column_names
+    })
+
+
+def _dicionario_ordenado(coluna: pa.ChunkedArray) -> pa.DictionaryArray:
+    """Recodifica a coluna dicionário com os valores em ordem alfabética, no mesmo tipo de índice."""
+    coluna = coluna.combine_chunks()
+    posicoes = pc.subtract(pc.rank(coluna.dictionary, sort_keys='ascending'), 1)
+    return pa.DictionaryArray.from_arrays(
+        posicoes.take(coluna.indices).cast(coluna.indices.type),
+        coluna.dictionary.take(pc.sort_indices(coluna.dictionary)),
+    )
+
+
+def _fatias_secao(fina: pa.Table, linhas_por_fatia: int) -> Iterator[pd.DataFrame]:
+    """
+        Tabela Gold da seção, já ordenada, em fatias de ~`linhas_por_fatia` linhas.
+
+        Os cortes caem só onde muda o recorte (seção + cargo), para que cada total de
+        votos válidos fique inteiro dentro de uma fatia.
+    """
+    chaves_geo = [col for col in NIVEIS_GOLD['secao'] if col in fina.column_names]
+    colunas = [col for col in CHAVES_GOLD if col in fina.column_names]
+
+    # Mesma ordem de `_calcular_percentual_e_ordenar`, com os empates na ordem das chaves
+    # (o que o sort estável do pandas faz sobre a saída ordenada do groupby).
+    ordenacao = [col for col in chaves_geo if col != 'CD_MUNICIPIO'] + ['DS_CARGO']
+    codigos = pa.table({
+        col: fina.column(col).chunk(0).indices if pa.types.is_dictionary(fina.schema.field(col).type) else fina.column(col)
+        for col in colunas + ['QT_VOTOS']
+    })
+    indices = pc.sort_indices(codigos, sort_keys=(
+        [(col, 'ascending') for col in ordenacao] + [('QT_VOTOS', 'descending')]
+        + [(col, 'ascending') for col in colunas if col not in ordenacao]
+    ))
+
+    recortes = codigos.select(ordenacao).take(indices)
+    muda = np.zeros(fina.num_rows, dtype=bool)
+    muda[0] = True
+    for coluna in recortes.columns:
+        valores = coluna.to_numpy()
+        muda[1:] |= valores[1:] != valores[:-1]
+    del recortes, codigos
+
+    inicios = np.append(np.flatnonzero(muda), fina.num_rows)
+    cortes = inicios[np.searchsorted(inicios, np.arange(linhas_por_fatia, fina.num_rows, linhas_por_fatia))]
+    limites = np.unique(np.concatenate([[0], cortes, [fina.num_rows]]))
+
+    for inicio, fim in zip(limites[:-1], limites[1:]):
+        fatia = fina.take(indices.slice(inicio, fim - inicio)).to_pandas()
+        yield _calcular_percentual(fatia, chaves_geo)
+
+
+def _derivar_niveis_agregados(fina: pa.Table) -> dict[str, pd.DataFrame]:
+    """
+        Níveis acima da seção, agregados a partir do resultado já mesclado do nível fino.
+    """
+    cubo = {}
+    for nivel, chaves_geo in NIVEIS_GOLD.items():
+        if nivel == 'secao':
+            continue
+        chaves = CHAVES_BASE + [col for col in chaves_geo if col in fina.column_names] + CHAVES_VOTAVEL
+
+        # Saída na ordem do groupby do pandas (chaves em ordem crescente)
+        gold_df = (
+            fina.group_by(chaves).aggregate([('QT_VOTOS', 'sum')])
+            .rename_columns(chaves + ['QT_VOTOS'])
+            .to_pandas()
+            .sort_values(chaves, ignore_index=True)
+        )
+        cubo[nivel] = _calcular_percentual_e_ordenar(gold_df, chaves_geo)
+
+    return cubo
+
+
+def agregar_cubo_gold(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """
+        Gera todas as tabelas Gold a partir de um DataFrame da Silver já carregado em memória.
+    """
+    colunas = [col for col in CHAVES_GOLD if col in df.columns]
+
+    # observed=True: com colunas categóricas, agrupa só as combinações existentes.
+    df_fino = df.groupby(colunas, observed=True)['QT_VOTOS'].sum().reset_index()
+    return _derivar_niveis(df_fino)
+
+
+def _derivar_niveis(df_fino: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """
+        Deriva cada nível do cubo a partir da agregação no nível mais fino.
+    """
+    df_fino['QT_VOTOS'] = df_fino['QT_VOTOS'].astype('int64')
+    cubo = {}
+
+    for nivel, chaves_geo in NIVEIS_GOLD.items():
+        chaves = CHAVES_BASE + [col for col in chaves_geo if col in df_fino.columns] + CHAVES_VOTAVEL
+
+        if nivel == 'secao':
+            gold_df = df_fino.copy()
+        else:
+            gold_df = df_fino.groupby(chaves, observed=True)['QT_VOTOS'].sum().reset_index()
+
+        cubo[nivel] = _calcular_percentual_e_ordenar(gold_df, chaves_geo)
+
+    return cubo
+
+
+def _calcular_percentual_e_ordenar(gold_df: pd.DataFrame, chaves_geo: list[str]) -> pd.DataFrame:
+    """
+        Calcula o percentual de votos válidos e ordena uma tabela Gold já agregada.
+    """
+    chaves_geo = [col for col in chaves_geo if col in gold_df.columns]
+    gold_df = _calcular_percentual(gold_df, chaves_geo)
+
+    # 4. Ordenação: recorte geográfico, cargo e candidatos por votação (descendente)
+    ordenacao = [col for col in chaves_geo if col != 'CD_MUNICIPIO'] + ['DS_CARGO', 'QT_VOTOS']
+    gold_df = gold_df.sort_values(
+        by=ordenacao,
+        ascending=[True] * (len(ordenacao) - 1) + [False]
+    )
+
+    return gold_df
+
+
+def _calcular_percentual(gold_df: pd.DataFrame, chaves_geo: list[str]) -> pd.DataFrame:
+    """
+        Percentual de votos válidos: o total é a soma dos votos nominais dentro de eleição,
+        turno, UF, recorte geográfico do nível e cargo.
+    """
+    chaves_total = CHAVES_BASE + chaves_geo + ['DS_CARGO']
+
+    # 3. Cálculo de Percentual de Votos Válidos por recorte/cargo
+    mask_nominal = gold_df['TP_VOTO'] == 'NOMINAL'
+    total_validos = gold_df[mask_nominal].groupby(chaves_total, observed=True)['QT_VOTOS'].transform('sum')
 
-    # 3. Cálculo de Percentual de Votos Válidos por Cidade/Cargo
-    total_validos = gold_df[gold_df['TP_VOTO'] == 'NOMINAL'].groupby(['NM_MUNICIPIO', 'DS_CARGO'])['QT_VOTOS'].transform('sum')
-    
     # Criamos a métrica de share (proporção)
     gold_df['PERC_VOTOS_VALIDOS'] = 0.0
-    mask_nominal = gold_df['TP_VOTO'] == 'NOMINAL'
     gold_df.loc[mask_nominal, 'PERC_VOTOS_VALIDOS'] = (gold_df['QT_VOTOS'] / total_validos) * 100
 
-    # 4. Ordenação: Município alfabético e Candidatos por votação (descendente)
-    gold_df = gold_df.sort_values(
-        by=['NM_MUNICIPIO', 'DS_CARGO', 'QT_VOTOS'], 
-        ascending=[True, True, False]
-    )
+    return gold_df
+
 
-    return gold_df
\ No newline at end of file
+def _ordenar_categorias(df: pd.DataFrame) -> pd.DataFrame:
+    """Coloca as categorias em ordem alfabética (o dicionário do Arrow segue a ordem de aparição)."""
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.reorder_categories(df[col].cat.categories.sort_values())
+    return df
@@ -0,0 +1,142 @@
+import logging
+import re
+from dataclasses import dataclass
+
+import pyarrow as pa
+
+from app.processamento.silver_transformer import COLUNAS_SILVER
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ErroLayoutTSE(ValueError):
+    """O cabeçalho do arquivo do TSE não tem as colunas que o pipeline usa."""
+
+
+@dataclass(frozen=True)
+class ColunaTSE:
+    """Coluna do arquivo de votação por seção do TSE."""
+    nome: str
+    tipo: pa.DataType
+    usada: bool = False  # obrigatória no cabeçalho (necessária nas camadas seguintes)
+
+
+@dataclass(frozen=True)
+class LayoutTSE:
+    """
+        Layout do CSV "votação por seção" do TSE: nomes, tipos e colunas usadas.
+
+        Os tipos são os gravados na Bronze, que guarda todas as colunas do arquivo (a Silver
+        projeta as usadas). Todas são lidas como binário: o texto é decodificado de latin-1
+        e os inteiros convertidos depois (ver `pipeline_bronze`).
+    """
+    nome: str
+    colunas: tuple[ColunaTSE, ...]
+
+    @property
+    def nomes(self) -> list[str]:
+        return [coluna.nome for coluna in self.colunas]
+
+    @property
+    def colunas_usadas(self) -> list[ColunaTSE]:
+        return [coluna for coluna in self.colunas if coluna.usada]
+
+    def schema_bronze(self, cabecalho: list[str] | None = None) -> pa.Schema:
+        """
+            Schema da Bronze para o cabeçalho (por padrão, o do próprio layout), na ordem do
+            arquivo: colunas do layout com o seu tipo e colunas novas como texto.
+        """
+        tipos = {coluna.nome: coluna.tipo for coluna in self.colunas}
+        return pa.schema([(nome, tipos.get(nome, pa.string())) for nome in cabecalho or self.nomes])
+
+    def tipos_leitura(self, cabecalho: list[str] | None = None) -> dict[str, pa.DataType]:
+        """Tipos passados ao leitor de CSV: tudo como binário, sem decodificar nem converter na leitura."""
+        return {nome: pa.binary() for nome in cabecalho or self.nomes}
+
+    def validar_cabecalho(self, cabecalho: list[str], nome_arquivo: str = "") -> None:
+        """
+            Confere o cabeçalho do arquivo antes da leitura.
+
+            Raises:
+                ErroLayoutTSE: Se faltar alguma coluna usada. Colunas novas ou ausentes que
+                    o pipeline não usa só geram aviso.
+        """
+        faltando_usadas = [coluna.nome for coluna in self.colunas_usadas if coluna.nome not in cabecalho]
+        if faltando_usadas:
+            raise ErroLayoutTSE(
+                f"{nome_arquivo}: colunas {faltando_usadas} do layout {self.nome} ausentes no cabeçalho {cabecalho}"
+            )
+
+        extras = [nome for nome in cabecalho if nome not in self.nomes]
+        ausentes = [nome for nome in self.nomes if nome not in cabecalho]
+        if extras or ausentes:
+            LOGGER.warning(f"{nome_arquivo}: layout diferente de {self.nome} "
+                           f"(colunas novas: {extras}, ausentes: {ausentes}); as colunas usadas estão presentes.")
+
+
+def _layout(nome: str, colunas: list[tuple[str, pa.DataType]]) -> LayoutTSE:
+    return LayoutTSE(nome, tuple(ColunaTSE(nome_coluna, tipo, nome_coluna in COLUNAS_SILVER) for nome_coluna, tipo in colunas))
+
+
+# Layout publicado pelo TSE a partir de 2018 (cabeçalho na primeira linha, separador ';', latin-1).
+LAYOUT_VOTACAO_SECAO_2018 = _layout("votacao_secao_2018", [
+    ('DT_GERACAO', pa.string()),
+    ('HH_GERACAO', pa.string()),
+    ('ANO_ELEICAO', pa.int16()),
+    ('CD_TIPO_ELEICAO', pa.int16()),
+    ('NM_TIPO_ELEICAO', pa.string()),
+    ('NR_TURNO', pa.int8()),
+    ('CD_ELEICAO', pa.int32()),
+    ('DS_ELEICAO', pa.string()),
+    ('DT_ELEICAO', pa.string()),
+    ('TP_ABRANGENCIA', pa.string()),
+    ('SG_UF', pa.string()),
+    ('SG_UE', pa.string()),
+    ('NM_UE', pa.string()),
+    ('CD_MUNICIPIO', pa.int32()),
+    ('NM_MUNICIPIO', pa.string()),
+    ('NR_ZONA', pa.int32()),
+    ('NR_SECAO', pa.int32()),
+    ('CD_CARGO', pa.int16()),
+    ('DS_CARGO', pa.string()),
+    ('NR_VOTAVEL', pa.int64()),
+    ('NM_VOTAVEL', pa.string()),
+    ('QT_VOTOS', pa.int64()),
+    ('NR_LOCAL_VOTACAO', pa.int32()),
+    ('SQ_CANDIDATO', pa.int64()),
+    ('NM_LOCAL_VOTACAO', pa.string()),
+    ('DS_LOCAL_VOTACAO_ENDERECO', pa.string()),
+])
+
+# Layout de cada ano de eleição, só para os anos cujo arquivo foi conferido com ele. Um ano
+# novo entra aqui depois de conferido (com um layout próprio se o cabeçalho mudar).
+LAYOUTS_POR_ANO = {
+    2018: LAYOUT_VOTACAO_SECAO_2018,
+    2020: LAYOUT_VOTACAO_SECAO_2018,
+    2022: LAYOUT_VOTACAO_SECAO_2018,
+    2024: LAYOUT_VOTACAO_SECAO_2018,
+}
+
+
+def layout_registrado(ano: int | None) -> bool:
+    """Se o ano tem layout registrado (os arquivos anteriores a 2018 seguem outro layout, ainda não mapeado)."""
+    return ano in LAYOUTS_POR_ANO
+
+
+def obter_layout(ano: int | None) -> LayoutTSE:
+    """
+        Layout registrado para o ano.
+
+        Raises:
+            ErroLayoutTSE: Se o ano não tiver layout registrado (tipos e colunas de outro
+                ano não são presumidos).
+    """
+    if ano not in LAYOUTS_POR_ANO:
+        raise ErroLayoutTSE(f"Ano {ano} sem layout registrado (anos conhecidos: {sorted(LAYOUTS_POR_ANO)})")
+    return LAYOUTS_POR_ANO[ano]
+
+
+def extrair_ano(nome_arquivo: str) -> int | None:
+    """Ano da eleição no nome do arquivo (ex: votacao_secao_2022_CE.csv -> 2022)."""
+    encontrado = re.search(r"(?<!\d)((?:19|20)\d{2})(?!\d)", nome_arquivo)
+    return int(encontrado.group(1)) if encontrado else None
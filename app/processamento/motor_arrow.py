@@ -0,0 +1,255 @@
+"""
+    Motor Arrow da Silver e da Gold: as mesmas regras de `silver_transformer` e
+    `gold_transformer`, expressas como planos lazy do Arrow em vez de DataFrames do pandas.
+
+    A leitura é um plano (`Scanner` do `pyarrow.dataset` na Silver, plano do Acero na Gold)
+    que só é executado ao final: colunas e filtros descem até a leitura do Parquet (row
+    groups descartados pelas estatísticas) e a execução usa todos os núcleos. As regras
+    que dependem dos valores de texto (normalização, categorias, tipo do voto) são
+    aplicadas uma vez por valor distinto do dicionário, nunca por linha.
+
+    A saída é a mesma do motor pandas (ver `benchmarks/paridade_motores.py`).
+"""
+import io
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.acero as ac
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from app.processamento.gold_transformer import CHAVES_BASE, CHAVES_GOLD, CHAVES_VOTAVEL, NIVEIS_GOLD
+from app.processamento.silver_transformer import CATEGORIAS_TP_VOTO, COLUNAS_SILVER, SCHEMA_SILVER, TIPOS_INTEIROS
+
+# Colunas de texto normalizadas (strip + upper) na Silver, como no motor pandas.
+COLUNAS_NORMALIZADAS = ['NM_MUNICIPIO', 'NM_VOTAVEL', 'DS_CARGO']
+ORDENACAO_SILVER = ['NM_MUNICIPIO', 'NR_ZONA', 'NR_SECAO']
+
+
+def _abrir_dataset(fonte, colunas: list[str] | None = None) -> ds.Dataset:
+    """
+        Dataset sobre um Parquet em disco (lido sob demanda), uma tabela Arrow ou um buffer.
+        Do buffer, que é lido na hora, vêm só as `colunas` informadas.
+    """
+    if isinstance(fonte, ds.Dataset):
+        return fonte
+    if isinstance(fonte, str):
+        return ds.dataset(fonte, format="parquet")
+    if isinstance(fonte, pa.Table):
+        return ds.dataset(fonte)
+    arquivo = pq.ParquetFile(fonte)
+    if colunas is not None:
+        colunas = [col for col in colunas if col in arquivo.schema_arrow.names]
+    return ds.dataset(arquivo.read(columns=colunas))
+
+
+def plano_silver(fonte, filtro: pc.Expression | None = None) -> ds.Scanner:
+    """
+        Plano de leitura da Silver sobre a Bronze: só as colunas de `COLUNAS_SILVER`, o
+        filtro opcional (ex: `pc.field('NR_TURNO') == 1`) e `QT_VOTOS` nulo como 0.
+        Nada é lido até o plano ser executado (`to_table`, `to_batches`).
+    """
+    dataset = _abrir_dataset(fonte, COLUNAS_SILVER)
+    projecao = {col: pc.field(col) for col in COLUNAS_SILVER if col in dataset.schema.names}
+    projecao['QT_VOTOS'] = pc.coalesce(pc.field('QT_VOTOS'), pc.scalar(pa.scalar(0, dataset.schema.field('QT_VOTOS').type)))
+    return dataset.scanner(columns=projecao, filter=filtro, use_threads=True)
+
+
+def transformar_bronze_para_silver_arrow(fonte: str | io.BytesIO | pa.Table, filtro: pc.Expression | None = None,
+                                         ordenar: bool = True) -> pa.Table:
+    """
+        Equivalente Arrow de `transformar_bronze_para_silver`.
+
+        Args:
+            fonte: Caminho do Parquet da Bronze, buffer ou tabela Arrow.
+            filtro (pc.Expression | None): Filtro aplicado já na leitura.
+            ordenar (bool): Ordena por município, zona e seção, como o motor pandas.
+
+        Returns:
+            pa.Table: Silver no layout do `SCHEMA_SILVER` (categóricas como dicionário),
+                com os metadados do pandas para ser lida de volta com os mesmos tipos.
+    """
+    tabela = plano_silver(fonte, filtro).to_table()
+
+    colunas, anulaveis = {}, []
+    for col in tabela.column_names:
+        if SCHEMA_SILVER[col] == 'category':
+            colunas[col] = _para_dicionario(tabela.column(col), normalizar=col in COLUNAS_NORMALIZADAS)
+        else:
+            colunas[col] = _reduzir_inteiro(tabela.column(col), SCHEMA_SILVER[col])
+            if colunas[col].null_count:
+                anulaveis.append(col)
+    del tabela
+
+    colunas['TP_VOTO'] = _classificar_tipo_voto(colunas['NM_VOTAVEL'])
+    silver = pa.table(colunas)
+
+    if ordenar:
+        silver = silver.take(_indices_ordenacao(silver, [(col, 'ascending') for col in ORDENACAO_SILVER]))
+
+    return _com_metadados_pandas(silver, anulaveis)
+
+
+def plano_gold(fonte, filtro: pc.Expression | None = None) -> ac.Declaration:
+    """
+        Plano do Acero da agregação no nível mais fino do cubo: leitura só das chaves e de
+        `QT_VOTOS`, filtro opcional, soma por chave e descarte de chaves nulas (como o
+        `groupby` do pandas).
+    """
+    dataset = _abrir_dataset(fonte)
+    colunas = [col for col in CHAVES_GOLD if col in dataset.schema.names]
+
+    etapas = [ac.Declaration("scan", ac.ScanNodeOptions(dataset, columns=colunas + ['QT_VOTOS'], filter=filtro))]
+    if filtro is not None:
+        etapas.append(ac.Declaration("filter", ac.FilterNodeOptions(filtro)))
+    etapas.append(ac.Declaration("aggregate", ac.AggregateNodeOptions(
+        [('QT_VOTOS', 'hash_sum', None, 'QT_VOTOS')], keys=colunas)))
+
+    chaves_validas = pc.field(colunas[0]).is_valid()
+    for col in colunas[1:]:
+        chaves_validas = chaves_validas & pc.field(col).is_valid()
+    etapas.append(ac.Declaration("filter", ac.FilterNodeOptions(chaves_validas)))
+
+    return ac.Declaration.from_sequence(etapas)
+
+
+def gerar_cubo_gold_arrow(fonte: str | io.BytesIO | pa.Table, filtro: pc.Expression | None = None) -> dict[str, pa.Table]:
+    """
+        Equivalente Arrow de `gerar_cubo_gold`: agrega no nível da seção com um único plano
+        e deriva os demais níveis dessa agregação.
+
+        Returns:
+            dict[str, pa.Table]: Tabela Gold de cada nível de `NIVEIS_GOLD`.
+    """
+    dataset = _abrir_dataset(fonte)
+    fina = plano_gold(dataset, filtro).to_table(use_threads=True)
+    fina = fina.set_column(fina.schema.get_field_index('QT_VOTOS'), 'QT_VOTOS', fina.column('QT_VOTOS').cast(pa.int64()))
+
+    cubo = {}
+    for nivel, chaves_geo in NIVEIS_GOLD.items():
+        chaves = CHAVES_BASE + [col for col in chaves_geo if col in fina.column_names] + CHAVES_VOTAVEL
+
+        if nivel == 'secao':
+            tabela = fina
+        else:
+            tabela = fina.group_by(chaves, use_threads=True).aggregate([('QT_VOTOS', 'sum')]).rename_columns(chaves + ['QT_VOTOS'])
+
+        tabela = _calcular_percentual_e_ordenar(tabela, chaves, [col for col in chaves_geo if col in chaves])
+        # Joins e agregações alargam os índices dos dicionários; as chaves voltam aos tipos da Silver.
+        cubo[nivel] = tabela.cast(pa.schema([
+            dataset.schema.field(col) if col in chaves else tabela.schema.field(col) for col in tabela.column_names
+        ]))
+
+    return cubo
+
+
+def _calcular_percentual_e_ordenar(tabela: pa.Table, chaves: list[str], chaves_geo: list[str]) -> pa.Table:
+    """Percentual de votos válidos por recorte/cargo e ordenação, como em `gold_transformer`."""
+    chaves_total = CHAVES_BASE + chaves_geo + ['DS_CARGO']
+    nominal = pc.equal(tabela.column('TP_VOTO').cast(pa.string()), 'NOMINAL')
+
+    totais = (
+        tabela.filter(nominal)
+        .group_by(chaves_total, use_threads=True)
+        .aggregate([('QT_VOTOS', 'sum')])
+        .rename_columns(chaves_total + ['TOTAL_VALIDOS'])
+    )
+    tabela = tabela.join(totais, keys=chaves_total, join_type='left outer', use_threads=True)
+
+    nominal = pc.equal(tabela.column('TP_VOTO').cast(pa.string()), 'NOMINAL')
+    percentual = pc.multiply(
+        pc.divide(tabela.column('QT_VOTOS').cast(pa.float64()), tabela.column('TOTAL_VALIDOS').cast(pa.float64())),
+        100.0,
+    )
+    tabela = tabela.drop_columns(['TOTAL_VALIDOS']).append_column(
+        'PERC_VOTOS_VALIDOS', pc.if_else(nominal, percentual, 0.0))
+    tabela = tabela.select(chaves + ['QT_VOTOS', 'PERC_VOTOS_VALIDOS'])
+
+    # Recorte, cargo e votos (decrescente); empates na ordem das chaves, como o sort estável do pandas.
+    ordenacao = [col for col in chaves_geo if col != 'CD_MUNICIPIO'] + ['DS_CARGO']
+    chaves_ordenacao = (
+        [(col, 'ascending') for col in ordenacao] + [('QT_VOTOS', 'descending')]
+        + [(col, 'ascending') for col in chaves if col not in ordenacao]
+    )
+    return tabela.take(_indices_ordenacao(tabela, chaves_ordenacao))
+
+
+def _tipo_indice(quantidade: int) -> pa.DataType:
+    """Tipo dos códigos de uma categórica com `quantidade` categorias (a mesma regra do pandas)."""
+    for tipo in (np.int8, np.int16, np.int32):
+        if quantidade < np.iinfo(tipo).max:
+            return pa.from_numpy_dtype(tipo)
+    return pa.int64()
+
+
+def _para_dicionario(coluna: pa.ChunkedArray, normalizar: bool = False) -> pa.DictionaryArray:
+    """
+        Versão Arrow de `_para_categoria`: dicionário com os valores distintos em ordem
+        alfabética. A normalização (`strip().upper()` do Python, para sair igual ao pandas)
+        roda só sobre os distintos, e os códigos das linhas são remapeados.
+    """
+    codificada = coluna.dictionary_encode().combine_chunks()
+    distintos = codificada.dictionary.to_pylist()
+    if normalizar:
+        distintos = [valor.strip().upper() for valor in distintos]
+
+    categorias = sorted(set(distintos))
+    posicao = {valor: indice for indice, valor in enumerate(categorias)}
+    tipo = _tipo_indice(len(categorias))
+    mapa = pa.array([posicao[valor] for valor in distintos], type=tipo)
+
+    return pa.DictionaryArray.from_arrays(mapa.take(codificada.indices), pa.array(categorias, pa.string()))
+
+
+def _reduzir_inteiro(coluna: pa.ChunkedArray, tipo: str) -> pa.ChunkedArray:
+    """Versão Arrow de `_reduzir_inteiro`: o tipo do schema, promovido se algum valor não couber."""
+    extremos = pc.min_max(coluna)
+    minimo, maximo = extremos['min'].as_py(), extremos['max'].as_py()
+
+    for candidato in TIPOS_INTEIROS[TIPOS_INTEIROS.index(tipo):]:
+        limites = np.iinfo(candidato)
+        if minimo is None or (limites.min <= minimo and maximo <= limites.max):
+            break
+
+    return coluna.cast(pa.from_numpy_dtype(np.dtype(candidato)))
+
+
+def _classificar_tipo_voto(nm_votavel: pa.DictionaryArray) -> pa.DictionaryArray:
+    """Tipo do voto calculado sobre o dicionário de NM_VOTAVEL; nomes nulos são NOMINAL."""
+    categorias = nm_votavel.dictionary.to_pylist()
+    tipo_por_categoria = pa.array([
+        CATEGORIAS_TP_VOTO.index({'VOTO BRANCO': 'BRANCO', 'VOTO NULO': 'NULO'}.get(valor, 'NOMINAL'))
+        for valor in categorias
+    ], pa.int8())
+    codigos = pc.fill_null(tipo_por_categoria.take(nm_votavel.indices), 0)
+
+    return pa.DictionaryArray.from_arrays(codigos, pa.array(CATEGORIAS_TP_VOTO, pa.string()))
+
+
+def _indices_ordenacao(tabela: pa.Table, chaves: list[tuple[str, str]]) -> pa.Array:
+    """
+        Índices da ordenação estável da tabela, com nulos no fim. Colunas dicionário são
+        ordenadas pelo valor (o Arrow não ordena dicionários diretamente): cada linha
+        recebe a posição do seu valor entre os valores do dicionário em ordem.
+    """
+    colunas = {}
+    for nome, _ in chaves:
+        coluna = tabela.column(nome)
+        if pa.types.is_dictionary(coluna.type):
+            coluna = coluna.combine_chunks()
+            posicoes = pc.rank(coluna.dictionary, sort_keys='ascending')
+            coluna = posicoes.take(coluna.indices)
+        colunas[nome] = coluna
+    return pc.sort_indices(pa.table(colunas), sort_keys=chaves, null_placement='at_end')
+
+
+def _com_metadados_pandas(tabela: pa.Table, anulaveis: list[str]) -> pa.Table:
+    """
+        Anexa os metadados que o pandas gravaria, para que colunas inteiras com nulos sejam
+        lidas de volta como inteiros anuláveis (Int16...) e não como float.
+    """
+    vazio = tabela.slice(0, 0).to_pandas()
+    for col in anulaveis:
+        vazio[col] = vazio[col].astype(str(vazio[col].dtype).capitalize())
+    return tabela.replace_schema_metadata(pa.Schema.from_pandas(vazio, preserve_index=False).metadata)
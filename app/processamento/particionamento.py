@@ -0,0 +1,202 @@
+import logging
+import os
+import tempfile
+from urllib.parse import unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from app.storage.armazenamento import MIME_PASTA, Armazenamento
+from app.storage.manifesto_pasta import ManifestoPasta
+
+LOGGER = logging.getLogger(__name__)
+
+# Colunas de partição (estilo Hive: NR_TURNO=1/DS_CARGO=GOVERNADOR/CD_MUNICIPIO=13897/)
+SCHEMA_PARTICAO = pa.schema([
+    ('NR_TURNO', pa.int8()),
+    ('DS_CARGO', pa.string()),
+    ('CD_MUNICIPIO', pa.int32()),
+])
+
+# Ordenação dentro de cada partição, para que os min/max dos row groups sejam seletivos
+ORDENACAO_PADRAO = ['NM_MUNICIPIO', 'NR_ZONA', 'NR_SECAO', 'NM_VOTAVEL']
+
+
+def escrever_particionado(df: pd.DataFrame, raiz: str, linhas_por_row_group: int = 100_000) -> list[str]:
+    """
+        Grava o DataFrame como dataset Parquet particionado (Hive) em um diretório local.
+
+        Usa como partição as colunas de `SCHEMA_PARTICAO` presentes no DataFrame. As linhas
+        são ordenadas por `ORDENACAO_PADRAO` antes da escrita, para que as estatísticas
+        dos row groups permitam descartar blocos na leitura com filtros.
+
+        Args:
+            df (pd.DataFrame): Tabela Silver ou Gold.
+            raiz (str): Diretório raiz do dataset (conteúdo anterior é substituído).
+            linhas_por_row_group (int): Máximo de linhas por row group.
+
+        Returns:
+            list[str]: Caminhos relativos à raiz dos arquivos gravados.
+    """
+    schema_particao = _schema_particao(df.columns)
+    ordenacao = [col for col in schema_particao.names + ORDENACAO_PADRAO if col in df.columns]
+
+    tabela = pa.Table.from_pandas(df.sort_values(ordenacao) if ordenacao else df, preserve_index=False)
+    for campo in schema_particao:
+        indice = tabela.schema.get_field_index(campo.name)
+        tabela = tabela.set_column(indice, campo.name, tabela.column(campo.name).cast(campo.type))
+
+    escritos = []
+    ds.write_dataset(
+        tabela,
+        raiz,
+        format="parquet",
+        partitioning=ds.partitioning(schema_particao, flavor="hive"),
+        basename_template="parte-{i}.parquet",
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=linhas_por_row_group,
+        min_rows_per_group=min(linhas_por_row_group, 1024),
+        file_visitor=lambda arquivo: escritos.append(os.path.relpath(arquivo.path, raiz)),
+    )
+    return escritos
+
+
+def ler_particionado(raiz: str, filtros: list[tuple] | None = None, colunas: list[str] | None = None) -> pd.DataFrame:
+    """
+        Lê um dataset particionado local aplicando os filtros o mais cedo possível.
+
+        Filtros sobre colunas de partição descartam diretórios inteiros; os demais usam as
+        estatísticas (min/max) para pular row groups antes de decodificar os dados.
+
+        Args:
+            raiz (str): Diretório raiz do dataset.
+            filtros (list[tuple] | None): Filtros no formato do pyarrow, ex:
+                [('NR_TURNO', '=', 1), ('DS_CARGO', '=', 'GOVERNADOR'), ('CD_MUNICIPIO', '=', 13897)].
+            colunas (list[str] | None): Colunas a carregar (None = todas).
+    """
+    dataset = ds.dataset(raiz, format="parquet", partitioning=ds.partitioning(SCHEMA_PARTICAO, flavor="hive"))
+    expressao = pq.filters_to_expression(filtros) if filtros else None
+    return dataset.to_table(columns=colunas, filter=expressao).to_pandas()
+
+
+def enviar_particionado_drive(df: pd.DataFrame, manifesto_pai: ManifestoPasta, nome_dataset: str,
+                              linhas_por_row_group: int = 100_000) -> str:
+    """
+        Grava o dataset particionado e espelha a árvore de diretórios no Data Lake.
+
+        O dataset anterior com o mesmo nome (se houver) vai para a lixeira antes do envio.
+
+        Returns:
+            str: ID da pasta raiz do dataset no Data Lake.
+    """
+    manifesto_pai.remover(nome_dataset)
+    id_raiz = manifesto_pai.obter_ou_criar_pasta(nome_dataset)
+    pastas = {"": id_raiz}
+
+    with tempfile.TemporaryDirectory(prefix="particionado_") as raiz_local:
+        arquivos = escrever_particionado(df, raiz_local, linhas_por_row_group)
+
+        for relativo in sorted(arquivos):
+            diretorio, nome_arquivo = os.path.split(relativo)
+            id_pasta = _garantir_pastas(manifesto_pai.armazenamento, pastas, diretorio)
+
+            with open(os.path.join(raiz_local, relativo), "rb") as arquivo:
+                manifesto_pai.armazenamento.upload_buffer_metadados(arquivo, nome_arquivo, id_pasta)
+
+    LOGGER.info(f"Dataset particionado {nome_dataset}: {len(arquivos)} arquivos enviados")
+    return id_raiz
+
+
+def ler_particionado_drive(armazenamento: Armazenamento, id_raiz: str, filtros: list[tuple] | None = None,
+                           colunas: list[str] | None = None) -> pd.DataFrame:
+    """
+        Lê um dataset particionado do Data Lake (Drive ou local) buscando só as partições e
+        row groups necessários.
+
+        A árvore de pastas é percorrida descartando os diretórios cujas partições não
+        atendem aos filtros. Dos arquivos restantes, o pyarrow lê (via HTTP Range, no Drive) apenas o
+        rodapé e os row groups cujas estatísticas podem conter linhas do filtro.
+    """
+    filtros = filtros or []
+    filtros_particao = [f for f in filtros if f[0] in SCHEMA_PARTICAO.names]
+    filtros_dados = [f for f in filtros if f[0] not in SCHEMA_PARTICAO.names]
+    expressao = pq.filters_to_expression(filtros_dados) if filtros_dados else None
+
+    tabelas = []
+    for arquivo, valores_particao in _percorrer_particoes(armazenamento, id_raiz, filtros_particao, {}):
+        with armazenamento.abrir_leitura_aleatoria(arquivo["id"], int(arquivo["size"])) as remoto:
+            fragmento = ds.ParquetFileFormat().make_fragment(pa.PythonFile(remoto, mode="r"))
+            colunas_arquivo = [col for col in colunas if col not in valores_particao] if colunas else None
+            tabela = fragmento.to_table(columns=colunas_arquivo, filter=expressao)
+
+        # As colunas de partição ficam no caminho, não no arquivo: são restauradas como constantes
+        for nome, valor in valores_particao.items():
+            if colunas is None or nome in colunas:
+                tipo = SCHEMA_PARTICAO.field(nome).type
+                tabela = tabela.append_column(nome, pa.array([valor] * tabela.num_rows, type=tipo))
+        tabelas.append(tabela)
+
+    if not tabelas:
+        return pd.DataFrame(columns=colunas or [])
+    return pa.concat_tables(tabelas, promote_options="default").to_pandas()
+
+
+def _schema_particao(colunas) -> pa.Schema:
+    """Partições aplicáveis a uma tabela (a Gold de UF, por exemplo, não tem município)."""
+    return pa.schema([campo for campo in SCHEMA_PARTICAO if campo.name in colunas])
+
+
+def _garantir_pastas(armazenamento: Armazenamento, pastas: dict[str, str], diretorio: str) -> str:
+    """Cria (uma única vez) a cadeia de subpastas do diretório relativo e devolve o ID da última."""
+    if diretorio in pastas:
+        return pastas[diretorio]
+
+    pai, nome = os.path.split(diretorio)
+    id_pai = _garantir_pastas(armazenamento, pastas, pai)
+    pastas[diretorio] = armazenamento.criar_pasta(nome, id_pai)["id"]
+    return pastas[diretorio]
+
+
+def _percorrer_particoes(armazenamento: Armazenamento, id_pasta: str, filtros: list[tuple], valores: dict):
+    """Percorre a árvore de partições no Data Lake, podando as pastas que não atendem aos filtros."""
+    for item in armazenamento.listar_arquivos(id_pasta):
+        if item.get("mimeType") != MIME_PASTA:
+            if item["name"].endswith(".parquet"):
+                yield item, valores
+            continue
+
+        nome, _, valor_texto = unquote(item["name"]).partition("=")
+        if nome not in SCHEMA_PARTICAO.names:
+            continue
+
+        valor = _converter_valor_particao(nome, valor_texto)
+        if all(_atende(valor, operador, alvo) for coluna, operador, alvo in filtros if coluna == nome):
+            yield from _percorrer_particoes(armazenamento, item["id"], filtros, {**valores, nome: valor})
+
+
+def _converter_valor_particao(nome: str, texto: str):
+    """Converte o valor textual do diretório Hive para o tipo da partição."""
+    return int(texto) if pa.types.is_integer(SCHEMA_PARTICAO.field(nome).type) else texto
+
+
+def _atende(valor, operador: str, alvo) -> bool:
+    """Avalia um filtro simples (formato pyarrow) sobre o valor de uma partição."""
+    if operador in ("=", "=="):
+        return valor == alvo
+    if operador == "!=":
+        return valor != alvo
+    if operador == "in":
+        return valor in alvo
+    if operador == "not in":
+        return valor not in alvo
+    if operador == "<":
+        return valor < alvo
+    if operador == "<=":
+        return valor <= alvo
+    if operador == ">":
+        return valor > alvo
+    if operador == ">=":
+        return valor >= alvo
+    raise ValueError(f"Operador de filtro não suportado: {operador}")
@@ -1,38 +1,176 @@
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import io
 
-def transformar_bronze_para_silver(buffer_bronze: io.BytesIO) -> pd.DataFrame:
+from app.processamento.camadas import VERSAO_SILVER as VERSAO_TRANSFORMADOR # versões de todas as camadas ficam em `camadas`
+
+# Colunas da Bronze mantidas na Silver
+COLUNAS_SILVER = [
+    'ANO_ELEICAO', 'NR_TURNO', 'SG_UF', 'CD_MUNICIPIO', 'NM_MUNICIPIO',
+    'NR_ZONA', 'NR_SECAO', 'DS_CARGO', 'NR_VOTAVEL', 'NM_VOTAVEL', 'QT_VOTOS'
+]
+
+# Tipos da Silver: categóricas para colunas de baixa cardinalidade e o menor inteiro seguro.
+SCHEMA_SILVER = {
+    'ANO_ELEICAO': 'int16',
+    'NR_TURNO': 'int8',
+    'SG_UF': 'category',
+    'CD_MUNICIPIO': 'int32',
+    'NM_MUNICIPIO': 'category',
+    'NR_ZONA': 'int16',
+    'NR_SECAO': 'int16',
+    'DS_CARGO': 'category',
+    'NR_VOTAVEL': 'int32',
+    'NM_VOTAVEL': 'category',
+    'QT_VOTOS': 'int32',
+    'TP_VOTO': 'category',
+}
+
+CATEGORIAS_TP_VOTO = ['NOMINAL', 'BRANCO', 'NULO']
+TIPOS_INTEIROS = ['int8', 'int16', 'int32', 'int64']
+
+
+def transformar_bronze_para_silver(buffer_bronze: str | io.BytesIO, ordenar: bool = True) -> pd.DataFrame:
     """
     Lê o dado bruto da Bronze e devolve um DataFrame refinado para a Silver.
     """
-    # 1. Carregamento
-    df = pd.read_parquet(buffer_bronze)
+    # 1. Carregamento só das colunas da Silver (a Bronze guarda todas as do arquivo do TSE).
+    # Arquivo em disco é lido via mmap, sem cópia para um buffer próprio.
+    arquivo = pq.ParquetFile(buffer_bronze, memory_map=isinstance(buffer_bronze, str))
+    colunas = [col for col in COLUNAS_SILVER if col in arquivo.schema_arrow.names]
+    df = arquivo.read(columns=colunas).to_pandas()
 
-    # 2. Definição das colunas de interesse
-    colunas_silver = [
-        'ANO_ELEICAO', 'NR_TURNO', 'SG_UF', 'CD_MUNICIPIO', 'NM_MUNICIPIO',
-        'NR_ZONA', 'NR_SECAO', 'DS_CARGO', 'NR_VOTAVEL', 'NM_VOTAVEL', 'QT_VOTOS'
-    ]
-    
+    return aplicar_regras_silver(df, ordenar)
+
+
+def aplicar_regras_silver(df: pd.DataFrame, ordenar: bool = True) -> pd.DataFrame:
+    """
+    Aplica as regras da Silver sobre um DataFrame da Bronze já carregado em memória.
+
+    O resultado segue o `SCHEMA_SILVER`: colunas de baixa cardinalidade como categóricas
+    e inteiros no menor tipo seguro, layout que é preservado no Parquet (dicionário).
+    Com `ordenar=False` as linhas ficam na ordem da Bronze (a ordenação é só para inspeção).
+    """
+    # 2. Seleção das colunas de interesse
     # Filtra apenas as colunas que existem (evita erro se o layout mudar)
-    df_silver = df[[col for col in colunas_silver if col in df.columns]].copy()
+    df_silver = df[[col for col in COLUNAS_SILVER if col in df.columns]].copy()
 
-    # 3. Limpeza de Strings e Normalização
+    # 3. Limpeza de Strings e Normalização (uma vez por valor distinto, não por linha)
     cols_string = ['NM_MUNICIPIO', 'NM_VOTAVEL', 'DS_CARGO']
-    for col in cols_string:
-        if col in df_silver.columns:
-            df_silver[col] = df_silver[col].str.strip().str.upper()
+    for col in df_silver.columns:
+        if SCHEMA_SILVER.get(col) == 'category':
+            df_silver[col] = _para_categoria(df_silver[col], normalizar=col in cols_string)
 
     # 4. Tipagem Estrita
-    df_silver['QT_VOTOS'] = pd.to_numeric(df_silver['QT_VOTOS'], errors='coerce').fillna(0).astype(int)
+    df_silver['QT_VOTOS'] = pd.to_numeric(df_silver['QT_VOTOS'], errors='coerce').fillna(0)
+    for col in df_silver.columns:
+        if SCHEMA_SILVER[col] != 'category':
+            df_silver[col] = _reduzir_inteiro(df_silver[col], SCHEMA_SILVER[col])
     
     # 5. Enriquecimento: Classificação do Tipo de Voto
     # Isso facilita muito criar dashboards depois
-    df_silver['TP_VOTO'] = 'NOMINAL'
-    df_silver.loc[df_silver['NM_VOTAVEL'] == 'VOTO BRANCO', 'TP_VOTO'] = 'BRANCO'
-    df_silver.loc[df_silver['NM_VOTAVEL'] == 'VOTO NULO', 'TP_VOTO'] = 'NULO'
+    df_silver['TP_VOTO'] = _classificar_tipo_voto(df_silver['NM_VOTAVEL'])
 
     # 6. Ordenação lógica (Opcional, mas ajuda na inspeção visual)
-    df_silver = df_silver.sort_values(['NM_MUNICIPIO', 'NR_ZONA', 'NR_SECAO'])
+    # As categorias são ordenadas alfabeticamente, então a ordem é a mesma das strings.
+    if ordenar:
+        df_silver = df_silver.sort_values(['NM_MUNICIPIO', 'NR_ZONA', 'NR_SECAO'])
+
+    return df_silver
+
+
+def _para_categoria(serie: pd.Series, normalizar: bool = False) -> pd.Series:
+    """
+    Converte a coluna em categórica com categorias em ordem alfabética.
+
+    Quando `normalizar=True`, o `strip().upper()` é aplicado apenas aos valores distintos
+    e os códigos das linhas são remapeados (valores que passam a coincidir após a
+    normalização viram a mesma categoria).
+    """
+    codigos, distintos = pd.factorize(serie)
+    distintos = pd.Index(distintos)
+
+    if normalizar:
+        distintos = distintos.str.strip().str.upper()
+
+    categorias = pd.Index(distintos.unique()).sort_values()
+    mapa = categorias.get_indexer(distintos)
+    # Código -1 (nulo) continua -1: o índice extra no fim de `mapa` é o próprio -1.
+    novos_codigos = np.append(mapa, -1)[codigos]
+
+    return pd.Series(
+        pd.Categorical.from_codes(novos_codigos, categories=categorias),
+        index=serie.index,
+        name=serie.name,
+    )
+
+
+def _reduzir_inteiro(serie: pd.Series, tipo: str) -> pd.Series:
+    """
+    Converte para o tipo inteiro do schema, promovendo para o próximo tamanho caso algum
+    valor não caiba (o schema descreve o caso comum; a conversão nunca trunca valores).
+    Colunas com nulos usam o tipo inteiro anulável equivalente (Int8, Int16...).
+    """
+    serie = pd.to_numeric(serie, errors='coerce')
+    minimo, maximo = serie.min(), serie.max()
+
+    ordem = TIPOS_INTEIROS[TIPOS_INTEIROS.index(tipo):]
+    for candidato in ordem:
+        limites = np.iinfo(candidato)
+        if pd.isna(minimo) or (limites.min <= minimo and maximo <= limites.max):
+            break
+
+    if serie.isna().any():
+        return serie.astype(candidato.capitalize())
+    return serie.astype(candidato)
+
+
+def _classificar_tipo_voto(nm_votavel: pd.Series) -> pd.Series:
+    """Classifica o tipo de voto a partir das categorias de NM_VOTAVEL (uma vez por categoria)."""
+    categorias = nm_votavel.cat.categories
+    tipo_por_categoria = np.full(len(categorias) + 1, CATEGORIAS_TP_VOTO.index('NOMINAL'))
+    tipo_por_categoria[:-1][categorias == 'VOTO BRANCO'] = CATEGORIAS_TP_VOTO.index('BRANCO')
+    tipo_por_categoria[:-1][categorias == 'VOTO NULO'] = CATEGORIAS_TP_VOTO.index('NULO')
+
+    # Nomes nulos (código -1) caem no índice extra, classificado como NOMINAL.
+    codigos = tipo_por_categoria[nm_votavel.cat.codes.to_numpy()]
+
+    return pd.Series(
+        pd.Categorical.from_codes(codigos, categories=CATEGORIAS_TP_VOTO),
+        index=nm_votavel.index,
+    )
+
+
+def comparar_layouts_silver(df_bronze: pd.DataFrame) -> dict:
+    """
+    Compara memória (RAM) e tamanho do Parquet entre o layout anterior da Silver
+    (strings como object e QT_VOTOS int64) e o layout compacto do `SCHEMA_SILVER`.
+
+    Returns:
+        dict: {'anterior': {...}, 'compacto': {...}, 'reducao_memoria': float, 'reducao_parquet': float},
+            com memória e Parquet em bytes e as reduções como razão anterior/compacto.
+    """
+    df_compacto = aplicar_regras_silver(df_bronze)
+
+    tipos_anteriores = {
+        col: (object if str(tipo) == 'category' else 'int64')
+        for col, tipo in df_compacto.dtypes.items()
+        if str(tipo) == 'category' or col == 'QT_VOTOS'
+    }
+    df_anterior = df_compacto.astype(tipos_anteriores)
+
+    relatorio = {}
+    for nome, df_layout in (('anterior', df_anterior), ('compacto', df_compacto)):
+        buffer = io.BytesIO()
+        df_layout.to_parquet(buffer, index=False)
+        relatorio[nome] = {
+            'linhas': len(df_layout),
+            'memoria_bytes': int(df_layout.memory_usage(deep=True).sum()),
+            'parquet_bytes': buffer.getbuffer().nbytes,
+            'tipos': {col: str(tipo) for col, tipo in df_layout.dtypes.items()},
+        }
 
-    return df_silver
\ No newline at end of file
+    relatorio['reducao_memoria'] = relatorio['anterior']['memoria_bytes'] / max(relatorio['compacto']['memoria_bytes'], 1)
+    relatorio['reducao_parquet'] = relatorio['anterior']['parquet_bytes'] / max(relatorio['compacto']['parquet_bytes'], 1)
+    return relatorio
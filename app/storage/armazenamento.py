@@ -0,0 +1,131 @@
+import io
+import threading
+from abc import ABC, abstractmethod
+
+from app.storage.arquivo_spool import ArquivoSpool
+from app.utils.vars_envs import Settings_Env
+
+MIME_PASTA = "application/vnd.google-apps.folder" # mimeType das pastas nos metadados (o mesmo do Drive em todos os backends).
+
+
+class Armazenamento(ABC):
+    """
+        Interface do Data Lake usada pelas etapas do pipeline: listar, verificar existência,
+        abrir para leitura, gravar (inteiro ou em streaming) e excluir.
+
+        Pastas e arquivos são identificados por IDs opacos (no Drive, os IDs da API; no
+        backend local, caminhos relativos à raiz). Os metadados seguem o formato do Drive,
+        que é o que `ManifestoPasta` e a linhagem consomem: `id`, `name`, `size`,
+        `md5Checksum`, `modifiedTime` e `mimeType` (`MIME_PASTA` para pastas).
+
+        Implementações: `GoogleDriveClient` e `ArmazenamentoLocal` (disco local ou NFS).
+    """
+
+    @abstractmethod
+    def listar_arquivos(self, folder_id: str) -> list[dict]:
+        """Metadados de todos os arquivos e subpastas da pasta."""
+
+
+    @abstractmethod
+    def arquivo_existe(self, nome_arquivo: str, folder_id: str) -> str | None:
+        """ID do arquivo com o nome exato na pasta, ou None."""
+
+
+    @abstractmethod
+    def download_file(self, file_id: str, md5_checksum: str | None = None) -> bytes:
+        """Conteúdo inteiro do arquivo em memória."""
+
+
+    @abstractmethod
+    def download_para_arquivo(self, file_id: str, caminho_arquivo: str, md5_checksum: str | None = None) -> str:
+        """Copia o arquivo para `caminho_arquivo` (disco local) e devolve o caminho."""
+
+
+    @abstractmethod
+    def download_spool(self, file_id: str, md5_checksum: str | None = None) -> ArquivoSpool:
+        """Arquivo aberto como `ArquivoSpool`, posicionado no início (ver `arquivo_spool`)."""
+
+
+    @abstractmethod
+    def abrir_leitura_aleatoria(self, file_id: str, tamanho: int) -> io.RawIOBase:
+        """Arquivo somente leitura com seek, para ler só trechos (rodapé do Parquet, diretório do ZIP)."""
+
+
+    @abstractmethod
+    def upload_buffer_metadados(self, buffer, file_name: str, folder_drive_id: str) -> dict:
+        """Grava o conteúdo do objeto file-like como um novo arquivo na pasta e devolve os metadados."""
+
+
+    @abstractmethod
+    def atualizar_buffer_metadados(self, file_id: str, buffer) -> dict:
+        """Substitui o conteúdo de um arquivo existente, mantendo o ID, e devolve os metadados."""
+
+
+    @abstractmethod
+    def iniciar_upload_resumable(self, file_name: str, folder_drive_id: str,
+                                 mimetype: str = "application/zip",
+                                 file_id: str | None = None):
+        """
+            Abre uma gravação em streaming, alimentada fatia a fatia. A sessão devolvida tem
+            o contrato de `SessaoUploadResumable`: `uri_sessao`, `offset`, `metadados`,
+            `enviar_fatia(dados, final)`, `consultar_offset()` e `cancelar()`.
+        """
+
+
+    @abstractmethod
+    def retomar_upload_resumable(self, uri_sessao: str):
+        """
+            Reabre uma gravação em streaming iniciada antes, posicionada no último byte gravado.
+
+            Raises:
+                ErroHttpDrive | FileNotFoundError: Se a sessão não existir mais.
+        """
+
+
+    @abstractmethod
+    def criar_pasta(self, nome: str, parent_id: str) -> dict:
+        """Cria uma subpasta e devolve seus metadados."""
+
+
+    @abstractmethod
+    def excluir_arquivo(self, file_id: str) -> None:
+        """Exclui o arquivo (ou a pasta, com todo o conteúdo)."""
+
+
+    def upload_buffer(self, buffer, file_name: str, folder_drive_id: str) -> str:
+        """Grava o buffer como um novo arquivo na pasta e devolve o ID."""
+        return self.upload_buffer_metadados(buffer, file_name, folder_drive_id)["id"]
+
+
+_armazenamentos_locais: dict[str, Armazenamento] = {}
+_trava_armazenamentos = threading.Lock()
+
+
+def obter_armazenamento_compartilhado(backend: str | None = None) -> Armazenamento:
+    """
+        Backend do Data Lake do processo, escolhido por `BACKEND_ARMAZENAMENTO`:
+
+        - `drive`: o cliente compartilhado do Google Drive (`obter_drive_compartilhado`);
+        - `local`: `ArmazenamentoLocal` em `DIRETORIO_ARMAZENAMENTO_LOCAL`, sem OAuth nem rede.
+          As pastas das camadas (`ID_PASTA_*`) passam a ser subpastas dessa raiz.
+
+        Raises:
+            ValueError: Se o backend não for conhecido.
+    """
+    backend = (backend or Settings_Env.BACKEND_ARMAZENAMENTO).lower()
+
+    if backend == "drive":
+        # Importado aqui: o backend local não carrega as bibliotecas do Google nem autentica.
+        from app.storage.google_drive import obter_drive_compartilhado
+        return obter_drive_compartilhado()
+
+    if backend == "local":
+        from app.storage.armazenamento_local import ArmazenamentoLocal
+
+        raiz = Settings_Env.DIRETORIO_ARMAZENAMENTO_LOCAL
+        with _trava_armazenamentos:
+            if raiz not in _armazenamentos_locais:
+                _armazenamentos_locais[raiz] = ArmazenamentoLocal(raiz)
+            return _armazenamentos_locais[raiz]
+
+    raise ValueError(f"BACKEND_ARMAZENAMENTO desconhecido: {backend} (use 'drive' ou 'local')")
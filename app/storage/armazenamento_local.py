@@ -0,0 +1,363 @@
+import fcntl
+import hashlib
+import io
+import json
+import logging
+import os
+import secrets
+import shutil
+import stat
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+from app.storage.armazenamento import MIME_PASTA, Armazenamento
+from app.storage.arquivo_spool import ArquivoSpool
+
+LOGGER = logging.getLogger(__name__)
+
+NOME_INDICE = ".indice.json"     # md5 dos arquivos gravados pelo backend, um por pasta
+NOME_TRAVA_INDICE = ".indice.lock" # trava (flock) das atualizações do índice entre processos
+PREFIXO_PARCIAL = ".parcial-"    # gravações em andamento (ocultas na listagem)
+TAMANHO_COPIA = 1024 * 1024
+
+
+def _copiar_arquivo(origem, destino) -> None:
+    """
+        Copia entre dois arquivos abertos com `os.sendfile`: os bytes vão de um arquivo ao
+        outro dentro do kernel, sem passar pelo Python. Onde o sendfile entre arquivos não é
+        suportado, copia em blocos.
+    """
+    tamanho = os.fstat(origem.fileno()).st_size
+    enviado = 0
+    try:
+        while enviado < tamanho:
+            copiados = os.sendfile(destino.fileno(), origem.fileno(), enviado, tamanho - enviado)
+            if copiados == 0:
+                break
+            enviado += copiados
+    except (AttributeError, OSError):
+        if enviado:
+            raise
+        shutil.copyfileobj(origem, destino, length=TAMANHO_COPIA)
+
+
+def _copiar_com_md5(origem, destino) -> str:
+    """Copia o objeto file-like para o arquivo de destino calculando o md5 no caminho."""
+    md5 = hashlib.md5()
+    bloco = memoryview(bytearray(TAMANHO_COPIA))
+    while lidos := origem.readinto(bloco):
+        md5.update(bloco[:lidos])
+        destino.write(bloco[:lidos])
+    return md5.hexdigest()
+
+
+def _md5_arquivo(caminho: str) -> str:
+    with open(caminho, "rb") as arquivo:
+        return hashlib.file_digest(arquivo, "md5").hexdigest()
+
+
+class SessaoGravacaoLocal:
+    """
+        Gravação em streaming no backend local, com o contrato de `SessaoUploadResumable`.
+
+        As fatias vão para um arquivo parcial oculto na pasta de destino, que só recebe o
+        nome final (`os.replace`, atômico) quando a última fatia chega. A `uri_sessao` é o
+        caminho do arquivo parcial, então uma gravação interrompida continua em outra
+        execução a partir do tamanho dele.
+    """
+
+    def __init__(self, armazenamento: "ArmazenamentoLocal", uri_sessao: str, offset: int = 0):
+        self.armazenamento = armazenamento
+        self.uri_sessao = uri_sessao
+        self.offset = offset
+        self.metadados = None
+
+
+    @property
+    def _caminho_parcial(self) -> str:
+        return self.armazenamento._caminho(self.uri_sessao)
+
+
+    def consultar_offset(self) -> int:
+        """
+            Bytes já gravados no arquivo parcial.
+
+            Raises:
+                FileNotFoundError: Se a gravação não existir mais (concluída ou cancelada).
+        """
+        self.offset = os.path.getsize(self._caminho_parcial)
+        return self.offset
+
+
+    def enviar_fatia(self, dados, final: bool = False) -> str | None:
+        """Grava a fatia a partir de `offset`. Com `final=True`, publica o arquivo e devolve o ID."""
+        with open(self._caminho_parcial, "r+b") as arquivo:
+            arquivo.seek(self.offset)
+            arquivo.write(dados)
+            arquivo.truncate()
+            if final:
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+        self.offset += len(dados)
+
+        if not final:
+            return None
+
+        caminho_parcial = self._caminho_parcial
+        pasta, nome_parcial = os.path.split(caminho_parcial)
+        nome_final = nome_parcial.removeprefix(PREFIXO_PARCIAL).split("-", 1)[1]
+        self.metadados = self.armazenamento._publicar(
+            caminho_parcial, os.path.join(pasta, nome_final), _md5_arquivo(caminho_parcial)
+        )
+        return self.metadados["id"]
+
+
+    def cancelar(self) -> None:
+        """Descarta o arquivo parcial."""
+        try:
+            os.remove(self._caminho_parcial)
+        except OSError:
+            pass
+
+
+class ArmazenamentoLocal(Armazenamento):
+    """
+        Data Lake em um diretório local ou montado por NFS, sem autenticação nem rede.
+
+        - IDs são caminhos relativos à raiz (ex: `bronze/votacao_secao_2022_CE.parquet`);
+        - toda gravação vai para um arquivo temporário na própria pasta e recebe o nome
+          final com `os.replace`, então um leitor nunca vê um arquivo pela metade;
+        - downloads para disco usam `os.sendfile` e `download_spool` adota o próprio arquivo
+          (lido pelo Arrow via mmap), sem cópias em Python;
+        - as listagens ficam em memória e só são refeitas quando nome, tamanho ou mtime de
+          alguma entrada da pasta muda (reescritas no lugar também contam); o
+          md5 dos arquivos gravados fica em um índice por pasta (`.indice.json`), válido
+          enquanto tamanho e mtime do arquivo forem os mesmos. Cada gravação relê o índice e o
+          regrava sob um `flock` (`.indice.lock`), para não perder as entradas de outros
+          processos sobre a mesma raiz (ex: workers no mesmo NFS). Arquivos colocados na pasta
+          por fora ficam sem md5, e a linhagem usa tamanho + data de modificação.
+    """
+
+    def __init__(self, raiz: str):
+        """
+            Attributes:
+                raiz (str): Diretório raiz do Data Lake (criado se não existir).
+        """
+        self.raiz = os.path.abspath(raiz)
+        os.makedirs(self.raiz, exist_ok=True)
+
+        self._listagens: dict[str, tuple[tuple, list[dict]]] = {} # pasta -> ((nome, tamanho, mtime_ns) das entradas, metadados)
+        self._indices: dict[str, tuple[tuple, dict[str, dict]]] = {} # pasta -> ((tamanho, mtime_ns) do índice, nome -> {tamanho, modificado_ns, md5})
+        self._trava = threading.RLock()
+
+
+    def listar_arquivos(self, folder_id: str) -> list[dict]:
+        pasta = self._caminho(folder_id)
+        try:
+            with os.scandir(pasta) as entradas:
+                estados = sorted(
+                    (entrada.name, entrada.stat()) for entrada in entradas if not entrada.name.startswith(".")
+                )
+        except FileNotFoundError:
+            return []
+
+        # O mtime da pasta não muda quando um arquivo é reescrito no lugar: a chave é o estado de cada entrada.
+        chave = tuple((nome, estado.st_size, estado.st_mtime_ns) for nome, estado in estados)
+        with self._trava:
+            em_cache = self._listagens.get(pasta)
+            if em_cache is not None and em_cache[0] == chave:
+                return list(em_cache[1])
+
+            arquivos = [self._metadados(os.path.join(pasta, nome), estado) for nome, estado in estados]
+            self._listagens[pasta] = (chave, arquivos)
+            return list(arquivos)
+
+
+    def arquivo_existe(self, nome_arquivo: str, folder_id: str) -> str | None:
+        file_id = self._id(os.path.join(self._caminho(folder_id), nome_arquivo))
+        return file_id if os.path.exists(self._caminho(file_id)) else None
+
+
+    def download_file(self, file_id: str, md5_checksum: str | None = None) -> bytes:
+        with open(self._caminho(file_id), "rb") as arquivo:
+            return arquivo.read()
+
+
+    def download_para_arquivo(self, file_id: str, caminho_arquivo: str, md5_checksum: str | None = None) -> str:
+        with open(self._caminho(file_id), "rb") as origem, open(caminho_arquivo, "wb") as destino:
+            _copiar_arquivo(origem, destino)
+        return caminho_arquivo
+
+
+    def download_spool(self, file_id: str, md5_checksum: str | None = None) -> ArquivoSpool:
+        """Adota o próprio arquivo do Data Lake, sem cópia (o Arrow o lê via mmap)."""
+        return ArquivoSpool.de_arquivo(open(self._caminho(file_id), "rb"))
+
+
+    def abrir_leitura_aleatoria(self, file_id: str, tamanho: int) -> io.RawIOBase:
+        return open(self._caminho(file_id), "rb", buffering=0)
+
+
+    def upload_buffer_metadados(self, buffer, file_name: str, folder_drive_id: str) -> dict:
+        return self._gravar(buffer, os.path.join(self._caminho(folder_drive_id), file_name))
+
+
+    def atualizar_buffer_metadados(self, file_id: str, buffer) -> dict:
+        return self._gravar(buffer, self._caminho(file_id))
+
+
+    def iniciar_upload_resumable(self, file_name: str, folder_drive_id: str,
+                                 mimetype: str = "application/zip",
+                                 file_id: str | None = None) -> SessaoGravacaoLocal:
+        destino = self._caminho(file_id) if file_id else os.path.join(self._caminho(folder_drive_id), file_name)
+        pasta, nome = os.path.split(destino)
+        os.makedirs(pasta, exist_ok=True)
+
+        caminho_parcial = os.path.join(pasta, f"{PREFIXO_PARCIAL}{secrets.token_hex(8)}-{nome}")
+        open(caminho_parcial, "wb").close()
+        return SessaoGravacaoLocal(self, self._id(caminho_parcial))
+
+
+    def retomar_upload_resumable(self, uri_sessao: str) -> SessaoGravacaoLocal:
+        sessao = SessaoGravacaoLocal(self, uri_sessao)
+        sessao.consultar_offset()
+        return sessao
+
+
+    def criar_pasta(self, nome: str, parent_id: str) -> dict:
+        caminho = os.path.join(self._caminho(parent_id), nome)
+        os.makedirs(caminho, exist_ok=True)
+        return self._metadados(caminho)
+
+
+    def excluir_arquivo(self, file_id: str) -> None:
+        caminho = self._caminho(file_id)
+        if os.path.isdir(caminho):
+            shutil.rmtree(caminho)
+        else:
+            os.remove(caminho)
+
+        pasta, nome = os.path.split(caminho)
+        if os.path.exists(os.path.join(pasta, NOME_INDICE)):
+            self._atualizar_indice(pasta, lambda indice: indice.pop(nome, None))
+
+
+    def _caminho(self, file_id: str) -> str:
+        """Caminho absoluto de um ID, sem permitir sair da raiz (ex: com '..')."""
+        caminho = os.path.abspath(os.path.join(self.raiz, file_id or ""))
+        if caminho != self.raiz and not caminho.startswith(self.raiz + os.sep):
+            raise ValueError(f"ID fora da raiz do armazenamento local: {file_id}")
+        return caminho
+
+
+    def _id(self, caminho: str) -> str:
+        return os.path.relpath(caminho, self.raiz).replace(os.sep, "/")
+
+
+    def _gravar(self, buffer, destino: str) -> dict:
+        """Grava o buffer em um temporário da pasta de destino e o publica com `os.replace`."""
+        pasta = os.path.dirname(destino)
+        os.makedirs(pasta, exist_ok=True)
+
+        descritor, temporario = tempfile.mkstemp(dir=pasta, prefix=PREFIXO_PARCIAL)
+        try:
+            with os.fdopen(descritor, "wb") as arquivo:
+                md5 = _copiar_com_md5(buffer, arquivo)
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+            return self._publicar(temporario, destino, md5)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+
+    def _publicar(self, temporario: str, destino: str, md5: str) -> dict:
+        """Dá ao arquivo gravado o nome final e registra o md5 no índice da pasta."""
+        os.replace(temporario, destino)
+        estado = os.stat(destino)
+
+        pasta, nome = os.path.split(destino)
+        registro = {"tamanho": estado.st_size, "modificado_ns": estado.st_mtime_ns, "md5": md5}
+        self._atualizar_indice(pasta, lambda indice: indice.__setitem__(nome, registro))
+        with self._trava:
+            self._listagens.pop(pasta, None)
+        return self._metadados(destino, estado)
+
+
+    def _indice(self, pasta: str) -> dict[str, dict]:
+        """Índice de md5 da pasta, relido só quando o arquivo do índice muda (chamar com a trava)."""
+        chave = self._estado_indice(pasta)
+        em_cache = self._indices.get(pasta)
+        if em_cache is None or em_cache[0] != chave:
+            self._indices[pasta] = (chave, self._ler_indice(pasta))
+        return self._indices[pasta][1]
+
+
+    def _estado_indice(self, pasta: str) -> tuple:
+        try:
+            estado = os.stat(os.path.join(pasta, NOME_INDICE))
+        except FileNotFoundError:
+            return ()
+        return (estado.st_ino, estado.st_size, estado.st_mtime_ns)
+
+
+    def _ler_indice(self, pasta: str) -> dict[str, dict]:
+        try:
+            with open(os.path.join(pasta, NOME_INDICE), encoding="utf-8") as arquivo:
+                return json.load(arquivo)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            LOGGER.warning(f"Índice de {pasta} ilegível; os md5 serão registrados de novo nas próximas gravações.")
+            return {}
+
+
+    def _atualizar_indice(self, pasta: str, alterar) -> None:
+        """
+            Aplica `alterar` ao índice da pasta e o regrava.
+
+            Outros processos (ex: workers sobre o mesmo NFS) também gravam o índice: sob um
+            `flock` exclusivo em `.indice.lock`, o índice é relido do disco antes da alteração,
+            então as entradas gravadas por eles desde a última leitura não se perdem.
+        """
+        with self._trava, open(os.path.join(pasta, NOME_TRAVA_INDICE), "a") as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            try:
+                indice = self._ler_indice(pasta)
+                alterar(indice)
+                self._salvar_indice(pasta, indice)
+                self._indices[pasta] = (self._estado_indice(pasta), indice)
+            finally:
+                fcntl.flock(trava, fcntl.LOCK_UN)
+
+
+    def _salvar_indice(self, pasta: str, indice: dict[str, dict]) -> None:
+        descritor, temporario = tempfile.mkstemp(dir=pasta, prefix=PREFIXO_PARCIAL)
+        with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+            json.dump(indice, arquivo)
+        os.replace(temporario, os.path.join(pasta, NOME_INDICE))
+
+
+    def _metadados(self, caminho: str, estado: os.stat_result | None = None) -> dict:
+        """Metadados no formato do Drive (`CAMPOS_ARQUIVO`)."""
+        estado = estado or os.stat(caminho)
+        pasta, nome = os.path.split(caminho)
+        modificado = datetime.fromtimestamp(estado.st_mtime, timezone.utc).isoformat(timespec="milliseconds")
+        metadados = {
+            "id": self._id(caminho),
+            "name": nome,
+            "modifiedTime": modificado.replace("+00:00", "Z"),
+        }
+        if stat.S_ISDIR(estado.st_mode):
+            metadados["mimeType"] = MIME_PASTA
+            return metadados
+
+        metadados["size"] = str(estado.st_size)
+        metadados["mimeType"] = "application/octet-stream"
+        with self._trava:
+            registro = self._indice(pasta).get(nome)
+        if registro and (registro["tamanho"], registro["modificado_ns"]) == (estado.st_size, estado.st_mtime_ns):
+            metadados["md5Checksum"] = registro["md5"]
+        return metadados
@@ -0,0 +1,147 @@
+import io
+import mmap
+import os
+import tempfile
+from typing import TYPE_CHECKING
+
+from app.utils.vars_envs import Settings_Env
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+
+class ArquivoSpool(io.RawIOBase):
+    """
+        Arquivo temporário que fica em memória até `limite_memoria_bytes` e passa para o
+        disco acima disso.
+
+        Serve de destino para downloads e para a serialização de Parquet, e de origem para
+        uploads (seek/read) sem `getvalue()`. Para leitura pelo Arrow, `entrada_arrow()`
+        expõe o conteúdo sem cópia: o próprio buffer em memória ou um `mmap` do arquivo em
+        disco, de onde o sistema operacional carrega só as páginas lidas.
+
+        Uso:
+            with drive.download_spool(file_id, md5) as arquivo:
+                tabela = pq.read_table(arquivo.entrada_arrow())
+    """
+
+    def __init__(self, limite_memoria_bytes: int | None = None, diretorio: str | None = None):
+        """
+            Attributes:
+                limite_memoria_bytes (int): Tamanho a partir do qual o conteúdo vai para o disco.
+                diretorio (str | None): Pasta do arquivo em disco (padrão: a do `tempfile`).
+        """
+        super().__init__()
+        self.limite_memoria_bytes = (
+            Settings_Env.LIMITE_SPOOL_MEMORIA_BYTES if limite_memoria_bytes is None else limite_memoria_bytes
+        )
+        self.diretorio = diretorio
+        self._arquivo = io.BytesIO()
+        self._em_disco = False
+        self._mapa: mmap.mmap | None = None
+
+
+    @classmethod
+    def de_arquivo(cls, arquivo) -> "ArquivoSpool":
+        """Adota um arquivo em disco já aberto para leitura (ex: uma entrada do cache), sem copiá-lo."""
+        spool = cls()
+        spool._arquivo = arquivo
+        spool._em_disco = True
+        return spool
+
+
+    @property
+    def em_disco(self) -> bool:
+        return self._em_disco
+
+
+    def readable(self) -> bool:
+        return True
+
+
+    def writable(self) -> bool:
+        return True
+
+
+    def seekable(self) -> bool:
+        return True
+
+
+    def write(self, dados) -> int:
+        if not self._em_disco and self._arquivo.tell() + len(dados) > self.limite_memoria_bytes:
+            self._transbordar()
+        return self._arquivo.write(dados)
+
+
+    def readinto(self, buffer) -> int:
+        return self._arquivo.readinto(buffer)
+
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._arquivo.seek(offset, whence)
+
+
+    def tell(self) -> int:
+        return self._arquivo.tell()
+
+
+    def flush(self) -> None:
+        if not self._arquivo.closed:
+            self._arquivo.flush()
+
+
+    def tamanho(self) -> int:
+        if self._em_disco:
+            self._arquivo.flush()
+            return os.fstat(self._arquivo.fileno()).st_size
+        return self._arquivo.getbuffer().nbytes
+
+
+    def buffer_arrow(self) -> "pa.Buffer":
+        """Conteúdo como `pyarrow.Buffer`, sem cópia (a memória do BytesIO ou um mmap do arquivo)."""
+        # Importado aqui: o armazenamento (e com ele os comandos de metadados do CLI) não carrega o Arrow.
+        import pyarrow as pa
+
+        if not self._em_disco:
+            return pa.py_buffer(self._arquivo.getbuffer())
+
+        if self._mapa is None:
+            self._arquivo.flush()
+            if self.tamanho() == 0:
+                return pa.py_buffer(b"")
+            self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        return pa.py_buffer(self._mapa)
+
+
+    def entrada_arrow(self) -> "pa.BufferReader":
+        """Arquivo de entrada do Arrow (`pq.read_table`, `pq.ParquetFile`, `pd.read_parquet`) sem cópia."""
+        import pyarrow as pa
+
+        return pa.BufferReader(self.buffer_arrow())
+
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        if self._mapa is not None:
+            try:
+                self._mapa.close()
+            except BufferError:
+                pass # Ainda há buffers do Arrow apontando para o mmap; ele é liberado junto com eles.
+            self._mapa = None
+        try:
+            self._arquivo.close()
+        except BufferError:
+            pass # Idem para o buffer exportado do BytesIO.
+        super().close()
+
+
+    def _transbordar(self) -> None:
+        """Move o conteúdo em memória para um arquivo temporário em disco."""
+        posicao = self._arquivo.tell()
+        em_disco = tempfile.TemporaryFile(dir=self.diretorio)
+        em_disco.write(self._arquivo.getbuffer())
+        em_disco.seek(posicao)
+        self._arquivo.close()
+        self._arquivo = em_disco
+        self._em_disco = True
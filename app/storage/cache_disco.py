@@ -0,0 +1,146 @@
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from typing import BinaryIO, Callable
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class EstatisticasCache:
+    """Contadores do cache neste processo."""
+    acertos: int = 0
+    faltas: int = 0
+    bytes_servidos: int = 0   # bytes entregues a partir do cache (downloads evitados)
+    bytes_gravados: int = 0
+    remocoes: int = 0         # entradas descartadas pelo LRU
+
+
+class CacheDisco:
+    """
+        Cache local de objetos do Drive, endereçado por conteúdo (ID do arquivo + md5).
+
+        Como a chave inclui o md5, uma entrada nunca fica desatualizada: um arquivo que
+        mudou no Drive tem outra chave e a entrada antiga sai pelo LRU. O uso de cada
+        entrada é marcado no mtime do arquivo, e ao passar do orçamento as entradas
+        menos usadas recentemente são apagadas.
+
+        Seguro para vários processos no mesmo diretório: a gravação vai para um arquivo
+        temporário que só entra no lugar com `os.replace` (atômico), e as entradas são
+        abertas antes de serem entregues, então uma remoção concorrente não afeta quem já
+        está lendo.
+    """
+
+    def __init__(self, diretorio: str, orcamento_bytes: int):
+        """
+            Attributes:
+                diretorio (str): Pasta das entradas do cache.
+                orcamento_bytes (int): Tamanho máximo somado das entradas.
+        """
+        self.diretorio = diretorio
+        self.orcamento_bytes = orcamento_bytes
+        self._estatisticas = EstatisticasCache()
+        self._trava = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+
+    def abrir(self, file_id: str, md5: str) -> BinaryIO | None:
+        """Abre a entrada para leitura (marcando o uso) ou devolve None se não estiver no cache."""
+        caminho = self._caminho(file_id, md5)
+        try:
+            arquivo = open(caminho, "rb")
+        except FileNotFoundError:
+            with self._trava:
+                self._estatisticas.faltas += 1
+            return None
+
+        try:
+            os.utime(caminho)
+        except FileNotFoundError:
+            pass # Removida por outro processo depois de aberta: a leitura continua válida.
+
+        with self._trava:
+            self._estatisticas.acertos += 1
+            self._estatisticas.bytes_servidos += os.fstat(arquivo.fileno()).st_size
+        return arquivo
+
+
+    def gravar(self, file_id: str, md5: str, escrever: Callable[[BinaryIO], None]) -> BinaryIO:
+        """
+            Grava uma nova entrada e a devolve aberta para leitura.
+
+            Args:
+                escrever (Callable): Recebe o arquivo temporário e escreve o conteúdo nele
+                    (ex: o download do Drive).
+        """
+        caminho = self._caminho(file_id, md5)
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, prefix=".parcial-")
+        try:
+            with os.fdopen(descritor, "wb") as destino:
+                escrever(destino)
+            os.replace(temporario, caminho)
+        except BaseException:
+            try:
+                os.remove(temporario)
+            except FileNotFoundError:
+                pass
+            raise
+
+        arquivo = open(caminho, "rb")
+        tamanho = os.fstat(arquivo.fileno()).st_size
+        with self._trava:
+            self._estatisticas.bytes_gravados += tamanho
+
+        self._aplicar_orcamento(preservar=caminho)
+        return arquivo
+
+
+    def estatisticas(self) -> dict:
+        """Contadores deste processo e ocupação atual do diretório."""
+        with self._trava:
+            dados = asdict(self._estatisticas)
+        consultas = dados["acertos"] + dados["faltas"]
+        dados["taxa_acerto"] = round(dados["acertos"] / consultas, 4) if consultas else 0.0
+        dados["bytes_em_disco"] = sum(tamanho for _, tamanho, _ in self._entradas())
+        return dados
+
+
+    def _caminho(self, file_id: str, md5: str) -> str:
+        return os.path.join(self.diretorio, f"{file_id}-{md5}")
+
+
+    def _entradas(self) -> list[tuple[str, int, float]]:
+        """(caminho, tamanho, último uso) de cada entrada completa."""
+        entradas = []
+        with os.scandir(self.diretorio) as itens:
+            for item in itens:
+                if item.name.startswith(".parcial-") or not item.is_file():
+                    continue
+                try:
+                    info = item.stat()
+                except FileNotFoundError:
+                    continue
+                entradas.append((item.path, info.st_size, info.st_mtime))
+        return entradas
+
+
+    def _aplicar_orcamento(self, preservar: str) -> None:
+        """Remove as entradas menos usadas recentemente até caber no orçamento."""
+        entradas = sorted(self._entradas(), key=lambda entrada: entrada[2])
+        total = sum(tamanho for _, tamanho, _ in entradas)
+
+        for caminho, tamanho, _ in entradas:
+            if total <= self.orcamento_bytes:
+                break
+            if caminho == preservar:
+                continue
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass # Outro processo já removeu.
+            total -= tamanho
+            with self._trava:
+                self._estatisticas.remocoes += 1
+            LOGGER.info(f"Cache do Drive: removida {os.path.basename(caminho)} ({tamanho} bytes)")
@@ -0,0 +1,71 @@
+import json
+import logging
+import os
+import tempfile
+from dataclasses import asdict, dataclass
+
+from app.storage.manifesto_pasta import ArquivoManifesto
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class CheckpointIngestao:
+    """Progresso de uma ingestão em streaming (TSE -> upload resumable do Drive)."""
+    nome_arquivo: str
+    link: str
+    uri_sessao: str                    # sessão resumable do Drive que recebe o arquivo
+    tamanho_total: int | None          # validadores do arquivo no TSE quando a ingestão começou
+    etag: str | None
+    ultima_modificacao: str | None
+    offset: int = 0                    # bytes baixados e confirmados pelo Drive
+    md5_cauda: str | None = None       # md5 dos bytes imediatamente antes de `offset` (confere a retomada)
+    retomadas: int = 0
+
+    def mesma_origem(self, link: str, origem: ArquivoManifesto) -> bool:
+        """Indica se o arquivo no TSE ainda é o mesmo de quando o checkpoint foi criado."""
+        return (self.link, self.tamanho_total, self.etag, self.ultima_modificacao) == (
+            link, origem.tamanho, origem.md5, origem.modificado_em
+        )
+
+
+class RegistroCheckpoints:
+    """
+        Checkpoints das ingestões em andamento, um JSON por arquivo em `diretorio`.
+
+        Cada gravação é atômica (arquivo temporário + `os.replace`), então uma queda no
+        meio da gravação deixa o checkpoint anterior intacto.
+    """
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+
+
+    def carregar(self, nome_arquivo: str) -> CheckpointIngestao | None:
+        try:
+            with open(self._caminho(nome_arquivo), encoding="utf-8") as arquivo:
+                return CheckpointIngestao(**json.load(arquivo))
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError):
+            LOGGER.warning(f"Checkpoint de {nome_arquivo} ilegível; a ingestão recomeça do zero.")
+            return None
+
+
+    def salvar(self, checkpoint: CheckpointIngestao) -> None:
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, prefix=".parcial-")
+        with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+            json.dump(asdict(checkpoint), arquivo, indent=2)
+        os.replace(temporario, self._caminho(checkpoint.nome_arquivo))
+
+
+    def remover(self, nome_arquivo: str) -> None:
+        try:
+            os.remove(self._caminho(nome_arquivo))
+        except FileNotFoundError:
+            pass
+
+
+    def _caminho(self, nome_arquivo: str) -> str:
+        return os.path.join(self.diretorio, f"{os.path.basename(nome_arquivo)}.json")
@@ -0,0 +1,219 @@
+import json
+import logging
+import random
+import ssl
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+from googleapiclient.errors import HttpError
+
+from app.utils.vars_envs import Settings_Env
+
+LOGGER = logging.getLogger(__name__)
+
+# Classes de erro das chamadas ao Drive
+ERRO_LIMITE = "limite"            # 429 e 403 de cota (rateLimitExceeded, userRateLimitExceeded)
+ERRO_TRANSITORIO = "transitorio"  # 5xx, timeouts e falhas de conexão
+ERRO_PERMANENTE = "permanente"    # 4xx restantes: repetir não adianta
+
+MOTIVOS_LIMITE = {"rateLimitExceeded", "userRateLimitExceeded", "sharingRateLimitExceeded"} # dailyLimitExceeded não volta em minutos: é permanente.
+STATUS_TRANSITORIOS = {408, 500, 502, 503, 504}
+
+
+class ErroHttpDrive(RuntimeError):
+    """Resposta HTTP inesperada do Drive em chamadas feitas fora do googleapiclient."""
+
+    def __init__(self, mensagem: str, status: int, corpo: str = ""):
+        super().__init__(f"{mensagem} ({status}): {corpo}")
+        self.status = status
+        self.corpo = corpo
+
+
+def classificar_erro(erro: Exception) -> str:
+    """
+        Classifica um erro de chamada ao Drive em limite de cota, transitório ou permanente.
+
+        O Drive sinaliza cota estourada tanto com 429 quanto com 403; no 403 o motivo
+        (`reason`) no corpo da resposta diferencia cota de falta de permissão.
+    """
+    if isinstance(erro, HttpError):
+        status, corpo = erro.resp.status, erro.content.decode("utf-8", errors="replace") if erro.content else ""
+    elif isinstance(erro, ErroHttpDrive):
+        status, corpo = erro.status, erro.corpo
+    elif isinstance(erro, (ConnectionError, TimeoutError, ssl.SSLError)) or _eh_erro_de_rede(erro):
+        return ERRO_TRANSITORIO
+    else:
+        return ERRO_PERMANENTE
+
+    if status == 429 or (status == 403 and _motivo(corpo) in MOTIVOS_LIMITE):
+        return ERRO_LIMITE
+    if status in STATUS_TRANSITORIOS:
+        return ERRO_TRANSITORIO
+    return ERRO_PERMANENTE
+
+
+def _motivo(corpo: str) -> str | None:
+    """Extrai o `reason` do corpo de erro da API do Google."""
+    try:
+        erros = json.loads(corpo).get("error", {}).get("errors", [])
+        return erros[0].get("reason") if erros else None
+    except (ValueError, AttributeError):
+        return None
+
+
+def _eh_erro_de_rede(erro: Exception) -> bool:
+    """Falhas de conexão/timeout do requests, urllib3 e httplib2, sem importar as bibliotecas aqui."""
+    modulo = type(erro).__module__.split(".")[0]
+    nome = type(erro).__name__
+    return modulo in ("requests", "urllib3", "httplib2") and any(
+        termo in nome for termo in ("Connection", "Timeout", "ServerNotFound", "Protocol")
+    )
+
+
+@dataclass
+class EstatisticasCota:
+    """Contadores acumulados do controlador."""
+    chamadas: int = 0
+    sucessos: int = 0
+    limitadas: int = 0      # respostas 429/403 de cota
+    transitorias: int = 0   # 5xx e falhas de rede
+    retentativas: int = 0
+    falhas: int = 0         # chamadas que terminaram em erro (após as retentativas)
+    reducoes: int = 0       # vezes em que o limite de chamadas simultâneas foi cortado
+
+
+class ControladorCota:
+    """
+        Controla a vazão das chamadas ao Drive para aproveitar a cota sem estourá-la.
+
+        - Concorrência AIMD: o número de chamadas simultâneas cresce 1 a cada "janela"
+          de sucessos (aumento aditivo) e cai pela metade a cada resposta de cota
+          (redução multiplicativa), no máximo uma vez por intervalo de espera.
+        - Retentativas: erros de cota e transitórios são repetidos com espera exponencial
+          e jitter completo (`uniform(0, base * 2^n)`); erros permanentes sobem na hora.
+        - Contadores de chamadas, limitações e retentativas em `estatisticas()`.
+
+        Uma chamada que espera para tentar de novo não ocupa vaga de concorrência.
+    """
+
+    def __init__(self,
+                 limite_maximo: int | None = None,
+                 limite_inicial: int | None = None,
+                 tentativas: int | None = None,
+                 espera_base_segundos: float | None = None,
+                 espera_maxima_segundos: float | None = None,
+                 fator_reducao: float = 0.5,
+                 dormir: Callable[[float], None] = time.sleep,
+                 aleatorio: Callable[[float, float], float] = random.uniform):
+        """
+            Attributes:
+                limite_maximo (int): Teto de chamadas simultâneas.
+                limite (float): Chamadas simultâneas permitidas agora (ajustado por AIMD).
+                tentativas (int): Tentativas por chamada, contando a primeira.
+                espera_base_segundos (float): Espera máxima antes da 1ª retentativa.
+                espera_maxima_segundos (float): Teto da espera entre tentativas.
+                fator_reducao (float): Multiplicador do limite a cada resposta de cota.
+                dormir, aleatorio: Injetáveis para simular o tempo e o jitter.
+        """
+        self.limite_maximo = limite_maximo or Settings_Env.MAX_CHAMADAS_DRIVE_EM_VOO
+        self.limite = float(min(limite_inicial or self.limite_maximo, self.limite_maximo))
+        self.tentativas = tentativas or Settings_Env.TENTATIVAS_DRIVE
+        self.espera_base_segundos = Settings_Env.ESPERA_BASE_DRIVE_SEGUNDOS if espera_base_segundos is None else espera_base_segundos
+        self.espera_maxima_segundos = Settings_Env.ESPERA_MAXIMA_DRIVE_SEGUNDOS if espera_maxima_segundos is None else espera_maxima_segundos
+        self.fator_reducao = fator_reducao
+        self._dormir = dormir
+        self._aleatorio = aleatorio
+
+        self._em_voo = 0
+        self._condicao = threading.Condition()
+        self._ultima_reducao = float("-inf")
+        self._estatisticas = EstatisticasCota()
+
+
+    def executar(self, funcao: Callable, *args, **kwargs):
+        """
+            Executa a chamada respeitando o limite de concorrência, com retentativas.
+
+            Raises:
+                Exception: O erro da última tentativa, ou o primeiro erro permanente.
+        """
+        for tentativa in range(1, self.tentativas + 1):
+            self._adquirir()
+            try:
+                resultado = funcao(*args, **kwargs)
+            except Exception as erro:
+                classe = classificar_erro(erro)
+                self._liberar(sucesso=False, classe=classe)
+
+                if classe == ERRO_PERMANENTE or tentativa == self.tentativas:
+                    with self._condicao:
+                        self._estatisticas.falhas += 1
+                    raise
+
+                espera = self.calcular_espera(tentativa)
+                with self._condicao:
+                    self._estatisticas.retentativas += 1
+                LOGGER.warning(f"Drive: erro {classe} (tentativa {tentativa}/{self.tentativas}), "
+                               f"nova tentativa em {espera:.1f}s: {erro}")
+                self._dormir(espera)
+                continue
+
+            self._liberar(sucesso=True)
+            return resultado
+
+
+    def calcular_espera(self, tentativa: int) -> float:
+        """Espera antes da próxima tentativa: exponencial com jitter completo."""
+        teto = min(self.espera_maxima_segundos, self.espera_base_segundos * 2 ** (tentativa - 1))
+        return self._aleatorio(0, teto)
+
+
+    def registrar_erro(self, erro: Exception) -> str:
+        """Contabiliza um erro recebido fora de `executar` (ex: item de um batch) e o classifica."""
+        classe = classificar_erro(erro)
+        with self._condicao:
+            self._contabilizar_erro(classe)
+        return classe
+
+
+    def estatisticas(self) -> dict:
+        """Cópia dos contadores e do limite de concorrência atual."""
+        with self._condicao:
+            return {**asdict(self._estatisticas), "limite_atual": round(self.limite, 2), "em_voo": self._em_voo}
+
+
+    def _adquirir(self) -> None:
+        with self._condicao:
+            self._condicao.wait_for(lambda: self._em_voo < int(self.limite))
+            self._em_voo += 1
+            self._estatisticas.chamadas += 1
+
+
+    def _liberar(self, sucesso: bool, classe: str | None = None) -> None:
+        with self._condicao:
+            self._em_voo -= 1
+            if sucesso:
+                self._estatisticas.sucessos += 1
+                # Aumento aditivo: +1 vaga a cada `limite` sucessos (~ uma "janela" completa).
+                self.limite = min(self.limite_maximo, self.limite + 1 / self.limite)
+            else:
+                self._contabilizar_erro(classe)
+            self._condicao.notify_all()
+
+
+    def _contabilizar_erro(self, classe: str) -> None:
+        """Atualiza contadores e, em erro de cota, corta o limite (chamar com a condição adquirida)."""
+        if classe == ERRO_TRANSITORIO:
+            self._estatisticas.transitorias += 1
+        elif classe == ERRO_LIMITE:
+            self._estatisticas.limitadas += 1
+
+            # Várias chamadas em voo recebem o mesmo 429: só corta uma vez por intervalo.
+            agora = time.monotonic()
+            if agora - self._ultima_reducao >= self.espera_base_segundos:
+                self.limite = max(1.0, self.limite * self.fator_reducao)
+                self._ultima_reducao = agora
+                self._estatisticas.reducoes += 1
+                LOGGER.info(f"Drive: cota atingida, chamadas simultâneas reduzidas para {int(self.limite)}")
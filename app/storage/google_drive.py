@@ -1,18 +1,228 @@
 import os
 import pickle
 from pathlib import Path
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from google.auth.transport.requests import Request, AuthorizedSession
+from googleapiclient.discovery import build, build_from_document
 from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload, MediaIoBaseDownload
 from googleapiclient.errors import HttpError
 import io
+import json
+import shutil
+import threading
+import time
 
+from requests.adapters import HTTPAdapter
 
-class GoogleDriveClient:
+from app.storage.armazenamento import MIME_PASTA, Armazenamento
+from app.storage.arquivo_spool import ArquivoSpool
+from app.storage.cache_disco import CacheDisco
+from app.storage.controle_cota import ERRO_PERMANENTE, ControladorCota, ErroHttpDrive
+from app.utils.instrumentacao import RASTREADOR
+from app.utils.vars_envs import Settings_Env
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+
+URL_UPLOAD_RESUMABLE = "https://www.googleapis.com/upload/drive/v3/files?uploadType=resumable"
+GRANULARIDADE_UPLOAD = 256 * 1024 # O Drive exige fatias intermediárias múltiplas de 256 KiB.
+CAMPOS_ARQUIVO = "id, name, size, md5Checksum, modifiedTime, mimeType" # Metadados usados pelo manifesto das pastas.
+URL_ARQUIVOS = "https://www.googleapis.com/drive/v3/files"
+TAMANHO_MAXIMO_LOTE = 100 # Limite de chamadas por requisição do endpoint de batch do Drive.
+TAMANHO_LOTE_IDS = 50 # IDs reservados por chamada a `files().generateIds` (criação idempotente).
+
+
+def _offset_confirmado(resposta) -> int:
+    """Bytes gravados segundo o 308 do Drive (cabeçalho `Range: bytes=0-N`, ausente se nada foi recebido)."""
+    faixa = resposta.headers.get("Range")
+    return int(faixa.rsplit("-", 1)[-1]) + 1 if faixa else 0
+
+
+class SessaoUploadResumable:
+    """
+        Sessão de upload resumable do Google Drive, alimentada fatia a fatia.
+
+        Permite enviar um arquivo cujo tamanho total ainda não é conhecido: cada fatia
+        intermediária é enviada com `Content-Range: bytes ini-fim/*` e somente a última
+        informa o tamanho total, o que finaliza a criação do arquivo no Drive.
+    """
+
+    def __init__(self, sessao_http: AuthorizedSession, uri_sessao: str, offset: int = 0):
+        """
+            Attributes:
+                sessao_http (AuthorizedSession): Sessão HTTP autenticada com as credenciais do Drive.
+                uri_sessao (str): URI da sessão resumable devolvida pelo Drive.
+                offset (int): Quantidade de bytes já confirmados pelo Drive.
+                metadados (dict | None): Metadados do arquivo criado, preenchidos ao finalizar.
+        """
+        self.sessao_http = sessao_http
+        self.uri_sessao = uri_sessao
+        self.offset = offset
+        self.metadados = None
+
+
+    def consultar_offset(self) -> int:
+        """
+            Pergunta ao Drive quantos bytes a sessão já recebeu (`Content-Range: bytes */*`)
+            e atualiza `offset`. Se o upload já tiver sido finalizado, preenche `metadados`.
+
+            Raises:
+                ErroHttpDrive: Se a sessão não existir mais (expirada ou cancelada).
+        """
+        resposta = self.sessao_http.put(self.uri_sessao, headers={"Content-Range": "bytes */*"})
+
+        if resposta.status_code in (200, 201):
+            self.metadados = resposta.json()
+            self.offset = int(self.metadados.get("size", self.offset))
+        elif resposta.status_code == 308:
+            self.offset = _offset_confirmado(resposta)
+        else:
+            raise ErroHttpDrive("Sessão de upload indisponível", resposta.status_code, resposta.text)
+        return self.offset
+
+
+    def enviar_fatia(self, dados, final: bool = False) -> str | None:
+        """
+            Envia uma fatia para a sessão.
+
+            O offset avança pelo que o Drive confirma no cabeçalho `Range` do 308, não pelo
+            tamanho enviado: se só parte da fatia foi gravada, o restante é reenviado.
+
+            Args:
+                dados (bytes | bytearray | memoryview): Conteúdo da fatia.
+                final (bool): Indica se é a última fatia do arquivo.
+
+            Returns:
+                str | None: O ID do arquivo criado quando `final=True`, senão None.
+
+            Raises:
+                ValueError: Se uma fatia intermediária não for múltipla de 256 KiB.
+                RuntimeError: Se o Drive responder com um status inesperado ou não confirmar
+                    nenhum byte novo da fatia.
+        """
+        tamanho = len(dados)
+
+        if not final and tamanho % GRANULARIDADE_UPLOAD:
+            raise ValueError(f"Fatias intermediárias devem ser múltiplas de {GRANULARIDADE_UPLOAD} bytes (recebido: {tamanho}).")
+
+        inicio = self.offset
+        fim = inicio + tamanho
+        restante = memoryview(dados)
+        while True:
+            total = str(fim) if final else "*"
+            if len(restante):
+                content_range = f"bytes {self.offset}-{fim - 1}/{total}"
+            else:
+                content_range = f"bytes */{total}"
+
+            RASTREADOR.contar("chamadas_api", api="drive", metodo="upload_resumable.fatia")
+            RASTREADOR.contar("bytes_api", len(restante), api="drive", direcao="upload")
+            resposta = self.sessao_http.put(
+                self.uri_sessao,
+                data=restante,
+                headers={"Content-Range": content_range},
+            )
+
+            if final and resposta.status_code in (200, 201):
+                self.metadados = resposta.json()
+                self.offset = fim
+                return self.metadados.get("id")
+            if resposta.status_code != 308:
+                mensagem = "Falha ao finalizar upload" if final else "Falha ao enviar fatia"
+                raise ErroHttpDrive(mensagem, resposta.status_code, resposta.text)
+
+            confirmado = _offset_confirmado(resposta)
+            if not self.offset < confirmado <= fim:
+                raise ErroHttpDrive(f"Drive confirmou até o byte {confirmado} de uma fatia {self.offset}-{fim}",
+                                    resposta.status_code, resposta.text)
+            self.offset = confirmado
+            if self.offset == fim and not final:
+                return None
+
+            LOGGER.warning(f"Drive gravou só até o byte {self.offset} da fatia {inicio}-{fim}; reenviando o restante.")
+            restante = memoryview(dados)[self.offset - inicio:]
+
+
+    def cancelar(self) -> None:
+        """Cancela a sessão, descartando os bytes já enviados."""
+        try:
+            self.sessao_http.delete(self.uri_sessao)
+        except Exception:
+            pass
+
+
+class ArquivoRemotoDrive(io.RawIOBase):
+    """
+        Arquivo do Drive somente leitura com acesso aleatório via HTTP Range.
+
+        Permite que o pyarrow leia apenas o rodapé e os row groups necessários de um
+        Parquet no Drive, sem baixar o arquivo inteiro.
+    """
+
+    def __init__(self, drive: "GoogleDriveClient", file_id: str, tamanho: int):
+        self.drive = drive
+        self.file_id = file_id
+        self.tamanho = tamanho
+        self.posicao = 0
+
+
+    def readable(self) -> bool:
+        return True
+
+
+    def seekable(self) -> bool:
+        return True
+
+
+    def tell(self) -> int:
+        return self.posicao
+
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.posicao, io.SEEK_END: self.tamanho}[whence]
+        self.posicao = max(0, base + offset)
+        return self.posicao
+
+
+    def readinto(self, buffer) -> int:
+        fim = min(self.posicao + len(buffer), self.tamanho)
+        if fim <= self.posicao:
+            return 0
+
+        dados = self.drive.ler_intervalo(self.file_id, self.posicao, fim)
+        buffer[:len(dados)] = dados
+        self.posicao += len(dados)
+        return len(dados)
+
+
+_clientes_compartilhados: dict[tuple, "GoogleDriveClient"] = {}
+_trava_clientes = threading.Lock()
+
+
+def obter_drive_compartilhado(client_secret_file: str | None = None,
+                              token_file: str | None = None) -> "GoogleDriveClient":
+    """
+        Devolve o cliente do Drive do processo para as credenciais informadas
+        (por padrão, as de `Settings_Env`), autenticando e lendo o discovery uma única vez.
+
+        Todas as etapas usam o mesmo cliente e, com ele, o mesmo pool de conexões.
+    """
+    client_secret_file = client_secret_file or Settings_Env.PATH_GOOGLE_OAUTH_CLIENT_SECRET
+    token_file = token_file or Settings_Env.PATH_TOKEN_PICKLE
+    chave = (client_secret_file, token_file)
+
+    with _trava_clientes:
+        if chave not in _clientes_compartilhados:
+            _clientes_compartilhados[chave] = GoogleDriveClient(client_secret_file=client_secret_file, token_file=token_file)
+        return _clientes_compartilhados[chave]
+
+
+class GoogleDriveClient(Armazenamento):
     """
         Classe responsável pela autenticação e envio de arquivos
         para o Google Drive usando OAuth 2.0
+
+        Backend `drive` do Data Lake (ver `armazenamento.Armazenamento`).
     """
 
     def __init__(self, client_secret_file: str,
@@ -26,6 +236,9 @@ class GoogleDriveClient:
                 token_file (str): Caminho do arquivo onde o token de acesso será armazenado.
                 credentials (Credentials): Credenciais autenticadas obtidas via OAuth 2.0.
                 service: Objeto de serviço da API do Google Drive (versão v3).
+                controle_cota (ControladorCota): Concorrência e retentativas das chamadas ao Drive.
+                    Criações só são repetidas com ID pré-gerado (`_criar_arquivo`).
+                cache (CacheDisco | None): Cache local dos downloads (None se desativado).
         """
 
         self.scopes = scopes or ["https://www.googleapis.com/auth/drive"]
@@ -33,7 +246,54 @@ class GoogleDriveClient:
         self.token_file = token_file
 
         self.credentials = self._authenticate()
-        self.service = build("drive", "v3", credentials=self.credentials, cache_discovery=False)
+        self._local = threading.local()
+        self._local.service = build("drive", "v3", credentials=self.credentials, cache_discovery=False)
+        self._documento_discovery = self._local.service._rootDesc
+        self._sessao_http = None
+        self._trava_sessao = threading.Lock()
+        self.controle_cota = ControladorCota()
+        self._ids_reservados: list[str] = []
+        self._trava_ids = threading.Lock()
+        self.cache = (
+            CacheDisco(Settings_Env.DIRETORIO_CACHE_DRIVE, Settings_Env.TAMANHO_CACHE_DRIVE_BYTES)
+            if Settings_Env.TAMANHO_CACHE_DRIVE_BYTES > 0 else None
+        )
+        RASTREADOR.registrar_fonte("drive.cota", self.controle_cota.estatisticas)
+        if self.cache is not None:
+            RASTREADOR.registrar_fonte("drive.cache", self.cache.estatisticas)
+
+
+    @property
+    def service(self):
+        """
+            Serviço da API do Drive da thread atual.
+
+            O cliente HTTP do googleapiclient (httplib2) não é thread-safe, então cada thread
+            recebe o próprio serviço, montado a partir do documento de discovery já obtido.
+        """
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = build_from_document(self._documento_discovery, credentials=self.credentials)
+            self._local.service = service
+        return service
+
+
+    @property
+    def sessao_http(self) -> AuthorizedSession:
+        """
+            Sessão HTTP autenticada usada nas transferências de mídia (Range, resumable).
+
+            Uma única sessão com pool de `MAX_CONEXOES_DRIVE` conexões é compartilhada por
+            todas as threads, reaproveitando conexões TLS entre downloads e uploads.
+        """
+        if self._sessao_http is None:
+            with self._trava_sessao:
+                if self._sessao_http is None:
+                    sessao = AuthorizedSession(self.credentials)
+                    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=Settings_Env.MAX_CONEXOES_DRIVE)
+                    sessao.mount("https://", adaptador)
+                    self._sessao_http = sessao
+        return self._sessao_http
 
 
     def upload_buffer(self, buffer: io.BytesIO, file_name: str, folder_drive_id: str) -> str:
@@ -46,25 +306,194 @@ class GoogleDriveClient:
                     (extraído da URL da pasta ou via API).
 
             Returns:
-                str | None: O ID único do arquivo gerado no Google Drive em caso de sucesso, 
-                    ou None caso ocorra uma falha no upload.
+                str: O ID único do arquivo gerado no Google Drive.
 
             Raises:
-                googleapiclient.errors.HttpError: Caso ocorra um erro de permissão ou 
-                    limite na API do Google.
+                googleapiclient.errors.HttpError: Caso ocorra um erro de permissão, ou de
+                    limite na API do Google que persista após as retentativas.
+        """
+        return self.upload_buffer_metadados(buffer, file_name, folder_drive_id)["id"]
+
+
+    def upload_buffer_metadados(self, buffer: io.BytesIO, file_name: str, folder_drive_id: str) -> dict:
+        """
+            Faz o upload do buffer e devolve os metadados do arquivo criado
+            (id, name, size, md5Checksum, modifiedTime), usados para atualizar o manifesto da pasta.
         """
         metadata = {"name": file_name, "parents": [folder_drive_id]}
         media = MediaIoBaseUpload(buffer, mimetype="application/zip", resumable=True)
-        
+
+        return self._criar_arquivo(metadata, media)
+
+
+    def atualizar_buffer_metadados(self, file_id: str, buffer: io.BytesIO) -> dict:
+        """
+            Substitui o conteúdo de um arquivo existente (mesmo ID) pelo buffer e
+            devolve os metadados atualizados. Evita duplicatas ao reprocessar uma saída.
+        """
+        media = MediaIoBaseUpload(buffer, mimetype="application/octet-stream", resumable=True)
+
+        return self._executar(self.service.files().update(
+            fileId=file_id,
+            media_body=media,
+            fields=CAMPOS_ARQUIVO
+        ))
+
+
+    def iniciar_upload_resumable(self, file_name: str, folder_drive_id: str,
+                                 mimetype: str = "application/zip",
+                                 file_id: str | None = None) -> SessaoUploadResumable:
+        """
+            Abre uma sessão de upload resumable para envio do arquivo em fatias.
+
+            Args:
+                file_name (str): O nome que o arquivo receberá dentro do Google Drive.
+                folder_drive_id (str): O ID da pasta de destino no Google Drive.
+                mimetype (str): Tipo do conteúdo enviado.
+                file_id (str | None): Quando informado, substitui o conteúdo desse arquivo
+                    em vez de criar um novo.
+
+            Returns:
+                SessaoUploadResumable: Sessão pronta para receber as fatias.
+        """
+        sessao_http = self.sessao_http
+        campos = CAMPOS_ARQUIVO.replace(' ', '')
+
+        if file_id:
+            metodo = sessao_http.patch
+            url = URL_UPLOAD_RESUMABLE.replace("/files?", f"/files/{file_id}?") + f"&fields={campos}"
+            metadata = {}
+        else:
+            metodo = sessao_http.post
+            url = f"{URL_UPLOAD_RESUMABLE}&fields={campos}"
+            metadata = {"name": file_name, "parents": [folder_drive_id]}
+
+        def iniciar():
+            resposta = metodo(
+                url,
+                data=json.dumps(metadata),
+                headers={
+                    "Content-Type": "application/json; charset=UTF-8",
+                    "X-Upload-Content-Type": mimetype,
+                },
+            )
+            if resposta.status_code != 200:
+                raise ErroHttpDrive("Falha ao iniciar upload resumable", resposta.status_code, resposta.text)
+            return resposta
+
+        RASTREADOR.contar("chamadas_api", api="drive", metodo="upload_resumable.iniciar")
+        resposta = self.controle_cota.executar(iniciar)
+
+        return SessaoUploadResumable(sessao_http, resposta.headers["Location"])
+
+
+    def retomar_upload_resumable(self, uri_sessao: str) -> SessaoUploadResumable:
+        """
+            Reabre uma sessão de upload resumable iniciada antes (ex: em uma execução que
+            falhou), já posicionada no último byte confirmado pelo Drive.
+
+            Raises:
+                ErroHttpDrive: Se a sessão não existir mais (o Drive as mantém por cerca de uma semana).
+        """
+        sessao = SessaoUploadResumable(self.sessao_http, uri_sessao)
+        RASTREADOR.contar("chamadas_api", api="drive", metodo="upload_resumable.consultar")
+        self.controle_cota.executar(sessao.consultar_offset)
+        return sessao
+
+
+    def criar_pasta(self, nome: str, parent_id: str) -> dict:
+        """Cria uma subpasta e devolve seus metadados."""
+        metadata = {"name": nome, "parents": [parent_id], "mimeType": MIME_PASTA}
+        return self._criar_arquivo(metadata)
+
+
+    def _criar_arquivo(self, metadata: dict, media: MediaIoBaseUpload | None = None) -> dict:
+        """
+            `files().create` idempotente, com ID pré-gerado.
+
+            Um 5xx ou timeout pode chegar depois de o Drive ter criado o arquivo. Repetir o
+            create sem ID criaria uma duplicata; com o ID fixo, cada retentativa antes
+            procura o arquivo por ele e, se a tentativa anterior o criou, devolve esse
+            arquivo. Um create que ainda assim colida com o ID (a tentativa anterior
+            terminou no servidor depois da busca) também cai nessa busca.
+        """
+        file_id = self._reservar_id()
+        tentativas = 0
+
+        def criar() -> dict:
+            nonlocal tentativas
+            tentativas += 1
+            if tentativas > 1:
+                criado = self._buscar_criado(file_id)
+                if criado is not None:
+                    return criado
+
+            try:
+                return self.service.files().create(
+                    body={**metadata, "id": file_id},
+                    media_body=media,
+                    fields=CAMPOS_ARQUIVO,
+                ).execute()
+            except HttpError as erro:
+                criado = self._buscar_criado(file_id) if tentativas > 1 and erro.resp.status in (400, 409) else None
+                if criado is None:
+                    raise
+                return criado
+
+        RASTREADOR.contar("chamadas_api", api="drive", metodo="drive.files.create")
+        if media is not None:
+            RASTREADOR.contar("bytes_api", media.size(), api="drive", direcao="upload")
+        return self.controle_cota.executar(criar)
+
+
+    def _buscar_criado(self, file_id: str) -> dict | None:
+        """Metadados do arquivo com o ID pré-gerado, ou None se ele ainda não foi criado."""
         try:
-            file = self.service.files().create(
-                body=metadata,
-                media_body=media,
-                fields="id"
-            ).execute()
-            return file.get("id")
-        except Exception as e:
-            print(f"Erro ao subir fatia: {e}")
+            return self.service.files().get(fileId=file_id, fields=CAMPOS_ARQUIVO).execute()
+        except HttpError as erro:
+            if erro.resp.status == 404:
+                return None
+            raise
+
+
+    def _reservar_id(self) -> str:
+        """ID para um arquivo novo; os IDs vêm em lotes de `files().generateIds`, que não cria nada e pode ser repetido."""
+        with self._trava_ids:
+            if not self._ids_reservados:
+                resposta = self._executar(self.service.files().generateIds(count=TAMANHO_LOTE_IDS, space="drive"))
+                self._ids_reservados.extend(resposta["ids"])
+            return self._ids_reservados.pop()
+
+
+    def excluir_arquivo(self, file_id: str) -> None:
+        """Move o arquivo (ou pasta, com todo o conteúdo) para a lixeira."""
+        self._executar(self.service.files().update(fileId=file_id, body={"trashed": True}))
+
+
+    def ler_intervalo(self, file_id: str, inicio: int, fim: int) -> bytes:
+        """
+            Lê os bytes [inicio, fim) de um arquivo do Drive com uma requisição Range.
+        """
+        def ler():
+            resposta = self.sessao_http.get(
+                f"{URL_ARQUIVOS}/{file_id}?alt=media",
+                headers={"Range": f"bytes={inicio}-{fim - 1}"},
+            )
+            if resposta.status_code not in (200, 206):
+                raise ErroHttpDrive(f"Falha ao ler intervalo de {file_id}", resposta.status_code, resposta.text)
+            return resposta
+
+        RASTREADOR.contar("chamadas_api", api="drive", metodo="ler_intervalo")
+        resposta = self.controle_cota.executar(ler)
+        RASTREADOR.contar("bytes_api", fim - inicio, api="drive", direcao="download")
+
+        # Um 200 significa que o servidor ignorou o Range e devolveu o arquivo inteiro.
+        return resposta.content if resposta.status_code == 206 else resposta.content[inicio:fim]
+
+
+    def abrir_leitura_aleatoria(self, file_id: str, tamanho: int) -> ArquivoRemotoDrive:
+        """Abre o arquivo para leitura aleatória (seek/read) via HTTP Range."""
+        return ArquivoRemotoDrive(self, file_id, tamanho)
 
 
     def _authenticate(self):
@@ -91,6 +520,9 @@ class GoogleDriveClient:
             if credencial and credencial.expired and credencial.refresh_token:
                 credencial.refresh(Request())
             else:
+                # Importado aqui: o fluxo interativo só roda na primeira autorização.
+                from google_auth_oauthlib.flow import InstalledAppFlow
+
                 flow = InstalledAppFlow.from_client_secrets_file(
                     self.client_secret_file,
                     self.scopes
@@ -104,22 +536,94 @@ class GoogleDriveClient:
         return credencial
 
 
-    def download_file(self, file_id: str) -> bytes:
-        """Baixa o arquivo do Drive para a memória RAM."""
+    def download_file(self, file_id: str, md5_checksum: str | None = None) -> bytes:
+        """
+            Baixa o arquivo do Drive para a memória RAM.
+
+            Com o cache local ativo, o conteúdo é lido do cache quando o mesmo ID e md5 já
+            foram baixados; senão é baixado para o cache e lido de lá.
+
+            Args:
+                file_id (str): ID do arquivo.
+                md5_checksum (str | None): md5 atual do arquivo (ex: do manifesto da pasta).
+                    Quando None e o cache está ativo, é consultado no Drive.
+        """
+        arquivo = self._abrir_via_cache(file_id, md5_checksum)
+        if arquivo is not None:
+            with arquivo:
+                return arquivo.read()
+
+        fh = io.BytesIO()
+        self._baixar_midia(file_id, fh)
+        return fh.getvalue()
+
+
+    def download_para_arquivo(self, file_id: str, caminho_arquivo: str, md5_checksum: str | None = None) -> str:
+        """Baixa o arquivo do Drive direto para o disco, em chunks, sem montá-lo na memória."""
+        arquivo = self._abrir_via_cache(file_id, md5_checksum)
+        with open(caminho_arquivo, "wb") as fh:
+            if arquivo is None:
+                self._baixar_midia(file_id, fh)
+            else:
+                with arquivo:
+                    shutil.copyfileobj(arquivo, fh, length=1024 * 1024)
+        return caminho_arquivo
+
+
+    def download_spool(self, file_id: str, md5_checksum: str | None = None) -> ArquivoSpool:
+        """
+            Baixa o arquivo para um `ArquivoSpool`: em memória até o limite configurado e em
+            disco acima dele, sem cópia para `bytes`. Uma entrada do cache local é adotada
+            como está (lida por mmap). O arquivo volta posicionado no início.
+        """
+        arquivo = self._abrir_via_cache(file_id, md5_checksum)
+        if arquivo is not None:
+            return ArquivoSpool.de_arquivo(arquivo)
+
+        spool = ArquivoSpool()
         try:
-            from googleapiclient.http import MediaIoBaseDownload
-            request = self.service.files().get_media(fileId=file_id)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
-            
-            return fh.getvalue()
-        except Exception as error:
-            # LOGGER.error(f"Erro no download do ID {file_id}: {e}")
-            raise f"{error}"
+            self._baixar_midia(file_id, spool)
+        except BaseException:
+            spool.close()
+            raise
+        spool.seek(0)
+        return spool
+
+
+    def _baixar_midia(self, file_id: str, destino) -> None:
+        """Baixa o conteúdo do arquivo em chunks para o objeto gravável."""
+        request = self.service.files().get_media(fileId=file_id)
+        downloader = MediaIoBaseDownload(destino, request)
+
+        done = False
+        recebido = 0
+        while not done:
+            # Um chunk que falha é pedido de novo a partir do último byte recebido.
+            RASTREADOR.contar("chamadas_api", api="drive", metodo="download_midia")
+            status, done = self.controle_cota.executar(downloader.next_chunk)
+            RASTREADOR.contar("bytes_api", status.resumable_progress - recebido, api="drive", direcao="download")
+            recebido = status.resumable_progress
+
+
+    def _abrir_via_cache(self, file_id: str, md5_checksum: str | None):
+        """
+            Abre o arquivo a partir do cache local, baixando-o para lá em caso de falta.
+            Devolve None quando o cache está desativado ou o arquivo não tem md5 (ex: pastas).
+        """
+        if self.cache is None:
+            return None
+
+        if md5_checksum is None:
+            md5_checksum = self._executar(
+                self.service.files().get(fileId=file_id, fields="md5Checksum")
+            ).get("md5Checksum")
+            if md5_checksum is None:
+                return None
+
+        arquivo = self.cache.abrir(file_id, md5_checksum)
+        if arquivo is None:
+            arquivo = self.cache.gravar(file_id, md5_checksum, lambda destino: self._baixar_midia(file_id, destino))
+        return arquivo
 
 
     def arquivo_existe(self, nome_arquivo: str, folder_id: str) -> str | None:
@@ -130,53 +634,145 @@ class GoogleDriveClient:
             folder_id (str): ID da pasta onde a busca deve ser realizada.
         Returns:
             str | None: Retorna o ID do arquivo se ele existir, ou None caso não exista.
+        Raises:
+            googleapiclient.errors.HttpError: Se a consulta falhar (após as retentativas). Uma
+                falha nunca é tratada como "arquivo não existe", o que levaria a duplicatas.
         """
-        try:
-            # Query: Filtra por nome, pasta pai e ignora arquivos na lixeira
-            query = (
-                f"name = '{nome_arquivo}' and "
-                f"'{folder_id}' in parents and "
-                f"trashed = false"
-            )
+        # Query: Filtra por nome, pasta pai e ignora arquivos na lixeira
+        query = montar_consulta_arquivo(nome_arquivo, folder_id)
 
-            # Executa a busca pedindo apenas o ID por performance
-            response = self.service.files().list(
-                q=query,
-                spaces='drive',
-                fields='files(id, name)',
-                pageSize=1 # Só precisamos saber se existe pelo menos um.
-            ).execute()
-
-            arquivos = response.get('files', [])
-
-            if arquivos:
-                file_id = arquivos[0]['id']
-                # LOGGER.info(f"Arquivo já existe: {nome_arquivo} (ID: {file_id})")
-                return file_id
-                
-            return None
+        # Executa a busca pedindo apenas o ID por performance
+        response = self._executar(self.service.files().list(
+            q=query,
+            spaces='drive',
+            fields='files(id, name)',
+            pageSize=1 # Só precisamos saber se existe pelo menos um.
+        ))
 
-        except Exception as e:
-            # LOGGER.error(f"Erro ao verificar existência do arquivo {nome_arquivo}: {e}")
-            return None
+        arquivos = response.get('files', [])
+
+        if arquivos:
+            file_id = arquivos[0]['id']
+            # LOGGER.info(f"Arquivo já existe: {nome_arquivo} (ID: {file_id})")
+            return file_id
+
+        return None
 
 
-    def listar_arquivos(self, folder_id : str):
+    def _executar(self, requisicao):
         """
+            Executa uma requisição do googleapiclient pelo controlador de cota, com
+            retentativas: só para chamadas idempotentes (leituras, updates, lotes de
+            leitura). Criações passam por `_criar_arquivo`.
+        """
+        RASTREADOR.contar("chamadas_api", api="drive", metodo=getattr(requisicao, "methodId", "lote"))
+        midia = getattr(requisicao, "resumable", None)
+        if midia is not None:
+            RASTREADOR.contar("bytes_api", midia.size(), api="drive", direcao="upload")
+        return self.controle_cota.executar(requisicao.execute)
+
+
+    def executar_em_lote(self, criar_requisicoes: list) -> list:
+        """
+            Executa chamadas de metadados pelo endpoint de batch do Drive (até 100 por requisição HTTP).
+
+            Args:
+                criar_requisicoes (list[Callable]): Funções que recebem o `service` e devolvem a
+                    requisição ainda não executada (ex: `lambda s: s.files().get(fileId=...)`).
+
+            Returns:
+                list: Resposta de cada chamada, na ordem recebida, ou a exceção da chamada que falhou.
+        """
+        resultados = [None] * len(criar_requisicoes)
+        pendentes = list(range(len(criar_requisicoes)))
+
+        def guardar(request_id, response, exception):
+            resultados[int(request_id)] = exception if exception is not None else response
+
+        for tentativa in range(1, self.controle_cota.tentativas + 1):
+            for inicio in range(0, len(pendentes), TAMANHO_MAXIMO_LOTE):
+                lote = self.service.new_batch_http_request(callback=guardar)
+                for indice in pendentes[inicio:inicio + TAMANHO_MAXIMO_LOTE]:
+                    lote.add(criar_requisicoes[indice](self.service), request_id=str(indice))
+                self._executar(lote)
+
+            # Itens do lote também podem receber 429/5xx: só eles são reenviados, após a espera.
+            pendentes = [
+                indice for indice in pendentes
+                if isinstance(resultados[indice], Exception)
+                and self.controle_cota.registrar_erro(resultados[indice]) != ERRO_PERMANENTE
+            ]
+            if not pendentes or tentativa == self.controle_cota.tentativas:
+                break
+            time.sleep(self.controle_cota.calcular_espera(tentativa))
+
+        return resultados
+
+
+    def obter_metadados_em_lote(self, file_ids: list[str]) -> list[dict | Exception]:
+        """Metadados (CAMPOS_ARQUIVO) de vários arquivos em chamadas de batch."""
+        return self.executar_em_lote([
+            lambda service, file_id=file_id: service.files().get(fileId=file_id, fields=CAMPOS_ARQUIVO)
+            for file_id in file_ids
+        ])
+
+
+    def arquivos_existem(self, nomes_arquivos: list[str], folder_id: str) -> dict[str, str | None]:
+        """Versão em lote de `arquivo_existe`: nome -> ID (ou None) para cada nome informado."""
+        respostas = self.executar_em_lote([
+            lambda service, nome=nome: service.files().list(
+                q=montar_consulta_arquivo(nome, folder_id), spaces='drive', fields='files(id, name)', pageSize=1,
+            )
+            for nome in nomes_arquivos
+        ])
+
+        existentes = {}
+        for nome, resposta in zip(nomes_arquivos, respostas):
+            if isinstance(resposta, Exception):
+                raise resposta
+            arquivos = resposta.get('files', [])
+            existentes[nome] = arquivos[0]['id'] if arquivos else None
+        return existentes
+
+
+    def listar_arquivos(self, folder_id : str) -> list[dict]:
+        """
+        Lista todos os arquivos de uma pasta, percorrendo todas as páginas da API.
+        Args:
+            folder_id (str): ID da pasta a ser listada.
+        Returns:
+            list[dict]: Arquivos com id, name, size, md5Checksum e modifiedTime.
         """
         try:
             query = f"'{folder_id}' in parents and trashed = false"
+            arquivos = []
+            page_token = None
 
-            results = (
-                self.service.files().list(
-                    q=query,
-                    fields="files(id, name)",
-                    pageSize=1000,
-                ).execute()
-            )
+            while True:
+                results = self._executar(
+                    self.service.files().list(
+                        q=query,
+                        fields=f"nextPageToken, files({CAMPOS_ARQUIVO})",
+                        pageSize=1000,
+                        pageToken=page_token,
+                    )
+                )
 
-            arquivos = results.get("files", [])
-            return arquivos
+                arquivos.extend(results.get("files", []))
+                page_token = results.get("nextPageToken")
+
+                if not page_token:
+                    return arquivos
 
         except HttpError as error:
-            raise RuntimeError(f"Erro ao listar arquivos: {error}")
\ No newline at end of file
+            raise RuntimeError(f"Erro ao listar arquivos: {error}")
+
+
+def montar_consulta_arquivo(nome_arquivo: str, folder_id: str) -> str:
+    """Query do `files.list` para um nome exato na pasta, ignorando a lixeira."""
+    nome_escapado = nome_arquivo.replace("\\", "\\\\").replace("'", "\\'")
+    return (
+        f"name = '{nome_escapado}' and "
+        f"'{folder_id}' in parents and "
+        f"trashed = false"
+    )
@@ -0,0 +1,198 @@
+import io
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+from app.storage.google_drive import (
+    CAMPOS_ARQUIVO, TAMANHO_MAXIMO_LOTE, URL_ARQUIVOS, GoogleDriveClient, montar_consulta_arquivo,
+)
+from app.storage.controle_cota import ErroHttpDrive
+from app.utils.vars_envs import Settings_Env
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _PedidoLote:
+    """Chamada de metadados aguardando o próximo lote."""
+    criar_requisicao: Callable
+    futuro: Future = field(default_factory=Future)
+    tratar_resposta: Callable = lambda resposta: resposta
+
+
+class ClienteDriveAssincrono:
+    """
+        Variante assíncrona do `GoogleDriveClient`: os métodos devolvem `Future`.
+
+        - Metadados (`arquivo_existe`, `obter_metadados`) entram numa fila e são enviados
+          juntos pelo endpoint de batch do Drive: as chamadas feitas dentro de
+          `espera_lote_segundos` (até 100) viram uma única requisição HTTP.
+        - Transferências de mídia (`download_file`, `upload_buffer`) rodam em um pool de
+          `max_transferencias` threads sobre a sessão HTTP compartilhada do cliente.
+        - `listar_arquivos` depende da paginação (cada página pede o token da anterior),
+          então roda no pool de transferências, em paralelo com as demais chamadas.
+
+        Uso:
+            with ClienteDriveAssincrono(obter_drive_compartilhado()) as drive_async:
+                futuros = [drive_async.download_file(file_id) for file_id in ids]
+                conteudos = [futuro.result() for futuro in futuros]
+    """
+
+    def __init__(self, drive: GoogleDriveClient,
+                 max_transferencias: int | None = None,
+                 espera_lote_segundos: float = 0.05):
+        """
+            Attributes:
+                drive (GoogleDriveClient): Cliente (autenticação, discovery e pool de conexões).
+                max_transferencias (int): Downloads/uploads simultâneos.
+                espera_lote_segundos (float): Tempo máximo que uma chamada de metadados espera
+                    por outras para formar um lote.
+        """
+        self.drive = drive
+        self.max_transferencias = max_transferencias or Settings_Env.MAX_TRANSFERENCIAS_DRIVE
+        self.espera_lote_segundos = espera_lote_segundos
+
+        self._transferencias = ThreadPoolExecutor(max_workers=self.max_transferencias, thread_name_prefix="drive")
+        self._fila_lote: queue.Queue = queue.Queue()
+        self._encerrar = threading.Event()
+        self._despachante = threading.Thread(target=self._despachar_lotes, name="drive-lote", daemon=True)
+        self._despachante.start()
+
+
+    def __enter__(self) -> "ClienteDriveAssincrono":
+        return self
+
+
+    def __exit__(self, tipo, *exc) -> None:
+        # Saída por exceção: o que ainda não começou é cancelado em vez de executado.
+        self.fechar(cancelar_pendentes=tipo is not None)
+
+
+    def fechar(self, cancelar_pendentes: bool = False) -> None:
+        """
+            Envia os lotes pendentes e espera as transferências em andamento. Com
+            `cancelar_pendentes`, os Futures que ainda não começaram são cancelados.
+        """
+        self._encerrar.set()
+        if cancelar_pendentes:
+            while True:
+                try:
+                    self._fila_lote.get_nowait().futuro.cancel()
+                except queue.Empty:
+                    break
+        self._despachante.join()
+        self._transferencias.shutdown(wait=True, cancel_futures=cancelar_pendentes)
+
+
+    def arquivo_existe(self, nome_arquivo: str, folder_id: str) -> Future:
+        """Future com o ID do arquivo de mesmo nome na pasta, ou None."""
+        def tratar(resposta):
+            arquivos = resposta.get("files", [])
+            return arquivos[0]["id"] if arquivos else None
+
+        return self._enfileirar_metadados(
+            lambda service: service.files().list(
+                q=montar_consulta_arquivo(nome_arquivo, folder_id),
+                spaces="drive", fields="files(id, name)", pageSize=1,
+            ),
+            tratar,
+        )
+
+
+    def obter_metadados(self, file_id: str) -> Future:
+        """Future com os metadados (CAMPOS_ARQUIVO) do arquivo."""
+        return self._enfileirar_metadados(
+            lambda service: service.files().get(fileId=file_id, fields=CAMPOS_ARQUIVO)
+        )
+
+
+    def listar_arquivos(self, folder_id: str) -> Future:
+        """Future com a listagem completa (todas as páginas) da pasta."""
+        return self._transferencias.submit(self.drive.listar_arquivos, folder_id)
+
+
+    def download_file(self, file_id: str, md5_checksum: str | None = None) -> Future:
+        """
+            Future com o conteúdo do arquivo, baixado pela sessão HTTP compartilhada
+            (ou lido do cache local do cliente, quando ativo).
+        """
+        if self.drive.cache is not None:
+            return self._transferencias.submit(self.drive.download_file, file_id, md5_checksum)
+        return self._transferencias.submit(self._baixar, file_id)
+
+
+    def upload_buffer(self, buffer: io.BytesIO, file_name: str, folder_drive_id: str) -> Future:
+        """Future com o ID do arquivo criado."""
+        return self._transferencias.submit(
+            lambda: self.drive.upload_buffer_metadados(buffer, file_name, folder_drive_id)["id"]
+        )
+
+
+    def _baixar(self, file_id: str) -> bytes:
+        def baixar():
+            resposta = self.drive.sessao_http.get(f"{URL_ARQUIVOS}/{file_id}?alt=media")
+            if resposta.status_code != 200:
+                raise ErroHttpDrive(f"Falha no download de {file_id}", resposta.status_code, resposta.text)
+            return resposta.content
+
+        return self.drive.controle_cota.executar(baixar)
+
+
+    def _enfileirar_metadados(self, criar_requisicao: Callable, tratar_resposta: Callable | None = None) -> Future:
+        if self._encerrar.is_set():
+            raise RuntimeError("Cliente assíncrono do Drive já foi fechado")
+
+        pedido = _PedidoLote(criar_requisicao)
+        if tratar_resposta is not None:
+            pedido.tratar_resposta = tratar_resposta
+        self._fila_lote.put(pedido)
+        return pedido.futuro
+
+
+    def _despachar_lotes(self) -> None:
+        """Junta as chamadas de metadados da fila em lotes e os executa."""
+        while not (self._encerrar.is_set() and self._fila_lote.empty()):
+            try:
+                pedidos = [self._fila_lote.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+
+            prazo = time.monotonic() + self.espera_lote_segundos
+            while len(pedidos) < TAMANHO_MAXIMO_LOTE:
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    pedidos.append(self._fila_lote.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            self._executar_lote(pedidos)
+
+
+    def _executar_lote(self, pedidos: list[_PedidoLote]) -> None:
+        # Pedidos cancelados por quem os fez saem do lote (e não podem mais receber resultado).
+        pedidos = [pedido for pedido in pedidos if pedido.futuro.set_running_or_notify_cancel()]
+        if not pedidos:
+            return
+
+        try:
+            respostas = self.drive.executar_em_lote([pedido.criar_requisicao for pedido in pedidos])
+        except Exception as error:
+            for pedido in pedidos:
+                pedido.futuro.set_exception(error)
+            return
+
+        LOGGER.debug(f"Lote de {len(pedidos)} chamadas de metadados enviado ao Drive")
+        for pedido, resposta in zip(pedidos, respostas):
+            if isinstance(resposta, Exception):
+                pedido.futuro.set_exception(resposta)
+                continue
+            try:
+                pedido.futuro.set_result(pedido.tratar_resposta(resposta))
+            except Exception as error:
+                pedido.futuro.set_exception(error)
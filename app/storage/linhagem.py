@@ -0,0 +1,111 @@
+import io
+import json
+import logging
+from datetime import datetime, timezone
+
+from app.storage.manifesto_pasta import ArquivoManifesto, ManifestoPasta
+
+LOGGER = logging.getLogger(__name__)
+
+NOME_ARQUIVO_LINHAGEM = "_linhagem.json"
+
+
+class RegistroLinhagem:
+    """
+        Registro de linhagem (ledger) de uma pasta de saída.
+
+        Para cada arquivo de saída guarda o arquivo de origem, o checksum da origem no
+        momento do processamento e a versão do transformador que o gerou. O registro é
+        persistido como `_linhagem.json` dentro da própria pasta de saída, de modo que
+        cada etapa só reprocessa as saídas cuja origem ou transformador mudaram.
+
+        Saídas sem entrada no registro (geradas antes dele existir) são consideradas
+        desatualizadas e reprocessadas uma única vez.
+    """
+
+    def __init__(self, manifesto_saida: ManifestoPasta, nome_arquivo: str = NOME_ARQUIVO_LINHAGEM):
+        """
+            Attributes:
+                manifesto_saida (ManifestoPasta): Manifesto da pasta onde ficam as saídas e o registro.
+                nome_arquivo (str): Nome do arquivo JSON do registro na pasta.
+                entradas (dict[str, dict]): Saída -> {origem, checksum_origem, versao_transformador, processado_em}.
+        """
+        self.manifesto_saida = manifesto_saida
+        self.nome_arquivo = nome_arquivo
+        self.entradas: dict[str, dict] = {}
+        self._alterado = False
+        self.carregar()
+
+
+    def carregar(self) -> None:
+        """Lê o registro da pasta de saída, se existir."""
+        arquivo = self.manifesto_saida.obter(self.nome_arquivo)
+        if arquivo is None:
+            self.entradas = {}
+            return
+
+        conteudo = self.manifesto_saida.armazenamento.download_file(arquivo.id, arquivo.md5)
+        self.entradas = json.loads(conteudo).get("saidas", {})
+        LOGGER.info(f"Linhagem carregada: {len(self.entradas)} saídas registradas em {self.manifesto_saida.folder_id}")
+
+
+    def precisa_processar(self, nome_saida: str, origem: ArquivoManifesto | None, versao_transformador: str) -> bool:
+        """
+            Indica se a saída precisa ser (re)gerada.
+
+            Args:
+                nome_saida (str): Nome do arquivo de saída.
+                origem (ArquivoManifesto | None): Arquivo de entrada, com o checksum atual.
+                    None quando a origem ainda não existe (a saída precisa ser gerada).
+                versao_transformador (str): Versão atual do código que gera a saída.
+
+            Returns:
+                bool: True se a saída não existe, não tem linhagem registrada, ou se o
+                    checksum da origem ou a versão do transformador mudaram.
+        """
+        if origem is None or nome_saida not in self.manifesto_saida:
+            return True
+
+        entrada = self.entradas.get(nome_saida)
+        if entrada is None:
+            return True
+
+        return (
+            entrada.get("checksum_origem") != _checksum(origem)
+            or entrada.get("versao_transformador") != versao_transformador
+        )
+
+
+    def registrar(self, nome_saida: str, origem: ArquivoManifesto, versao_transformador: str) -> None:
+        """Registra que a saída foi gerada a partir da origem com a versão informada."""
+        self.entradas[nome_saida] = {
+            "origem": origem.nome,
+            "checksum_origem": _checksum(origem),
+            "versao_transformador": versao_transformador,
+            "processado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        self._alterado = True
+
+
+    def salvar(self) -> None:
+        """Persiste o registro na pasta de saída, se algo mudou."""
+        if not self._alterado:
+            return
+
+        conteudo = json.dumps({"saidas": self.entradas}, ensure_ascii=False, indent=2).encode("utf-8")
+        with io.BytesIO(conteudo) as buffer:
+            self.manifesto_saida.salvar_buffer(buffer, self.nome_arquivo)
+
+        self._alterado = False
+
+
+def _checksum(arquivo: ArquivoManifesto) -> str | None:
+    """
+        Checksum usado na linhagem: o md5 calculado pelo Drive ou, na falta dele,
+        tamanho + data de modificação.
+    """
+    if arquivo.md5:
+        return arquivo.md5
+    if arquivo.tamanho is None and arquivo.modificado_em is None:
+        return None
+    return f"{arquivo.tamanho}:{arquivo.modificado_em}"
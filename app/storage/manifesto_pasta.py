@@ -0,0 +1,132 @@
+import io
+import logging
+from dataclasses import dataclass
+
+from app.storage.armazenamento import MIME_PASTA, Armazenamento
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class ArquivoManifesto:
+    """Metadados de um arquivo do Data Lake guardados no manifesto."""
+    id: str
+    nome: str
+    tamanho: int | None = None
+    md5: str | None = None
+    modificado_em: str | None = None
+    mime_type: str | None = None
+
+    @property
+    def eh_pasta(self) -> bool:
+        return self.mime_type == MIME_PASTA
+
+    @classmethod
+    def de_metadados_drive(cls, arquivo: dict) -> "ArquivoManifesto":
+        """Converte o dicionário de metadados (formato da API do Drive, usado por todos os backends)."""
+        tamanho = arquivo.get("size")
+        return cls(
+            id=arquivo["id"],
+            nome=arquivo["name"],
+            tamanho=int(tamanho) if tamanho is not None else None,
+            md5=arquivo.get("md5Checksum"),
+            modificado_em=arquivo.get("modifiedTime"),
+            mime_type=arquivo.get("mimeType"),
+        )
+
+
+class ManifestoPasta:
+    """
+        Índice em memória (nome -> metadados) de uma pasta do Data Lake.
+
+        A pasta é listada uma única vez, com paginação completa, e todas as verificações
+        de existência passam a ser consultas ao dicionário, sem ida ao armazenamento. Os uploads
+        feitos pelo manifesto atualizam o índice no lugar.
+    """
+
+    def __init__(self, armazenamento: Armazenamento, folder_id: str):
+        """
+            Attributes:
+                armazenamento (Armazenamento): Backend (Drive ou local) usado para listar a pasta e gravar arquivos.
+                folder_id (str): ID da pasta indexada.
+                arquivos (dict[str, ArquivoManifesto]): Índice nome -> metadados.
+        """
+        self.armazenamento = armazenamento
+        self.folder_id = folder_id
+        self.arquivos: dict[str, ArquivoManifesto] = {}
+        self.carregar()
+
+
+    def carregar(self) -> None:
+        """(Re)lista a pasta inteira e reconstrói o índice."""
+        self.arquivos = {}
+        for arquivo in self.armazenamento.listar_arquivos(self.folder_id):
+            # Em caso de nomes duplicados na pasta, mantém o primeiro, como o `arquivo_existe` fazia.
+            self.arquivos.setdefault(arquivo["name"], ArquivoManifesto.de_metadados_drive(arquivo))
+
+        LOGGER.info(f"Manifesto da pasta {self.folder_id}: {len(self.arquivos)} arquivos")
+
+
+    def existe(self, nome_arquivo: str) -> str | None:
+        """Mesmo contrato de `Armazenamento.arquivo_existe`: devolve o ID ou None."""
+        arquivo = self.arquivos.get(nome_arquivo)
+        return arquivo.id if arquivo else None
+
+
+    def obter(self, nome_arquivo: str) -> ArquivoManifesto | None:
+        """Devolve os metadados do arquivo, se ele estiver na pasta."""
+        return self.arquivos.get(nome_arquivo)
+
+
+    def registrar(self, metadados: dict) -> ArquivoManifesto:
+        """Inclui (ou substitui) no índice um arquivo criado fora do manifesto."""
+        arquivo = ArquivoManifesto.de_metadados_drive(metadados)
+        self.arquivos[arquivo.nome] = arquivo
+        return arquivo
+
+
+    def upload_buffer(self, buffer: io.BytesIO, file_name: str) -> str:
+        """Envia o buffer para a pasta e registra o novo arquivo no índice."""
+        metadados = self.armazenamento.upload_buffer_metadados(buffer, file_name, self.folder_id)
+        return self.registrar(metadados).id
+
+
+    def salvar_buffer(self, buffer: io.BytesIO, file_name: str) -> str:
+        """
+            Grava o buffer com o nome informado: substitui o conteúdo se o arquivo já
+            existir na pasta (mantendo o ID) ou cria um novo caso contrário.
+        """
+        existente = self.arquivos.get(file_name)
+        if existente is None:
+            return self.upload_buffer(buffer, file_name)
+
+        metadados = self.armazenamento.atualizar_buffer_metadados(existente.id, buffer)
+        metadados.setdefault("name", file_name)
+        return self.registrar(metadados).id
+
+
+    def obter_ou_criar_pasta(self, nome: str) -> str:
+        """Devolve o ID da subpasta com o nome informado, criando-a se necessário."""
+        existente = self.arquivos.get(nome)
+        if existente is not None:
+            return existente.id
+        return self.registrar(self.armazenamento.criar_pasta(nome, self.folder_id)).id
+
+
+    def remover(self, nome: str) -> None:
+        """Exclui o arquivo (ou pasta; no Drive, vai para a lixeira) e o retira do índice."""
+        existente = self.arquivos.pop(nome, None)
+        if existente is not None:
+            self.armazenamento.excluir_arquivo(existente.id)
+
+
+    def __contains__(self, nome_arquivo: str) -> bool:
+        return nome_arquivo in self.arquivos
+
+
+    def __iter__(self):
+        return iter(list(self.arquivos.values()))
+
+
+    def __len__(self) -> int:
+        return len(self.arquivos)
@@ -0,0 +1,72 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from app.utils.instrumentacao import RASTREADOR
+
+LOGGER = logging.getLogger(__name__)
+
+
+def executar_local(funcao: Callable, *args):
+    """
+        Executa a transformação no próprio processo.
+
+        As etapas recebem um `executar_cpu` com esta assinatura; `ExecutorProcessos` envia a
+        mesma chamada para um pool de processos. Por isso a função deve ser de módulo e os
+        argumentos leves: as etapas passam caminhos de arquivos temporários, nunca os bytes
+        do Parquet, para que os dados não sejam serializados entre os processos.
+    """
+    return funcao(*args)
+
+
+def _executar_instrumentado(funcao: Callable, *args):
+    """Roda no processo do pool e devolve, junto com o resultado, os spans e contadores registrados nele."""
+    try:
+        return funcao(*args), RASTREADOR.coletar()
+    except BaseException:
+        RASTREADOR.coletar() # Descarta o que sobrou da chamada que falhou.
+        raise
+
+
+class ExecutorProcessos:
+    """
+        Pool de processos para as transformações pesadas (pandas/Arrow), usável como
+        `executar_cpu` pelas etapas.
+
+        Cada chamada bloqueia a thread que a fez até o resultado ficar pronto. Com mais
+        threads de etapa do que processos, downloads e uploads de uns arquivos seguem
+        enquanto outros estão sendo transformados. Os spans registrados no processo do
+        pool voltam com o resultado e entram no trace como filhos do span da chamada.
+    """
+
+    def __init__(self, num_processos: int):
+        """
+            Attributes:
+                num_processos (int): Processos do pool. 0 executa no próprio processo.
+        """
+        self.num_processos = num_processos
+        self._pool: ProcessPoolExecutor | None = None
+
+
+    def __enter__(self) -> "ExecutorProcessos":
+        if self.num_processos > 0:
+            # spawn: o fork de um processo com threads ativas (HTTP, pools) pode herdar locks travados.
+            self._pool = ProcessPoolExecutor(max_workers=self.num_processos,
+                                             mp_context=multiprocessing.get_context("spawn"))
+            LOGGER.info(f"Pool de transformação iniciado com {self.num_processos} processos")
+        return self
+
+
+    def __exit__(self, *exc) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+    def __call__(self, funcao: Callable, *args):
+        if self._pool is None:
+            return executar_local(funcao, *args)
+        resultado, coletado = self._pool.submit(_executar_instrumentado, funcao, *args).result()
+        RASTREADOR.incorporar(coletado)
+        return resultado
@@ -0,0 +1,350 @@
+import itertools
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable
+
+from app.utils.vars_envs import Settings_Env
+
+LOGGER = logging.getLogger(__name__)
+
+MAX_SPANS = 200_000 # acima disso os spans são descartados (os contadores continuam), para não crescer sem limite
+NOME_ARQUIVO_PROMETHEUS = "pipeline.prom"
+
+
+def pico_rss_bytes() -> int:
+    """
+        Maior RSS do processo até agora.
+
+        No Linux vem do `VmHWM` de /proc/self/status: o `ru_maxrss` sobrevive ao exec, e
+        um processo do pool (spawn) herdaria o pico do processo que o criou.
+    """
+    try:
+        with open("/proc/self/status", "rb") as status:
+            for linha in status:
+                if linha.startswith(b"VmHWM:"):
+                    return int(linha.split()[1]) * 1024
+    except OSError:
+        pass
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == "darwin" else pico * 1024 # o Linux informa em KiB, o macOS em bytes
+
+
+@dataclass
+class Span:
+    """Trecho cronometrado do pipeline (ex: o download de um arquivo na Bronze)."""
+    nome: str
+    id: int
+    pai: int | None
+    inicio: float                       # time.time() do início
+    processo: int
+    thread: str
+    atributos: dict = field(default_factory=dict)
+    duracao_segundos: float | None = None
+    pico_rss_bytes: int | None = None   # maior RSS do processo até o fim do span
+    erro: str | None = None
+
+    def registrar(self, **valores) -> None:
+        """Soma valores numéricos aos atributos (bytes, linhas...) e substitui os demais."""
+        for chave, valor in valores.items():
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                self.atributos[chave] = self.atributos.get(chave, 0) + valor
+            else:
+                self.atributos[chave] = valor
+
+
+class _SpanNulo:
+    """Span devolvido com a instrumentação desligada: aceita as mesmas chamadas e não guarda nada."""
+    id = None
+
+    def registrar(self, **valores) -> None:
+        pass
+
+
+SPAN_NULO = _SpanNulo()
+_span_atual: ContextVar[Span | None] = ContextVar("span_atual", default=None)
+
+
+class Rastreador:
+    """
+        Registro dos spans e contadores de uma execução do pipeline.
+
+        Os spans são aninhados pelo contexto (`contextvars`): um `span()` aberto dentro de
+        outro vira filho dele na mesma thread. Threads e processos novos não herdam o
+        contexto, então o pai é passado explicitamente (`pai=`) ou, no pool de processos,
+        os spans do filho são trazidos de volta por `coletar`/`incorporar` (ver `execucao`).
+
+        O custo é de alguns microssegundos por span (dois relógios, um `getrusage` e um
+        append sob trava), por isso os spans ficam no nível de arquivo e de etapa, nunca
+        por linha ou lote pequeno.
+    """
+
+    def __init__(self, ativo: bool = True):
+        self.ativo = ativo
+        self.inicio = time.time()
+        self._spans: list[dict] = []
+        self._descartados = 0
+        self._contadores: dict[tuple, float] = {}
+        self._fontes: dict[str, Callable[[], dict]] = {}
+        self._ids = itertools.count(1)
+        self._trava = threading.Lock()
+
+
+    @contextmanager
+    def span(self, nome: str, pai: Span | None = None, **atributos):
+        """
+            Cronometra o bloco como um span filho do span atual (ou de `pai`).
+
+            Uso:
+                with RASTREADOR.span("bronze.download", arquivo=nome) as span:
+                    ...
+                    span.registrar(bytes=tamanho)
+        """
+        if not self.ativo:
+            yield SPAN_NULO
+            return
+
+        pai = pai or _span_atual.get()
+        span = Span(
+            nome=nome,
+            id=next(self._ids),
+            pai=pai.id if pai is not None else None,
+            inicio=time.time(),
+            processo=os.getpid(),
+            thread=threading.current_thread().name,
+            atributos=dict(atributos),
+        )
+        token = _span_atual.set(span)
+        inicio = time.perf_counter()
+        try:
+            yield span
+        except BaseException as error:
+            span.erro = f"{type(error).__name__}: {error}"
+            raise
+        finally:
+            span.duracao_segundos = time.perf_counter() - inicio
+            span.pico_rss_bytes = pico_rss_bytes()
+            _span_atual.reset(token)
+            self._guardar(asdict(span))
+
+
+    def registrar_etapa(self, nome: str, segundos: float, **atributos) -> None:
+        """
+            Registra como span filho do atual um tempo já medido. Serve para etapas
+            intercaladas em um laço (ex: ler, decodificar e gravar cada lote), medidas
+            por partes e somadas.
+        """
+        if not self.ativo:
+            return
+        pai = _span_atual.get()
+        self._guardar(asdict(Span(
+            nome=nome,
+            id=next(self._ids),
+            pai=pai.id if pai is not None else None,
+            inicio=time.time() - segundos,
+            processo=os.getpid(),
+            thread=threading.current_thread().name,
+            atributos=atributos,
+            duracao_segundos=segundos,
+            pico_rss_bytes=pico_rss_bytes(),
+        )))
+
+
+    def contar(self, nome: str, valor: float = 1, **rotulos) -> None:
+        """Incrementa um contador (ex: chamadas de API por método)."""
+        if not self.ativo:
+            return
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+
+    def registrar_fonte(self, nome: str, estatisticas: Callable[[], dict]) -> None:
+        """Estatísticas lidas só na exportação (ex: `ControladorCota.estatisticas`)."""
+        with self._trava:
+            self._fontes[nome] = estatisticas
+
+
+    def coletar(self) -> dict:
+        """Retira os spans e contadores registrados até aqui (usado no processo filho)."""
+        with self._trava:
+            coletado = {"spans": self._spans, "contadores": list(self._contadores.items())}
+            self._spans, self._contadores = [], {}
+        return coletado
+
+
+    def incorporar(self, coletado: dict) -> None:
+        """
+            Junta os spans e contadores de um processo filho, pendurando os spans raiz dele
+            no span atual. Os IDs são renumerados, pois cada processo tem a própria sequência.
+        """
+        if not self.ativo or not coletado:
+            return
+        pai = _span_atual.get()
+        novos_ids = {}
+        for span in coletado["spans"]:
+            novos_ids[span["id"]] = next(self._ids)
+        for span in coletado["spans"]:
+            span["id"] = novos_ids[span["id"]]
+            span["pai"] = novos_ids.get(span["pai"], pai.id if pai is not None else None)
+            self._guardar(span)
+        for (nome, rotulos), valor in coletado["contadores"]:
+            self.contar(nome, valor, **dict(rotulos))
+
+
+    def _guardar(self, span: dict) -> None:
+        with self._trava:
+            if len(self._spans) < MAX_SPANS:
+                self._spans.append(span)
+            else:
+                self._descartados += 1
+
+
+    def resumo(self) -> dict[str, dict]:
+        """Totais por nome de span: execuções, erros, segundos, bytes, linhas e pico de RSS."""
+        with self._trava:
+            spans = list(self._spans)
+
+        resumo = {}
+        for span in spans:
+            item = resumo.setdefault(span["nome"], {
+                "execucoes": 0, "erros": 0, "segundos": 0.0, "segundos_max": 0.0,
+                "bytes": 0, "linhas": 0, "pico_rss_bytes": 0,
+            })
+            item["execucoes"] += 1
+            item["erros"] += span["erro"] is not None
+            item["segundos"] += span["duracao_segundos"]
+            item["segundos_max"] = max(item["segundos_max"], span["duracao_segundos"])
+            item["bytes"] += span["atributos"].get("bytes", 0)
+            item["linhas"] += span["atributos"].get("linhas", 0)
+            item["pico_rss_bytes"] = max(item["pico_rss_bytes"], span["pico_rss_bytes"] or 0)
+        return resumo
+
+
+    def exportar(self, diretorio: str | None = None) -> tuple[str, str] | None:
+        """
+            Grava o trace da execução (`trace_<data>.json`: spans, contadores, estatísticas
+            das fontes e resumo) e as métricas no formato texto do Prometheus
+            (`pipeline.prom`, substituído a cada execução, no formato do textfile collector
+            do node_exporter).
+
+            Returns:
+                tuple[str, str] | None: Caminhos do trace e das métricas (None se desligado).
+        """
+        if not self.ativo:
+            return None
+        diretorio = diretorio or Settings_Env.DIRETORIO_METRICAS
+        os.makedirs(diretorio, exist_ok=True)
+
+        fontes = {}
+        for nome, estatisticas in list(self._fontes.items()):
+            try:
+                fontes[nome] = estatisticas()
+            except Exception as error:
+                LOGGER.warning(f"Estatísticas de {nome} indisponíveis: {error}")
+
+        with self._trava:
+            spans = list(self._spans)
+            contadores = dict(self._contadores)
+            descartados = self._descartados
+
+        fim = time.time()
+        resumo = self.resumo()
+        trace = {
+            "inicio": datetime.fromtimestamp(self.inicio).isoformat(timespec="seconds"),
+            "duracao_segundos": round(fim - self.inicio, 3),
+            "pico_rss_bytes": pico_rss_bytes(),
+            "resumo": resumo,
+            "contadores": [
+                {"nome": nome, "rotulos": dict(rotulos), "valor": valor}
+                for (nome, rotulos), valor in sorted(contadores.items())
+            ],
+            "fontes": fontes,
+            "spans_descartados": descartados,
+            "spans": spans,
+        }
+
+        caminho_trace = os.path.join(diretorio, f"trace_{datetime.fromtimestamp(self.inicio):%Y%m%d-%H%M%S}.json")
+        _gravar_atomico(caminho_trace, json.dumps(trace, ensure_ascii=False, default=str))
+
+        caminho_prometheus = os.path.join(diretorio, NOME_ARQUIVO_PROMETHEUS)
+        _gravar_atomico(caminho_prometheus, _formatar_prometheus(fim - self.inicio, resumo, contadores, fontes))
+
+        LOGGER.info(f"Métricas da execução: {caminho_trace} e {caminho_prometheus} ({len(spans)} spans)")
+        return caminho_trace, caminho_prometheus
+
+
+def _gravar_atomico(caminho: str, conteudo: str) -> None:
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho) or ".", prefix=".parcial-")
+    with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+        arquivo.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+def _rotulos(**rotulos) -> str:
+    """Rótulos no formato do Prometheus, com barra invertida, aspas e quebras de linha escapadas."""
+    def escapar(valor) -> str:
+        return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{chave}="{escapar(valor)}"' for chave, valor in rotulos.items()) + "}"
+
+
+def _valor(valor: float) -> str:
+    valor = float(valor)
+    return str(int(valor)) if valor.is_integer() else repr(valor)
+
+
+def _formatar_prometheus(duracao: float, resumo: dict, contadores: dict, fontes: dict) -> str:
+    metricas = [
+        ("pipeline_execucao_segundos", "gauge", "Duração da execução do pipeline.", [("", duracao)]),
+        ("pipeline_pico_rss_bytes", "gauge", "Maior RSS do processo principal.", [("", pico_rss_bytes())]),
+    ]
+    por_span = [
+        ("pipeline_span_segundos_total", "counter", "Tempo somado dos spans.", "segundos"),
+        ("pipeline_span_execucoes_total", "counter", "Quantidade de spans.", "execucoes"),
+        ("pipeline_span_erros_total", "counter", "Spans encerrados com exceção.", "erros"),
+        ("pipeline_span_segundos_max", "gauge", "Maior duração de um span.", "segundos_max"),
+        ("pipeline_span_bytes_total", "counter", "Bytes processados nos spans.", "bytes"),
+        ("pipeline_span_linhas_total", "counter", "Linhas processadas nos spans.", "linhas"),
+        ("pipeline_span_pico_rss_bytes", "gauge", "Maior RSS do processo ao fim dos spans (inclui os processos de transformação).", "pico_rss_bytes"),
+    ]
+    for nome, tipo, ajuda, campo in por_span:
+        metricas.append((nome, tipo, ajuda, [
+            (_rotulos(span=span), item[campo]) for span, item in sorted(resumo.items())
+            if item[campo] or campo not in ("bytes", "linhas") # bytes e linhas só dos spans que os registram
+        ]))
+
+    nomes_contadores = sorted({nome for nome, _ in contadores})
+    for nome in nomes_contadores:
+        metricas.append((f"pipeline_{nome}_total", "counter", f"Contador {nome}.", [
+            (_rotulos(**dict(rotulos)), valor) for (nome_contador, rotulos), valor in sorted(contadores.items())
+            if nome_contador == nome
+        ]))
+
+    metricas.append(("pipeline_fonte_estatistica", "gauge", "Estatísticas dos componentes (cota e cache do Drive).", [
+        (_rotulos(fonte=fonte, campo=campo), valor)
+        for fonte, estatisticas in sorted(fontes.items())
+        for campo, valor in sorted(estatisticas.items()) if isinstance(valor, (int, float))
+    ]))
+
+    linhas = []
+    for nome, tipo, ajuda, amostras in metricas:
+        if not amostras:
+            continue
+        linhas.append(f"# HELP {nome} {ajuda}")
+        linhas.append(f"# TYPE {nome} {tipo}")
+        linhas.extend(f"{nome}{rotulos} {_valor(valor)}" for rotulos, valor in amostras)
+    return "\n".join(linhas) + "\n"
+
+
+# Rastreador do processo (os processos do pool de transformação têm o seu e o devolvem a cada chamada).
+RASTREADOR = Rastreador(ativo=Settings_Env.INSTRUMENTACAO)
@@ -10,7 +10,57 @@ class Settings_Env:
     PATH_GOOGLE_OAUTH_CLIENT_SECRET= os.getenv("PATH_GOOGLE_OAUTH_CLIENT_SECRET") # caminho local onde as credenciais estão salvas para realizar autenticação.
     PATH_TOKEN_PICKLE = os.getenv("PATH_TOKEN_PICKLE")
 
-    ID_DADOS_BRUTOS_BUCKET_GOOGLE_DRIVE = os.getenv("ID_DADOS_BRUTOS_BUCKET_GOOGLE_DRIVE") # id do bucket onde os dados brutos serão salvos.
-    ID_PASTA_BRONZE = os.getenv("ID_PASTA_BRONZE")
-    ID_PASTA_SILVER = os.getenv("ID_PASTA_SILVER")
-    ID_PASTA_GOLD = os.getenv("ID_PASTA_GOLD")
\ No newline at end of file
+    BACKEND_ARMAZENAMENTO = os.getenv("BACKEND_ARMAZENAMENTO", "drive").lower() # Data Lake: "drive" (Google Drive) ou "local" (diretório local/NFS, sem OAuth).
+    DIRETORIO_ARMAZENAMENTO_LOCAL = os.getenv("DIRETORIO_ARMAZENAMENTO_LOCAL", "data_lake") # raiz do Data Lake no backend local.
+
+    # No Drive, IDs das pastas; no backend local, subpastas de DIRETORIO_ARMAZENAMENTO_LOCAL.
+    ID_DADOS_BRUTOS_BUCKET_GOOGLE_DRIVE = os.getenv("ID_DADOS_BRUTOS_BUCKET_GOOGLE_DRIVE", "dados_brutos") # id do bucket onde os dados brutos serão salvos.
+    ID_PASTA_BRONZE = os.getenv("ID_PASTA_BRONZE", "bronze")
+    ID_PASTA_SILVER = os.getenv("ID_PASTA_SILVER", "silver")
+    ID_PASTA_GOLD = os.getenv("ID_PASTA_GOLD", "gold")
+
+    TAMANHO_LOTE_PARQUET_BYTES = int(os.getenv("TAMANHO_LOTE_PARQUET_BYTES", 64 * 1024 * 1024)) # tamanho de cada lote lido do CSV na conversão para Parquet (bronze).
+    TAMANHO_FATIA_INGESTAO_BYTES = int(os.getenv("TAMANHO_FATIA_INGESTAO_BYTES", 10 * 1024 * 1024)) # tamanho de cada fatia baixada do TSE (múltiplo de 256 KiB).
+    MAX_FATIAS_EM_MEMORIA = int(os.getenv("MAX_FATIAS_EM_MEMORIA", 3)) # fatias aguardando upload no modo streaming.
+    NUM_CONEXOES_DOWNLOAD = int(os.getenv("NUM_CONEXOES_DOWNLOAD", 4)) # faixas (HTTP Range) baixadas em paralelo do TSE. 1 baixa uma faixa por vez.
+    TIMEOUT_DOWNLOAD_TSE_SEGUNDOS = float(os.getenv("TIMEOUT_DOWNLOAD_TSE_SEGUNDOS", 120)) # prazo de cada faixa baixada do TSE (no download sem Range, tempo máximo sem receber dados).
+    PIPELINE_FUNDIDO = os.getenv("PIPELINE_FUNDIDO", "false").lower() == "true" # executa Bronze -> Silver -> Gold em uma única passada por arquivo.
+    LINHAS_POR_ROW_GROUP = int(os.getenv("LINHAS_POR_ROW_GROUP", 500_000)) # linhas por row group nos Parquets da Silver (unidade de leitura da Gold).
+    SAIDA_PARTICIONADA = os.getenv("SAIDA_PARTICIONADA", "false").lower() == "true" # grava também datasets particionados (Hive) na Silver e na Gold.
+
+    ANOS = [int(ano) for ano in os.getenv("ANOS", "2022").split(",")] # anos das eleições processadas (ex: 2018,2020,2022).
+    UFS = [uf.strip().upper() for uf in os.getenv("UFS", "CE").split(",")] # siglas das UFs processadas (ex: CE,PE,SP).
+    LIMITE_CONCORRENCIA_INGESTAO = int(os.getenv("LIMITE_CONCORRENCIA_INGESTAO", 2)) # jobs (ano, UF) baixando do TSE ao mesmo tempo.
+    LIMITE_CONCORRENCIA_BRONZE = int(os.getenv("LIMITE_CONCORRENCIA_BRONZE", 2)) # jobs na etapa Bronze ao mesmo tempo.
+    NUM_PROCESSOS_CPU = int(os.getenv("NUM_PROCESSOS_CPU", os.cpu_count() or 1)) # processos das transformações (CSV -> Parquet, Silver, Gold).
+    LIMITE_CONCORRENCIA_SILVER = int(os.getenv("LIMITE_CONCORRENCIA_SILVER", NUM_PROCESSOS_CPU)) # jobs (ou arquivos, na pasta inteira) na etapa Silver ao mesmo tempo; padrão: um por processo.
+    LIMITE_CONCORRENCIA_GOLD = int(os.getenv("LIMITE_CONCORRENCIA_GOLD", NUM_PROCESSOS_CPU)) # jobs (ou arquivos, na pasta inteira) na etapa Gold ao mesmo tempo; padrão: um por processo.
+    TENTATIVAS_ETAPA = int(os.getenv("TENTATIVAS_ETAPA", 3)) # tentativas de cada etapa de um job antes de desistir dele.
+    MAX_CONEXOES_DRIVE = int(os.getenv("MAX_CONEXOES_DRIVE", 16)) # conexões no pool da sessão HTTP compartilhada com o Drive.
+    MAX_TRANSFERENCIAS_DRIVE = int(os.getenv("MAX_TRANSFERENCIAS_DRIVE", 8)) # downloads/uploads simultâneos no cliente assíncrono do Drive.
+    MAX_CHAMADAS_DRIVE_EM_VOO = int(os.getenv("MAX_CHAMADAS_DRIVE_EM_VOO", 16)) # teto de chamadas simultâneas ao Drive (o controlador de cota ajusta abaixo dele).
+    TENTATIVAS_DRIVE = int(os.getenv("TENTATIVAS_DRIVE", 6)) # tentativas por chamada ao Drive em erros de cota (429/403) e transitórios (5xx).
+    ESPERA_BASE_DRIVE_SEGUNDOS = float(os.getenv("ESPERA_BASE_DRIVE_SEGUNDOS", 1)) # espera máxima antes da 1ª retentativa; dobra a cada tentativa (com jitter).
+    ESPERA_MAXIMA_DRIVE_SEGUNDOS = float(os.getenv("ESPERA_MAXIMA_DRIVE_SEGUNDOS", 64)) # teto da espera entre tentativas.
+    DIRETORIO_CACHE_DRIVE = os.getenv("DIRETORIO_CACHE_DRIVE", ".cache_drive") # cache local dos arquivos baixados do Drive (chave: ID + md5).
+    TAMANHO_CACHE_DRIVE_BYTES = int(os.getenv("TAMANHO_CACHE_DRIVE_BYTES", 5 * 1024 * 1024 * 1024)) # orçamento do cache (LRU). 0 desativa o cache.
+    LIMITE_SPOOL_MEMORIA_BYTES = int(os.getenv("LIMITE_SPOOL_MEMORIA_BYTES", 256 * 1024 * 1024)) # downloads/Parquets temporários acima disso vão para o disco (lidos via mmap).
+    URL_BASE_TSE = os.getenv("URL_BASE_TSE", "https://dadosabertos.tse.jus.br/dataset/resultados-") # prefixo das páginas de resultados (completado com o ano).
+    DIRETORIO_CATALOGO_TSE = os.getenv("DIRETORIO_CATALOGO_TSE", ".cache_tse") # índices UF -> link das páginas do TSE.
+    VALIDADE_CATALOGO_TSE_SEGUNDOS = int(os.getenv("VALIDADE_CATALOGO_TSE_SEGUNDOS", 6 * 60 * 60)) # idade a partir da qual a página é revalidada (ETag/Last-Modified).
+    DIRETORIO_CHECKPOINTS_INGESTAO = os.getenv("DIRETORIO_CHECKPOINTS_INGESTAO", ".checkpoints_ingestao") # progresso das ingestões em streaming, para retomada. Vazio desativa.
+    INSTRUMENTACAO = os.getenv("INSTRUMENTACAO", "true").lower() == "true" # spans por arquivo/etapa, contadores de API e exportação ao fim da execução.
+    DIRETORIO_METRICAS = os.getenv("DIRETORIO_METRICAS", "metricas") # trace JSON de cada execução e pipeline.prom (Prometheus).
+    MOTOR_TRANSFORMACAO = os.getenv("MOTOR_TRANSFORMACAO", "pandas").lower() # motor da Silver e da Gold: "pandas" ou "arrow" (planos lazy do Arrow, multithread).
+    ORDENAR_SILVER = os.getenv("ORDENAR_SILVER", "true").lower() == "true" # ordena a Silver por município, zona e seção (só para inspeção; false evita o sort).
+    DIRETORIO_CACHE_CONSULTA = os.getenv("DIRETORIO_CACHE_CONSULTA", ".cache_consulta") # tabelas Gold em IPC do Arrow (mapeadas em memória pelo serviço de consultas).
+    TAMANHO_CACHE_CONSULTAS = int(os.getenv("TAMANHO_CACHE_CONSULTAS", 4096)) # resultados de consultas mantidos em memória (LRU). 0 desativa.
+    REVALIDACAO_GOLD_SEGUNDOS = float(os.getenv("REVALIDACAO_GOLD_SEGUNDOS", 60)) # intervalo entre as verificações de md5 das tabelas Gold no serviço de consultas.
+    PORTA_SERVICO_CONSULTA = int(os.getenv("PORTA_SERVICO_CONSULTA", 8765)) # porta HTTP do serviço de consultas (somente 127.0.0.1).
+
+
+# O Drive exige fatias intermediárias de upload múltiplas de 256 KiB: um valor fora disso só
+# falharia na segunda fatia de cada ingestão, depois de o download já ter começado.
+if Settings_Env.TAMANHO_FATIA_INGESTAO_BYTES <= 0 or Settings_Env.TAMANHO_FATIA_INGESTAO_BYTES % (256 * 1024):
+    raise ValueError(f"TAMANHO_FATIA_INGESTAO_BYTES deve ser um múltiplo positivo de 262144 (256 KiB); "
+                     f"recebido: {Settings_Env.TAMANHO_FATIA_INGESTAO_BYTES}")
@@ -0,0 +1,240 @@
+"""
+    Benchmarks das transformações do pipeline sobre um ZIP sintético do TSE.
+
+    Uso (na raiz do repositório):
+        python -m benchmarks.executar --perfil ce --repeticoes 3
+        python -m benchmarks.executar --perfil pequeno --comparar benchmarks/resultados/<anterior>.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+
+from benchmarks.gerador_tse import PERFIS, gerar_zip_votacao_secao
+
+VERSAO_FORMATO = 1
+DIRETORIO_RESULTADOS = os.path.join(os.path.dirname(__file__), "resultados")
+
+# Benchmark -> (arquivo de entrada usado para o MB/s)
+BENCHMARKS = {
+    "bronze": "zip",
+    "silver": "bronze",
+    "silver_arrow": "bronze",
+    "gold": "silver",
+    "gold_arrow": "silver",
+    "pipeline_local": "zip",
+    "pipeline_fundido": "zip",
+}
+
+
+def _executar_etapa(nome: str, caminhos: dict[str, str]) -> None:
+    """Roda uma etapa sobre os arquivos da pasta de trabalho (no processo filho)."""
+    from app.orquestracao.pipeline_bronze import converter_zip_para_parquet
+    from app.orquestracao.pipeline_gold import transformar_arquivo_silver_para_gold
+    from app.orquestracao.pipeline_silver import transformar_arquivo_bronze_para_silver
+
+    if nome == "bronze":
+        converter_zip_para_parquet(caminhos["zip"], caminhos["bronze"])
+    elif nome in ("silver", "silver_arrow"):
+        motor = "arrow" if nome == "silver_arrow" else "pandas"
+        transformar_arquivo_bronze_para_silver(caminhos["bronze"], caminhos["silver"], motor=motor)
+    elif nome in ("gold", "gold_arrow"):
+        motor = "arrow" if nome == "gold_arrow" else "pandas"
+        transformar_arquivo_silver_para_gold(caminhos["silver"], caminhos["gold"], motor=motor)
+    elif nome == "pipeline_local":
+        converter_zip_para_parquet(caminhos["zip"], caminhos["bronze"])
+        transformar_arquivo_bronze_para_silver(caminhos["bronze"], caminhos["silver"])
+        transformar_arquivo_silver_para_gold(caminhos["silver"], caminhos["gold"])
+    elif nome == "pipeline_fundido":
+        from app.orquestracao.pipeline_fundido import transformar_zip_fundido
+        from app.utils.vars_envs import Settings_Env
+
+        with open(caminhos["zip"], "rb") as fonte, open(caminhos["bronze"], "wb") as destino:
+            df_silver, cubo_gold = transformar_zip_fundido(fonte, destino, motor="pandas")
+        df_silver.to_parquet(caminhos["silver"], index=False, row_group_size=Settings_Env.LINHAS_POR_ROW_GROUP)
+        for nivel, df_gold in cubo_gold.items():
+            df_gold.to_parquet(caminhos["gold"][nivel], index=False)
+    else:
+        raise ValueError(f"Benchmark desconhecido: {nome}")
+
+
+def _medir(nome: str, caminhos: dict[str, str]) -> dict:
+    """Executado em um processo novo: tempo de parede e pico de memória (RSS) da etapa."""
+    logging.basicConfig(level=logging.WARNING)
+    import app.orquestracao.pipeline_fundido  # noqa: F401 (importações fora da medição)
+    from app.utils.instrumentacao import pico_rss_bytes
+
+    rss_inicial = pico_rss_bytes()
+    inicio = time.perf_counter()
+    _executar_etapa(nome, caminhos)
+    segundos = time.perf_counter() - inicio
+    return {
+        "segundos": segundos,
+        "pico_rss_bytes": pico_rss_bytes(),
+        "rss_inicial_bytes": rss_inicial,
+    }
+
+
+def _medir_em_processo_novo(nome: str, caminhos: dict[str, str]) -> dict:
+    """Cada medição usa um processo limpo, para que o pico de RSS seja só o da etapa."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_medir, nome, caminhos).result()
+
+
+def executar_benchmarks(perfil, nomes: list[str], repeticoes: int, pasta: str) -> dict:
+    """Gera o ZIP sintético em `pasta` e mede cada benchmark `repeticoes` vezes."""
+    from app.processamento.camadas import nomes_tabelas_gold
+
+    caminhos = {
+        "zip": os.path.join(pasta, f"votacao_secao_{perfil.ano}_{perfil.uf}.zip"),
+        "bronze": os.path.join(pasta, "bronze.parquet"),
+        "silver": os.path.join(pasta, "votacao_silver.parquet"),
+        "gold": {nivel: os.path.join(pasta, nome) for nivel, nome in nomes_tabelas_gold("votacao_silver.parquet").items()},
+    }
+
+    inicio = time.perf_counter()
+    gerado = gerar_zip_votacao_secao(caminhos["zip"], perfil)
+    print(f"ZIP sintético: {gerado['linhas']:,} linhas, {gerado['bytes_csv'] / 1e6:,.1f} MB de CSV, "
+          f"{os.path.getsize(caminhos['zip']) / 1e6:,.1f} MB zipado ({time.perf_counter() - inicio:.1f}s)")
+
+    # Silver e Gold isoladas precisam das camadas anteriores já geradas.
+    if any(BENCHMARKS[nome] in ("bronze", "silver") for nome in nomes) and "bronze" not in nomes:
+        _executar_etapa("bronze", caminhos)
+    if any(BENCHMARKS[nome] == "silver" for nome in nomes) and not {"silver", "silver_arrow"} & set(nomes):
+        _executar_etapa("silver", caminhos)
+
+    resultados = {}
+    for nome in nomes:
+        medicoes = [_medir_em_processo_novo(nome, caminhos) for _ in range(repeticoes)]
+        segundos = [medicao["segundos"] for medicao in medicoes]
+        mediana = statistics.median(segundos)
+
+        entrada = BENCHMARKS[nome]
+        bytes_entrada = gerado["bytes_csv"] if entrada == "zip" else os.path.getsize(caminhos[entrada])
+        resultados[nome] = {
+            "segundos": [round(valor, 4) for valor in segundos],
+            "mediana_segundos": round(mediana, 4),
+            "linhas": gerado["linhas"],
+            "bytes_entrada": bytes_entrada,
+            "linhas_por_segundo": round(gerado["linhas"] / mediana, 1),
+            "mb_por_segundo": round(bytes_entrada / 1e6 / mediana, 2),
+            "pico_rss_bytes": max(medicao["pico_rss_bytes"] for medicao in medicoes),
+            "rss_inicial_bytes": min(medicao["rss_inicial_bytes"] for medicao in medicoes),
+        }
+        _imprimir_resultado(nome, resultados[nome])
+
+    return {"gerador": gerado, "resultados": resultados}
+
+
+def _ambiente() -> dict:
+    import pandas
+    import pyarrow
+
+    def git(*args) -> str | None:
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "alteracoes_locais": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "pandas": pandas.__version__,
+        "pyarrow": pyarrow.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _imprimir_resultado(nome: str, resultado: dict) -> None:
+    print(f"{nome:<18} {resultado['mediana_segundos']:>9.3f}s {resultado['linhas_por_segundo']:>14,.0f} linhas/s "
+          f"{resultado['mb_por_segundo']:>9.2f} MB/s  pico RSS {resultado['pico_rss_bytes'] / 2**20:,.0f} MiB")
+
+
+def comparar(atual: dict, anterior: dict, limiar: float) -> list[str]:
+    """
+        Compara as medianas com um resultado anterior e devolve os benchmarks que ficaram
+        mais lentos que `limiar` (ex: 0.1 = 10%).
+    """
+    regressoes = []
+    mesmo_perfil = anterior["gerador"]["perfil"] == atual["gerador"]["perfil"]
+    print(f"\nComparação com {anterior['ambiente'].get('commit')} ({anterior['data']}):")
+    for nome, resultado in atual["resultados"].items():
+        base = anterior["resultados"].get(nome)
+        if base is None:
+            continue
+        variacao = resultado["mediana_segundos"] / base["mediana_segundos"] - 1
+        variacao_rss = resultado["pico_rss_bytes"] / base["pico_rss_bytes"] - 1
+        regrediu = mesmo_perfil and variacao > limiar
+        print(f"{nome:<18} {base['mediana_segundos']:>9.3f}s -> {resultado['mediana_segundos']:>9.3f}s "
+              f"({variacao:+.1%})  RSS {variacao_rss:+.1%}{'  <-- REGRESSÃO' if regrediu else ''}")
+        if regrediu:
+            regressoes.append(nome)
+
+    if not mesmo_perfil:
+        print("Atenção: perfis do gerador diferentes, a comparação não é direta (regressões não são apontadas).")
+    return regressoes
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks das transformações Bronze/Silver/Gold.")
+    parser.add_argument("--perfil", choices=sorted(PERFIS), default="pequeno")
+    parser.add_argument("--municipios", type=int)
+    parser.add_argument("--secoes-por-municipio", type=int)
+    parser.add_argument("--candidatos-por-cargo", type=int)
+    parser.add_argument("--cargos", type=int, choices=range(1, 6))
+    parser.add_argument("--turnos", type=int, choices=(1, 2))
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", help="JSON de resultados (padrão: benchmarks/resultados/<data>_<commit>.json)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--limiar-regressao", type=float, default=0.10)
+    parser.add_argument("--pasta-trabalho", help="Pasta dos arquivos gerados (padrão: temporária)")
+    args = parser.parse_args(argv)
+
+    ajustes = {
+        campo: valor for campo, valor in {
+            "municipios": args.municipios,
+            "secoes_por_municipio": args.secoes_por_municipio,
+            "candidatos_por_cargo": args.candidatos_por_cargo,
+            "cargos": args.cargos,
+            "turnos": args.turnos,
+        }.items() if valor is not None
+    }
+    perfil = replace(PERFIS[args.perfil], **ajustes)
+
+    with tempfile.TemporaryDirectory(prefix="bench_tse_", dir=args.pasta_trabalho) as pasta:
+        medicao = executar_benchmarks(perfil, args.benchmarks, args.repeticoes, pasta)
+
+    agora = datetime.now()
+    resultado = {"versao": VERSAO_FORMATO, "data": agora.isoformat(timespec="seconds"), "ambiente": _ambiente(), **medicao}
+
+    saida = args.saida or os.path.join(
+        DIRETORIO_RESULTADOS, f"{agora:%Y%m%d-%H%M%S}_{resultado['ambiente']['commit'] or 'sem-commit'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            regressoes = comparar(resultado, json.load(arquivo), args.limiar_regressao)
+        if regressoes:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
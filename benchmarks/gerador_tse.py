@@ -0,0 +1,149 @@
+import csv
+import io
+import zipfile
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+from app.processamento.layout_tse import LAYOUT_VOTACAO_SECAO_2018
+
+# Pedaços de nomes com acentos, para que o latin-1 apareça nas colunas de texto como no TSE.
+PREFIXOS_MUNICIPIO = ["SÃO", "SANTA", "VÁRZEA", "JUAZEIRO", "ITAPAGÉ", "CAUCAIA", "MARACANAÚ", "CRATEÚS", "IGUATU", "QUIXADÁ"]
+SUFIXOS_MUNICIPIO = ["DO NORTE", "DA SERRA", "DO SUL", "DAS FLORES", "DE JESUS", "DO PIAUÍ", "DO CEARÁ", "NOVA", "VELHA", "GRANDE"]
+NOMES_CANDIDATO = ["JOSÉ", "MARIA", "JOÃO", "ANTÔNIO", "FRANCISCA", "CONCEIÇÃO", "LUÍS", "INÊS", "SEBASTIÃO", "MÔNICA"]
+SOBRENOMES_CANDIDATO = ["ARAÚJO", "GONÇALVES", "DA SILVA", "SOUSA", "ASSUNÇÃO", "FALCÃO", "MAGALHÃES", "BRAGANÇA", "LEÃO", "CONCEIÇÃO"]
+
+# (CD_CARGO, DS_CARGO, dígitos do número do votável)
+CARGOS = [
+    (1, "Presidente", 2), (3, "Governador", 2), (5, "Senador", 3),
+    (6, "Deputado Federal", 4), (7, "Deputado Estadual", 5),
+]
+
+
+@dataclass
+class PerfilGerador:
+    """Tamanho do arquivo sintético de votação por seção."""
+    municipios: int = 20
+    secoes_por_municipio: int = 50
+    secoes_por_zona: int = 400
+    candidatos_por_cargo: int = 8
+    cargos: int = 3
+    turnos: int = 1
+    ano: int = 2022
+    uf: str = "CE"
+    semente: int = 0
+
+    @property
+    def linhas(self) -> int:
+        votaveis = self.candidatos_por_cargo + 2 # + branco e nulo
+        return self.turnos * self.municipios * self.secoes_por_municipio * self.cargos * votaveis
+
+
+# Perfis prontos; "sp" tem a ordem de grandeza do arquivo de SP (dezenas de milhões de linhas).
+PERFIS = {
+    "pequeno": PerfilGerador(),
+    "ce": PerfilGerador(municipios=184, secoes_por_municipio=120, candidatos_por_cargo=12, cargos=5),
+    "sp": PerfilGerador(municipios=645, secoes_por_municipio=160, candidatos_por_cargo=40, cargos=5, turnos=2, uf="SP"),
+}
+
+
+def gerar_zip_votacao_secao(destino, perfil: PerfilGerador) -> dict:
+    """
+        Grava um ZIP no formato do TSE ("votação por seção": CSV `;`, latin-1, tudo entre
+        aspas, cabeçalho do layout de 2018+) com o tamanho descrito no perfil.
+
+        O CSV é gerado e comprimido município a município, em streaming, então o pico de
+        memória não depende do número de linhas.
+
+        Args:
+            destino: Caminho ou objeto file-like gravável.
+
+        Returns:
+            dict: Perfil usado, linhas geradas e bytes do CSV (sem compressão).
+    """
+    rng = np.random.default_rng(perfil.semente)
+    nome_csv = f"votacao_secao_{perfil.ano}_{perfil.uf}.csv"
+    cabecalho = LAYOUT_VOTACAO_SECAO_2018.nomes
+
+    municipios = _nomes_municipios(perfil.municipios)
+    cargos = CARGOS[:perfil.cargos]
+    votaveis = {cd_cargo: _votaveis(rng, digitos, perfil.candidatos_por_cargo) for cd_cargo, _, digitos in cargos}
+
+    bytes_csv = 0
+    linhas = 0
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as z:
+        with z.open(nome_csv, "w", force_zip64=True) as saida:
+            bytes_csv += saida.write(_linha_csv(cabecalho))
+
+            for indice, (cd_municipio, nm_municipio) in enumerate(municipios):
+                zona_inicial = 1 + indice * -(-perfil.secoes_por_municipio // perfil.secoes_por_zona)
+                for turno in range(1, perfil.turnos + 1):
+                    bloco = _bloco_municipio(rng, perfil, turno, cd_municipio, nm_municipio, zona_inicial, cargos, votaveis)
+                    texto = io.StringIO()
+                    bloco.to_csv(texto, sep=";", header=False, index=False, quoting=csv.QUOTE_ALL, lineterminator="\n")
+                    bytes_csv += saida.write(texto.getvalue().encode("latin-1"))
+                    linhas += len(bloco)
+
+    return {"perfil": asdict(perfil), "linhas": linhas, "bytes_csv": bytes_csv}
+
+
+def _linha_csv(valores: list[str]) -> bytes:
+    return (";".join(f'"{valor}"' for valor in valores) + "\n").encode("latin-1")
+
+
+def _nomes_municipios(quantidade: int) -> list[tuple[int, str]]:
+    nomes = []
+    for i in range(quantidade):
+        nome = f"{PREFIXOS_MUNICIPIO[i % 10]} {SUFIXOS_MUNICIPIO[(i // 10) % 10]}"
+        if i >= 100:
+            nome += f" {i // 100}"
+        nomes.append((10000 + i * 7, nome))
+    return nomes
+
+
+def _votaveis(rng: np.random.Generator, digitos: int, quantidade: int) -> list[tuple[int, str]]:
+    numeros = rng.choice(np.arange(10 ** (digitos - 1), 10 ** digitos), size=quantidade, replace=False)
+    candidatos = [
+        (int(numero), f"{NOMES_CANDIDATO[i % 10]} {SOBRENOMES_CANDIDATO[(i // 10 + i) % 10]} {i // 100 or ''}".strip())
+        for i, numero in enumerate(numeros)
+    ]
+    return candidatos + [(95, "VOTO BRANCO"), (96, "VOTO NULO")]
+
+
+def _bloco_municipio(rng, perfil: PerfilGerador, turno: int, cd_municipio: int, nm_municipio: str,
+                     zona_inicial: int, cargos: list, votaveis: dict) -> pd.DataFrame:
+    """Linhas de um município em um turno: seções x cargos x votáveis."""
+    secoes = np.arange(1, perfil.secoes_por_municipio + 1)
+    partes = []
+    for cd_cargo, ds_cargo, _ in cargos:
+        numeros = np.array([numero for numero, _ in votaveis[cd_cargo]])
+        nomes = np.array([nome for _, nome in votaveis[cd_cargo]], dtype=object)
+        por_secao = len(numeros)
+
+        partes.append(pd.DataFrame({
+            "NR_SECAO": np.repeat(secoes, por_secao),
+            "CD_CARGO": cd_cargo,
+            "DS_CARGO": ds_cargo,
+            "NR_VOTAVEL": np.tile(numeros, len(secoes)),
+            "NM_VOTAVEL": np.tile(nomes, len(secoes)),
+        }))
+
+    bloco = pd.concat(partes, ignore_index=True)
+    total = len(bloco)
+    bloco["NR_ZONA"] = zona_inicial + (bloco["NR_SECAO"] - 1) // perfil.secoes_por_zona
+    bloco["QT_VOTOS"] = rng.poisson(25, size=total)
+    bloco["NR_LOCAL_VOTACAO"] = 1000 + (bloco["NR_SECAO"] - 1) // 8
+
+    colunas = {
+        "DT_GERACAO": "09/11/2022", "HH_GERACAO": "10:56:34", "ANO_ELEICAO": perfil.ano,
+        "CD_TIPO_ELEICAO": 2, "NM_TIPO_ELEICAO": "Eleição Ordinária", "NR_TURNO": turno,
+        "CD_ELEICAO": 546 + turno, "DS_ELEICAO": "Eleição Geral Federal", "DT_ELEICAO": "02/10/2022",
+        "TP_ABRANGENCIA": "E", "SG_UF": perfil.uf, "SG_UE": perfil.uf, "NM_UE": "ESTADO",
+        "CD_MUNICIPIO": cd_municipio, "NM_MUNICIPIO": nm_municipio, "SQ_CANDIDATO": -1,
+        "NM_LOCAL_VOTACAO": "ESCOLA MUNICIPAL", "DS_LOCAL_VOTACAO_ENDERECO": "RUA DA CONCEIÇÃO, S/N",
+    }
+    for nome, valor in colunas.items():
+        bloco[nome] = valor
+
+    return bloco[LAYOUT_VOTACAO_SECAO_2018.nomes]
@@ -0,0 +1,183 @@
+"""
+    Latência das consultas do serviço da Gold (`app/consulta`), sobre uma Gold por
+    município gerada a partir do ZIP sintético.
+
+    Uso (na raiz do repositório):
+        python -m benchmarks.latencia_consultas --perfil ce --consultas 5000
+        python -m benchmarks.latencia_consultas --perfil sp --limite-p99-ms 5
+
+    Cenários:
+    - `sem_cache`: toda consulta vai ao índice e às colunas mapeadas (cache desativado);
+    - `com_cache`: carga com repetição (consultas populares, distribuição de Zipf);
+    - `http`: a mesma carga pelo endpoint local, numa conexão keep-alive.
+
+    Cada cenário registra p50, p95, p99 e máximo (ms) e consultas/s. Termina com código 1
+    se o p99 de algum cenário passar de `--limite-p99-ms`.
+"""
+import argparse
+import http.client
+import os
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import replace
+from urllib.parse import urlencode
+
+import numpy as np
+
+from benchmarks.gerador_tse import PERFIS, gerar_zip_votacao_secao
+
+
+def gerar_gold(perfil, pasta: str) -> str:
+    """Gera ZIP -> Bronze -> Silver -> Gold em `pasta/gold` (layout do backend local) e devolve a pasta do lake."""
+    from app.orquestracao.pipeline_bronze import converter_zip_para_parquet
+    from app.orquestracao.pipeline_gold import transformar_arquivo_silver_para_gold
+    from app.orquestracao.pipeline_silver import transformar_arquivo_bronze_para_silver
+    from app.processamento.camadas import nome_saida_bronze, nome_saida_silver, nomes_tabelas_gold
+
+    lake = os.path.join(pasta, "lake")
+    os.makedirs(os.path.join(lake, "gold"))
+    nome_zip = f"votacao_secao_{perfil.ano}_{perfil.uf}.zip"
+    caminho_zip = os.path.join(pasta, nome_zip)
+    caminho_bronze = os.path.join(pasta, nome_saida_bronze(nome_zip))
+    caminho_silver = os.path.join(pasta, nome_saida_silver(nome_saida_bronze(nome_zip)))
+
+    gerar_zip_votacao_secao(caminho_zip, perfil)
+    converter_zip_para_parquet(caminho_zip, caminho_bronze)
+    transformar_arquivo_bronze_para_silver(caminho_bronze, caminho_silver)
+    caminhos_gold = {nivel: os.path.join(pasta, nome) for nivel, nome in nomes_tabelas_gold(os.path.basename(caminho_silver)).items()}
+    transformar_arquivo_silver_para_gold(caminho_silver, caminhos_gold)
+    os.replace(caminhos_gold["municipio"], os.path.join(lake, "gold", os.path.basename(caminhos_gold["municipio"])))
+    return lake
+
+
+def montar_carga(servico, quantidade: int, zipf: float | None, semente: int) -> list[tuple[str, dict]]:
+    """
+        Consultas (rota, parâmetros) sorteadas entre os recortes indexados: 60% top-N,
+        30% participação e 10% comparação. Com `zipf`, os recortes populares se repetem.
+    """
+    rng = np.random.default_rng(semente)
+    recortes = sorted(servico._indice.items(), key=lambda item: item[0])
+    candidatos = {chave: [linha['NM_VOTAVEL'] for linha in faixa.tabela.linhas(faixa.inicio, faixa.fim_nominal)]
+                  for chave, faixa in recortes}
+    chaves = [chave for chave, _ in recortes if candidatos[chave]]
+
+    def sortear_recorte():
+        if zipf:
+            return chaves[min(int(rng.zipf(zipf)) - 1, len(chaves) - 1)]
+        return chaves[int(rng.integers(len(chaves)))]
+
+    carga = []
+    for _ in range(quantidade):
+        ano, cd_municipio, cargo, turno = chave = sortear_recorte()
+        base = {"municipio": str(cd_municipio), "cargo": cargo.title(), "turno": turno, "ano": ano}
+        sorteio = rng.random()
+        if sorteio < 0.6:
+            carga.append(("/top", {**base, "n": int(rng.integers(3, 11))}))
+        elif sorteio < 0.9:
+            carga.append(("/participacao", {**base, "candidato": str(rng.choice(candidatos[chave])).lower()}))
+        else:
+            outros = [str(c) for (a, c, g, t) in chaves if (a, g, t) == (ano, cargo, turno)]
+            municipios = rng.choice(outros, size=min(3, len(outros)), replace=False).tolist()
+            nomes = rng.choice(candidatos[chave], size=min(2, len(candidatos[chave])), replace=False).tolist()
+            carga.append(("/comparar", {**base, "municipio": None, "municipios": ",".join(municipios),
+                                        "candidatos": ",".join(nomes)}))
+    return carga
+
+
+def _executar_local(servico, rota: str, parametros: dict):
+    from app.consulta.servidor_http import responder
+
+    return responder(servico, rota, {nome: str(valor) for nome, valor in parametros.items() if valor is not None})
+
+
+def medir(executar, carga: list[tuple[str, dict]]) -> dict:
+    """Latência de cada consulta (executadas em sequência) e resumo em ms."""
+    latencias = np.empty(len(carga))
+    inicio_total = time.perf_counter()
+    for i, (rota, parametros) in enumerate(carga):
+        inicio = time.perf_counter()
+        executar(rota, parametros)
+        latencias[i] = time.perf_counter() - inicio
+    total = time.perf_counter() - inicio_total
+
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99]) * 1000
+    return {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "max_ms": latencias.max() * 1000,
+            "consultas_por_segundo": len(carga) / total}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Latência do serviço de consultas da Gold.")
+    parser.add_argument("--perfil", choices=list(PERFIS), default="ce")
+    parser.add_argument("--municipios", type=int, help="Sobrescreve o número de municípios do perfil")
+    parser.add_argument("--consultas", type=int, default=5000)
+    parser.add_argument("--zipf", type=float, default=1.3, help="Expoente da popularidade no cenário com cache")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--limite-p99-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    from app.consulta.servico_gold import ServicoConsultaGold
+    from app.consulta.servidor_http import criar_servidor
+    from app.storage.armazenamento_local import ArmazenamentoLocal
+
+    perfil = replace(PERFIS[args.perfil], **({"municipios": args.municipios} if args.municipios else {}))
+    with tempfile.TemporaryDirectory(prefix="latencia_consultas_") as pasta:
+        inicio = time.perf_counter()
+        lake = gerar_gold(perfil, pasta)
+        print(f"Gold sintética: {perfil.municipios} municípios, {perfil.cargos} cargos, "
+              f"{perfil.turnos} turno(s) ({time.perf_counter() - inicio:.1f}s)")
+
+        armazenamento = ArmazenamentoLocal(lake)
+        cache_ipc = os.path.join(pasta, "cache_consulta")
+
+        inicio = time.perf_counter()
+        sem_cache = ServicoConsultaGold(armazenamento, "gold", cache_ipc, capacidade_cache=0)
+        sem_cache.revalidar()
+        print(f"Carga inicial (download, IPC e índice): {(time.perf_counter() - inicio) * 1000:.0f} ms, "
+              f"{len(sem_cache._indice)} recortes\n")
+
+        com_cache = ServicoConsultaGold(armazenamento, "gold", cache_ipc)
+        com_cache.revalidar()
+
+        carga_uniforme = montar_carga(sem_cache, args.consultas, None, args.semente)
+        carga_popular = montar_carga(com_cache, args.consultas, args.zipf, args.semente)
+
+        resultados = {
+            "sem_cache": medir(lambda rota, parametros: _executar_local(sem_cache, rota, parametros), carga_uniforme),
+            "com_cache": medir(lambda rota, parametros: _executar_local(com_cache, rota, parametros), carga_popular),
+        }
+
+        servidor = criar_servidor(com_cache, porta=0)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        conexao = http.client.HTTPConnection(*servidor.server_address[:2])
+
+        def executar_http(rota: str, parametros: dict):
+            conexao.request("GET", f"{rota}?{urlencode({k: v for k, v in parametros.items() if v is not None})}")
+            resposta = conexao.getresponse()
+            corpo = resposta.read()
+            if resposta.status != 200:
+                raise RuntimeError(f"{rota} {parametros}: HTTP {resposta.status} {corpo[:200]!r}")
+
+        try:
+            resultados["http"] = medir(executar_http, carga_popular)
+        finally:
+            conexao.close()
+            servidor.shutdown()
+            servidor.server_close()
+
+        print(f"{'cenário':<12}{'p50':>10}{'p95':>10}{'p99':>10}{'máx':>10}{'consultas/s':>14}")
+        for nome, r in resultados.items():
+            print(f"{nome:<12}{r['p50_ms']:>8.3f}ms{r['p95_ms']:>8.3f}ms{r['p99_ms']:>8.3f}ms{r['max_ms']:>8.2f}ms"
+                  f"{r['consultas_por_segundo']:>14,.0f}")
+        print(f"\nCache: {com_cache.cache.estatisticas()}")
+
+    lentos = [nome for nome, r in resultados.items() if r["p99_ms"] > args.limite_p99_ms]
+    if lentos:
+        print(f"\np99 acima de {args.limite_p99_ms} ms em: {', '.join(lentos)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+    Confere que os motores pandas e Arrow geram a mesma Silver e a mesma Gold.
+
+    Uso (na raiz do repositório):
+        python -m benchmarks.paridade_motores --perfil pequeno
+        python -m benchmarks.paridade_motores --perfil ce --sem-perturbacao
+
+    A Bronze gerada a partir do ZIP sintético é "perturbada" antes da comparação (nomes
+    com espaços e minúsculas, nulos em texto, zona e votos) para exercitar a normalização,
+    a promoção de inteiros e o tratamento de nulos. Termina com código 1 se algum arquivo
+    divergir. O perfil "pequeno" também roda na suíte de testes (`tests/test_paridade_motores.py`).
+"""
+import argparse
+import os
+import sys
+import tempfile
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from benchmarks.gerador_tse import PERFIS, gerar_zip_votacao_secao
+
+
+def perturbar_bronze(caminho: str, semente: int = 0) -> None:
+    """Reescreve a Bronze com variações que as regras da Silver precisam tratar."""
+    tabela = pq.read_table(caminho)
+    rng = np.random.default_rng(semente)
+    linhas = tabela.num_rows
+
+    def sorteio(proporcao: float) -> pa.Array:
+        return pa.array(rng.random(linhas) < proporcao)
+
+    nm_municipio = tabela.column('NM_MUNICIPIO')
+    variante = pc.binary_join_element_wise("  ", pc.utf8_lower(nm_municipio), " ", "")
+    tabela = tabela.set_column(tabela.schema.get_field_index('NM_MUNICIPIO'), 'NM_MUNICIPIO',
+                               pc.if_else(sorteio(0.05), variante, nm_municipio))
+    for coluna, proporcao in (('NM_VOTAVEL', 0.01), ('NR_ZONA', 0.01), ('QT_VOTOS', 0.02), ('DS_CARGO', 0.005)):
+        valores = tabela.column(coluna)
+        tabela = tabela.set_column(tabela.schema.get_field_index(coluna), coluna,
+                                   pc.if_else(sorteio(proporcao), pa.scalar(None, valores.type), valores))
+    pq.write_table(tabela, caminho)
+
+
+def comparar_parquets(caminho_pandas: str, caminho_arrow: str) -> str | None:
+    """Descrição da primeira diferença entre os dois Parquets, ou None se forem iguais."""
+    schema_pandas, schema_arrow = pq.read_schema(caminho_pandas), pq.read_schema(caminho_arrow)
+    if schema_pandas.names != schema_arrow.names:
+        return f"colunas: {schema_pandas.names} != {schema_arrow.names}"
+    for campo_pandas, campo_arrow in zip(schema_pandas, schema_arrow):
+        if campo_pandas.type != campo_arrow.type:
+            return f"tipo de {campo_pandas.name}: {campo_pandas.type} != {campo_arrow.type}"
+
+    try:
+        # check_categorical=False: categorias sem uso no dicionário não contam como diferença.
+        pd.testing.assert_frame_equal(pd.read_parquet(caminho_pandas), pd.read_parquet(caminho_arrow),
+                                      check_categorical=False)
+    except AssertionError as erro:
+        return str(erro)
+    return None
+
+
+def verificar_paridade(perfil, pasta: str, perturbar: bool = True) -> dict[str, str | None]:
+    """
+        Gera os dados, roda os dois motores e compara as saídas.
+
+        Returns:
+            dict[str, str | None]: Primeira diferença de cada arquivo comparado (None se iguais).
+    """
+    from app.orquestracao.pipeline_bronze import converter_zip_para_parquet
+    from app.orquestracao.pipeline_gold import transformar_arquivo_silver_para_gold
+    from app.orquestracao.pipeline_silver import transformar_arquivo_bronze_para_silver
+    from app.processamento.camadas import nomes_tabelas_gold
+    from app.utils.vars_envs import Settings_Env
+
+    caminho_zip = os.path.join(pasta, f"votacao_secao_{perfil.ano}_{perfil.uf}.zip")
+    caminho_bronze = os.path.join(pasta, "bronze.parquet")
+    gerar_zip_votacao_secao(caminho_zip, perfil)
+    converter_zip_para_parquet(caminho_zip, caminho_bronze)
+    if perturbar:
+        perturbar_bronze(caminho_bronze, perfil.semente)
+
+    resultados = {}
+
+    def conferir(nome: str, caminho_pandas: str, caminho_arrow: str) -> None:
+        diferenca = comparar_parquets(caminho_pandas, caminho_arrow)
+        print(f"{nome:<32} {'OK' if diferenca is None else 'DIVERGE'}")
+        if diferenca is not None:
+            print(f"    {diferenca}")
+        resultados[nome] = diferenca
+
+    ordenar_original = Settings_Env.ORDENAR_SILVER
+    try:
+        for ordenar in (True, False):
+            Settings_Env.ORDENAR_SILVER = ordenar
+            sufixo = "" if ordenar else "_sem_ordem"
+            silver = {motor: os.path.join(pasta, f"{motor}{sufixo}_silver.parquet") for motor in ("pandas", "arrow")}
+            for motor, caminho in silver.items():
+                transformar_arquivo_bronze_para_silver(caminho_bronze, caminho, motor=motor)
+            conferir(f"silver{sufixo}", silver["pandas"], silver["arrow"])
+
+            # A Gold de cada motor parte da Silver do próprio motor.
+            gold = {motor: {nivel: os.path.join(pasta, nome) for nivel, nome in nomes_tabelas_gold(os.path.basename(caminho)).items()}
+                    for motor, caminho in silver.items()}
+            for motor, caminho in silver.items():
+                transformar_arquivo_silver_para_gold(caminho, gold[motor], motor=motor)
+            for nivel in gold["pandas"]:
+                conferir(f"gold_{nivel}{sufixo}", gold["pandas"][nivel], gold["arrow"][nivel])
+    finally:
+        Settings_Env.ORDENAR_SILVER = ordenar_original
+
+    return resultados
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Paridade entre os motores pandas e Arrow da Silver e da Gold.")
+    parser.add_argument("--perfil", choices=sorted(PERFIS), default="pequeno")
+    parser.add_argument("--municipios", type=int)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--sem-perturbacao", action="store_true", help="Compara sobre a Bronze gerada, sem variações")
+    args = parser.parse_args(argv)
+
+    perfil = replace(PERFIS[args.perfil], semente=args.semente,
+                     **({"municipios": args.municipios} if args.municipios else {}))
+    with tempfile.TemporaryDirectory(prefix="paridade_") as pasta:
+        resultados = verificar_paridade(perfil, pasta, perturbar=not args.sem_perturbacao)
+
+    divergencias = [nome for nome, diferenca in resultados.items() if diferenca is not None]
+
+    if divergencias:
+        print(f"\n{len(divergencias)} saída(s) divergente(s): {', '.join(divergencias)}")
+        return 1
+    print("\nMotores pandas e Arrow geraram saídas idênticas.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+    Mede o tempo de inicialização do CLI (`main.py`): cada comando roda num interpretador
+    novo, como numa execução real, e o tempo de parede inclui as importações.
+
+    Uso (na raiz do repositório):
+        python -m benchmarks.tempo_inicializacao --repeticoes 10
+        python -m benchmarks.tempo_inicializacao --limite-segundos 0.5 --detalhar pendentes
+
+    `pendentes` roda sobre um Data Lake local vazio (`BACKEND_ARMAZENAMENTO=local`), para
+    medir só a inicialização, sem rede. `importar_pipeline` importa todas as etapas e serve
+    de referência do custo que os comandos de metadados deixam de pagar. Termina com
+    código 1 se a mediana de `pendentes` passar de `--limite-segundos`.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ_REPOSITORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMANDOS = {
+    "ajuda": ["main.py", "--help"],
+    "pendentes": ["main.py", "pendentes"],
+    "importar_pipeline": ["-c", "import app.orquestracao.agendador, app.orquestracao.pipeline_fundido"],
+}
+
+
+def _ambiente(pasta_lake: str) -> dict[str, str]:
+    return {
+        **os.environ,
+        "BACKEND_ARMAZENAMENTO": "local",
+        "DIRETORIO_ARMAZENAMENTO_LOCAL": pasta_lake,
+        "INSTRUMENTACAO": "false",
+    }
+
+
+def medir_comando(argumentos: list[str], repeticoes: int, ambiente: dict[str, str]) -> list[float]:
+    """Tempo de parede (s) de cada execução do comando num processo Python novo."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, *argumentos], cwd=RAIZ_REPOSITORIO, env=ambiente,
+                       stdout=subprocess.DEVNULL, check=True)
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def importacoes_mais_lentas(argumentos: list[str], ambiente: dict[str, str], quantidade: int = 15) -> list[tuple[str, int]]:
+    """Módulos de maior tempo acumulado de importação (µs), segundo `python -X importtime`."""
+    resultado = subprocess.run([sys.executable, "-X", "importtime", *argumentos], cwd=RAIZ_REPOSITORIO, env=ambiente,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    modulos = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, acumulado, modulo = (parte.strip() for parte in linha.removeprefix("import time:").split("|"))
+        modulos.append((modulo, int(acumulado)))
+    return sorted(modulos, key=lambda item: item[1], reverse=True)[:quantidade]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Tempo de inicialização dos comandos do CLI.")
+    parser.add_argument("--comandos", nargs="+", choices=list(COMANDOS), default=list(COMANDOS))
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--limite-segundos", type=float, default=0.5,
+                        help="Mediana máxima aceita para `pendentes`")
+    parser.add_argument("--detalhar", nargs="*", choices=list(COMANDOS), default=[],
+                        help="Lista as importações mais lentas desses comandos")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="lake_vazio_") as pasta_lake:
+        ambiente = _ambiente(pasta_lake)
+        medianas = {}
+        for nome in args.comandos:
+            medir_comando(COMANDOS[nome], 1, ambiente) # aquece o cache de bytecode e de disco
+            tempos = medir_comando(COMANDOS[nome], args.repeticoes, ambiente)
+            medianas[nome] = statistics.median(tempos)
+            print(f"{nome:<20} mediana {medianas[nome] * 1000:8.1f} ms   mín {min(tempos) * 1000:8.1f} ms   "
+                  f"máx {max(tempos) * 1000:8.1f} ms")
+
+        for nome in args.detalhar:
+            print(f"\nImportações mais lentas de `{nome}` (acumulado):")
+            for modulo, microssegundos in importacoes_mais_lentas(COMANDOS[nome], ambiente):
+                print(f"  {microssegundos / 1000:8.1f} ms  {modulo}")
+
+    if "pendentes" in medianas and medianas["pendentes"] > args.limite_segundos:
+        print(f"\n`pendentes` levou {medianas['pendentes']:.3f}s (limite {args.limite_segundos:.3f}s)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
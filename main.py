@@ -1,21 +1,180 @@
-from app.orquestracao.pipeline_ingestao import executar_pipeline_ingestao
-from app.orquestracao.pipeline_bronze import executar_pipeline_bronze
-from app.orquestracao.pipeline_silver import executar_pipeline_silver
-from app.orquestracao.pipeline_gold import executar_pipeline_gold
+"""
+    Linha de comando do pipeline.
+
+        python main.py                                  # matriz ANOS x UFS completa (o mesmo que `executar`)
+        python main.py executar --anos 2022 --ufs CE PE # agendador (ou modo fundido) só nesses jobs
+        python main.py ingestao --anos 2022 --ufs CE    # uma etapa, opcionalmente restrita a jobs (ano, UF)
+        python main.py bronze | silver | gold | fundido [--anos ...] [--ufs ...]
+        python main.py pendentes [--json]               # etapas a executar por job, só com metadados
+        python main.py consultas [--porta 8765]         # endpoint HTTP local de consultas sobre a Gold
+
+    Cada comando importa apenas o que usa: pandas, pyarrow, BeautifulSoup, curl_cffi e as
+    transformações ficam fora de `--help` e de `pendentes`. Todas as etapas de uma execução
+    usam a mesma sessão do armazenamento (`obter_armazenamento_compartilhado`): o token do
+    Drive é lido (e renovado, se preciso) uma única vez por processo.
+"""
+import argparse
+import json
+import logging
+import sys
 
 from app.utils.logging_config import setup_logging
+from app.utils.vars_envs import Settings_Env
+
+
+def _jobs_informados(args: argparse.Namespace) -> list[tuple[int, str]] | None:
+    """Jobs (ano, UF) pedidos na linha de comando; None quando nenhum filtro foi passado (todos os arquivos)."""
+    if not args.anos and not args.ufs:
+        return None
+
+    from app.orquestracao.pendencias import montar_jobs
+    return montar_jobs(args.anos, args.ufs)
+
+
+def _ingerir(jobs: list[tuple[int, str]], modo_streaming: bool = True) -> None:
+    from app.orquestracao.pipeline_ingestao import executar_pipeline_ingestao
+
+    for ano, sigla_estado in jobs:
+        executar_pipeline_ingestao(ano=ano, sigla_estado=sigla_estado, modo_streaming=modo_streaming)
+
+
+def comando_executar(args: argparse.Namespace) -> int:
+    """Pipeline completo da matriz de jobs: agendador ou, com `PIPELINE_FUNDIDO`, ingestão + modo fundido."""
+    from app.orquestracao.pendencias import montar_jobs
+
+    jobs = montar_jobs(args.anos, args.ufs)
+    if Settings_Env.PIPELINE_FUNDIDO:
+        from app.orquestracao.pipeline_fundido import executar_pipeline_fundido
+
+        _ingerir(jobs)
+        executar_pipeline_fundido(jobs=_jobs_informados(args))
+        return 0
+
+    # Matriz ANOS x UFS: ingestão, Bronze, Silver e Gold de cada job em paralelo.
+    from app.orquestracao.agendador import executar_agendador
+
+    resultado = executar_agendador(args.anos, args.ufs)
+    return 1 if any(job.status == "falhou" for job in resultado) else 0
+
+
+def comando_ingestao(args: argparse.Namespace) -> int:
+    from app.orquestracao.pendencias import montar_jobs
+
+    _ingerir(montar_jobs(args.anos, args.ufs), modo_streaming=not args.em_memoria)
+    return 0
+
+
+def comando_bronze(args: argparse.Namespace) -> int:
+    from app.orquestracao.pipeline_bronze import executar_pipeline_bronze
+
+    executar_pipeline_bronze(jobs=_jobs_informados(args))
+    return 0
+
+
+def comando_silver(args: argparse.Namespace) -> int:
+    from app.orquestracao.pipeline_silver import executar_pipeline_silver
+
+    executar_pipeline_silver(jobs=_jobs_informados(args))
+    return 0
+
 
-def main():
+def comando_gold(args: argparse.Namespace) -> int:
+    from app.orquestracao.pipeline_gold import executar_pipeline_gold
 
-    SIGLA_ESTADO = "CE"
-    ANO = 2022
+    executar_pipeline_gold(jobs=_jobs_informados(args))
+    return 0
+
+
+def comando_fundido(args: argparse.Namespace) -> int:
+    from app.orquestracao.pipeline_fundido import executar_pipeline_fundido
+
+    executar_pipeline_fundido(jobs=_jobs_informados(args))
+    return 0
+
+
+def comando_pendentes(args: argparse.Namespace) -> int:
+    """Lista as etapas pendentes de cada job, sem baixar dados nem carregar as transformações."""
+    from app.orquestracao.pendencias import listar_pendencias, montar_jobs
+    from app.storage.armazenamento import obter_armazenamento_compartilhado
+
+    pendencias = listar_pendencias(obter_armazenamento_compartilhado(), montar_jobs(args.anos, args.ufs))
+
+    if args.json:
+        print(json.dumps([vars(pendencia) for pendencia in pendencias], ensure_ascii=False, indent=2))
+        return 0
+
+    for pendencia in pendencias:
+        situacao = ", ".join(pendencia.etapas) if pendencia.etapas else "atualizado"
+        print(f"{str(pendencia):<8} {pendencia.arquivo or '-':<32} {situacao}")
+    return 0
+
+
+def comando_consultas(args: argparse.Namespace) -> int:
+    """Carrega as tabelas Gold por município e atende consultas HTTP em 127.0.0.1 até ser interrompido."""
+    from app.consulta.servico_gold import abrir_servico_consulta
+    from app.consulta.servidor_http import servir
+
+    servir(abrir_servico_consulta(), args.porta)
+    return 0
+
+
+# Comandos que rodam etapas do pipeline (exportam o trace e as métricas ao final).
+COMANDOS_PIPELINE = {
+    "executar": (comando_executar, "Pipeline completo (agendador ou modo fundido) da matriz de jobs"),
+    "ingestao": (comando_ingestao, "Ingestão dos ZIPs do TSE na camada de dados brutos"),
+    "bronze": (comando_bronze, "ZIPs brutos -> Parquet Bronze"),
+    "silver": (comando_silver, "Bronze -> Silver"),
+    "gold": (comando_gold, "Silver -> Gold"),
+    "fundido": (comando_fundido, "Bronze -> Silver -> Gold em uma passada por arquivo"),
+}
+
+
+def montar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Pipeline de dados eleitorais do TSE (dados brutos -> Bronze -> Silver -> Gold).")
+    subparsers = parser.add_subparsers(dest="comando", metavar="comando")
+
+    filtro_jobs = argparse.ArgumentParser(add_help=False)
+    filtro_jobs.add_argument("--anos", type=int, nargs="+", help="Anos das eleições (padrão: ANOS)")
+    filtro_jobs.add_argument("--ufs", type=str.upper, nargs="+", help="Siglas das UFs (padrão: UFS)")
+
+    for nome, (funcao, ajuda) in COMANDOS_PIPELINE.items():
+        subparser = subparsers.add_parser(nome, parents=[filtro_jobs], help=ajuda, description=ajuda)
+        subparser.set_defaults(funcao=funcao)
+    subparsers.choices["ingestao"].add_argument("--em-memoria", action="store_true",
+                                                help="Monta o ZIP em memória antes do upload, em vez de enviar em streaming")
+
+    pendentes = subparsers.add_parser("pendentes", parents=[filtro_jobs], help="Etapas pendentes de cada job (só metadados)")
+    pendentes.add_argument("--json", action="store_true", help="Saída em JSON")
+    pendentes.set_defaults(funcao=comando_pendentes)
+
+    consultas = subparsers.add_parser("consultas", help="Endpoint HTTP local de consultas sobre a Gold (top-N, participação, comparação)")
+    consultas.add_argument("--porta", type=int, help="Porta em 127.0.0.1 (padrão: PORTA_SERVICO_CONSULTA)")
+    consultas.set_defaults(funcao=comando_consultas)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    args = montar_parser().parse_args(argv or ["executar"])
+
+    if args.comando == "pendentes":
+        # A saída é o resultado, sem os logs de progresso.
+        setup_logging(logging.WARNING)
+        return args.funcao(args)
+
+    if args.comando not in COMANDOS_PIPELINE:
+        setup_logging()
+        return args.funcao(args)
 
     setup_logging()
-    executar_pipeline_ingestao(ano=ANO, sigla_estado=SIGLA_ESTADO)
-    executar_pipeline_bronze()
-    executar_pipeline_silver()
-    executar_pipeline_gold()
+    from app.utils.instrumentacao import RASTREADOR
+
+    try:
+        return args.funcao(args)
+    finally:
+        # Trace JSON e métricas Prometheus da execução (também quando ela termina com erro).
+        RASTREADOR.exportar()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+    Dublês locais usados pelos testes: um servidor HTTP que faz o papel do TSE (arquivo
+    com ou sem suporte a Range e falhas injetadas).
+"""
+import re
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+@dataclass
+class ArquivoRemoto:
+    """Estado do servidor local: o arquivo servido e as falhas a injetar."""
+    conteudo: bytes
+    aceita_ranges: bool = True
+    etag: str = '"v1"'
+    falhar_a_partir_de: int | None = None  # faixas que começam neste byte ou depois recebem um 500 vazio
+    falhas_transitorias: int = 0           # próximas faixas respondidas com 503
+    cortes: int = 0                        # próximas faixas enviadas pela metade, com a conexão fechada
+    requisicoes: list[str | None] = field(default_factory=list)  # cabeçalho Range de cada GET
+    pausa_sem_range: threading.Event | None = None  # respostas 200 mandam metade do corpo e esperam por ele
+
+
+class _TratadorArquivo(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        arquivo: ArquivoRemoto = self.server.arquivo
+        intervalo = self.headers.get("Range")
+        with self.server.trava:
+            arquivo.requisicoes.append(intervalo)
+
+        faixa = re.fullmatch(r"bytes=(\d+)-(\d*)", intervalo or "")
+        if not arquivo.aceita_ranges or faixa is None:
+            self._responder(200, arquivo.conteudo, {"Content-Length": str(len(arquivo.conteudo))},
+                            pausa=arquivo.pausa_sem_range)
+            return
+
+        inicio = int(faixa.group(1))
+        fim = min(int(faixa.group(2)) if faixa.group(2) else len(arquivo.conteudo) - 1, len(arquivo.conteudo) - 1)
+        with self.server.trava:
+            if arquivo.falhar_a_partir_de is not None and inicio >= arquivo.falhar_a_partir_de and inicio > 0:
+                falha = 500
+            elif arquivo.falhas_transitorias and inicio > 0:
+                arquivo.falhas_transitorias -= 1
+                falha = 503
+            else:
+                falha = None
+            cortar = bool(arquivo.cortes) and inicio > 0 and falha is None
+            if cortar:
+                arquivo.cortes -= 1
+
+        if falha:
+            self._responder(falha, b"", {"Content-Length": "0"})
+            return
+
+        corpo = arquivo.conteudo[inicio:fim + 1]
+        cabecalhos = {"Content-Length": str(len(corpo)), "Content-Range": f"bytes {inicio}-{fim}/{len(arquivo.conteudo)}"}
+        if cortar:
+            self.close_connection = True
+            self._responder(206, corpo[:len(corpo) // 2], cabecalhos)
+            return
+        self._responder(206, corpo, cabecalhos)
+
+    def _responder(self, status: int, corpo: bytes, cabecalhos: dict[str, str],
+                   pausa: threading.Event | None = None) -> None:
+        self.send_response(status)
+        self.send_header("ETag", self.server.arquivo.etag)
+        if self.server.arquivo.aceita_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        for nome, valor in cabecalhos.items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        try:
+            if pausa is not None:
+                self.wfile.write(corpo[:len(corpo) // 2])
+                self.wfile.flush()
+                pausa.wait(30)
+                corpo = corpo[len(corpo) // 2:]
+            self.wfile.write(corpo)
+        except (BrokenPipeError, ConnectionResetError):
+            pass # O cliente abortou a transferência (ex: sondagem de um servidor sem Range).
+
+    def log_message(self, formato, *args):
+        pass
+
+
+@pytest.fixture
+def servidor_tse():
+    """
+        Sobe um servidor HTTP local e devolve `publicar(conteudo, **falhas) -> (url, ArquivoRemoto)`.
+        O `ArquivoRemoto` pode ser alterado durante o teste.
+    """
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _TratadorArquivo)
+    servidor.daemon_threads = True
+    servidor.trava = threading.Lock()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    def publicar(conteudo: bytes, **opcoes) -> tuple[str, ArquivoRemoto]:
+        servidor.arquivo = ArquivoRemoto(conteudo, **opcoes)
+        host, porta = servidor.server_address[:2]
+        return f"http://{host}:{porta}/votacao_secao_2022_CE.zip", servidor.arquivo
+
+    yield publicar
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def executar_com_prazo(funcao, prazo_segundos: float = 30):
+    """Executa `funcao()` numa thread e falha o teste se ela não terminar no prazo (em vez de travar a suíte)."""
+    resultado = {}
+
+    def alvo():
+        try:
+            resultado["valor"] = funcao()
+        except BaseException as erro:
+            resultado["erro"] = erro
+
+    thread = threading.Thread(target=alvo, daemon=True)
+    thread.start()
+    thread.join(prazo_segundos)
+    if thread.is_alive():
+        pytest.fail(f"{funcao} não terminou em {prazo_segundos}s")
+    if "erro" in resultado:
+        raise resultado["erro"]
+    return resultado.get("valor")
+
+
+@dataclass
+class EstadoDrive:
+    """Arquivos do Drive falso e o controle das falhas e da concorrência das transferências."""
+    arquivos: dict[str, dict] = field(default_factory=dict)
+    falhas_midia: dict[str, int] = field(default_factory=dict)  # ID -> status devolvido no download
+    bloqueio_midia: threading.Event | None = None                # downloads esperam por ele antes de responder
+    em_andamento: int = 0
+    pico_em_andamento: int = 0
+    downloads: list[str] = field(default_factory=list)
+    lotes: list[int] = field(default_factory=list)               # chamadas por requisição de batch
+    sessoes_upload: dict[str, dict] = field(default_factory=dict)
+    proximo_id: int = 0
+
+    def adicionar(self, nome: str, conteudo: bytes, pasta: str = "pasta") -> str:
+        file_id = self.novo_id()
+        self.arquivos[file_id] = {"id": file_id, "name": nome, "parents": [pasta], "conteudo": conteudo}
+        return file_id
+
+    def novo_id(self) -> str:
+        self.proximo_id += 1
+        return f"id{self.proximo_id}"
+
+    def metadados(self, file_id: str) -> dict:
+        import hashlib
+
+        arquivo = self.arquivos[file_id]
+        return {"id": file_id, "name": arquivo["name"], "size": str(len(arquivo["conteudo"])),
+                "md5Checksum": hashlib.md5(arquivo["conteudo"]).hexdigest(), "mimeType": "application/octet-stream"}
+
+
+class _TratadorDrive(BaseHTTPRequestHandler):
+    """Rotas da API v3 do Drive usadas pelo cliente (metadados, mídia, upload resumable e batch)."""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        from urllib.parse import parse_qs, urlsplit
+
+        url = urlsplit(self.path)
+        parametros = {nome: valores[-1] for nome, valores in parse_qs(url.query).items()}
+        status, corpo, tipo = self._rota_get(url.path, parametros)
+        self._responder(status, corpo, tipo)
+
+    def do_POST(self):
+        corpo = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        estado: EstadoDrive = self.server.estado
+
+        if self.path.startswith("/batch/"):
+            self._responder_lote(corpo)
+            return
+
+        if self.path.startswith("/upload/drive/v3/files"):
+            import json
+
+            with self.server.trava:
+                # Sessões concluídas saem do dicionário: o ID vem do contador, que só cresce.
+                sessao = f"sessao-{estado.novo_id()}"
+                estado.sessoes_upload[sessao] = json.loads(corpo or b"{}")
+            self.send_response(200)
+            self.send_header("Location", f"http://{self.headers['Host']}/upload/sessoes/{sessao}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._responder(404, {"error": {"code": 404, "errors": [{"reason": "notFound"}]}})
+
+    def do_PUT(self):
+        corpo = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        estado: EstadoDrive = self.server.estado
+        sessao = self.path.rsplit("/", 1)[-1]
+        with self.server.trava:
+            metadados = estado.sessoes_upload.pop(sessao)
+            file_id = metadados.get("id") or estado.novo_id()
+            estado.arquivos[file_id] = {"id": file_id, "name": metadados["name"],
+                                        "parents": metadados.get("parents", []), "conteudo": corpo}
+            resposta = estado.metadados(file_id)
+        self._responder(200, resposta)
+
+    def _rota_get(self, caminho: str, parametros: dict) -> tuple[int, object, str]:
+        import re
+        import time
+
+        estado: EstadoDrive = self.server.estado
+        if caminho == "/drive/v3/files/generateIds":
+            with self.server.trava:
+                return 200, {"ids": [estado.novo_id() for _ in range(int(parametros.get("count", 10)))]}, "json"
+
+        if caminho == "/drive/v3/files":
+            nome = re.search(r"name = '((?:[^'\\]|\\.)*)'", parametros.get("q", ""))
+            pasta = re.search(r"'([^']*)' in parents", parametros.get("q", ""))
+            with self.server.trava:
+                arquivos = [estado.metadados(file_id) for file_id, arquivo in estado.arquivos.items()
+                            if (nome is None or arquivo["name"] == nome.group(1))
+                            and (pasta is None or pasta.group(1) in arquivo["parents"])]
+            return 200, {"files": arquivos}, "json"
+
+        file_id = caminho.removeprefix("/drive/v3/files/")
+        if file_id not in estado.arquivos:
+            return 404, {"error": {"code": 404, "errors": [{"reason": "notFound"}]}}, "json"
+        if parametros.get("alt") != "media":
+            return 200, estado.metadados(file_id), "json"
+
+        with self.server.trava:
+            estado.downloads.append(file_id)
+            estado.em_andamento += 1
+            estado.pico_em_andamento = max(estado.pico_em_andamento, estado.em_andamento)
+        try:
+            if estado.bloqueio_midia is not None:
+                estado.bloqueio_midia.wait(30)
+            else:
+                time.sleep(0.05)
+            if file_id in estado.falhas_midia:
+                status = estado.falhas_midia[file_id]
+                return status, {"error": {"code": status, "errors": [{"reason": "falhaInjetada"}]}}, "json"
+            return 200, estado.arquivos[file_id]["conteudo"], "binario"
+        finally:
+            with self.server.trava:
+                estado.em_andamento -= 1
+
+    def _responder_lote(self, corpo: bytes) -> None:
+        """Executa cada parte do batch (só GETs) e devolve a resposta multipart com os mesmos Content-IDs."""
+        import json
+        import re
+        from urllib.parse import parse_qs, urlsplit
+
+        fronteira = re.search(r"boundary=\"?([^\";]+)", self.headers["Content-Type"]).group(1)
+        partes = [parte for parte in corpo.decode("utf-8").split(f"--{fronteira}") if "Content-ID" in parte]
+        with self.server.trava:
+            self.server.estado.lotes.append(len(partes))
+
+        saida = []
+        for parte in partes:
+            content_id = re.search(r"Content-ID: <([^>]*)>", parte).group(1)
+            metodo, caminho = re.search(r"\n(GET|POST|PATCH) (\S+) HTTP", parte).groups()
+            url = urlsplit(caminho)
+            status, resposta, _ = self._rota_get(url.path, {n: v[-1] for n, v in parse_qs(url.query).items()})
+            conteudo = json.dumps(resposta)
+            saida.append(
+                f"--lote_falso\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\nContent-Length: {len(conteudo)}\r\n\r\n{conteudo}\r\n"
+            )
+        saida.append("--lote_falso--\r\n")
+        corpo_resposta = "".join(saida).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "multipart/mixed; boundary=lote_falso")
+        self.send_header("Content-Length", str(len(corpo_resposta)))
+        self.end_headers()
+        self.wfile.write(corpo_resposta)
+
+    def _responder(self, status: int, corpo, tipo: str = "json") -> None:
+        import json
+
+        conteudo = corpo if tipo == "binario" else json.dumps(corpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream" if tipo == "binario" else "application/json")
+        self.send_header("Content-Length", str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+@pytest.fixture
+def servidor_drive(monkeypatch):
+    """
+        Drive falso em 127.0.0.1 e um `GoogleDriveClient` apontado para ele (discovery com a
+        raiz trocada, credenciais anônimas, cache desativado). Devolve (cliente, estado).
+    """
+    from google.auth.credentials import AnonymousCredentials
+    from googleapiclient.discovery import build
+
+    from app.storage import google_drive, google_drive_assincrono
+    from app.storage.controle_cota import ControladorCota
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _TratadorDrive)
+    servidor.daemon_threads = True
+    servidor.trava = threading.Lock()
+    servidor.estado = EstadoDrive()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    raiz = "http://%s:%s/" % servidor.server_address[:2]
+
+    documento = build("drive", "v3", static_discovery=True, developerKey="-")._rootDesc
+    documento = {**documento, "rootUrl": raiz, "baseUrl": f"{raiz}drive/v3/"}
+    monkeypatch.setattr(google_drive, "URL_ARQUIVOS", f"{raiz}drive/v3/files")
+    monkeypatch.setattr(google_drive_assincrono, "URL_ARQUIVOS", f"{raiz}drive/v3/files")
+
+    drive = google_drive.GoogleDriveClient.__new__(google_drive.GoogleDriveClient)
+    drive.credentials = AnonymousCredentials()
+    drive._local = threading.local()
+    drive._documento_discovery = documento
+    drive._sessao_http = None
+    drive._trava_sessao = threading.Lock()
+    drive.controle_cota = ControladorCota(limite_maximo=16, tentativas=3, espera_base_segundos=0, dormir=lambda _: None)
+    drive._ids_reservados = []
+    drive._trava_ids = threading.Lock()
+    drive.cache = None
+
+    yield drive, servidor.estado
+    servidor.shutdown()
+    servidor.server_close()
@@ -0,0 +1,139 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from app.orquestracao import agendador
+from app.orquestracao.agendador import AgendadorPipeline
+from app.processamento.layout_tse import ErroLayoutTSE
+from app.storage.armazenamento_local import ArmazenamentoLocal
+
+
+class DownloaderFalso:
+    def __init__(self):
+        self.fechado = False
+
+    def fechar(self):
+        self.fechado = True
+
+
+class ExtratorFalso:
+    criados: list["ExtratorFalso"] = []
+
+    def __init__(self):
+        self.downloader = DownloaderFalso()
+        self.threads = set()
+        ExtratorFalso.criados.append(self)
+
+
+@pytest.fixture
+def agendador_local(tmp_path, monkeypatch):
+    """Agendador sobre o backend local, sem pool de processos e sem espera entre tentativas."""
+    ExtratorFalso.criados = []
+    monkeypatch.setattr(agendador, "ExtratorDados", ExtratorFalso)
+    chamadas = []
+
+    def rodar(etapas: dict, jobs, limite_ingestao: int = 2, tentativas: int = 3):
+        agenda = AgendadorPipeline(ArmazenamentoLocal(str(tmp_path)), num_processos=0, tentativas=tentativas,
+                                   espera_base_segundos=0, limites=dict.fromkeys(agendador.ETAPAS, limite_ingestao))
+
+        reais = agenda._etapas()
+
+        def etapa(nome):
+            def executar(job):
+                chamadas.append((nome, str(job)))
+                return etapas.get(nome, lambda job: f"{nome}_{job}")(job)
+            return executar
+
+        # Etapa marcada como "real" roda o método do agendador (com as funções do pipeline trocadas no teste).
+        monkeypatch.setattr(agenda, "_etapas", lambda: {
+            nome: reais[nome] if etapas.get(nome) == "real" else etapa(nome) for nome in agendador.ETAPAS
+        })
+        return agenda.executar(jobs)
+
+    return rodar, chamadas
+
+
+@pytest.mark.parametrize("erro", [FileNotFoundError("CE/2022 não encontrado na página do TSE"),
+                                  ErroLayoutTSE("Cabeçalho sem as colunas usadas: NR_SECAO")])
+def test_falha_permanente_nao_e_repetida(agendador_local, erro):
+    rodar, chamadas = agendador_local
+
+    def falhar(job):
+        raise erro
+
+    jobs = rodar({"bronze": falhar}, [(2022, "CE")])
+
+    assert jobs[0].status == "falhou" and jobs[0].etapa == "bronze"
+    assert jobs[0].tentativas == {"bronze": 1}
+    assert [etapa for etapa, _ in chamadas] == ["ingestao", "bronze"]
+
+
+def test_ano_sem_layout_e_ignorado_sem_rodar_etapas(agendador_local):
+    rodar, chamadas = agendador_local
+
+    jobs = rodar({}, [(2014, "CE"), (2022, "CE")])
+
+    assert jobs[0].status == "ignorado" and "sem layout registrado" in jobs[0].erro
+    assert jobs[1].status == "concluido"
+    assert all(job == "CE/2022" for _, job in chamadas)
+
+
+def test_montar_jobs_deixa_de_fora_anos_sem_layout(caplog):
+    from app.orquestracao.pendencias import montar_jobs
+
+    assert montar_jobs([2014, 2022], ["CE", "PE"]) == [(2022, "CE"), (2022, "PE")]
+    assert "[2014] ignorados" in caplog.text
+
+
+def test_falha_transitoria_e_repetida(agendador_local):
+    rodar, chamadas = agendador_local
+    falhas = iter([IOError("conexão caiu"), IOError("conexão caiu")])
+
+    def instavel(job):
+        erro = next(falhas, None)
+        if erro is not None:
+            raise erro
+        return "ok"
+
+    jobs = rodar({"ingestao": instavel}, [(2022, "CE")])
+
+    assert jobs[0].status == "concluido"
+    assert jobs[0].tentativas == {"ingestao": 2}
+    assert [etapa for etapa, _ in chamadas] == ["ingestao"] * 3 + ["bronze", "silver", "gold"]
+
+
+def test_cada_thread_da_ingestao_tem_o_proprio_extrator(agendador_local, monkeypatch):
+    rodar, _ = agendador_local
+    barreira = threading.Barrier(2, timeout=10)
+    usados = []
+
+    def ingerir(extrator, manifesto, linhagem, ano, sigla_estado, modo_streaming):
+        barreira.wait() # os dois primeiros jobs rodam ao mesmo tempo
+        extrator.threads.add(threading.get_ident())
+        usados.append(extrator)
+        return f"{sigla_estado}.zip"
+
+    monkeypatch.setattr(agendador, "ingerir_arquivo_tse", ingerir)
+    jobs = rodar({"ingestao": "real"}, [(2022, "CE"), (2022, "PE"), (2022, "SP"), (2022, "RJ")])
+
+    assert all(job.status == "concluido" for job in jobs)
+    assert len(ExtratorFalso.criados) == 2
+    assert all(len(extrator.threads) == 1 for extrator in ExtratorFalso.criados)
+    assert usados[0] is not usados[1]
+    assert all(extrator.downloader.fechado for extrator in ExtratorFalso.criados)
+
+
+def test_limites_de_silver_e_gold_acompanham_os_processos():
+    # Com o padrão antigo (2), no máximo duas transformações chegavam ao pool de processos.
+    ambiente = {nome: valor for nome, valor in os.environ.items() if not nome.startswith("LIMITE_CONCORRENCIA_")}
+    resultado = subprocess.run(
+        [sys.executable, "-c", "from app.utils.vars_envs import Settings_Env as S; "
+                               "print(S.LIMITE_CONCORRENCIA_SILVER, S.LIMITE_CONCORRENCIA_GOLD, S.LIMITE_CONCORRENCIA_BRONZE)"],
+        capture_output=True, text=True, env={**ambiente, "NUM_PROCESSOS_CPU": "6"},
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    assert resultado.stdout.split() == ["6", "6", "2"]
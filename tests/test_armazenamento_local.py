@@ -0,0 +1,91 @@
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from app.storage.armazenamento_local import ArmazenamentoLocal
+
+
+def _por_nome(arquivos: list[dict]) -> dict[str, dict]:
+    return {arquivo["name"]: arquivo for arquivo in arquivos}
+
+
+def test_listagem_ve_arquivo_reescrito_no_lugar(tmp_path):
+    armazenamento = ArmazenamentoLocal(str(tmp_path))
+    caminho = tmp_path / "bronze" / "a.parquet"
+    caminho.parent.mkdir()
+    caminho.write_bytes(b"1234")
+    mtime_pasta = os.stat(caminho.parent).st_mtime_ns
+
+    assert _por_nome(armazenamento.listar_arquivos("bronze"))["a.parquet"]["size"] == "4"
+
+    # Reescrita no lugar: a pasta mantém o mtime, só a entrada muda.
+    with open(caminho, "r+b") as arquivo:
+        arquivo.write(b"123456789")
+    os.utime(caminho.parent, ns=(mtime_pasta, mtime_pasta))
+
+    assert _por_nome(armazenamento.listar_arquivos("bronze"))["a.parquet"]["size"] == "9"
+
+
+def test_listagem_reaproveitada_enquanto_nada_muda(tmp_path, monkeypatch):
+    armazenamento = ArmazenamentoLocal(str(tmp_path))
+    (tmp_path / "silver").mkdir()
+    (tmp_path / "silver" / "b.parquet").write_bytes(b"x")
+    primeira = armazenamento.listar_arquivos("silver")
+
+    chamadas = []
+    original = armazenamento._metadados
+    monkeypatch.setattr(armazenamento, "_metadados", lambda *args: chamadas.append(args) or original(*args))
+
+    assert armazenamento.listar_arquivos("silver") == primeira
+    assert chamadas == []
+
+    (tmp_path / "silver" / "c.parquet").write_bytes(b"yy")
+    assert sorted(_por_nome(armazenamento.listar_arquivos("silver"))) == ["b.parquet", "c.parquet"]
+    assert armazenamento.listar_arquivos("pasta_inexistente") == []
+
+
+def test_gravacao_pelo_backend_aparece_na_listagem(tmp_path):
+    armazenamento = ArmazenamentoLocal(str(tmp_path))
+    (tmp_path / "gold").mkdir()
+    assert armazenamento.listar_arquivos("gold") == []
+
+    armazenamento.upload_buffer_metadados(io.BytesIO(b"dados"), "d.parquet", "gold")
+    listagem = _por_nome(armazenamento.listar_arquivos("gold"))
+    assert listagem["d.parquet"]["md5Checksum"] == hashlib.md5(b"dados").hexdigest()
+
+
+def test_instancias_na_mesma_raiz_nao_perdem_md5_uma_da_outra(tmp_path):
+    # Cada processo (ex: workers sobre o mesmo NFS) tem a própria instância e o próprio cache do índice.
+    primeira, segunda = ArmazenamentoLocal(str(tmp_path)), ArmazenamentoLocal(str(tmp_path))
+    (tmp_path / "gold").mkdir()
+
+    primeira.upload_buffer_metadados(io.BytesIO(b"um"), "a.parquet", "gold")
+    segunda.upload_buffer_metadados(io.BytesIO(b"dois"), "b.parquet", "gold")
+    primeira.upload_buffer_metadados(io.BytesIO(b"tres"), "c.parquet", "gold")
+
+    for armazenamento in (primeira, segunda, ArmazenamentoLocal(str(tmp_path))):
+        listagem = _por_nome(armazenamento.listar_arquivos("gold"))
+        assert {nome: arquivo.get("md5Checksum") for nome, arquivo in listagem.items()} == {
+            "a.parquet": hashlib.md5(b"um").hexdigest(),
+            "b.parquet": hashlib.md5(b"dois").hexdigest(),
+            "c.parquet": hashlib.md5(b"tres").hexdigest(),
+        }
+
+
+def _gravar_varios(raiz: str, prefixo: str) -> None:
+    armazenamento = ArmazenamentoLocal(raiz)
+    for i in range(20):
+        armazenamento.upload_buffer_metadados(io.BytesIO(f"{prefixo}{i}".encode()), f"{prefixo}{i}.parquet", "silver")
+
+
+def test_processos_concorrentes_mantem_todas_as_entradas_do_indice(tmp_path):
+    (tmp_path / "silver").mkdir()
+    prefixos = ["p", "q", "r", "s"]
+    with ProcessPoolExecutor(max_workers=len(prefixos)) as pool:
+        list(pool.map(_gravar_varios, [str(tmp_path)] * len(prefixos), prefixos))
+
+    listagem = ArmazenamentoLocal(str(tmp_path)).listar_arquivos("silver")
+    assert len(listagem) == 80
+    assert all(arquivo.get("md5Checksum") == hashlib.md5(arquivo["name"].removesuffix(".parquet").encode()).hexdigest()
+               for arquivo in listagem)
@@ -0,0 +1,120 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from app.ingestao.catalogo_tse import CatalogoTSE, indexar_pagina
+from app.ingestao.tse_extrator import ExtratorDados
+
+PAGINA_2022 = (Path(__file__).parent / "fixtures" / "resultados-2022.html").read_text(encoding="utf-8")
+URL_CE = "https://cdn.tse.jus.br/estatistica/sead/odsele/votacao_secao/votacao_secao_2022_CE.zip"
+
+
+def test_indexar_pagina_por_uf():
+    recursos = indexar_pagina(PAGINA_2022)
+
+    assert {"BR", "CE", "SP"} <= set(recursos)
+    # A primeira publicação da UF vale; o recurso sem link (PE) e os itens fora da lista ficam de fora.
+    assert "PE" not in recursos and "XX" not in recursos
+    assert recursos["CE"].url == URL_CE
+    assert recursos["CE"].titulo == "CE - Votação por seção eleitoral - 2022"
+
+
+def test_indexar_pagina_sem_lista_de_recursos():
+    assert indexar_pagina("<html><body><p>Página em manutenção</p></body></html>") == {}
+
+
+class _TratadorPagina(BaseHTTPRequestHandler):
+    """Página de resultados com ETag: responde 304 quando o If-None-Match confere."""
+
+    def do_GET(self):
+        pagina = self.server.paginas.get(self.path)
+        self.server.requisicoes.append((self.path, self.headers.get("If-None-Match")))
+        if pagina is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        etag = f'"{hash(pagina) & 0xffffffff:x}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        corpo = pagina.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+@pytest.fixture
+def portal_tse():
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _TratadorPagina)
+    servidor.daemon_threads = True
+    servidor.paginas = {"/resultados-2022": PAGINA_2022}
+    servidor.requisicoes = []
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield servidor, "http://%s:%s/resultados-" % servidor.server_address[:2]
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_catalogo_le_a_pagina_uma_vez_para_todas_as_ufs(portal_tse, tmp_path):
+    servidor, base_url = portal_tse
+    catalogo = CatalogoTSE(base_url=base_url, diretorio=str(tmp_path), validade_segundos=3600)
+
+    resultados = {}
+    threads = [threading.Thread(target=lambda uf=uf: resultados.update({uf: catalogo.obter(2022, uf)}))
+               for uf in ("CE", "SP", "BR", "PE")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert resultados["CE"].url == URL_CE and resultados["PE"] is None
+    assert len(servidor.requisicoes) == 1
+    assert (tmp_path / "resultados-2022.json").exists()
+
+    # Outro processo (catálogo novo) usa o índice em disco, sem rede.
+    assert CatalogoTSE(base_url=base_url, diretorio=str(tmp_path), validade_segundos=3600).obter(2022, "SP")
+    assert len(servidor.requisicoes) == 1
+
+
+def test_catalogo_vencido_revalida_com_etag(portal_tse, tmp_path):
+    servidor, base_url = portal_tse
+    catalogo = CatalogoTSE(base_url=base_url, diretorio=str(tmp_path), validade_segundos=0)
+
+    catalogo.obter(2022, "CE")
+    catalogo.registrar_sondagem(2022, "CE", 1234, "Tue, 01 Nov 2022 10:00:00 GMT")
+    assert catalogo.obter(2022, "CE").tamanho == 1234 # 304: índice mantido
+    etag = servidor.requisicoes[0][1]
+    assert etag is None and servidor.requisicoes[1][1] is not None
+
+    # Página republicada com outro link para SP: o CE sondado (mesmo link) é preservado.
+    servidor.paginas["/resultados-2022"] = PAGINA_2022.replace("2022_SP.zip", "2022_SP_v2.zip")
+    assert catalogo.obter(2022, "SP").url.endswith("2022_SP_v2.zip")
+    assert catalogo.obter(2022, "CE").tamanho == 1234
+    assert len(servidor.requisicoes) == 4
+
+
+def test_catalogo_propaga_erro_http(portal_tse):
+    _, base_url = portal_tse
+    with pytest.raises(Exception, match="404"):
+        CatalogoTSE(base_url=base_url, diretorio="").obter(2018, "CE")
+
+
+def test_extrator_devolve_o_link_do_catalogo(portal_tse):
+    _, base_url = portal_tse
+    extrator = ExtratorDados(catalogo=CatalogoTSE(base_url=base_url, diretorio=""))
+
+    assert extrator.raspar_dados_tse(2022, "CE") == URL_CE
+    assert extrator.raspar_dados_tse(2022, "PE") is None
@@ -0,0 +1,145 @@
+import os
+import threading
+
+import pytest
+
+from app.ingestao.downloader_paralelo import DownloaderParalelo, InfoRecurso
+from tests.conftest import executar_com_prazo
+
+MIB = 1024 * 1024
+CONTEUDO = os.urandom(11 * MIB + 12345)
+
+
+def _downloader(**opcoes) -> DownloaderParalelo:
+    return DownloaderParalelo(**{"num_conexoes": 4, "tamanho_segmento_bytes": 512 * 1024, "impersonate": None,
+                                 "timeout_segundos": 10, **opcoes})
+
+
+def _juntar(fatias) -> bytes:
+    return b"".join(bytes(fatia) for fatia, _ in fatias)
+
+
+def test_sondar_com_range(servidor_tse):
+    url, _ = servidor_tse(CONTEUDO)
+
+    info = _downloader().sondar(url)
+
+    assert info.aceita_ranges
+    assert info.tamanho == len(CONTEUDO)
+    assert info.etag == '"v1"'
+
+
+def test_sondar_sem_range_aborta_o_corpo(servidor_tse):
+    url, _ = servidor_tse(CONTEUDO, aceita_ranges=False)
+
+    info = executar_com_prazo(lambda: _downloader().sondar(url))
+
+    assert not info.aceita_ranges
+    assert info.tamanho == len(CONTEUDO)
+
+
+def test_baixar_em_faixas(servidor_tse):
+    url, arquivo = servidor_tse(CONTEUDO)
+
+    conteudo = _downloader().baixar(url)
+
+    assert conteudo == CONTEUDO
+    assert all(intervalo and intervalo.startswith("bytes=") for intervalo in arquivo.requisicoes)
+    assert len(arquivo.requisicoes) > 4
+
+
+def test_baixar_em_fatias_em_ordem(servidor_tse):
+    url, _ = servidor_tse(CONTEUDO)
+
+    fatias = list(_downloader().baixar_em_fatias(url, tamanho_fatia_bytes=MIB))
+
+    assert [parte for _, parte in fatias] == list(range(1, len(fatias) + 1))
+    assert all(len(fatia) == MIB for fatia, _ in fatias[:-1])
+    assert _juntar(fatias) == CONTEUDO
+
+
+def test_baixar_para_arquivo(servidor_tse, tmp_path):
+    url, _ = servidor_tse(CONTEUDO)
+    caminho = tmp_path / "arquivo.zip"
+
+    _downloader().baixar_para_arquivo(url, str(caminho))
+
+    assert caminho.read_bytes() == CONTEUDO
+
+
+def test_sem_range_cai_para_uma_requisicao(servidor_tse, tmp_path):
+    url, arquivo = servidor_tse(CONTEUDO, aceita_ranges=False)
+    downloader = _downloader()
+
+    assert _juntar(downloader.baixar_em_fatias(url, tamanho_fatia_bytes=MIB)) == CONTEUDO
+    downloader.baixar_para_arquivo(url, str(tmp_path / "arquivo.zip"))
+    assert (tmp_path / "arquivo.zip").read_bytes() == CONTEUDO
+    assert len(arquivo.requisicoes) == 4 # sondagem + download, duas vezes
+
+
+def test_sem_range_entrega_fatias_durante_o_download(servidor_tse):
+    # O servidor só manda a segunda metade depois que a primeira fatia chega a quem consome.
+    liberar = threading.Event()
+    url, _ = servidor_tse(CONTEUDO, aceita_ranges=False, pausa_sem_range=liberar)
+    fatias = _downloader().baixar_em_fatias(url, tamanho_fatia_bytes=MIB,
+                                            info=InfoRecurso(tamanho=len(CONTEUDO), aceita_ranges=False))
+
+    primeira, parte = executar_com_prazo(lambda: next(fatias), prazo_segundos=10)
+    liberar.set()
+
+    assert parte == 1
+    assert bytes(primeira) + _juntar(fatias) == CONTEUDO
+
+
+def test_retomada_a_partir_de_um_offset(servidor_tse):
+    url, arquivo = servidor_tse(CONTEUDO)
+    inicio = 3 * MIB + 7
+
+    fatias = list(_downloader().baixar_em_fatias(url, tamanho_fatia_bytes=MIB, inicio=inicio))
+
+    assert _juntar(fatias) == CONTEUDO[inicio:]
+    assert not any(intervalo.startswith("bytes=0-") and intervalo != "bytes=0-0" for intervalo in arquivo.requisicoes)
+
+
+def test_retomada_sem_range_descarta_o_inicio(servidor_tse):
+    url, _ = servidor_tse(CONTEUDO, aceita_ranges=False)
+    inicio = 2 * MIB + 1
+
+    assert _juntar(_downloader().baixar_em_fatias(url, tamanho_fatia_bytes=MIB, inicio=inicio)) == CONTEUDO[inicio:]
+
+
+def test_falha_transitoria_e_retentada(servidor_tse):
+    url, arquivo = servidor_tse(CONTEUDO, falhas_transitorias=2)
+
+    assert _downloader().baixar(url) == CONTEUDO
+    assert arquivo.falhas_transitorias == 0
+
+
+def test_faixa_cortada_retoma_do_ultimo_byte(servidor_tse):
+    url, arquivo = servidor_tse(CONTEUDO, cortes=2)
+
+    assert _downloader().baixar(url) == CONTEUDO
+    assert arquivo.cortes == 0
+
+
+@pytest.mark.parametrize("repeticao", range(6))
+def test_erro_500_vazio_falha_sem_travar(servidor_tse, repeticao):
+    # 500 vazio a partir de 1,5 MB: a resposta termina antes de qualquer callback; o download
+    # tem que falhar com IOError, não ficar esperando para sempre.
+    url, _ = servidor_tse(CONTEUDO, falhar_a_partir_de=3 * MIB // 2)
+    downloader = _downloader()
+
+    with pytest.raises(IOError, match="Não foi possível baixar a faixa"):
+        executar_com_prazo(lambda: _juntar(downloader.baixar_em_fatias(url, tamanho_fatia_bytes=MIB)))
+    with pytest.raises(IOError, match="Não foi possível baixar a faixa"):
+        executar_com_prazo(lambda: downloader.baixar(url))
+
+
+def test_servidor_que_ignora_o_range_na_faixa(servidor_tse):
+    url, arquivo = servidor_tse(CONTEUDO)
+    downloader = _downloader()
+    info = downloader.sondar(url)
+    arquivo.aceita_ranges = False # passa a responder 200 com o arquivo inteiro a cada faixa
+
+    with pytest.raises(IOError, match="Servidor ignorou o Range"):
+        executar_com_prazo(lambda: _juntar(downloader.baixar_em_fatias(url, tamanho_fatia_bytes=MIB, info=info)))
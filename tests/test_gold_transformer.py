@@ -0,0 +1,47 @@
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from app.processamento.gold_transformer import (
+    agregar_cubo_gold, gerar_cubo_gold, gravar_cubo_gold, transformar_silver_para_gold,
+)
+
+
+def _silver_pequena(pasta) -> str:
+    from benchmarks.gerador_tse import PERFIS, gerar_zip_votacao_secao
+    from app.orquestracao.pipeline_bronze import converter_zip_para_parquet
+    from app.orquestracao.pipeline_silver import transformar_arquivo_bronze_para_silver
+
+    caminho_zip, caminho_bronze, caminho_silver = (
+        os.path.join(pasta, nome) for nome in ("votacao.zip", "bronze.parquet", "silver.parquet"))
+    gerar_zip_votacao_secao(caminho_zip, PERFIS["pequeno"])
+    converter_zip_para_parquet(caminho_zip, caminho_bronze)
+    transformar_arquivo_bronze_para_silver(caminho_bronze, caminho_silver, motor="pandas")
+    return caminho_silver
+
+
+def test_cubo_gravado_em_fatias_igual_ao_agregado_em_memoria(tmp_path):
+    caminho_silver = _silver_pequena(str(tmp_path))
+    esperado = agregar_cubo_gold(pd.read_parquet(caminho_silver))
+    caminhos = {nivel: str(tmp_path / f"{nivel}.parquet") for nivel in esperado}
+
+    linhas = gravar_cubo_gold(caminho_silver, caminhos, linhas_por_lote=1_000)
+
+    # A seção sai em vários row groups, sem partir nenhum total de votos válidos.
+    assert pq.ParquetFile(caminhos['secao']).metadata.num_row_groups > 1
+    for nivel, gold_df in esperado.items():
+        assert linhas[nivel] == len(gold_df)
+        pd.testing.assert_frame_equal(pd.read_parquet(caminhos[nivel]), gold_df.reset_index(drop=True),
+                                      check_categorical=False)
+
+
+def test_cubo_em_memoria_igual_ao_gravado(tmp_path):
+    caminho_silver = _silver_pequena(str(tmp_path))
+    cubo = gerar_cubo_gold(caminho_silver, linhas_por_lote=1_000)
+    caminhos = {nivel: str(tmp_path / f"{nivel}.parquet") for nivel in cubo}
+    gravar_cubo_gold(caminho_silver, caminhos)
+
+    for nivel, gold_df in cubo.items():
+        pd.testing.assert_frame_equal(pd.read_parquet(caminhos[nivel]), gold_df.reset_index(drop=True))
+    pd.testing.assert_frame_equal(transformar_silver_para_gold(caminho_silver), cubo['municipio'])
@@ -0,0 +1,130 @@
+"""
+    Cliente do Drive contra um stub local (`HttpMockSequence` do googleapiclient): cada
+    requisição recebe a próxima resposta da sequência, sem rede nem OAuth.
+"""
+import io
+import json
+import threading
+
+import pytest
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpMockSequence
+
+from app.storage.controle_cota import ControladorCota
+from app.storage.google_drive import GoogleDriveClient
+
+METADADOS = {"id": "id-reservado", "name": "2022", "mimeType": "application/vnd.google-apps.folder"}
+
+
+def _erro(status: int, motivo: str) -> tuple[dict, str]:
+    corpo = {"error": {"code": status, "message": motivo, "errors": [{"reason": motivo}]}}
+    return {"status": str(status)}, json.dumps(corpo)
+
+
+def _ok(corpo: dict, **cabecalhos) -> tuple[dict, str]:
+    return {"status": "200", **cabecalhos}, json.dumps(corpo)
+
+
+def _cliente(respostas: list) -> tuple[GoogleDriveClient, HttpMockSequence]:
+    """Cliente sem autenticação, com o serviço ligado ao stub e retentativas sem espera."""
+    http = HttpMockSequence(respostas)
+    drive = GoogleDriveClient.__new__(GoogleDriveClient)
+    drive._local = threading.local()
+    drive._local.service = build("drive", "v3", http=http, static_discovery=True)
+    drive.controle_cota = ControladorCota(limite_maximo=8, tentativas=4, espera_base_segundos=0, dormir=lambda _: None)
+    drive._ids_reservados = []
+    drive._trava_ids = threading.Lock()
+    drive.cache = None
+    return drive, http
+
+
+def _creates(http: HttpMockSequence) -> list[dict]:
+    """Corpos (metadados) dos `files().create` enviados ao stub."""
+    corpos = []
+    for uri, metodo, corpo, _ in http.request_sequence:
+        if metodo == "POST" and "/files?" in uri and "generateIds" not in uri:
+            texto = corpo.decode() if isinstance(corpo, bytes) else corpo
+            corpos.append(json.loads(texto[texto.index("{"):texto.rindex("}") + 1]) if "{" in texto else {})
+    return corpos
+
+
+def test_429_e_repetido_e_reduz_a_concorrencia():
+    drive, http = _cliente([_erro(429, "rateLimitExceeded"), _ok({"files": [{"id": "abc", "name": "x.zip"}]})])
+
+    assert drive.arquivo_existe("x.zip", "pasta") == "abc"
+
+    estatisticas = drive.controle_cota.estatisticas()
+    assert len(http.request_sequence) == 2
+    assert (estatisticas["limitadas"], estatisticas["retentativas"], estatisticas["reducoes"]) == (1, 1, 1)
+    assert estatisticas["limite_atual"] < 8
+
+
+def test_403_de_permissao_nao_e_repetido():
+    drive, http = _cliente([_erro(403, "insufficientFilePermissions")])
+
+    with pytest.raises(HttpError):
+        drive.arquivo_existe("x.zip", "pasta")
+    assert len(http.request_sequence) == 1
+
+
+def test_create_confirmado_antes_do_5xx_nao_duplica():
+    drive, http = _cliente([
+        _ok({"ids": ["id-reservado"]}),
+        _erro(503, "backendError"),  # o Drive criou a pasta, mas a resposta se perdeu
+        _ok(METADADOS),              # a retentativa encontra a pasta pelo ID reservado
+    ])
+
+    assert drive.criar_pasta("2022", "pasta-pai") == METADADOS
+    assert [corpo["id"] for corpo in _creates(http)] == ["id-reservado"]
+
+
+def test_create_nao_confirmado_e_repetido_com_o_mesmo_id():
+    drive, http = _cliente([
+        _ok({"ids": ["id-reservado"]}),
+        _erro(429, "userRateLimitExceeded"),
+        _erro(404, "notFound"),
+        _ok(METADADOS),
+    ])
+
+    assert drive.criar_pasta("2022", "pasta-pai") == METADADOS
+    assert [corpo["id"] for corpo in _creates(http)] == ["id-reservado", "id-reservado"]
+
+
+def test_create_que_colide_com_a_tentativa_anterior_devolve_o_arquivo_dela():
+    drive, http = _cliente([
+        _ok({"ids": ["id-reservado"]}),
+        _erro(503, "backendError"),
+        _erro(404, "notFound"),            # a 1ª tentativa ainda não terminou no servidor
+        _erro(409, "fileIdInUse"),         # ...e terminou antes do novo create
+        _ok(METADADOS),
+    ])
+
+    assert drive.criar_pasta("2022", "pasta-pai") == METADADOS
+    assert len(_creates(http)) == 2
+
+
+def test_ids_reservados_em_lote():
+    drive, http = _cliente([
+        _ok({"ids": ["id-2", "id-1"]}),
+        _ok({**METADADOS, "id": "id-1"}),
+        _ok({**METADADOS, "id": "id-2"}),
+    ])
+
+    assert drive.criar_pasta("a", "pai")["id"] == "id-1"
+    assert drive.criar_pasta("b", "pai")["id"] == "id-2"
+    assert sum("generateIds" in uri for uri, *_ in http.request_sequence) == 1
+
+
+def test_upload_com_5xx_na_abertura_da_sessao():
+    metadados = {"id": "id-reservado", "name": "x.zip", "size": "3", "md5Checksum": "m"}
+    drive, http = _cliente([
+        _ok({"ids": ["id-reservado"]}),
+        _erro(503, "backendError"),
+        _erro(404, "notFound"),
+        _ok({}, location="http://upload.local/sessao"),
+        _ok(metadados),
+    ])
+
+    assert drive.upload_buffer_metadados(io.BytesIO(b"zip"), "x.zip", "pasta") == metadados
+    assert http.request_sequence[-1][1] == "PUT"
@@ -0,0 +1,127 @@
+import io
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+from app.storage.controle_cota import ErroHttpDrive
+from app.storage.google_drive_assincrono import ClienteDriveAssincrono
+
+
+def test_downloads_concorrentes(servidor_drive):
+    drive, estado = servidor_drive
+    conteudos = {estado.adicionar(f"a{i}.parquet", bytes([i]) * 1000): bytes([i]) * 1000 for i in range(12)}
+
+    with ClienteDriveAssincrono(drive, max_transferencias=4) as cliente:
+        futuros = {file_id: cliente.download_file(file_id) for file_id in conteudos}
+        resultados = {file_id: futuro.result(timeout=30) for file_id, futuro in futuros.items()}
+
+    assert resultados == conteudos
+    assert 1 < estado.pico_em_andamento <= 4
+
+
+def test_uploads_concorrentes(servidor_drive):
+    drive, estado = servidor_drive
+
+    with ClienteDriveAssincrono(drive, max_transferencias=4) as cliente:
+        futuros = [cliente.upload_buffer(io.BytesIO(f"conteudo {i}".encode()), f"s{i}.parquet", "silver") for i in range(8)]
+        ids = [futuro.result(timeout=30) for futuro in futuros]
+
+    assert len(set(ids)) == 8
+    assert sorted(estado.arquivos[file_id]["name"] for file_id in ids) == sorted(f"s{i}.parquet" for i in range(8))
+    assert all(estado.arquivos[file_id]["parents"] == ["silver"] for file_id in ids)
+
+
+def test_metadados_sao_agrupados_em_lote(servidor_drive):
+    drive, estado = servidor_drive
+    ids = [estado.adicionar(f"b{i}.parquet", b"x" * i) for i in range(1, 21)]
+
+    with ClienteDriveAssincrono(drive, espera_lote_segundos=0.2) as cliente:
+        existe = [cliente.arquivo_existe(f"b{i}.parquet", "pasta") for i in range(1, 21)]
+        ausente = cliente.arquivo_existe("nao_existe.parquet", "pasta")
+        metadados = [cliente.obter_metadados(file_id) for file_id in ids]
+
+        assert [futuro.result(timeout=30) for futuro in existe] == ids
+        assert ausente.result(timeout=30) is None
+        assert [int(futuro.result(timeout=30)["size"]) for futuro in metadados] == list(range(1, 21))
+
+    assert sum(estado.lotes) == 41
+    assert len(estado.lotes) < 41
+
+
+def test_erro_de_um_download_vai_so_para_o_seu_future(servidor_drive):
+    drive, estado = servidor_drive
+    bom = estado.adicionar("bom.parquet", b"ok")
+    ruim = estado.adicionar("ruim.parquet", b"?")
+    estado.falhas_midia[ruim] = 403
+
+    with ClienteDriveAssincrono(drive, max_transferencias=2) as cliente:
+        futuro_bom, futuro_ruim = cliente.download_file(bom), cliente.download_file(ruim)
+
+        assert futuro_bom.result(timeout=30) == b"ok"
+        with pytest.raises(ErroHttpDrive) as erro:
+            futuro_ruim.result(timeout=30)
+    assert erro.value.status == 403
+    assert estado.downloads.count(ruim) == 1 # erro permanente: sem retentativa
+
+
+def test_erro_de_metadados_vai_para_o_future(servidor_drive):
+    drive, estado = servidor_drive
+    existente = estado.adicionar("c.parquet", b"c")
+
+    with ClienteDriveAssincrono(drive) as cliente:
+        ok, inexistente = cliente.obter_metadados(existente), cliente.obter_metadados("id-inexistente")
+
+        assert ok.result(timeout=30)["name"] == "c.parquet"
+        with pytest.raises(Exception, match="404"):
+            inexistente.result(timeout=30)
+
+
+def test_cancelar_transferencias_que_ainda_nao_comecaram(servidor_drive):
+    drive, estado = servidor_drive
+    estado.bloqueio_midia = threading.Event()
+    ids = [estado.adicionar(f"d{i}.parquet", b"d") for i in range(4)]
+
+    cliente = ClienteDriveAssincrono(drive, max_transferencias=1)
+    futuros = [cliente.download_file(file_id) for file_id in ids]
+    assert futuros[3].cancel()
+
+    threading.Timer(0.3, estado.bloqueio_midia.set).start()
+    cliente.fechar()
+
+    assert futuros[3].cancelled()
+    assert [futuro.result(timeout=1) for futuro in futuros[:3]] == [b"d"] * 3
+    assert ids[3] not in estado.downloads
+
+
+def test_metadados_cancelados_nao_travam_o_lote(servidor_drive):
+    drive, estado = servidor_drive
+    ids = [estado.adicionar(f"e{i}.parquet", b"e") for i in range(3)]
+
+    with ClienteDriveAssincrono(drive, espera_lote_segundos=0.3) as cliente:
+        futuros = [cliente.obter_metadados(file_id) for file_id in ids]
+        assert futuros[1].cancel()
+
+        assert futuros[0].result(timeout=30)["id"] == ids[0]
+        assert futuros[2].result(timeout=30)["id"] == ids[2]
+        # O despachante continua vivo depois do lote com um pedido cancelado.
+        assert cliente.obter_metadados(ids[1]).result(timeout=30)["id"] == ids[1]
+    with pytest.raises(CancelledError):
+        futuros[1].result()
+
+
+def test_saida_com_erro_cancela_o_que_esta_pendente(servidor_drive):
+    drive, estado = servidor_drive
+    estado.bloqueio_midia = threading.Event()
+    ids = [estado.adicionar(f"f{i}.parquet", b"f") for i in range(5)]
+    futuros = []
+
+    threading.Timer(0.3, estado.bloqueio_midia.set).start()
+    with pytest.raises(RuntimeError, match="etapa falhou"):
+        with ClienteDriveAssincrono(drive, max_transferencias=1) as cliente:
+            futuros = [cliente.download_file(file_id) for file_id in ids]
+            raise RuntimeError("etapa falhou")
+
+    assert futuros[0].result(timeout=1) == b"f"
+    assert all(futuro.cancelled() for futuro in futuros[1:])
+    assert estado.downloads == ids[:1]
@@ -0,0 +1,23 @@
+import pytest
+
+from benchmarks.gerador_tse import PERFIS
+from benchmarks.paridade_motores import verificar_paridade
+
+# Silver e as quatro tabelas Gold, com e sem a ordenação da Silver.
+SAIDAS = [f"{tabela}{sufixo}" for sufixo in ("", "_sem_ordem")
+          for tabela in ("silver", "gold_secao", "gold_zona", "gold_municipio", "gold_uf")]
+
+
+@pytest.fixture(scope="module", params=[True, False], ids=["perturbada", "sem_perturbacao"])
+def resultados_paridade(request, tmp_path_factory):
+    """Pandas x Arrow sobre o perfil "pequeno", com e sem as perturbações na Bronze."""
+    return verificar_paridade(PERFIS["pequeno"], str(tmp_path_factory.mktemp("paridade")), perturbar=request.param)
+
+
+def test_compara_todas_as_saidas(resultados_paridade):
+    assert sorted(resultados_paridade) == sorted(SAIDAS)
+
+
+@pytest.mark.parametrize("saida", SAIDAS)
+def test_motores_geram_a_mesma_saida(resultados_paridade, saida):
+    assert resultados_paridade[saida] is None, resultados_paridade[saida]
@@ -0,0 +1,105 @@
+import io
+import zipfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from app.orquestracao.pipeline_bronze import converter_zip_para_parquet, transformar_para_parquet
+from app.processamento.layout_tse import LAYOUT_VOTACAO_SECAO_2018, ErroLayoutTSE
+from app.processamento.silver_transformer import COLUNAS_SILVER, transformar_bronze_para_silver
+from app.storage.arquivo_spool import ArquivoSpool
+
+
+def _linha(valores: dict) -> str:
+    return ";".join(f'"{valor}"' for valor in valores.values()) + "\n"
+
+
+def _registro(**alteracoes) -> dict:
+    valores = {nome: "1" for nome in LAYOUT_VOTACAO_SECAO_2018.nomes}
+    valores.update(SG_UF="CE", NM_MUNICIPIO="SÃO GONÇALO", DS_CARGO="Prefeito", NM_VOTAVEL="JOSÉ",
+                   NM_LOCAL_VOTACAO="ESCOLA", DS_LOCAL_VOTACAO_ENDERECO="RUA A", QT_VOTOS="10")
+    valores.update(alteracoes)
+    return valores
+
+
+def _zip_tse(registros: list[dict], nome_csv: str = "votacao_secao_2022_CE.csv") -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        conteudo = ";".join(f'"{nome}"' for nome in registros[0]) + "\n" + "".join(_linha(r) for r in registros)
+        z.writestr(nome_csv, conteudo.encode("latin-1"))
+    buffer.seek(0)
+    return buffer
+
+
+def _converter(registros, **opcoes) -> pa.Table:
+    destino = io.BytesIO()
+    converter_zip_para_parquet(_zip_tse(registros, **opcoes), destino)
+    destino.seek(0)
+    return pq.read_table(destino)
+
+
+def test_bronze_guarda_todas_as_colunas_do_arquivo():
+    registros = [{**_registro(), "COLUNA_NOVA": "extra"}]
+    tabela = _converter(registros)
+
+    assert tabela.column_names == LAYOUT_VOTACAO_SECAO_2018.nomes + ["COLUNA_NOVA"]
+    assert tabela.schema.field("CD_MUNICIPIO").type == pa.int32()
+    assert tabela.schema.field("COLUNA_NOVA").type == pa.string()
+    linha = tabela.to_pylist()[0]
+    assert (linha["NM_MUNICIPIO"], linha["NM_LOCAL_VOTACAO"], linha["COLUNA_NOVA"]) == ("SÃO GONÇALO", "ESCOLA", "extra")
+
+
+def test_inteiros_malformados_viram_nulos():
+    registros = [
+        _registro(QT_VOTOS="10"),
+        _registro(QT_VOTOS="#NULO#", NR_ZONA=" 7 "),
+        _registro(QT_VOTOS="", NR_TURNO="300"), # NR_TURNO é int8
+        _registro(QT_VOTOS="-1", NR_SECAO="1,5"),
+    ]
+    tabela = _converter(registros)
+
+    assert tabela.column("QT_VOTOS").to_pylist() == [10, None, None, -1]
+    assert tabela.column("NR_ZONA").to_pylist() == [1, 7, 1, 1]
+    assert tabela.column("NR_TURNO").to_pylist() == [1, 1, None, 1]
+    assert tabela.column("NR_SECAO").to_pylist() == [1, 1, 1, None]
+    assert tabela.schema.field("NR_TURNO").type == pa.int8()
+
+
+def test_ano_sem_layout_registrado_e_rejeitado():
+    with pytest.raises(ErroLayoutTSE, match="2016"):
+        _converter([_registro()], nome_csv="votacao_secao_2016_CE.csv")
+
+
+def test_cabecalho_sem_coluna_usada_e_rejeitado():
+    registro = _registro()
+    del registro["QT_VOTOS"]
+    with pytest.raises(ErroLayoutTSE, match="QT_VOTOS"):
+        _converter([registro])
+
+
+def test_silver_le_so_as_suas_colunas_da_bronze(tmp_path):
+    caminho = tmp_path / "bronze.parquet"
+    converter_zip_para_parquet(_zip_tse([_registro(), _registro(NR_SECAO="2", QT_VOTOS="x")]), str(caminho))
+
+    df = transformar_bronze_para_silver(str(caminho))
+
+    assert list(df.columns) == COLUNAS_SILVER + ["TP_VOTO"]
+    assert sorted(df["QT_VOTOS"].tolist()) == [0, 10]
+
+
+def test_transformar_para_parquet_grava_no_destino(tmp_path):
+    caminho = tmp_path / "bronze.parquet"
+    zip_bytes = _zip_tse([_registro(), _registro()]).getvalue()
+
+    assert transformar_para_parquet(zip_bytes, destino=str(caminho)) == str(caminho)
+    assert pq.read_table(caminho).num_rows == 2
+
+
+def test_transformar_para_parquet_sem_destino_usa_spool(monkeypatch):
+    monkeypatch.setattr("app.storage.arquivo_spool.Settings_Env.LIMITE_SPOOL_MEMORIA_BYTES", 1024)
+    zip_bytes = _zip_tse([_registro(NR_SECAO=str(secao)) for secao in range(500)]).getvalue()
+
+    with transformar_para_parquet(zip_bytes) as spool:
+        assert isinstance(spool, ArquivoSpool) and spool.em_disco and spool.tell() == 0
+        assert pq.read_table(spool.entrada_arrow()).column("NR_SECAO").to_pylist() == list(range(500))
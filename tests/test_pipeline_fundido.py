@@ -0,0 +1,51 @@
+import io
+import os
+
+import pytest
+
+from app.orquestracao.pipeline_bronze import converter_zip_para_parquet
+from app.orquestracao.pipeline_fundido import _gravar_parquet, transformar_zip_fundido
+from app.orquestracao.pipeline_gold import transformar_arquivo_silver_para_gold
+from app.orquestracao.pipeline_silver import transformar_arquivo_bronze_para_silver
+from app.processamento.camadas import nomes_tabelas_gold
+from app.utils.vars_envs import Settings_Env
+from benchmarks.gerador_tse import PERFIS, gerar_zip_votacao_secao
+from benchmarks.paridade_motores import comparar_parquets
+
+
+@pytest.fixture(scope="module")
+def zip_votacao(tmp_path_factory):
+    caminho = str(tmp_path_factory.mktemp("fundido") / "votacao_secao_2022_CE.zip")
+    gerar_zip_votacao_secao(caminho, PERFIS["pequeno"])
+    return caminho
+
+
+@pytest.mark.parametrize("ordenar", [True, False], ids=["ordenada", "sem_ordem"])
+@pytest.mark.parametrize("motor", ["pandas", "arrow"])
+def test_fundido_igual_as_etapas_separadas(zip_votacao, tmp_path, monkeypatch, motor, ordenar):
+    monkeypatch.setattr(Settings_Env, "ORDENAR_SILVER", ordenar)
+    monkeypatch.setattr(Settings_Env, "MOTOR_TRANSFORMACAO", motor)
+
+    # Etapas separadas, entre arquivos em disco
+    caminho_bronze, caminho_silver = str(tmp_path / "votacao_bronze.parquet"), str(tmp_path / "votacao_silver.parquet")
+    caminhos_gold = {nivel: str(tmp_path / nome) for nivel, nome in nomes_tabelas_gold("votacao_silver.parquet").items()}
+    converter_zip_para_parquet(zip_votacao, caminho_bronze)
+    transformar_arquivo_bronze_para_silver(caminho_bronze, caminho_silver)
+    transformar_arquivo_silver_para_gold(caminho_silver, caminhos_gold)
+
+    # Passada única, com o motor e a ordenação da configuração
+    with open(zip_votacao, "rb") as fonte:
+        silver, cubo_gold = transformar_zip_fundido(fonte, io.BytesIO())
+    fundido_silver = str(tmp_path / "fundido_silver.parquet")
+    _gravar_parquet(silver, fundido_silver)
+    assert comparar_parquets(caminho_silver, fundido_silver) is None
+
+    for nivel, gold in cubo_gold.items():
+        caminho = str(tmp_path / f"fundido_{nivel}.parquet")
+        _gravar_parquet(gold, caminho)
+        assert comparar_parquets(caminhos_gold[nivel], caminho) is None, nivel
+
+
+def test_motor_desconhecido(zip_votacao):
+    with open(zip_votacao, "rb") as fonte, pytest.raises(ValueError, match="MOTOR_TRANSFORMACAO desconhecido"):
+        transformar_zip_fundido(fonte, io.BytesIO(), motor="polars")
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import threading
+
+import pytest
+
+from app.ingestao.downloader_paralelo import DownloaderParalelo
+from app.ingestao.tse_extrator import ExtratorDados
+from app.orquestracao import pipeline_ingestao
+from app.orquestracao.pipeline_ingestao import _transferir
+from app.storage.checkpoint_ingestao import CheckpointIngestao, RegistroCheckpoints
+from app.storage.google_drive import GRANULARIDADE_UPLOAD
+from tests.conftest import executar_com_prazo
+
+MIB = 1024 * 1024
+CONTEUDO = os.urandom(11 * MIB + 4321)
+
+
+class SessaoUploadFalsa:
+    """Sessão resumable em memória com as mesmas regras da do Drive (fatias intermediárias múltiplas de 256 KiB)."""
+
+    def __init__(self):
+        self.uri_sessao = "sessao-falsa"
+        self.recebido = bytearray()
+        self.metadados = None
+
+    @property
+    def offset(self) -> int:
+        return len(self.recebido)
+
+    def enviar_fatia(self, dados, final: bool = False):
+        if not final and len(dados) % GRANULARIDADE_UPLOAD:
+            raise ValueError("Fatia intermediária fora da granularidade")
+        self.recebido += dados
+        if final:
+            self.metadados = {"id": "arquivo", "size": str(len(self.recebido))}
+            return "arquivo"
+        return None
+
+
+class ExtratorTravado:
+    """Entrega `fatias` e depois fica parado, como um download preso numa faixa."""
+
+    def __init__(self, fatias: int, prazo_faixa_segundos: float = 1.5, morrer: bool = False):
+        self.fatias = fatias
+        self.morrer = morrer
+        self.liberar = threading.Event()
+        self.downloader = type("Downloader", (), {"prazo_faixa_segundos": prazo_faixa_segundos})()
+
+    def baixar_em_fatias(self, url, chunk_size_bytes, inicio=0, info=None):
+        for parte in range(1, self.fatias + 1):
+            yield memoryview(bytes(chunk_size_bytes)), parte
+        if self.morrer:
+            raise SystemExit # encerra a thread produtora sem avisar o consumidor
+        self.liberar.wait(60)
+
+
+@pytest.fixture
+def fatia_de_1_mib(monkeypatch):
+    monkeypatch.setattr(pipeline_ingestao.Settings_Env, "TAMANHO_FATIA_INGESTAO_BYTES", MIB)
+
+
+def _checkpoint(url: str, tamanho: int | None = None) -> CheckpointIngestao:
+    return CheckpointIngestao(nome_arquivo="votacao_secao_2022_CE.zip", link=url, uri_sessao="sessao-falsa",
+                              tamanho_total=tamanho, etag='"v1"', ultima_modificacao=None)
+
+
+def _extrator(url_ou_downloader) -> ExtratorDados:
+    extrator = ExtratorDados(catalogo=object())
+    extrator.downloader = url_ou_downloader
+    return extrator
+
+
+def test_download_parado_vira_erro_e_mantem_o_checkpoint(tmp_path, fatia_de_1_mib):
+    extrator = ExtratorTravado(fatias=3)
+    checkpoints = RegistroCheckpoints(str(tmp_path))
+    checkpoint = _checkpoint("http://tse")
+    sessao = SessaoUploadFalsa()
+
+    try:
+        with pytest.raises(TimeoutError, match="download parado"):
+            executar_com_prazo(lambda: _transferir(extrator, sessao, "http://tse", checkpoint, checkpoints))
+    finally:
+        extrator.liberar.set()
+
+    salvo = checkpoints.carregar(checkpoint.nome_arquivo)
+    assert salvo.offset == sessao.offset == 2 * MIB # a 3ª fatia fica pendente até se saber se é a última
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_produtor_morto_vira_erro(tmp_path, fatia_de_1_mib):
+    extrator = ExtratorTravado(fatias=1, prazo_faixa_segundos=60, morrer=True)
+
+    with pytest.raises(IOError, match="sem entregar o fim"):
+        executar_com_prazo(lambda: _transferir(extrator, SessaoUploadFalsa(), "http://tse", _checkpoint("http://tse"), None))
+
+
+def test_retomada_depois_de_erro_no_tse_gera_o_mesmo_arquivo(servidor_tse, tmp_path, fatia_de_1_mib):
+    url, arquivo = servidor_tse(CONTEUDO, falhar_a_partir_de=5 * MIB)
+    downloader = DownloaderParalelo(num_conexoes=4, impersonate=None, timeout_segundos=10)
+    extrator = _extrator(downloader)
+    checkpoints = RegistroCheckpoints(str(tmp_path))
+    checkpoint = _checkpoint(url, len(CONTEUDO))
+    sessao = SessaoUploadFalsa()
+
+    with pytest.raises(IOError):
+        executar_com_prazo(lambda: _transferir(extrator, sessao, url, checkpoint, checkpoints))
+    salvo = checkpoints.carregar(checkpoint.nome_arquivo)
+    assert 0 < salvo.offset < len(CONTEUDO)
+
+    arquivo.falhar_a_partir_de = None
+    md5 = executar_com_prazo(lambda: _transferir(extrator, sessao, url, salvo, checkpoints))
+
+    assert md5 is None # retomada: o hash do arquivo inteiro não atravessa execuções
+    assert bytes(sessao.recebido) == CONTEUDO
+    assert hashlib.md5(sessao.recebido).hexdigest() == hashlib.md5(CONTEUDO).hexdigest()
@@ -0,0 +1,138 @@
+"""
+    `SessaoUploadResumable` contra uma sessão resumable local que, como o Drive, pode gravar
+    só parte de cada PUT e informa no `Range` do 308 até onde gravou.
+"""
+import os
+import re
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.storage.controle_cota import ErroHttpDrive
+from app.storage.google_drive import GRANULARIDADE_UPLOAD, SessaoUploadResumable
+
+
+class _TratadorSessao(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_PUT(self):
+        corpo = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        servidor = self.server
+        servidor.content_ranges.append(self.headers["Content-Range"])
+
+        faixa = re.match(r"bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)", self.headers["Content-Range"])
+        if faixa.group(1) is not None:
+            inicio = int(faixa.group(1))
+            assert inicio == len(servidor.recebido), "fatia fora do offset confirmado"
+            aceitos = len(corpo) if servidor.limite_por_put is None else min(len(corpo), servidor.limite_por_put)
+            servidor.recebido += corpo[:aceitos]
+
+        total = faixa.group(3)
+        if total != "*" and int(total) == len(servidor.recebido):
+            self._responder(200, b'{"id": "arquivo-final", "size": "%d"}' % len(servidor.recebido))
+            return
+
+        self.send_response(servidor.status_fatia)
+        if servidor.recebido:
+            self.send_header("Range", f"bytes=0-{len(servidor.recebido) - 1 + servidor.excesso_confirmado}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _responder(self, status: int, corpo: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+@pytest.fixture
+def sessao_drive():
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _TratadorSessao)
+    servidor.daemon_threads = True
+    servidor.recebido = bytearray()
+    servidor.content_ranges = []
+    servidor.limite_por_put = None
+    servidor.status_fatia = 308
+    servidor.excesso_confirmado = 0
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    with requests.Session() as http:
+        yield servidor, SessaoUploadResumable(http, "http://%s:%s/sessao" % servidor.server_address[:2])
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_fatias_inteiras(sessao_drive):
+    servidor, sessao = sessao_drive
+    dados = os.urandom(3 * GRANULARIDADE_UPLOAD + 100)
+
+    assert sessao.enviar_fatia(memoryview(dados)[:2 * GRANULARIDADE_UPLOAD]) is None
+    assert sessao.offset == 2 * GRANULARIDADE_UPLOAD
+    assert sessao.enviar_fatia(memoryview(dados)[2 * GRANULARIDADE_UPLOAD:], final=True) == "arquivo-final"
+    assert bytes(servidor.recebido) == dados
+    assert len(servidor.content_ranges) == 2
+
+
+def test_gravacao_parcial_reenvia_o_restante(sessao_drive):
+    servidor, sessao = sessao_drive
+    servidor.limite_por_put = GRANULARIDADE_UPLOAD
+    dados = os.urandom(4 * GRANULARIDADE_UPLOAD)
+
+    sessao.enviar_fatia(dados[:3 * GRANULARIDADE_UPLOAD])
+    assert sessao.offset == 3 * GRANULARIDADE_UPLOAD
+    assert servidor.content_ranges == [
+        f"bytes {inicio * GRANULARIDADE_UPLOAD}-{3 * GRANULARIDADE_UPLOAD - 1}/*" for inicio in range(3)
+    ]
+
+    assert sessao.enviar_fatia(dados[3 * GRANULARIDADE_UPLOAD:], final=True) == "arquivo-final"
+    assert bytes(servidor.recebido) == dados
+
+
+def test_308_sem_progresso_falha(sessao_drive):
+    servidor, sessao = sessao_drive
+    servidor.limite_por_put = 0
+
+    with pytest.raises(ErroHttpDrive, match="confirmou até o byte 0"):
+        sessao.enviar_fatia(os.urandom(GRANULARIDADE_UPLOAD))
+    assert sessao.offset == 0
+
+
+def test_308_alem_da_fatia_falha(sessao_drive):
+    servidor, sessao = sessao_drive
+    servidor.excesso_confirmado = GRANULARIDADE_UPLOAD
+
+    with pytest.raises(ErroHttpDrive):
+        sessao.enviar_fatia(os.urandom(GRANULARIDADE_UPLOAD))
+
+
+def test_fatia_intermediaria_fora_da_granularidade(sessao_drive):
+    _, sessao = sessao_drive
+    with pytest.raises(ValueError, match="múltiplas"):
+        sessao.enviar_fatia(b"x" * 1000)
+
+
+def _importar_configuracao(tamanho_fatia: str) -> subprocess.CompletedProcess:
+    """Importa `vars_envs` em outro processo, com TAMANHO_FATIA_INGESTAO_BYTES no ambiente."""
+    return subprocess.run([sys.executable, "-c", "import app.utils.vars_envs"], capture_output=True, text=True,
+                          env={**os.environ, "TAMANHO_FATIA_INGESTAO_BYTES": tamanho_fatia},
+                          cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.mark.parametrize("valor", ["1000000", "0", str(3 * GRANULARIDADE_UPLOAD + 1)])
+def test_tamanho_de_fatia_invalido_falha_ao_iniciar(valor):
+    resultado = _importar_configuracao(valor)
+    assert resultado.returncode != 0
+    assert "TAMANHO_FATIA_INGESTAO_BYTES deve ser um múltiplo positivo" in resultado.stderr
+
+
+def test_tamanho_de_fatia_valido():
+    resultado = _importar_configuracao(str(8 * GRANULARIDADE_UPLOAD))
+    assert resultado.returncode == 0, resultado.stderr